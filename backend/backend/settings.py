@@ -103,6 +103,21 @@ DATABASES = {
     }
 }
 
+# several processes write to one db.sqlite3 in docker (backend, progress-listener, scheduler):
+# 'concurrent' = WAL journal (readers do not block the writer), writers wait up to SQLITE_BUSY_TIMEOUT
+# seconds for the lock, transactions take the write lock when they begin (IMMEDIATE, no failed
+# read -> write upgrades) and connections are reused for DB_CONN_MAX_AGE seconds; 'default' = Django defaults
+SQLITE_PROFILE = os.getenv('SQLITE_PROFILE', 'concurrent')
+SQLITE_BUSY_TIMEOUT = float(os.getenv('SQLITE_BUSY_TIMEOUT', '30'))
+if SQLITE_PROFILE == 'concurrent':
+    DATABASES['default']['OPTIONS'] = {
+        'timeout': SQLITE_BUSY_TIMEOUT,
+        'transaction_mode': 'IMMEDIATE',
+        'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL',
+    }
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv('DB_CONN_MAX_AGE', '600'))
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+
 AUTH_USER_MODEL = "identity.User"
 
 
@@ -182,6 +197,31 @@ ASGI_APPLICATION = 'backend.asgi.application'
 REDIS_HOST = os.getenv('REDIS_HOST', '127.0.0.1')
 REDIS_PORT = int(os.getenv('REDIS_PORT', '6379'))
 REDIS_DB = int(os.getenv('REDIS_DB', '0'))
+# shared connection pool used by optimizer.services.get_redis_client
+REDIS_MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', '50'))
+REDIS_HEALTH_CHECK_INTERVAL = int(os.getenv('REDIS_HEALTH_CHECK_INTERVAL', '30'))
+# jobs kept in optimizer:jobs for the workers to BRPOP, the rest waits in the fair-share queue (optimizer.job_queue)
+OPTIMIZER_QUEUE_DISPATCH_DEPTH = int(os.getenv('OPTIMIZER_QUEUE_DISPATCH_DEPTH', '1'))
+# problem_data handed to the optimizer via optimizer:payload:* keys: 'zlib' or 'json' (uncompressed), kept for TTL seconds
+OPTIMIZER_PAYLOAD_ENCODING = os.getenv('OPTIMIZER_PAYLOAD_ENCODING', 'zlib')
+OPTIMIZER_PAYLOAD_TTL = int(os.getenv('OPTIMIZER_PAYLOAD_TTL', str(2 * 24 * 3600)))
+# seed each optimization round with the previous round's best genotype (optimizer.warm_start)
+OPTIMIZER_WARM_START = os.getenv('OPTIMIZER_WARM_START', 'true').lower() == 'true'
+# island model (optimizer.islands): sub-runs per job with distinct seeds, algorithms assigned round robin,
+# best genotypes migrate between running islands every N seconds
+OPTIMIZER_ISLANDS = int(os.getenv('OPTIMIZER_ISLANDS', '1'))
+OPTIMIZER_ISLAND_ALGORITHMS = [a.strip() for a in os.getenv('OPTIMIZER_ISLAND_ALGORITHMS', 'zawodev').split(',') if a.strip()]
+OPTIMIZER_ISLAND_MIGRATION_INTERVAL = int(os.getenv('OPTIMIZER_ISLAND_MIGRATION_INTERVAL', '30'))
+# check problem_data before queueing (optimizer.feasibility), infeasible problems fail at once instead of hanging in the queue
+OPTIMIZER_FEASIBILITY_CHECK = os.getenv('OPTIMIZER_FEASIBILITY_CHECK', 'true').lower() == 'true'
+
+# OptimizationProgress storage: 'delta' keeps a full keyframe every N rows and genotype/solution diffs in between, 'full' stores every row whole
+OPTIMIZER_PROGRESS_STORAGE = os.getenv('OPTIMIZER_PROGRESS_STORAGE', 'delta')
+OPTIMIZER_PROGRESS_KEYFRAME_INTERVAL = int(os.getenv('OPTIMIZER_PROGRESS_KEYFRAME_INTERVAL', '50'))
+
+# WebSocket progress frames: at most N per second per job (latest wins, 0 = unlimited); 'slim' frames carry fitness only, 'full' the whole best_solution
+OPTIMIZER_WS_MAX_FRAMES_PER_SECOND = float(os.getenv('OPTIMIZER_WS_MAX_FRAMES_PER_SECOND', '2'))
+OPTIMIZER_WS_FRAME = os.getenv('OPTIMIZER_WS_FRAME', 'slim')
 
 CHANNEL_LAYERS = {
     'default': {
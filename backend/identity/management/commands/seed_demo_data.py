@@ -1,8 +1,12 @@
+import math
 import random
-from django.core.management.base import BaseCommand
+import time
+from datetime import datetime, timedelta, time as dt_time
+from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
 from django.utils import timezone
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
 
 from identity.models import Organization, Group, UserGroup, UserRecruitment, UserSubjects
 from scheduling.models import (
@@ -11,6 +15,55 @@ from scheduling.models import (
 from preferences.models import UserPreferences, Constraints, HeatmapCache
 from optimizer.models import OptimizationJob, OptimizationProgress
 
+# --scale: wiersze na jeden INSERT
+SCALE_BATCH_SIZE = 2000
+SCALE_TIMESLOTS_DAILY = 32  # 8:00-16:00 w blokach 15 min
+SCALE_DAYS_IN_CYCLE = 7
+# tagi sal i jak często sala je ma; przedmioty wymagają ich z tym samym rozkładem
+SCALE_ROOM_TAGS = [
+    ('projector', 0.75), ('whiteboard', 0.6), ('accessible', 0.35), ('audio', 0.25),
+    ('computers', 0.2), ('lab', 0.12), ('chemistry-lab', 0.05), ('studio', 0.05),
+]
+SCALE_SUBJECTS = [
+    'Mathematics', 'Physics', 'Chemistry', 'Biology', 'History', 'Literature', 'Computer Science', 'Philosophy',
+    'Economics', 'Statistics', 'Sociology', 'Psychology', 'Geography', 'Law', 'Linguistics', 'Art History',
+]
+SCALE_FIRST_NAMES = ['Anna', 'Jan', 'Maria', 'Piotr', 'Katarzyna', 'Tomasz', 'Zofia', 'Michał', 'Julia', 'Kacper']
+SCALE_LAST_NAMES = ['Nowak', 'Kowalski', 'Wiśniewski', 'Wójcik', 'Kamiński', 'Lewandowski', 'Zieliński', 'Szymański']
+
+
+def scale_preferences(rng, group_weights=None):
+    """Random preferences in the DEFAULT_USER_PREFERENCES format around a preferred part of the day"""
+    from preferences.views import DEFAULT_USER_PREFERENCES
+
+    peak = rng.choice([4, 12, 20])  # rano / południe / popołudnie
+    free_day = rng.randrange(5) if rng.random() < 0.3 else None
+    timeslots = []
+    for day in range(SCALE_DAYS_IN_CYCLE):
+        if day >= 5 or day == free_day:
+            timeslots += [-3 if day >= 5 else -2] * SCALE_TIMESLOTS_DAILY
+            continue
+        noise = rng.randint(-1, 1)
+        timeslots += [max(-3, min(5, 4 - abs(slot - peak) // 4 + noise)) for slot in range(SCALE_TIMESLOTS_DAILY)]
+
+    data = dict(DEFAULT_USER_PREFERENCES)
+    data.update({
+        'FreeDays': rng.randint(0, 5),
+        'ShortDays': rng.randint(0, 3),
+        'UniformDays': rng.randint(0, 3),
+        'ConcentratedDays': rng.randint(0, 3),
+        'MinGapsLength': [rng.randint(0, 2), rng.randint(0, 2)],
+        'MaxGapsLength': [rng.randint(2, 8), rng.randint(0, 4)],
+        'MinDayLength': [rng.randint(0, 8), rng.randint(0, 2)],
+        'MaxDayLength': [rng.randint(16, 32), rng.randint(0, 4)],
+        'PreferredDayStartTimeslot': [max(0, peak - 4), rng.randint(0, 3)],
+        'PreferredDayEndTimeslot': [min(SCALE_TIMESLOTS_DAILY, peak + 12), rng.randint(0, 3)],
+        'PreferredTimeslots': timeslots,
+    })
+    if group_weights is not None:
+        data['PreferredGroups'] = group_weights
+    return data
+
 
 class Command(BaseCommand):
     help = "Seed the database with demo data across identity, scheduling, preferences, and optimizer apps."
@@ -18,9 +71,15 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument('--force', action='store_true', help='Proceed even if some demo objects already exist (idempotent).')
         parser.add_argument('--seed', type=int, default=42, help='Random seed for reproducibility.')
+        parser.add_argument('--scale', type=int, default=0,
+                            help='Load-test mode: generate this many participants (split across --organizations) with bulk inserts.')
+        parser.add_argument('--organizations', type=int, default=2, help='Number of organizations in --scale mode.')
 
     @transaction.atomic
     def handle(self, *args, **options):
+        if options['scale']:
+            return self.handle_scale(options['scale'], options['organizations'], options['seed'])
+
         random.seed(options['seed'])
         User = get_user_model()
 
@@ -560,7 +619,7 @@ class Command(BaseCommand):
             OptimizationProgress.objects.get_or_create(
                 job=job,
                 iteration=0,
-                defaults={'best_solution': {'fitness': 0.0, 'details': 'initial'}}
+                defaults={'best_solution': {'fitness': 0.0, 'details': 'initial'}, 'fitness': 0.0, 'keyframe_iteration': 0}
             )
 
         # 16) UserSubjects: przypisz 2 losowe przedmioty z aktywnej rekrutacji organizacji
@@ -585,3 +644,225 @@ class Command(BaseCommand):
         # assign_subject_tags(subjects_beta_active, org_tags[org_beta])
 
         self.stdout.write(self.style.SUCCESS('Demo data seeding complete (updated models + preferences + tags per recruitment).'))
+
+    # --- --scale: dane do testów obciążeniowych, wyłącznie bulk_create ---
+
+    def handle_scale(self, participants, organizations, seed):
+        """
+        Organizations with thousands of users, class groups, tagged rooms and two recruitments each:
+        an active term with meetings (the unavailability of the next one) and a draft term collecting
+        preferences. Constraints are compiled with prepare_optimization_constraints.
+        """
+        from scheduling.services import prepare_optimization_constraints
+        from scheduling.timetable import rebuild_timetable
+
+        rng = random.Random(seed)
+        started = time.perf_counter()
+        organizations = max(1, organizations)
+        names = [f'Scale Org {seed}-{i + 1}' for i in range(organizations)]
+        if Organization.objects.filter(organization_name__in=names).exists():
+            raise CommandError(f'Scale data for --seed {seed} already exists; use another --seed.')
+
+        self.stdout.write(self.style.NOTICE(
+            f'Seeding {participants} participants in {organizations} organizations (seed {seed})...'
+        ))
+        # hashowanie hasła raz dla wszystkich użytkowników (PBKDF2 per użytkownik trwałoby minuty)
+        password = make_password('Password123!')
+        orgs = Organization.objects.bulk_create([Organization(organization_name=name) for name in names])
+
+        counts = {}
+        recruitments = []
+        for index, org in enumerate(orgs):
+            size = participants // organizations + (1 if index < participants % organizations else 0)
+            recruitments += self.seed_scale_organization(rng, org, f'scale{seed}_o{index + 1}', size, password, counts)
+
+        for recruitment in recruitments:
+            prepare_optimization_constraints(recruitment)
+            if recruitment.plan_status == 'active':
+                rebuild_timetable(recruitment.recruitment_id)
+
+        summary = ', '.join(f'{count} {name}' for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(
+            f'Scale data seeded in {time.perf_counter() - started:.1f}s: {summary}. Password: Password123!'
+        ))
+
+    def seed_scale_organization(self, rng, org, prefix, num_participants, password, counts):
+        User = get_user_model()
+        num_hosts = max(3, num_participants // 25)
+        num_classes = max(1, num_participants // 25)
+        num_rooms = max(2, num_participants // 20)
+
+        def bulk(model, objects):
+            model.objects.bulk_create(objects, batch_size=SCALE_BATCH_SIZE)
+            counts[model.__name__] = counts.get(model.__name__, 0) + len(objects)
+            return objects
+
+        def user(username, role):
+            first, last = rng.choice(SCALE_FIRST_NAMES), rng.choice(SCALE_LAST_NAMES)
+            return User(
+                username=username, first_name=first, last_name=last, email=f'{username}@example.com',
+                role=role, organization=org, password=password,
+                weight=rng.randint(1, 10) if role in ['host', 'participant'] else 5,
+            )
+
+        office = user(f'{prefix}_office', 'office')
+        hosts = [user(f'{prefix}_host{i + 1}', 'host') for i in range(num_hosts)]
+        students = [user(f'{prefix}_part{i + 1}', 'participant') for i in range(num_participants)]
+        bulk(User, [office] + hosts + students)
+
+        # klasy (grupy identity) po ~25 osób
+        classes = bulk(Group, [
+            Group(group_name=f'Class {i + 1:03d}', category=f'year{1 + i % 4}', organization=org)
+            for i in range(num_classes)
+        ])
+        bulk(UserGroup, [
+            UserGroup(user=student, group=classes[i * num_classes // max(1, num_participants)])
+            for i, student in enumerate(students)
+        ])
+
+        tags = bulk(Tag, [Tag(tag_name=f'{name}-{prefix}', organization=org) for name, _ in SCALE_ROOM_TAGS])
+        tag_weights = [probability for _, probability in SCALE_ROOM_TAGS]
+        rooms = []
+        for i in range(num_rooms):
+            kind = rng.random()
+            capacity = rng.randint(15, 40) if kind < 0.8 else rng.randint(40, 80) if kind < 0.95 else rng.randint(80, 200)
+            building = chr(ord('A') + i % 5)
+            rooms.append(Room(organization=org, building_name=f'Building {building}',
+                              room_number=f'{building}{100 + i}', capacity=capacity))
+        bulk(Room, rooms)
+        bulk(RoomTag, [
+            RoomTag(room=room, tag=tag)
+            for room in rooms for tag, probability in zip(tags, tag_weights) if rng.random() < probability
+        ])
+
+        now = timezone.now()
+        current = Recruitment(
+            recruitment_name=f'{org.organization_name} Current Term', organization=org,
+            day_start_time=dt_time(8, 0), day_end_time=dt_time(16, 0), cycle_type='weekly', plan_status='active',
+            plan_start_date=now - timedelta(days=30), expiration_date=now + timedelta(days=120),
+            max_round_execution_time=300,
+        )
+        upcoming = Recruitment(
+            recruitment_name=f'{org.organization_name} Upcoming Term', organization=org,
+            day_start_time=dt_time(8, 0), day_end_time=dt_time(16, 0), cycle_type='weekly', plan_status='draft',
+            user_prefs_start_date=now - timedelta(days=7), user_prefs_end_date=now + timedelta(days=7),
+            optimization_start_date=now + timedelta(days=7), optimization_end_date=now + timedelta(days=10),
+            plan_start_date=now + timedelta(days=14), expiration_date=now + timedelta(days=150),
+            max_round_execution_time=300,
+        )
+        bulk(Recruitment, [current, upcoming])
+        bulk(RoomRecruitment, [RoomRecruitment(room=room, recruitment=rec) for rec in (current, upcoming) for room in rooms])
+        bulk(UserRecruitment, [
+            UserRecruitment(user=u, recruitment=rec) for rec in (current, upcoming) for u in hosts + students
+        ])
+
+        host_cycle = hosts[:]
+        rng.shuffle(host_cycle)
+        terms = {}
+        for rec in (current, upcoming):
+            terms[rec] = self.seed_scale_subjects(rng, rec, students, host_cycle, tags, tag_weights, bulk)
+
+        # bieżący semestr ma plan – jego spotkania to niedostępność sal, prowadzących i studentów w następnym
+        occupied = set()
+        meeting_groups, memberships, meetings = [], [], []
+        for subject, groups, enrolled in terms[current]:
+            rng.shuffle(enrolled)
+            for n, subject_group in enumerate(groups):
+                members = enrolled[n::len(groups)]
+                day = rng.randrange(5)
+                slot = rng.randrange(SCALE_TIMESLOTS_DAILY - subject.duration_blocks + 1)
+                fitting = [room for room in rooms if room.capacity >= len(members)] or rooms
+                room = rng.choice(fitting)
+                for _ in range(10):
+                    if (room.room_id, day, slot) not in occupied:
+                        break
+                    room = rng.choice(fitting)
+                occupied.add((room.room_id, day, slot))
+
+                group = Group(group_name=f'{subject.subject_name} / {n + 1}', category='meeting', organization=org)
+                meeting_groups.append(group)
+                memberships += [UserGroup(user=student, group=group) for student in members]
+                start = datetime.combine(now.date(), dt_time(8, 0)) + timedelta(minutes=15 * slot)
+                meetings.append(Meeting(
+                    recruitment=current, subject_group=subject_group, group=group, room=room,
+                    start_timeslot=day * SCALE_TIMESLOTS_DAILY + slot, duration=subject.duration_blocks,
+                    start_time=start.time(), end_time=(start + timedelta(minutes=15 * subject.duration_blocks)).time(),
+                    day_of_week=day, day_of_cycle=day,
+                ))
+        bulk(Group, meeting_groups)
+        bulk(UserGroup, memberships)
+        bulk(Meeting, meetings)
+
+        # preferencje do nadchodzącego semestru: wszyscy prowadzący i ~85% studentów
+        group_index, subjects_of = {}, {}
+        for subject, groups, enrolled in terms[upcoming]:
+            indices = [len(group_index) + n for n in range(len(groups))]
+            group_index.update(zip((sg.subject_group_id for sg in groups), indices))
+            for student in enrolled:
+                subjects_of.setdefault(student.id, []).extend(indices)
+
+        preferences = [
+            UserPreferences(user=host, recruitment=upcoming, preferences_data=scale_preferences(rng))
+            for host in hosts
+        ]
+        for student in students:
+            if rng.random() >= 0.85:
+                continue
+            weights = [0] * len(group_index)
+            for idx in subjects_of.get(student.id, ()):
+                weights[idx] = rng.randint(0, 5)
+            preferences.append(UserPreferences(
+                user=student, recruitment=upcoming, preferences_data=scale_preferences(rng, weights)
+            ))
+        bulk(UserPreferences, preferences)
+        Recruitment.objects.filter(pk=upcoming.pk).update(users_submitted_count=len(preferences))
+
+        bulk(Constraints, [Constraints(recruitment=rec, constraints_data={}) for rec in (current, upcoming)])
+        return [current, upcoming]
+
+    def seed_scale_subjects(self, rng, recruitment, students, host_cycle, tags, tag_weights, bulk):
+        """Subjects with popularity skew, tag requirements and enough groups for their enrolled students"""
+        num_subjects = max(4, len(students) // 40)
+        subjects = [
+            Subject(
+                subject_name=f'{SCALE_SUBJECTS[i % len(SCALE_SUBJECTS)]} {101 + i // len(SCALE_SUBJECTS)}',
+                recruitment=recruitment, duration_blocks=rng.choice([2, 4, 4, 4, 6, 8]),
+                capacity=rng.choice([15, 20, 25, 30, 30, 35]), min_students=rng.choice([1, 3, 5]),
+            )
+            for i in range(num_subjects)
+        ]
+        bulk(Subject, subjects)
+
+        subject_tags = []
+        for subject in subjects:
+            required = rng.random()
+            count = 2 if required < 0.15 else 1 if required < 0.6 else 0
+            for tag in {rng.choices(tags, weights=tag_weights)[0] for _ in range(count)}:
+                subject_tags.append(SubjectTag(subject=subject, tag=tag))
+        bulk(SubjectTag, subject_tags)
+
+        # popularne przedmioty wybiera więcej osób (rozkład Zipfa)
+        popularity = [1 / (rank + 1) ** 0.7 for rank in range(num_subjects)]
+        rng.shuffle(popularity)
+        enrolled = [[] for _ in subjects]
+        enrollments = []
+        for student in students:
+            k = min(rng.randint(3, 6), num_subjects)
+            chosen = set()
+            while len(chosen) < k:
+                chosen.add(rng.choices(range(num_subjects), weights=popularity)[0])
+            for idx in chosen:
+                enrolled[idx].append(student)
+                enrollments.append(UserSubjects(user=student, subject=subjects[idx]))
+        bulk(UserSubjects, enrollments)
+
+        subject_groups, terms = [], []
+        for subject, members in zip(subjects, enrolled):
+            groups = [
+                SubjectGroup(subject=subject, host_user=host_cycle[(len(subject_groups) + n) % len(host_cycle)])
+                for n in range(max(1, math.ceil(len(members) / subject.capacity)))
+            ]
+            subject_groups += groups
+            terms.append((subject, groups, members))
+        bulk(SubjectGroup, subject_groups)
+        return terms
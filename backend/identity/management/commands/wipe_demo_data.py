@@ -5,7 +5,7 @@ from django.contrib.auth import get_user_model
 from identity.models import Organization, Group, UserGroup, UserRecruitment, UserSubjects
 from scheduling.models import Subject, Recruitment, SubjectGroup, Room, Tag, Meeting, RoomTag, RoomRecruitment, SubjectTag
 from preferences.models import UserPreferences, Constraints, HeatmapCache
-from optimizer.models import OptimizationJob, OptimizationProgress
+from optimizer.models import OptimizationJob, OptimizationProgress, ProblemPayload
 
 
 class Command(BaseCommand):
@@ -24,6 +24,7 @@ class Command(BaseCommand):
         # 1) Optimizer
         OptimizationProgress.objects.all().delete()
         OptimizationJob.objects.all().delete()
+        ProblemPayload.objects.all().delete()
 
         # 2) Preferences
         HeatmapCache.objects.all().delete()
@@ -9,12 +9,13 @@ from .serializers import (
     RegisterSerializer, UserSerializer, OrganizationSerializer, GroupSerializer, UserGroupSerializer,
     UserRecruitmentSerializer, OfficeCreateUserSerializer, PasswordChangeSerializer, UserSubjectsSerializer
 )
-from .services import get_active_meetings_for_user, get_recruitments_for_user, get_groups_for_user
+from .services import get_recruitments_for_user, get_groups_for_user
 from .permissions import IsAdminUser, IsOfficeUser
 import secrets
 from django.conf import settings
 import json
-from scheduling.serializers import MeetingDetailSerializer, RecruitmentSerializer
+from scheduling.serializers import RecruitmentSerializer
+from scheduling.timetable import get_timetable, with_etag
 from datetime import datetime
 
 User = get_user_model()
@@ -287,6 +288,9 @@ class ActiveMeetingsByUserView(APIView):
     - start_date YYYY-MM-DD
     - end_date YYYY-MM-DD
     Jeśli brak któregoś z parametrów -> 400.
+
+    Dane z zmaterializowanego planu (scheduling.timetable); odpowiedź ma ETag, przy zgodnym
+    If-None-Match -> 304.
     """
     permission_classes = [permissions.IsAuthenticated]
 
@@ -310,16 +314,18 @@ class ActiveMeetingsByUserView(APIView):
         if end_date < start_date:
             return Response({'detail': 'end_date earlier than start_date'}, status=status.HTTP_400_BAD_REQUEST)
 
-        qs = get_active_meetings_for_user(user, start_date=start_date, end_date=end_date)
-        serializer = MeetingDetailSerializer(qs, many=True)
-        return Response({
+        # materialized timetable (scheduling.timetable): one indexed lookup, rows already serialized
+        meetings, etag = get_timetable('user', user.id, start_date=start_date, end_date=end_date)
+        if request.headers.get('If-None-Match') == etag:
+            return with_etag(Response(status=status.HTTP_304_NOT_MODIFIED), etag)
+        return with_etag(Response({
             'user_id': str(user.id),
             'role': user.role,
             'start_date': start_date.isoformat(),
             'end_date': end_date.isoformat(),
-            'count': len(serializer.data),
-            'results': serializer.data
-        })
+            'count': len(meetings),
+            'results': meetings
+        }), etag)
 
 
 class UserRecruitmentAddView(APIView):
@@ -1,19 +1,20 @@
 from django.contrib import admin
-from .models import OptimizationJob, OptimizationProgress
+from .models import OptimizationJob, OptimizationProgress, ProblemPayload
 
 
 @admin.register(OptimizationJob)
 class OptimizationJobAdmin(admin.ModelAdmin):
-    list_display = [field.name for field in OptimizationJob._meta.fields if field.name != 'problem_data' and field.name != 'final_solution' and field.name != 'first_solution']
+    list_display = [field.name for field in OptimizationJob._meta.fields if field.name not in ('problem_payload', 'final_solution', 'first_solution', 'entity_index')]
     list_filter = ['status', 'created_at']
     search_fields = ['id', 'recruitment__recruitment_name']
     readonly_fields = [
-        'id', 'created_at', 'updated_at', 'started_at', 'completed_at'
+        'id', 'created_at', 'updated_at', 'started_at', 'completed_at', 'problem_payload', 'problem_data',
+        'entity_index', 'warm_start_job'
     ]
     
     fieldsets = (
         ('Basic Information', {
-            'fields': ('id', 'recruitment', 'status', 'max_execution_time')
+            'fields': ('id', 'recruitment', 'status', 'max_execution_time', 'parent', 'seed', 'algorithm')
         }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at', 'started_at', 'completed_at')
@@ -26,7 +27,7 @@ class OptimizationJobAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
         ('Problem Data', {
-            'fields': ('problem_data',),
+            'fields': ('problem_payload', 'problem_data', 'entity_index', 'warm_start_job'),
             'classes': ('collapse',)
         }),
     )
@@ -35,19 +36,30 @@ class OptimizationJobAdmin(admin.ModelAdmin):
         return super().get_queryset(request).select_related('recruitment')
 
 
+@admin.register(ProblemPayload)
+class ProblemPayloadAdmin(admin.ModelAdmin):
+    list_display = ['content_hash', 'size_bytes', 'ref_count', 'created_at']
+    search_fields = ['content_hash']
+    readonly_fields = ['content_hash', 'size_bytes', 'ref_count', 'created_at', 'data']
+
+    def get_queryset(self, request):
+        # payloads can be several MB, keep them out of the changelist query
+        return super().get_queryset(request).defer('data')
+
+
 @admin.register(OptimizationProgress)
 class OptimizationProgressAdmin(admin.ModelAdmin):
-    list_display = [field.name for field in OptimizationProgress._meta.fields if field.name != 'best_solution']
+    list_display = [field.name for field in OptimizationProgress._meta.fields if field.name not in ('best_solution', 'delta')]
     list_filter = ['timestamp', 'job__status']
     search_fields = ['job__id']
     readonly_fields = ['timestamp']
     
     fieldsets = (
         ('Basic Information', {
-            'fields': ('job', 'iteration', 'timestamp')
+            'fields': ('job', 'iteration', 'timestamp', 'fitness')
         }),
         ('Solution Data', {
-            'fields': ('best_solution',),
+            'fields': ('best_solution', 'delta', 'keyframe_iteration', 'chain_length'),
             'classes': ('collapse',)
         }),
     )
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class OptimizerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'optimizer'
+
+    def ready(self):
+        # register problem payload reference counting signals
+        from . import signals  # noqa: F401
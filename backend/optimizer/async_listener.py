@@ -0,0 +1,334 @@
+import asyncio
+import json
+from typing import Dict, Any, List, Optional, Tuple
+
+import redis.asyncio as aioredis
+from asgiref.sync import sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.utils import timezone
+
+from .models import OptimizationJob, OptimizationProgress
+from .services import finish_optimization_round
+from .progress_storage import build_progress_rows
+from .db_writes import write_serialized
+from .progress_frames import ProgressFrameThrottle, PROGRESS_MESSAGE, COMPLETED_MESSAGE
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+PROGRESS_CHANNEL = "optimizer:progress:updates"
+
+# how long notifications are collected before one batch is written (seconds)
+DEFAULT_FLUSH_INTERVAL = 0.25
+# websocket sends in flight at once
+DEFAULT_MAX_PENDING_SENDS = 1000
+
+
+class PendingJobUpdate:
+    """Notifications for one job collected within a flush window"""
+    __slots__ = ('latest_iteration', 'first', 'completed')
+
+    def __init__(self):
+        self.latest_iteration: Optional[int] = None
+        self.first = False
+        self.completed = False
+
+    def add(self, iteration: int):
+        if iteration == -1:
+            self.completed = True
+            return
+        if iteration == 0:
+            self.first = True
+        if self.latest_iteration is None or iteration > self.latest_iteration:
+            self.latest_iteration = iteration
+
+
+class AsyncProgressListener:
+    """
+    asyncio variant of ProgressListener built on redis.asyncio.
+
+    Notifications are coalesced per job within flush_interval: the optimizer keeps only the latest
+    best solution under optimizer:progress:{job_id}, so one pipelined GET per job and window returns
+    everything the intermediate notifications could have. Each window is written to the database in
+    a single transaction on a worker thread while the next window is being collected, and websocket
+    updates are sent as background tasks so a slow channel layer does not stall the listener.
+    Iteration 0 (first solution) and -1 (completion) are never dropped by coalescing.
+    """
+
+    def __init__(self, flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 max_pending_sends: int = DEFAULT_MAX_PENDING_SENDS):
+        self.flush_interval = flush_interval
+        self.redis_client = None
+        self.pubsub = None
+        self.channel_layer = get_channel_layer()
+        self.frame_throttle = ProgressFrameThrottle()
+        self.running = False
+        self.pending: Dict[str, PendingJobUpdate] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._send_tasks = set()
+        self._send_slots = asyncio.Semaphore(max_pending_sends)
+
+    async def connect(self):
+        """Establish connection to Redis and subscribe to progress notifications"""
+        self.redis_client = aioredis.Redis(
+            host=getattr(settings, 'REDIS_HOST', 'localhost'),
+            port=getattr(settings, 'REDIS_PORT', 6379),
+            db=getattr(settings, 'REDIS_DB', 0),
+            decode_responses=True,
+            socket_connect_timeout=5
+        )
+        await self.redis_client.ping()
+        self.pubsub = self.redis_client.pubsub()
+        await self.pubsub.subscribe(PROGRESS_CHANNEL)
+        logger.info("Started async listening for Redis progress updates")
+        print("[REDIS] Started async listening for progress updates")
+
+    async def run(self):
+        """Main loop: collect notifications for flush_interval, then hand the batch to a flush task"""
+        if self.redis_client is None:
+            await self.connect()
+        self.running = True
+        loop = asyncio.get_running_loop()
+        try:
+            while self.running:
+                deadline = loop.time() + self.flush_interval
+                while self.running:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=remaining)
+                    except Exception as e:
+                        logger.error(f"Error receiving message: {e}")
+                        await asyncio.sleep(0.1)
+                        continue
+                    if message is not None and message['type'] == 'message':
+                        self.collect(message['data'])
+                await self.schedule_flush()
+                for frame in self.frame_throttle.due():
+                    await self.send_websocket_update(*frame)
+        finally:
+            await self.close()
+
+    def stop(self):
+        self.running = False
+
+    async def close(self):
+        """Flush what was collected, wait for in-flight sends and disconnect"""
+        await self.schedule_flush()
+        if self._flush_task:
+            await self._flush_task
+        if self._send_tasks:
+            await asyncio.gather(*self._send_tasks, return_exceptions=True)
+        if self.pubsub:
+            await self.pubsub.unsubscribe(PROGRESS_CHANNEL)
+            await self.pubsub.aclose()
+        if self.redis_client:
+            await self.redis_client.aclose()
+        logger.info("Async progress listener stopped")
+
+    def collect(self, raw: str):
+        """Register a notification in the current window"""
+        try:
+            data = json.loads(raw)
+        except json.JSONDecodeError as e:
+            logger.error(f"Failed to parse progress message: {e}")
+            return
+        job_id = data.get('job_id')
+        iteration = data.get('iteration')
+        if not job_id or iteration is None:
+            logger.warning(f"Invalid progress update data: {data}")
+            return
+        self.pending.setdefault(job_id, PendingJobUpdate()).add(iteration)
+
+    async def schedule_flush(self):
+        """Start flushing the current window; waits for the previous flush so writes stay ordered"""
+        if self._flush_task:
+            await self._flush_task
+            self._flush_task = None
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, {}
+        self._flush_task = asyncio.create_task(self.flush(batch))
+
+    async def flush(self, batch: Dict[str, PendingJobUpdate]):
+        try:
+            solutions = await self.fetch_progress(list(batch))
+            updates = [
+                (job_id, pending, solutions[job_id])
+                for job_id, pending in batch.items() if solutions.get(job_id) is not None
+            ]
+            for job_id in batch:
+                if solutions.get(job_id) is None:
+                    logger.warning(f"No progress data found for job {job_id}")
+            if not updates:
+                return
+
+            messages, completed_jobs = await sync_to_async(write_progress_batch, thread_sensitive=True)(updates)
+            for message in messages:
+                for frame in self.frame_throttle.dispatch(*message):
+                    await self.send_websocket_update(*frame)
+
+            for job in completed_jobs:
+                # conversion / next round run one at a time, outside the batch transaction
+                try:
+                    await sync_to_async(finish_optimization_round, thread_sensitive=True)(job)
+                except Exception as e:
+                    logger.error(f"Failed to finish optimization round of job {job.id}: {e}")
+
+            print(f"[REDIS] Flushed {len(updates)} job progress updates")
+        except Exception as e:
+            logger.error(f"Error flushing progress updates: {e}")
+
+    async def fetch_progress(self, job_ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """GET optimizer:progress:{job_id} for all jobs in one round-trip"""
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            for job_id in job_ids:
+                pipe.get(f"optimizer:progress:{job_id}")
+            raw_values = await pipe.execute()
+
+        solutions = {}
+        for job_id, raw in zip(job_ids, raw_values):
+            if not raw:
+                solutions[job_id] = None
+                continue
+            try:
+                solutions[job_id] = json.loads(raw).get('best_solution', {})
+            except json.JSONDecodeError as e:
+                logger.error(f"Failed to parse progress data for job {job_id}: {e}")
+                solutions[job_id] = None
+        return solutions
+
+    async def send_websocket_update(self, job_id: str, message_type: str, data: Dict[str, Any]):
+        """Send update to WebSocket clients without waiting for delivery"""
+        await self._send_slots.acquire()
+        task = asyncio.create_task(self._send(job_id, message_type, data))
+        self._send_tasks.add(task)
+        task.add_done_callback(self._send_done)
+
+    def _send_done(self, task: asyncio.Task):
+        self._send_tasks.discard(task)
+        self._send_slots.release()
+
+    async def _send(self, job_id: str, message_type: str, data: Dict[str, Any]):
+        try:
+            await self.channel_layer.group_send(
+                f'job_progress_{job_id}',
+                {
+                    'type': message_type,
+                    'data': data
+                }
+            )
+        except Exception as e:
+            logger.error(f"Failed to send WebSocket update: {e}")
+
+
+def write_progress_batch(updates: List[Tuple[str, PendingJobUpdate, Dict[str, Any]]]):
+    """
+    Apply one window of coalesced progress updates in a single transaction.
+
+    Returns (websocket messages, completed jobs). Job rows are updated with one bulk_update and
+    progress rows inserted with one bulk_create, mirroring ProgressListener.handle_progress_update.
+    Safe to replay: iterations already stored are not inserted again and a completed job is
+    returned for completion handling again only while its round_finished_at is unset.
+    """
+    now = timezone.now()
+
+    def write():
+        jobs = {
+            str(pk): job
+            for pk, job in OptimizationJob.objects.select_related('recruitment').in_bulk([job_id for job_id, _, _ in updates]).items()
+        }
+
+        stored_iterations = set(
+            OptimizationProgress.objects.filter(
+                job_id__in=list(jobs),
+                iteration__in={pending.latest_iteration for _, pending, _ in updates if pending.latest_iteration is not None}
+            ).values_list('job_id', 'iteration')
+        )
+
+        changed_jobs = []
+        progress_items = []
+        completed_jobs = []
+        for job_id, pending, solution in updates:
+            job = jobs.get(job_id)
+            if job is None:
+                logger.warning(f"Job {job_id} not found for progress update")
+                continue
+
+            # last stored progress row, base for the delta of the new one
+            base_iteration, base_solution = job.current_iteration, job.final_solution
+            # reclaimed/replayed entries may be older than what was already written
+            if pending.completed or job.status == 'completed':
+                job.current_iteration = -1
+            elif pending.latest_iteration > job.current_iteration:
+                job.current_iteration = pending.latest_iteration
+            job.updated_at = now
+            job.final_solution = solution
+            if job.status == 'queued':
+                job.status = 'running'
+                job.started_at = now
+
+            if pending.first:
+                job.first_solution = solution
+                recruitment = job.recruitment
+                if recruitment.plan_status == 'queued':
+                    recruitment.plan_status = 'optimizing'
+                    recruitment.save()
+                    logger.info(f"Recruitment {recruitment.recruitment_id} status changed to optimizing")
+
+            if pending.latest_iteration is not None and (job.id, pending.latest_iteration) not in stored_iterations:
+                progress_items.append((job, pending.latest_iteration, solution, base_iteration, base_solution))
+
+            if pending.completed and job.status != 'completed':
+                job.status = 'completed'
+                job.completed_at = now
+                completed_jobs.append(job)
+            elif pending.completed and job.status == 'completed' and job.round_finished_at is None:
+                # replayed completion of a job whose round was never finished (crash before the ack)
+                completed_jobs.append(job)
+            changed_jobs.append(job)
+
+        OptimizationJob.objects.bulk_update(
+            changed_jobs,
+            ['current_iteration', 'updated_at', 'final_solution', 'status', 'started_at', 'first_solution', 'completed_at']
+        )
+        progress_rows = OptimizationProgress.objects.bulk_create(build_progress_rows(progress_items))
+        return changed_jobs, progress_items, completed_jobs, progress_rows
+
+    # one short transaction, retried while the scheduler or the web process holds the write lock
+    changed_jobs, progress_items, completed_jobs, progress_rows = write_serialized(write)
+    messages = []
+
+    if completed_jobs or any(pending.first for _, pending, _ in updates):
+        # a worker took a job or became idle, hand out the next queued one
+        from .job_queue import dispatch_queued_jobs
+        dispatch_queued_jobs()
+
+    for progress, (_, _, solution, _, _) in zip(progress_rows, progress_items):
+        job_id = str(progress.job_id)
+        messages.append((job_id, PROGRESS_MESSAGE, {
+            'job_id': job_id,
+            'iteration': progress.iteration,
+            'best_solution': solution,
+            'timestamp': progress.timestamp.isoformat()
+        }))
+    for job in completed_jobs:
+        messages.append((str(job.id), COMPLETED_MESSAGE, {
+            'job_id': str(job.id),
+            'status': 'completed',
+            'final_solution': job.final_solution,
+            'timestamp': now.isoformat()
+        }))
+
+    island_jobs = [job for job in changed_jobs if job.parent_id]
+    if island_jobs:
+        # islands are merged into their parent, which completes the round instead of them
+        from .islands import merge_island_progress
+        island_messages, completed_parents = merge_island_progress(island_jobs)
+        messages.extend(island_messages)
+        completed_jobs = [job for job in completed_jobs if not job.parent_id] + completed_parents
+
+    logger.info(f"Updated progress for {len(changed_jobs)} jobs ({len(progress_rows)} progress rows)")
+    return messages, completed_jobs
@@ -0,0 +1,601 @@
+import random
+import time
+from datetime import time as dt_time
+from typing import Dict, Any, List
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .models import OptimizationJob
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+# rows per INSERT when building synthetic data
+SYNTHETIC_BATCH_SIZE = 1000
+
+
+class BenchmarkRollback(Exception):
+    """Raised to roll back synthetic benchmark data at the end of a run"""
+
+
+def build_synthetic_recruitment(num_students: int, num_groups: int, seed: int = 0,
+                                subjects_per_student: int = 3, groups_per_subject: int = 4,
+                                num_rooms: int = None, timeslots_daily: int = 32,
+                                days_in_cycle: int = 7) -> Dict[str, Any]:
+    """
+    Create a synthetic recruitment with users, subjects, subject groups and rooms using bulk inserts.
+
+    Returns a dict with the created recruitment, organization and ordered model lists. Intended to be
+    called inside a transaction that is rolled back afterwards (see run_in_rollback).
+    """
+    from identity.models import Organization, User, UserRecruitment, UserSubjects
+    from scheduling.models import Recruitment, Subject, SubjectGroup, Room, RoomRecruitment
+    from preferences.models import Constraints
+
+    rng = random.Random(seed)
+    num_subjects = max(1, num_groups // groups_per_subject)
+    num_hosts = max(1, num_groups // 5)
+    num_rooms = num_rooms or max(1, num_groups // 4)
+
+    organization = Organization.objects.create(organization_name=f'Benchmark Org {seed}')
+    recruitment = Recruitment.objects.create(
+        recruitment_name=f'Benchmark Recruitment {num_students}x{num_groups}',
+        organization=organization,
+        day_start_time=dt_time(8, 0),
+        day_end_time=dt_time(8 + timeslots_daily // 4, 0),
+        plan_status='optimizing',
+    )
+    Constraints.objects.create(recruitment=recruitment, constraints_data={})
+
+    tag = f'bench{seed}_{num_students}_{num_groups}'
+    hosts = [
+        User(username=f'{tag}_host{i}', role='host', organization=organization, weight=rng.randint(1, 10))
+        for i in range(num_hosts)
+    ]
+    students = [
+        User(username=f'{tag}_part{i}', role='participant', organization=organization, weight=rng.randint(1, 10))
+        for i in range(num_students)
+    ]
+    User.objects.bulk_create(hosts + students, batch_size=SYNTHETIC_BATCH_SIZE)
+    UserRecruitment.objects.bulk_create(
+        [UserRecruitment(user=u, recruitment=recruitment) for u in hosts + students],
+        batch_size=SYNTHETIC_BATCH_SIZE
+    )
+
+    subjects = [
+        Subject(subject_name=f'Subject {i:05d}', recruitment=recruitment, duration_blocks=rng.choice([2, 4, 6]),
+                capacity=max(1, (num_students * subjects_per_student) // num_groups + 5), min_students=1)
+        for i in range(num_subjects)
+    ]
+    Subject.objects.bulk_create(subjects, batch_size=SYNTHETIC_BATCH_SIZE)
+
+    subject_groups = [
+        SubjectGroup(subject=subjects[i % num_subjects], host_user=hosts[i % num_hosts])
+        for i in range(num_groups)
+    ]
+    SubjectGroup.objects.bulk_create(subject_groups, batch_size=SYNTHETIC_BATCH_SIZE)
+
+    rooms = [
+        Room(organization=organization, building_name='Benchmark', room_number=f'R{i}', capacity=rng.randint(10, 60))
+        for i in range(num_rooms)
+    ]
+    Room.objects.bulk_create(rooms, batch_size=SYNTHETIC_BATCH_SIZE)
+    RoomRecruitment.objects.bulk_create(
+        [RoomRecruitment(room=r, recruitment=recruitment) for r in rooms], batch_size=SYNTHETIC_BATCH_SIZE
+    )
+
+    k = min(subjects_per_student, num_subjects)
+    student_subjects = [rng.sample(range(num_subjects), k) for _ in students]
+    UserSubjects.objects.bulk_create(
+        [UserSubjects(user=stu, subject=subjects[s]) for stu, subs in zip(students, student_subjects) for s in subs],
+        batch_size=SYNTHETIC_BATCH_SIZE
+    )
+
+    return {
+        'rng': rng,
+        'organization': organization,
+        'recruitment': recruitment,
+        'hosts': hosts,
+        'students': students,
+        'subjects': subjects,
+        'subject_groups': subject_groups,
+        'rooms': rooms,
+        'student_subjects': student_subjects,
+        'timeslots_daily': timeslots_daily,
+        'days_in_cycle': days_in_cycle,
+    }
+
+
+def build_synthetic_solution(dataset: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build a final_solution dict (by_group / by_student) for a synthetic recruitment.
+
+    Groups are indexed in the same order convert_solution_to_meetings uses
+    (subject name), students in user id order.
+    """
+    from scheduling.models import Room, SubjectGroup
+
+    rng = dataset['rng']
+    recruitment = dataset['recruitment']
+    timeslots_daily = dataset['timeslots_daily']
+    days_in_cycle = dataset['days_in_cycle']
+    total_timeslots = timeslots_daily * days_in_cycle
+    num_all_rooms = Room.objects.count()
+
+    ordered_groups = list(
+        SubjectGroup.objects.filter(subject__recruitment=recruitment)
+        .select_related('subject').order_by('subject__subject_name')
+    )
+    groups_by_subject = {}
+    by_group = []
+    for idx, sg in enumerate(ordered_groups):
+        groups_by_subject.setdefault(sg.subject_id, []).append(idx)
+        duration = sg.subject.duration_blocks
+        day = rng.randrange(days_in_cycle)
+        start = day * timeslots_daily + rng.randrange(max(1, timeslots_daily - duration))
+        by_group.append([start, min(start + duration, total_timeslots), rng.randrange(num_all_rooms)])
+
+    subjects = dataset['subjects']
+    students_by_id = sorted(zip(dataset['students'], dataset['student_subjects']), key=lambda pair: str(pair[0].id))
+    by_student = [
+        [rng.choice(groups_by_subject[subjects[s].subject_id]) for s in subs]
+        for _, subs in students_by_id
+    ]
+
+    return {
+        'genotype': [],
+        'fitness': 0.0,
+        'by_group': by_group,
+        'by_student': by_student,
+        'timeslots_daily': timeslots_daily,
+        'days_in_cycle': days_in_cycle,
+    }
+
+
+def run_in_rollback(func, *args, **kwargs):
+    """Run func inside a transaction that is always rolled back; returns func's result"""
+    result = None
+    try:
+        with transaction.atomic():
+            result = func(*args, **kwargs)
+            raise BenchmarkRollback()
+    except BenchmarkRollback:
+        pass
+    return result
+
+
+def measure(func, *args, **kwargs) -> Dict[str, Any]:
+    """Call func and return its wall time (seconds) and executed query count"""
+    with CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        func(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+    return {'seconds': elapsed, 'queries': len(queries)}
+
+
+def benchmark_materialization(num_students: int, num_groups: int, seed: int = 0) -> Dict[str, Any]:
+    """
+    Time convert_solution_to_meetings on a synthetic recruitment of the given size.
+
+    All rows (including the created meetings) are rolled back afterwards.
+    """
+    from .services import convert_solution_to_meetings
+
+    def run():
+        dataset = build_synthetic_recruitment(num_students, num_groups, seed=seed)
+        job = OptimizationJob.objects.create(
+            recruitment=dataset['recruitment'],
+            status='completed',
+            max_execution_time=60,
+            problem_data={},
+            final_solution=build_synthetic_solution(dataset),
+        )
+        stats = measure(convert_solution_to_meetings, str(job.id))
+        stats.update({'students': num_students, 'groups': num_groups})
+        return stats
+
+    return run_in_rollback(run)
+
+
+# --- SQLite contention (docker-compose roles writing to one db.sqlite3) ---
+
+CONTENTION_ROLES = ('web', 'listener', 'scheduler')
+
+
+def _latency_stats(role: str, latencies, errors: int) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+
+    def percentile(p):
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p))] * 1000 if ordered else None
+
+    return {
+        'role': role,
+        'ops': len(ordered),
+        'errors': errors,
+        'p50_ms': percentile(0.5),
+        'p95_ms': percentile(0.95),
+        'max_ms': ordered[-1] * 1000 if ordered else None,
+    }
+
+
+def setup_contention_dataset(num_students: int = 300, num_groups: int = 60, seed: int = 0) -> Dict[str, Any]:
+    """Committed synthetic recruitment with meetings, its completed job and a running job for the listener"""
+    from .services import convert_solution_to_meetings
+
+    dataset = build_synthetic_recruitment(num_students, num_groups, seed=seed)
+    completed = OptimizationJob.objects.create(
+        recruitment=dataset['recruitment'],
+        status='completed',
+        max_execution_time=60,
+        problem_data={},
+        final_solution=build_synthetic_solution(dataset),
+    )
+    convert_solution_to_meetings(str(completed.id))
+    running = OptimizationJob.objects.create(
+        recruitment=dataset['recruitment'],
+        status='running',
+        max_execution_time=60,
+        problem_data={},
+    )
+    return {
+        'recruitment_id': str(dataset['recruitment'].recruitment_id),
+        'completed_job_id': str(completed.id),
+        'running_job_id': str(running.id),
+    }
+
+
+def run_contention_role(role: str, dataset: Dict[str, Any], duration: float, seed: int = 0) -> Dict[str, Any]:
+    """
+    Play one process of the compose deployment against the configured database for duration seconds.
+
+    - web: meeting list and job status reads, timetable lookups, a login (last_login write) every 10th op
+    - listener: one progress update per iteration through the serialized write path
+    - scheduler: convert_solution_to_meetings (one long transaction replacing all meetings), then a pause
+    """
+    from django.db import OperationalError
+    from identity.models import User
+    from scheduling.models import Meeting
+    from scheduling.serializers import MeetingSerializer
+    from scheduling.timetable import get_timetable
+    from .db_writes import write_serialized
+    from .services import apply_progress_update, convert_solution_to_meetings
+
+    rng = random.Random(f'{seed}-{role}')
+    user_ids = list(User.objects.filter(user_recruitments__recruitment_id=dataset['recruitment_id'])
+                    .values_list('id', flat=True))
+    solution = OptimizationJob.objects.get(id=dataset['completed_job_id']).final_solution
+
+    def web_op(op):
+        meetings = Meeting.objects.filter(recruitment_id=dataset['recruitment_id']).select_related(
+            'subject_group__subject', 'subject_group__host_user'
+        )[:200]
+        MeetingSerializer(meetings, many=True).data
+        OptimizationJob.objects.filter(id=dataset['running_job_id']).values('status', 'current_iteration').first()
+        user_id = rng.choice(user_ids)
+        get_timetable('user', user_id)
+        if op % 10 == 0:
+            User.objects.filter(id=user_id).update(last_login=timezone.now())
+
+    def listener_op(op):
+        write_serialized(apply_progress_update, dataset['running_job_id'], op, solution)
+
+    def scheduler_op(op):
+        convert_solution_to_meetings(dataset['completed_job_id'])
+
+    operation, pause = {
+        'web': (web_op, 0.01),
+        'listener': (listener_op, 0.02),
+        'scheduler': (scheduler_op, 0.5),
+    }[role]
+
+    latencies, errors, op = [], 0, 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            operation(op)
+            latencies.append(time.perf_counter() - start)
+        except OperationalError as e:
+            errors += 1
+            logger.warning(f"{role}: {e}")
+        op += 1
+        time.sleep(pause)
+    return _latency_stats(role, latencies, errors)
+
+
+def benchmark_sqlite_contention(profile: str, duration: float = 10.0, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Run web, listener and scheduler as separate processes on one fresh SQLite file with the given
+    SQLITE_PROFILE ('concurrent' or 'default'); returns the stats of each role.
+    """
+    import json
+    import os
+    import subprocess
+    import sys
+    import tempfile
+
+    from django.conf import settings
+
+    manage = str(settings.BASE_DIR / 'manage.py')
+    with tempfile.TemporaryDirectory(prefix='sqlite-contention-') as db_dir:
+        env = dict(os.environ, DB_DIR=db_dir, SQLITE_PROFILE=profile)
+
+        def command(*args):
+            return [sys.executable, manage, *args]
+
+        subprocess.run(command('migrate', '--run-syncdb', '-v', '0'), env=env, check=True)
+        setup = subprocess.run(
+            command('benchmark_sqlite_contention', '--role', 'setup', '--seed', str(seed)),
+            env=env, check=True, capture_output=True, text=True
+        )
+        dataset = setup.stdout.strip().splitlines()[-1]
+
+        processes = [
+            subprocess.Popen(
+                command('benchmark_sqlite_contention', '--role', role, '--dataset', dataset,
+                        '--duration', str(duration), '--seed', str(seed)),
+                env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+            )
+            for role in CONTENTION_ROLES
+        ]
+        results = []
+        for role, process in zip(CONTENTION_ROLES, processes):
+            out, _ = process.communicate()
+            lines = out.strip().splitlines()
+            if process.returncode != 0 or not lines:
+                results.append({'role': role, 'profile': profile, 'failed': True})
+                continue
+            stats = json.loads(lines[-1])
+            stats['profile'] = profile
+            results.append(stats)
+    return results
+
+
+# --- pipeline stages (preferences -> problem data -> meetings -> read views) ---
+
+PIPELINE_STAGES = (
+    'prepare_optimization_constraints',
+    'convert_preferences_to_problem_data',
+    'evaluate_plans',
+    'convert_solution_to_meetings',
+    'aggregate_preferred_timeslots_view',
+    'recruitment_optimization_status',
+)
+
+# random plans scored by the evaluate_plans stage (PlanEvaluator.evaluate_many throughput), in batches of
+# at most EVALUATOR_BENCHMARK_BATCH plans x students so large recruitments stay within memory
+EVALUATOR_BENCHMARK_PLANS = 200
+EVALUATOR_BENCHMARK_BATCH = 20000
+
+# a stage is only reported slower when it also lost this much wall time (sub-millisecond stages are noise)
+PIPELINE_MIN_SECONDS_DELTA = 0.025
+
+
+def add_synthetic_preferences(dataset: Dict[str, Any]) -> None:
+    """UserPreferences of every host and participant, based on DEFAULT_USER_PREFERENCES"""
+    from preferences.models import UserPreferences
+    from preferences.views import DEFAULT_USER_PREFERENCES
+
+    rng = dataset['rng']
+    total_timeslots = dataset['timeslots_daily'] * dataset['days_in_cycle']
+    num_groups = len(dataset['subject_groups'])
+
+    def preferences(with_groups: bool) -> Dict[str, Any]:
+        data = dict(DEFAULT_USER_PREFERENCES)
+        data.update({
+            'FreeDays': rng.randint(-3, 3),
+            'ShortDays': rng.randint(-3, 3),
+            'MinGapsLength': [rng.randint(0, 4), rng.randint(0, 3)],
+            'MaxGapsLength': [rng.randint(4, 12), rng.randint(0, 3)],
+            'PreferredTimeslots': [rng.choice((-1, 0, 0, 1, 2, 3)) for _ in range(total_timeslots)],
+            'PreferredGroups': [rng.randint(0, 3) for _ in range(num_groups)] if with_groups else [],
+        })
+        return data
+
+    UserPreferences.objects.bulk_create(
+        [UserPreferences(user=u, recruitment=dataset['recruitment'], preferences_data=preferences(False))
+         for u in dataset['hosts']] +
+        [UserPreferences(user=u, recruitment=dataset['recruitment'], preferences_data=preferences(True))
+         for u in dataset['students']],
+        batch_size=SYNTHETIC_BATCH_SIZE
+    )
+
+
+def build_pipeline_dataset(num_participants: int, num_groups: int, seed: int = 0,
+                           past_jobs: int = 20) -> Dict[str, Any]:
+    """
+    Synthetic recruitment with preferences, an optimization window and a history of past_jobs
+    completed jobs, the last one holding the final_solution the meetings are built from.
+    """
+    from datetime import timedelta
+
+    dataset = build_synthetic_recruitment(num_participants, num_groups, seed=seed)
+    add_synthetic_preferences(dataset)
+
+    now = timezone.now()
+    recruitment = dataset['recruitment']
+    recruitment.optimization_start_date = now - timedelta(days=2)
+    recruitment.optimization_end_date = now + timedelta(days=2)
+    recruitment.save(update_fields=['optimization_start_date', 'optimization_end_date'])
+
+    jobs = []
+    for i in range(max(1, past_jobs)):
+        started = recruitment.optimization_start_date + timedelta(minutes=30 * i)
+        jobs.append(OptimizationJob(
+            recruitment=recruitment, status='completed', max_execution_time=600, problem_data={},
+            started_at=started, completed_at=started + timedelta(minutes=dataset['rng'].randint(5, 25)),
+        ))
+    OptimizationJob.objects.bulk_create(jobs)
+
+    dataset['job'] = jobs[-1]
+    dataset['job'].final_solution = build_synthetic_solution(dataset)
+    dataset['job'].save(update_fields=['final_solution'])
+    return dataset
+
+
+def _call_view(view, path: str, **kwargs):
+    from rest_framework.test import APIRequestFactory
+
+    response = view(APIRequestFactory().get(path), **kwargs)
+    if response.status_code != 200:
+        raise RuntimeError(f"{path} returned {response.status_code}: {getattr(response, 'data', None)}")
+    return response
+
+
+def random_plans(evaluator, count: int, seed: int = 0):
+    """(count, genes) array of random genotypes within the gene ranges of the evaluator's problem"""
+    import numpy as np
+
+    bounds = np.concatenate([
+        evaluator.groups_per_subject[evaluator.student_subject],
+        np.tile([evaluator.total_timeslots, max(1, evaluator.num_rooms)], evaluator.num_groups),
+    ])
+    return (np.random.default_rng(seed).random((count, len(bounds))) * bounds).astype(np.int64)
+
+
+def evaluate_plans(problem_data: Dict[str, Any], count: int = EVALUATOR_BENCHMARK_PLANS):
+    from .evaluator import PlanEvaluator
+
+    import numpy as np
+
+    evaluator = PlanEvaluator(problem_data)
+    plans = random_plans(evaluator, count)
+    batch = max(1, EVALUATOR_BENCHMARK_BATCH // max(1, evaluator.num_students))
+    return np.concatenate([evaluator.evaluate_many(plans[i:i + batch]) for i in range(0, count, batch)])
+
+
+def pipeline_stage_calls(dataset: Dict[str, Any]) -> Dict[str, Any]:
+    """Stage name -> zero-argument callable, in PIPELINE_STAGES order"""
+    from preferences.views import aggregate_preferred_timeslots_view
+    from scheduling.services import prepare_optimization_constraints
+    from .services import convert_preferences_to_problem_data, convert_solution_to_meetings
+    from .views import recruitment_optimization_status
+
+    recruitment = dataset['recruitment']
+    recruitment_id = str(recruitment.recruitment_id)
+
+    def convert_problem():
+        # kept for evaluate_plans
+        dataset['problem_data'] = convert_preferences_to_problem_data(recruitment_id)
+        return dataset['problem_data']
+
+    return {
+        'prepare_optimization_constraints': lambda: prepare_optimization_constraints(recruitment),
+        'convert_preferences_to_problem_data': convert_problem,
+        'evaluate_plans': lambda: evaluate_plans(dataset['problem_data']),
+        'convert_solution_to_meetings': lambda: convert_solution_to_meetings(str(dataset['job'].id)),
+        'aggregate_preferred_timeslots_view': lambda: _call_view(
+            aggregate_preferred_timeslots_view,
+            f'/api/v1/preferences/aggregate-preferred-timeslots/{recruitment_id}/',
+            recruitment_id=recruitment_id
+        ),
+        'recruitment_optimization_status': lambda: _call_view(
+            recruitment_optimization_status,
+            f'/api/v1/optimizer/jobs/recruitment/{recruitment_id}/status/',
+            recruitment_id=recruitment.recruitment_id
+        ),
+    }
+
+
+def peak_memory(func) -> int:
+    """Peak of the memory allocated by Python while func runs, in bytes (tracemalloc)"""
+    import tracemalloc
+
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+    return max(0, peak - before)
+
+
+def measure_stage(func, repeat: int = 3) -> Dict[str, Any]:
+    """
+    Median wall time and query count over `repeat` runs, each rolled back to a savepoint, then one
+    more run under tracemalloc for the peak memory. That last run is kept, so the next stage sees
+    its result (e.g. the meetings of convert_solution_to_meetings).
+    """
+    runs = [run_in_rollback(measure, func) for _ in range(max(1, repeat))]
+    seconds = sorted(run['seconds'] for run in runs)
+    return {
+        'seconds': seconds[len(seconds) // 2],
+        'queries': max(run['queries'] for run in runs),
+        'peak_memory_kb': round(peak_memory(func) / 1024, 1),
+    }
+
+
+def benchmark_pipeline(num_participants: int, num_groups: int, seed: int = 0, repeat: int = 3) -> Dict[str, Any]:
+    """Time, query count and peak memory of every pipeline stage on one synthetic recruitment (rolled back)"""
+
+    def run_stages():
+        dataset = build_pipeline_dataset(num_participants, num_groups, seed=seed)
+        calls = pipeline_stage_calls(dataset)
+        stages = {}
+        for name in PIPELINE_STAGES:
+            stages[name] = measure_stage(calls[name], repeat=repeat)
+            logger.info(f"{num_participants}x{num_groups} {name}: {stages[name]}")
+        return {
+            'size': f'{num_participants}x{num_groups}',
+            'participants': num_participants,
+            'groups': num_groups,
+            'stages': stages,
+        }
+
+    return run_in_rollback(run_stages)
+
+
+def pipeline_report(sizes: List, seed: int = 0, repeat: int = 3) -> Dict[str, Any]:
+    """Machine-readable report of benchmark_pipeline over (participants, groups) sizes"""
+    import platform
+
+    import django
+
+    return {
+        'benchmark': 'pipeline',
+        'created_at': timezone.now().isoformat(),
+        'environment': {
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'machine': platform.machine(),
+        },
+        'seed': seed,
+        'repeat': repeat,
+        'results': [benchmark_pipeline(p, g, seed=seed, repeat=repeat) for p, g in sizes],
+    }
+
+
+def compare_pipeline_reports(report: Dict[str, Any], baseline: Dict[str, Any],
+                             time_tolerance: float = 0.5, memory_tolerance: float = 0.25) -> List[str]:
+    """
+    Regressions of report against baseline, one line each: more queries than the baseline (query
+    counts are deterministic), or wall time / peak memory above the baseline by more than the
+    relative tolerance. Sizes or stages missing from the baseline are not compared.
+    """
+    baseline_sizes = {result['size']: result['stages'] for result in baseline.get('results', [])}
+    regressions = []
+    for result in report['results']:
+        old_stages = baseline_sizes.get(result['size'])
+        if old_stages is None:
+            continue
+        for name, new in result['stages'].items():
+            old = old_stages.get(name)
+            if old is None:
+                continue
+            label = f"{result['size']} {name}"
+            if new['queries'] > old['queries']:
+                regressions.append(f"{label}: queries {old['queries']} -> {new['queries']}")
+            if (new['seconds'] > old['seconds'] * (1 + time_tolerance)
+                    and new['seconds'] - old['seconds'] > PIPELINE_MIN_SECONDS_DELTA):
+                regressions.append(f"{label}: seconds {old['seconds']:.4f} -> {new['seconds']:.4f}")
+            if new['peak_memory_kb'] > old['peak_memory_kb'] * (1 + memory_tolerance) + 1:
+                regressions.append(f"{label}: peak memory {old['peak_memory_kb']} KB -> {new['peak_memory_kb']} KB")
+    return regressions
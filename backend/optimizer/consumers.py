@@ -2,7 +2,7 @@ import json
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.contrib.auth.models import AnonymousUser
-from .models import OptimizationJob
+from .models import OptimizationJob, OptimizationProgress
 
 
 class JobProgressConsumer(AsyncWebsocketConsumer):
@@ -48,6 +48,9 @@ class JobProgressConsumer(AsyncWebsocketConsumer):
                 await self.send_current_status()
             elif message_type == 'cancel_job':
                 await self.handle_job_cancellation()
+            elif message_type == 'get_solution':
+                # progress frames are slim, full solution is sent on request
+                await self.send_solution(data.get('iteration'))
             else:
                 await self.send(text_data=json.dumps({
                     'type': 'error',
@@ -126,7 +129,7 @@ class JobProgressConsumer(AsyncWebsocketConsumer):
             if latest_progress:
                 data['latest_progress'] = {
                     'iteration': latest_progress.iteration,
-                    'best_solution': latest_progress.best_solution,
+                    'best_solution': latest_progress.get_solution(),
                     'timestamp': latest_progress.timestamp.isoformat(),
                 }
             
@@ -134,6 +137,53 @@ class JobProgressConsumer(AsyncWebsocketConsumer):
         except OptimizationJob.DoesNotExist:
             return None
     
+    @database_sync_to_async
+    def get_solution(self, iteration=None):
+        """Full best solution of the given iteration (latest stored one if not given)"""
+        progress = OptimizationProgress.objects.filter(job_id=self.job_id)
+        if iteration is not None:
+            progress = progress.filter(iteration=iteration)
+        progress = progress.order_by('-iteration').first()
+        if progress:
+            return {
+                'job_id': str(self.job_id),
+                'iteration': progress.iteration,
+                'best_solution': progress.get_solution(),
+                'timestamp': progress.timestamp.isoformat(),
+            }
+        if iteration is None:
+            # no progress rows (e.g. completed before any was stored), fall back to the job
+            job = OptimizationJob.objects.filter(id=self.job_id).only('final_solution', 'current_iteration').first()
+            if job and job.final_solution:
+                return {
+                    'job_id': str(self.job_id),
+                    'iteration': job.current_iteration,
+                    'best_solution': job.final_solution,
+                }
+        return None
+    
+    async def send_solution(self, iteration=None):
+        """Send full solution to client"""
+        try:
+            iteration = int(iteration) if iteration is not None else None
+        except (TypeError, ValueError):
+            await self.send(text_data=json.dumps({
+                'type': 'error',
+                'message': 'Invalid iteration'
+            }))
+            return
+        solution = await self.get_solution(iteration)
+        if solution:
+            await self.send(text_data=json.dumps({
+                'type': 'solution',
+                'data': solution
+            }))
+        else:
+            await self.send(text_data=json.dumps({
+                'type': 'error',
+                'message': 'Solution not found'
+            }))
+    
     async def send_current_status(self):
         """Send current job status to client"""
         status_data = await self.get_job_status()
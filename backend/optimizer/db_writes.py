@@ -0,0 +1,48 @@
+"""
+Serialized database writes of the progress listeners.
+
+SQLite has one writer at a time. The listener writes on every iteration while the web process and
+the scheduler (long transaction.atomic() blocks) write to the same file. write_serialized runs one
+update as a single short transaction, lets only one thread of the process write at a time and, when
+the lock could not be taken within the busy timeout (settings.SQLITE_BUSY_TIMEOUT), retries with
+backoff instead of dropping the update.
+"""
+import threading
+import time
+
+from django.db import OperationalError, transaction
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+LOCKED_RETRIES = 5
+LOCKED_BACKOFF = 0.05
+LOCKED_BACKOFF_MAX = 2.0
+
+_write_lock = threading.Lock()
+
+
+def is_database_locked(error: Exception) -> bool:
+    return isinstance(error, OperationalError) and 'locked' in str(error).lower()
+
+
+def write_serialized(func, *args, **kwargs):
+    """Run func(*args, **kwargs) in one transaction, retried while the database is locked.
+
+    Inside an outer transaction func just runs (a retry would replay a broken transaction).
+    """
+    if transaction.get_connection().in_atomic_block:
+        return func(*args, **kwargs)
+
+    delay = LOCKED_BACKOFF
+    for attempt in range(1, LOCKED_RETRIES + 1):
+        try:
+            with _write_lock, transaction.atomic():
+                return func(*args, **kwargs)
+        except OperationalError as e:
+            if not is_database_locked(e) or attempt == LOCKED_RETRIES:
+                raise
+            logger.warning(f"Database locked, retrying write in {delay:.2f}s (attempt {attempt}/{LOCKED_RETRIES})")
+            time.sleep(delay)
+            delay = min(delay * 2, LOCKED_BACKOFF_MAX)
@@ -0,0 +1,470 @@
+"""
+Python port of the optimizer's fitness function (Evaluator::evaluate in optimizer_service).
+
+PlanEvaluator compiles a problem_data once and scores plans given as a genotype or as the
+by_student / by_group pair of a solution, with the same per student / per teacher breakdown the
+optimizer reports in RawSolutionData (student_fitnesses, student_detailed_fitnesses, ...).
+
+Plans are scored as given: the optimizer repairs a genotype (capacities, room and teacher clashes,
+unavailability) before evaluating it, the backend scores manual edits and stored solutions, which
+are expected to be repaired already. Everything is computed on arrays over all (plan, person, day)
+cells at once, evaluate_many scores a whole batch of genotypes with the same number of NumPy calls
+as a single plan.
+
+Detailed fitness entries are (score, weight) pairs in preference order:
+
+    FreeDays, ShortDays, UniformDays, ConcentratedDays, MinGapsLength, MaxGapsLength, MinDayLength,
+    MaxDayLength, PreferredDayStartTimeslot, PreferredDayEndTimeslot, TagOrder, PreferredTimeslots,
+    PreferredGroups (students only)
+
+a disabled preference reports (1.0, 0.0).
+"""
+from typing import Dict, Any, List, Optional, Sequence
+
+import numpy as np
+
+from .warm_start import first_groups
+
+# positional preference format, see services.preferences_to_positional
+PREFERENCE_KEYS = [
+    'FreeDays', 'ShortDays', 'UniformDays', 'ConcentratedDays',
+    'MinGapsLength', 'MaxGapsLength', 'MinDayLength', 'MaxDayLength',
+    'PreferredDayStartTimeslot', 'PreferredDayEndTimeslot',
+    'TagOrder', 'PreferredTimeslots', 'PreferredGroups',
+]
+WEIGHT_KEYS = PREFERENCE_KEYS[:4]
+LIMIT_KEYS = PREFERENCE_KEYS[4:10]
+STUDENT_DETAILS = len(PREFERENCE_KEYS)
+TEACHER_DETAILS = STUDENT_DETAILS - 1
+
+# detail columns
+FREE_DAYS, SHORT_DAYS, UNIFORM_DAYS, CONCENTRATED_DAYS = range(4)
+MIN_GAPS, MAX_GAPS, MIN_DAY_LENGTH, MAX_DAY_LENGTH, DAY_START, DAY_END = range(4, 10)
+TAG_ORDER, PREFERRED_TIMESLOTS, PREFERRED_GROUPS = range(10, 13)
+
+EPSILON = 1e-9
+
+
+def normalize_preference(pref, include_groups: bool) -> Dict[str, Any]:
+    """Positional list or named dict -> dict keyed by PREFERENCE_KEYS (JsonParser defaults)"""
+    keys = PREFERENCE_KEYS if include_groups else PREFERENCE_KEYS[:-1]
+    if isinstance(pref, (list, tuple)):
+        values = dict(zip(keys, pref))
+    else:
+        values = {key: pref[key] for key in keys if key in (pref or {})}
+    for key in keys:
+        if key in WEIGHT_KEYS:
+            values.setdefault(key, 0)
+        elif key in LIMIT_KEYS:
+            values.setdefault(key, [0, 0])
+        else:
+            values.setdefault(key, [])
+    return values
+
+
+class PlanEvaluator:
+    """Fitness of plans for one problem_data; build once, evaluate many times"""
+
+    def __init__(self, problem_data: Dict[str, Any]):
+        constraints = problem_data['constraints']
+        preferences = problem_data.get('preferences') or {}
+
+        self.timeslots_daily = int(constraints['TimeslotsDaily'])
+        self.days = int(constraints['DaysInCycle'])
+        self.total_timeslots = self.timeslots_daily * self.days
+        if self.timeslots_daily <= 0 or self.days <= 0:
+            raise ValueError("TimeslotsDaily and DaysInCycle must be positive")
+
+        groups_per_subject = np.asarray(constraints['GroupsPerSubject'], dtype=np.int64)
+        self.num_groups = int(constraints.get('NumGroups', groups_per_subject.sum()))
+        self.num_rooms = int(constraints.get('NumRooms', len(constraints.get('RoomsCapacity', []))))
+        self.groups_per_subject = groups_per_subject
+        self.subject_offsets = np.asarray(first_groups(groups_per_subject.tolist()), dtype=np.int64)
+        durations = np.asarray(constraints['SubjectsDuration'], dtype=np.int64)
+        self.group_duration = durations[np.repeat(np.arange(len(groups_per_subject)), groups_per_subject)]
+
+        students_subjects = constraints['StudentsSubjects']
+        teachers_groups = constraints['TeachersGroups']
+        self.num_students = len(students_subjects)
+        self.num_teachers = len(teachers_groups)
+        self.num_persons = self.num_students + self.num_teachers
+
+        # memberships: one entry per (student, subject) gene, then per (teacher, group)
+        self.student_subject = np.fromiter(
+            (subject for subjects in students_subjects for subject in subjects), dtype=np.int64)
+        self.student_genes = len(self.student_subject)
+        self.teacher_group = np.fromiter(
+            (group for groups in teachers_groups for group in groups), dtype=np.int64)
+        self.member_person = np.concatenate([
+            np.repeat(np.arange(self.num_students), [len(subjects) for subjects in students_subjects]),
+            self.num_students + np.repeat(np.arange(self.num_teachers), [len(groups) for groups in teachers_groups]),
+        ]).astype(np.int64)
+        self.member_duration = np.concatenate([durations[self.student_subject], self.group_duration[self.teacher_group]])
+        self.total_genes = self.student_genes + 2 * self.num_groups
+
+        student_weights = constraints.get('StudentWeights') or []
+        teacher_weights = constraints.get('TeacherWeights') or []
+        self.person_weights = np.array(
+            [student_weights[s] if s < len(student_weights) else 1.0 for s in range(self.num_students)]
+            + [teacher_weights[t] if t < len(teacher_weights) else 1.0 for t in range(self.num_teachers)],
+            dtype=np.float64
+        )
+
+        student_prefs = list(preferences.get('students') or [])
+        teacher_prefs = list(preferences.get('teachers') or [])
+        prefs = (
+            [normalize_preference(student_prefs[s] if s < len(student_prefs) else {}, True) for s in range(self.num_students)]
+            + [normalize_preference(teacher_prefs[t] if t < len(teacher_prefs) else {}, False) for t in range(self.num_teachers)]
+        )
+        self._compile_preferences(prefs)
+        self._compile_tags(constraints.get('GroupsTags') or [], prefs, int(constraints.get('NumTags', 0)))
+
+    # compilation
+
+    def _compile_preferences(self, prefs: List[Dict[str, Any]]):
+        self.pref_weight = np.array([[pref[key] for key in WEIGHT_KEYS] for pref in prefs], dtype=np.float64).reshape(-1, 4)
+        # [value, weight] pairs, shorter lists are disabled like in the optimizer
+        limits = [[pref[key] if len(pref[key]) >= 2 else [0, 0] for key in LIMIT_KEYS] for pref in prefs]
+        limits = np.array(limits, dtype=np.float64).reshape(-1, len(LIMIT_KEYS), 2)
+        self.limit_value, self.limit_weight = limits[:, :, 0], limits[:, :, 1]
+
+        # preferred timeslots: prefix sums over a zero padded matrix, so sums clipped to the end
+        # of a person's list come for free
+        timeslot_prefs = [pref['PreferredTimeslots'] for pref in prefs]
+        length = max([len(values) for values in timeslot_prefs] + [0])
+        matrix = np.zeros((self.num_persons, length), dtype=np.float64)
+        for person, values in enumerate(timeslot_prefs):
+            matrix[person, :len(values)] = values
+        self.timeslot_length = length
+        self.timeslot_prefix = np.zeros((self.num_persons, length + 1), dtype=np.float64)
+        np.cumsum(matrix, axis=1, out=self.timeslot_prefix[:, 1:])
+        self.timeslot_weight = np.abs(matrix).sum(axis=1)
+
+        # best / worst obtainable sums depend on durations only, not on the plan
+        lengths = np.array([len(values) for values in timeslot_prefs], dtype=np.int64)
+        best = np.zeros(self.num_persons)
+        worst = np.zeros(self.num_persons)
+        for duration in np.unique(self.member_duration):
+            if duration > length:
+                continue  # no window fits, best and worst stay 0
+            windows = self.timeslot_prefix[:, duration:] - self.timeslot_prefix[:, :length + 1 - duration]
+            valid = np.arange(windows.shape[1])[None, :] <= (lengths - duration)[:, None]
+            has_window = valid.any(axis=1)
+            window_max = np.where(has_window, np.where(valid, windows, -np.inf).max(axis=1, initial=-np.inf), 0.0)
+            window_min = np.where(has_window, np.where(valid, windows, np.inf).min(axis=1, initial=np.inf), 0.0)
+            members = self.member_duration == duration
+            best += np.bincount(self.member_person[members], weights=window_max[self.member_person[members]], minlength=self.num_persons)
+            worst += np.bincount(self.member_person[members], weights=window_min[self.member_person[members]], minlength=self.num_persons)
+        self.timeslot_best, self.timeslot_worst = best, worst
+        self.timeslot_active = (lengths > 0) & (np.abs(best - worst) > EPSILON)
+
+        # preferred groups (students): score = |w| of every avoided group plus the signed weights
+        # of the groups taken
+        group_prefs = [pref['PreferredGroups'] for pref in prefs[:self.num_students]]
+        width = max([len(values) for values in group_prefs] + [self.num_groups])
+        group_weights = np.zeros((self.num_students, width), dtype=np.float64)
+        for student, values in enumerate(group_prefs):
+            group_weights[student, :len(values)] = values
+        self.group_gain = group_weights
+        self.group_base = np.where(group_weights < 0, -group_weights, 0).sum(axis=1)
+        self.group_weight = np.abs(group_weights).sum(axis=1)
+
+    def _compile_tags(self, groups_tags: Sequence[Sequence[int]], prefs: List[Dict[str, Any]], num_tags: int):
+        rules = [
+            (person, rule[0], rule[1], rule[2])
+            for person, pref in enumerate(prefs) for rule in pref['TagOrder']
+            if len(rule) >= 3 and rule[2] != 0
+        ]
+        tag_ids = [tag for pair in groups_tags if len(pair) >= 2 for tag in pair[1:2]]
+        tag_ids += [tag for _, tag_a, tag_b, _ in rules for tag in (tag_a, tag_b)]
+        # last column stays empty, unknown tags map to it
+        self.no_tag = max([num_tags - 1] + tag_ids) + 1
+        self.group_tags = np.zeros((self.num_groups, self.no_tag + 1), dtype=bool)
+        for pair in groups_tags:
+            if len(pair) >= 2 and 0 <= pair[0] < self.num_groups and pair[1] >= 0:
+                self.group_tags[pair[0], pair[1]] = True
+
+        rules = np.array(rules, dtype=np.int64).reshape(-1, 4)
+        self.rule_person = rules[:, 0]
+        tags = np.where(rules[:, 1:3] >= 0, rules[:, 1:3], self.no_tag)
+        self.rule_weight = rules[:, 3].astype(np.float64)
+        if not len(rules):
+            return
+        # opportunities are counted per first tag, matches per (first, second) tag pair
+        self.first_tags, self.rule_first = np.unique(tags[:, 0], return_inverse=True)
+        pairs, rule_pair = np.unique(tags, axis=0, return_inverse=True)
+        self.pair_first, self.pair_second = pairs[:, 0], pairs[:, 1]
+        self.rule_pair = rule_pair.reshape(-1)
+
+    # plans
+
+    def decode_genotypes(self, genotypes) -> Dict[str, np.ndarray]:
+        """(plans, genes) genotypes -> absolute student groups (plans, student genes) and group timeslots / rooms"""
+        genotypes = np.asarray(genotypes, dtype=np.int64)
+        if genotypes.ndim == 1:
+            genotypes = genotypes[None, :]
+        if genotypes.shape[1] != self.total_genes:
+            raise ValueError(f"Invalid genotype size: {genotypes.shape[1]}, expected: {self.total_genes}")
+        relative = genotypes[:, :self.student_genes]
+        if ((relative < 0) | (relative >= self.groups_per_subject[self.student_subject])).any():
+            raise ValueError("Genotype assigns a student to a group outside of its subject")
+        plan = {
+            'student_groups': relative + self.subject_offsets[self.student_subject],
+            'timeslots': genotypes[:, self.student_genes::2],
+            'rooms': genotypes[:, self.student_genes + 1::2],
+        }
+        self._check_placement(plan)
+        return plan
+
+    def decode_solution(self, by_student: Sequence[Sequence[int]], by_group: Sequence[Sequence[int]]) -> Dict[str, np.ndarray]:
+        """by_student (absolute groups in StudentsSubjects order) + by_group ([start, end, room]) -> plan arrays"""
+        if len(by_student) != self.num_students or len(by_group) != self.num_groups:
+            raise ValueError(
+                f"Solution has {len(by_student)} students and {len(by_group)} groups, "
+                f"expected {self.num_students} and {self.num_groups}"
+            )
+        student_groups = np.fromiter((group for groups in by_student for group in groups), dtype=np.int64)
+        if len(student_groups) != self.student_genes:
+            raise ValueError("by_student does not match StudentsSubjects")
+        relative = student_groups - self.subject_offsets[self.student_subject]
+        if ((relative < 0) | (relative >= self.groups_per_subject[self.student_subject])).any():
+            raise ValueError("by_student assigns a student to a group outside of its subject")
+        placement = np.array([[entry[0], entry[-1]] for entry in by_group], dtype=np.int64).reshape(-1, 2)
+        plan = {
+            'student_groups': student_groups[None, :],
+            'timeslots': placement[None, :, 0],
+            'rooms': placement[None, :, 1],
+        }
+        self._check_placement(plan)
+        return plan
+
+    def _check_placement(self, plan: Dict[str, np.ndarray]):
+        timeslots, rooms = plan['timeslots'], plan['rooms']
+        if ((timeslots < 0) | (timeslots >= self.total_timeslots)).any():
+            raise ValueError(f"Group timeslot outside of 0..{self.total_timeslots - 1}")
+        if self.num_rooms and ((rooms < 0) | (rooms >= self.num_rooms)).any():
+            raise ValueError(f"Group room outside of 0..{self.num_rooms - 1}")
+
+    def score(self, plan: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """
+        Score decoded plans.
+
+        Returns arrays over plans: fitness (plans,), person_fitness (plans, persons) and
+        detail_score / detail_weight (plans, persons, 13); persons are students then teachers.
+        """
+        student_groups, timeslots = plan['student_groups'], plan['timeslots']
+        plans = len(timeslots)
+        persons, days, daily = self.num_persons, self.days, self.timeslots_daily
+        owners = plans * persons
+        owner_person = np.tile(np.arange(persons), plans)
+
+        groups = np.concatenate([student_groups, np.broadcast_to(self.teacher_group, (plans, len(self.teacher_group)))], axis=1)
+        start = np.take_along_axis(timeslots, groups, axis=1).ravel()
+        duration = np.tile(self.member_duration, plans)
+        person = np.tile(self.member_person, plans)
+        owner = (np.arange(plans)[:, None] * persons + self.member_person[None, :]).ravel()
+        groups = groups.ravel()
+
+        # one row per preference, contiguous per column write
+        detail_score = np.ones((STUDENT_DETAILS, owners))
+        detail_weight = np.zeros((STUDENT_DETAILS, owners))
+        contribution = np.zeros((STUDENT_DETAILS, owners))
+
+        def add_details(column, raw, weight, enabled):
+            value = np.clip(raw, 0.0, 1.0)
+            value = np.where(weight < 0, 1.0 - value, value)
+            detail_score[column] = np.where(enabled, value, 1.0)
+            detail_weight[column] = np.where(enabled, np.abs(weight), 0.0)
+            contribution[column] = detail_score[column] * detail_weight[column]
+
+        # classes of every owner sorted by (start, duration), split into days
+        span = duration.max(initial=0) + 1
+        order = np.argsort((owner * self.total_timeslots + start) * span + duration, kind='stable')
+        owner_s, start_s, duration_s, groups_s = owner[order], start[order], duration[order], groups[order]
+        day_key = owner_s * days + start_s // daily
+        new_day = np.ones(len(day_key), dtype=bool)
+        new_day[1:] = day_key[1:] != day_key[:-1]
+        day_first = np.flatnonzero(new_day)
+        day_last = np.append(day_first[1:] - 1, len(day_key) - 1)[:len(day_first)].astype(np.int64)
+
+        day_owner = owner_s[day_first]
+        day_person = day_owner % persons
+        day_start = start_s[day_first] % daily
+        day_end = (start_s[day_last] + duration_s[day_last] - 1) % daily
+        day_length = day_end - day_start + 1
+        busy_days = np.bincount(day_owner, minlength=owners).astype(np.float64)
+        any_days = busy_days > 0
+        per_busy_day = np.where(any_days, busy_days, 1.0)
+
+        def per_owner(values):
+            return np.bincount(day_owner, weights=values, minlength=owners)
+
+        weights = self.pref_weight[owner_person]
+        add_details(FREE_DAYS, (days - busy_days) / days, weights[:, 0], weights[:, 0] != 0)
+        add_details(SHORT_DAYS, per_owner((daily - day_length) / daily) / per_busy_day,
+                    weights[:, 1], (weights[:, 1] != 0) & any_days)
+
+        mean_length = per_owner(day_length) / per_busy_day
+        variance = per_owner((day_length - mean_length[day_owner]) ** 2) / per_busy_day
+        add_details(UNIFORM_DAYS, 1.0 - np.sqrt(variance) / (daily / 2.0),
+                    weights[:, 2], (weights[:, 2] != 0) & (busy_days > 1))
+
+        busy = np.zeros((owners, days), dtype=bool)
+        busy[day_owner, day_key[day_first] % days] = True
+        transitions = (busy != np.roll(busy, -1, axis=1)).sum(axis=1)
+        add_details(CONCENTRATED_DAYS, 1.0 - transitions / days, weights[:, 3], weights[:, 3] != 0)
+
+        # gaps between consecutive classes of a day
+        same_day = ~new_day[1:]
+        gap = start_s[1:] - (start_s[:-1] + duration_s[:-1])
+        pair_day = (np.cumsum(new_day) - 1)[1:]
+        pair_person = owner_s[1:] % persons
+        gapped = same_day & (gap > 0)
+        day_has_gap = np.bincount(pair_day[gapped], minlength=len(day_first)) > 0
+        days_with_gaps = per_owner(day_has_gap)
+        limit_weights = self.limit_weight[owner_person]
+        for column, bad_gap in ((MIN_GAPS, gap < self.limit_value[pair_person, 0]),
+                                (MAX_GAPS, gap > self.limit_value[pair_person, 1])):
+            bad_day = np.bincount(pair_day[gapped & bad_gap], minlength=len(day_first)) > 0
+            valid = per_owner(day_has_gap & ~bad_day)
+            raw = np.where(days_with_gaps > 0, valid / np.where(days_with_gaps > 0, days_with_gaps, 1.0), 1.0)
+            add_details(column, raw, limit_weights[:, column - MIN_GAPS], limit_weights[:, column - MIN_GAPS] != 0)
+
+        for column, valid_day in ((MIN_DAY_LENGTH, day_length >= self.limit_value[day_person, 2]),
+                                  (MAX_DAY_LENGTH, day_length <= self.limit_value[day_person, 3])):
+            raw = np.where(any_days, per_owner(valid_day) / per_busy_day, 1.0)
+            add_details(column, raw, limit_weights[:, column - MIN_GAPS], limit_weights[:, column - MIN_GAPS] != 0)
+
+        for column, actual in ((DAY_START, day_start), (DAY_END, day_end)):
+            index = column - MIN_GAPS
+            error = np.minimum(np.abs(actual - self.limit_value[day_person, index]), daily) / daily
+            raw = np.where(any_days, 1.0 - per_owner(error) / per_busy_day, 1.0)
+            add_details(column, raw, limit_weights[:, index], limit_weights[:, index] != 0)
+
+        self._score_tag_order(plans, owners, owner_s, groups_s, same_day & (gap == 0),
+                              detail_score, detail_weight, contribution)
+
+        # preferred timeslots, over all classes including days past the cycle
+        length = self.timeslot_length
+        prefix = self.timeslot_prefix.ravel()
+        row = person * (length + 1)
+        obtained = np.bincount(
+            owner,
+            weights=prefix[row + np.minimum(start + duration, length)] - prefix[row + np.minimum(start, length)],
+            minlength=owners
+        )
+        best, worst = self.timeslot_best[owner_person], self.timeslot_worst[owner_person]
+        active = self.timeslot_active[owner_person]
+        normalized = (obtained - worst) / np.where(active, best - worst, 1.0)
+        total = self.timeslot_weight[owner_person]
+        detail_score[PREFERRED_TIMESLOTS] = np.where(active, np.clip(normalized, 0.0, 1.0), 1.0)
+        detail_weight[PREFERRED_TIMESLOTS] = np.where(active, total, 0.0)
+        contribution[PREFERRED_TIMESLOTS] = np.where(active, normalized * total, 0.0)
+
+        # preferred groups, students only
+        student = self.member_person[:self.student_genes]
+        gained = np.bincount(
+            (np.arange(plans)[:, None] * persons + student[None, :]).ravel(),
+            weights=self.group_gain[np.tile(student, plans), student_groups.ravel()], minlength=owners
+        )
+        is_student = owner_person < self.num_students
+        student_index = np.where(is_student, owner_person, 0)
+        group_weight = np.where(is_student, self.group_weight[student_index], 0.0) if self.num_students else np.zeros(owners)
+        active = group_weight > 0
+        group_score = (self.group_base[student_index] if self.num_students else 0.0) + gained
+        detail_score[PREFERRED_GROUPS] = np.where(active, np.clip(group_score / np.where(active, group_weight, 1.0), 0.0, 1.0), 1.0)
+        detail_weight[PREFERRED_GROUPS] = group_weight
+        contribution[PREFERRED_GROUPS] = np.where(active, group_score, 0.0)
+
+        weight_sum = detail_weight.sum(axis=0)
+        person_fitness = np.where(
+            weight_sum < EPSILON, 1.0,
+            np.clip(contribution.sum(axis=0) / np.where(weight_sum < EPSILON, 1.0, weight_sum), 0.0, 1.0)
+        ).reshape(plans, persons)
+        total_weight = self.person_weights.sum()
+        fitness = (person_fitness * self.person_weights).sum(axis=1) / total_weight if total_weight > 0 else np.zeros(plans)
+        return {
+            'fitness': fitness,
+            'person_fitness': person_fitness,
+            'detail_score': detail_score.T.reshape(plans, persons, STUDENT_DETAILS),
+            'detail_weight': detail_weight.T.reshape(plans, persons, STUDENT_DETAILS),
+        }
+
+    def _score_tag_order(self, plans, owners, owner_s, groups_s, adjacent, detail_score, detail_weight, contribution):
+        """TagOrder: share of back-to-back class pairs starting with tag A that continue with tag B"""
+        if not len(self.rule_person):
+            return
+        pair_owner = owner_s[:-1][adjacent]
+        first_tags = self.group_tags[groups_s[:-1][adjacent]]
+        second_tags = self.group_tags[groups_s[1:][adjacent]]
+
+        has_first = first_tags[:, self.first_tags]
+        opportunities = np.bincount(
+            (pair_owner[:, None] * len(self.first_tags) + np.arange(len(self.first_tags))).ravel(),
+            weights=has_first.ravel(), minlength=owners * len(self.first_tags)
+        ).reshape(owners, -1)
+        hits = first_tags[:, self.pair_first] & second_tags[:, self.pair_second]
+        matches = np.bincount(
+            (pair_owner[:, None] * len(self.pair_first) + np.arange(len(self.pair_first))).ravel(),
+            weights=hits.ravel(), minlength=owners * len(self.pair_first)
+        ).reshape(owners, -1)
+
+        rule_owner = (np.arange(plans)[:, None] * self.num_persons + self.rule_person[None, :]).ravel()
+        rule_opportunities = opportunities[rule_owner, np.tile(self.rule_first, plans)]
+        rule_matches = matches[rule_owner, np.tile(self.rule_pair, plans)]
+        counted = rule_opportunities > 0
+        ratio = rule_matches / np.where(counted, rule_opportunities, 1.0)
+        weight = np.tile(self.rule_weight, plans)
+        rule_score = np.where(weight < 0, 1.0 - ratio, ratio)
+
+        score_sum = np.bincount(rule_owner, weights=np.where(counted, rule_score * np.abs(weight), 0.0), minlength=owners)
+        weight_sum = np.bincount(rule_owner, weights=np.where(counted, np.abs(weight), 0.0), minlength=owners)
+        active = weight_sum > 0
+        detail_score[TAG_ORDER] = np.where(active, np.clip(score_sum / np.where(active, weight_sum, 1.0), 0.0, 1.0), 1.0)
+        detail_weight[TAG_ORDER] = weight_sum
+        contribution[TAG_ORDER] = score_sum
+
+    # results
+
+    def evaluate_many(self, genotypes) -> np.ndarray:
+        """Fitness of every genotype in a (plans, genes) array"""
+        return self.score(self.decode_genotypes(genotypes))['fitness']
+
+    def evaluate(self, genotype: Optional[Sequence[int]] = None, by_student: Optional[Sequence[Sequence[int]]] = None,
+                 by_group: Optional[Sequence[Sequence[int]]] = None) -> Dict[str, Any]:
+        """Fitness breakdown of one plan in the RawSolutionData format of the optimizer"""
+        if genotype is not None:
+            plan = self.decode_genotypes(genotype)
+        elif by_student is not None and by_group is not None:
+            plan = self.decode_solution(by_student, by_group)
+        else:
+            raise ValueError("A genotype or by_student and by_group are required")
+        return self.breakdown(self.score(plan))[0]
+
+    def breakdown(self, scores: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+        """score() arrays -> one RawSolutionData-like dict per plan"""
+        students, weights = self.num_students, self.person_weights
+        results = []
+        for plan, fitness in enumerate(scores['fitness']):
+            person_fitness = scores['person_fitness'][plan]
+            details = np.stack([scores['detail_score'][plan], scores['detail_weight'][plan]], axis=-1)
+            results.append({
+                'fitness': float(fitness),
+                'student_fitnesses': person_fitness[:students].tolist(),
+                'teacher_fitnesses': person_fitness[students:].tolist(),
+                'student_detailed_fitnesses': details[:students].tolist(),
+                'teacher_detailed_fitnesses': details[students:, :TEACHER_DETAILS].tolist(),
+                'student_weighted_fitnesses': (person_fitness[:students] * weights[:students]).tolist(),
+                'teacher_weighted_fitnesses': (person_fitness[students:] * weights[students:]).tolist(),
+                'total_student_weight': float(weights[:students].sum()),
+                'total_teacher_weight': float(weights[students:].sum()),
+            })
+        return results
+
+
+def evaluate_solution(problem_data: Dict[str, Any], solution: Dict[str, Any]) -> Dict[str, Any]:
+    """Re-score a solution dict (final_solution of a job): its genotype, or by_student / by_group"""
+    evaluator = PlanEvaluator(problem_data)
+    if solution.get('genotype'):
+        return evaluator.evaluate(genotype=solution['genotype'])
+    return evaluator.evaluate(by_student=solution.get('by_student'), by_group=solution.get('by_group'))
@@ -0,0 +1,324 @@
+"""
+Pre-flight feasibility analysis of a problem_data before it is queued.
+
+The optimizer refuses a problem that fails ProblemData::checkFeasibility and only logs it, so the job
+would stay queued forever. analyze_feasibility runs the same checks in the backend, plus a few it
+can prove with counting that the optimizer only finds out by failing every repair:
+
+- inconsistent sizes / references (mirrors checkFeasibility, exact),
+- per subject: student demand vs. capacity of the groups that can actually run; a group can run if
+  some room has all its tags and room for MinStudentsPerGroup students, and if its teacher and such
+  a room are free for the whole duration at some start within a day,
+- minimum students per group vs. demand,
+- teachers, students and rooms vs. the timeslots they are available in, counting only groups a
+  subject cannot do without.
+
+Issues are dicts {'code', 'severity', 'message', ...context}; severity 'error' makes the problem
+infeasible, 'warning' is informational (e.g. a group that can never run while its subject is
+still covered by the others).
+"""
+from typing import Dict, Any, List
+
+import numpy as np
+
+
+ERROR = 'error'
+WARNING = 'warning'
+
+# lists of constraints and the count they must match (see ProblemData::checkFeasibility)
+SIZE_CHECKS = [
+    ('SubjectsDuration', 'NumSubjects'),
+    ('GroupsPerSubject', 'NumSubjects'),
+    ('MinStudentsPerGroup', 'NumGroups'),
+    ('GroupsCapacity', 'NumGroups'),
+    ('RoomsCapacity', 'NumRooms'),
+    ('RoomsUnavailabilityTimeslots', 'NumRooms'),
+    ('StudentsSubjects', 'NumStudents'),
+    ('StudentsUnavailabilityTimeslots', 'NumStudents'),
+    ('TeachersGroups', 'NumTeachers'),
+    ('TeachersUnavailabilityTimeslots', 'NumTeachers'),
+]
+# may be empty (default weight 1)
+OPTIONAL_SIZE_CHECKS = [
+    ('StudentWeights', 'NumStudents'),
+    ('TeacherWeights', 'NumTeachers'),
+]
+REQUIRED_KEYS = ['TimeslotsDaily', 'DaysInCycle', 'NumSubjects', 'NumGroups', 'NumTeachers', 'NumStudents', 'NumRooms']
+
+# issues listed per code before the rest is only counted
+MAX_ISSUES_PER_CODE = 20
+
+
+class InfeasibleProblemError(Exception):
+    """problem_data the optimizer cannot solve; report holds the diagnosis, job the failed job if recorded"""
+
+    def __init__(self, report: 'FeasibilityReport', job=None):
+        self.report = report
+        self.job = job
+        super().__init__(report.summary())
+
+
+class FeasibilityReport:
+    def __init__(self):
+        self.issues: List[Dict[str, Any]] = []
+        self.suppressed: Dict[str, int] = {}
+
+    def add(self, severity: str, code: str, message: str, **context):
+        if sum(1 for issue in self.issues if issue['code'] == code) >= MAX_ISSUES_PER_CODE:
+            self.suppressed[code] = self.suppressed.get(code, 0) + 1
+            return
+        self.issues.append({'code': code, 'severity': severity, 'message': message, **context})
+
+    @property
+    def errors(self) -> List[Dict[str, Any]]:
+        return [issue for issue in self.issues if issue['severity'] == ERROR]
+
+    @property
+    def warnings(self) -> List[Dict[str, Any]]:
+        return [issue for issue in self.issues if issue['severity'] == WARNING]
+
+    @property
+    def feasible(self) -> bool:
+        return not self.errors
+
+    def summary(self) -> str:
+        if self.feasible:
+            return f"Problem is feasible ({len(self.warnings)} warnings)"
+        return "Problem is infeasible: " + "; ".join(issue['message'] for issue in self.errors[:5]) + (
+            f" (+{len(self.errors) - 5} more)" if len(self.errors) > 5 else ""
+        )
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'feasible': self.feasible,
+            'errors': self.errors,
+            'warnings': self.warnings,
+            'suppressed': self.suppressed,
+        }
+
+
+def analyze_feasibility(problem_data: Dict[str, Any]) -> FeasibilityReport:
+    """Diagnose problem_data; report.feasible is False when the optimizer could not solve it"""
+    report = FeasibilityReport()
+    constraints = (problem_data or {}).get('constraints')
+    if not constraints:
+        report.add(ERROR, 'missing_constraints', "problem_data has no constraints")
+        return report
+
+    missing = [key for key in REQUIRED_KEYS + [key for key, _ in SIZE_CHECKS] if key not in constraints]
+    for key in missing:
+        report.add(ERROR, 'missing_field', f"{key} is missing", field=key)
+    if missing:
+        return report
+
+    if not _check_structure(constraints, report):
+        # indices below would be out of range
+        return report
+    _check_resources(constraints, report)
+    return report
+
+
+def _check_structure(c: Dict[str, Any], report: FeasibilityReport) -> bool:
+    """Sizes, durations and references; False when further analysis is impossible"""
+    for key, count_key in SIZE_CHECKS:
+        if len(c[key]) != c[count_key]:
+            report.add(ERROR, 'size_mismatch', f"{key} has {len(c[key])} entries but {count_key} is {c[count_key]}",
+                       field=key, expected=c[count_key], actual=len(c[key]))
+    for key, count_key in OPTIONAL_SIZE_CHECKS:
+        values = c.get(key) or []
+        if values and len(values) != c[count_key]:
+            report.add(ERROR, 'size_mismatch', f"{key} has {len(values)} entries but {count_key} is {c[count_key]}",
+                       field=key, expected=c[count_key], actual=len(values))
+    if report.errors:
+        return False
+
+    daily, days = c['TimeslotsDaily'], c['DaysInCycle']
+    if daily <= 0 or days <= 0:
+        report.add(ERROR, 'invalid_cycle', f"TimeslotsDaily ({daily}) and DaysInCycle ({days}) must be positive")
+        return False
+    total_timeslots = daily * days
+
+    durations = np.asarray(c['SubjectsDuration'], dtype=np.int64)
+    for subject in np.flatnonzero((durations <= 0) | (durations > daily)):
+        report.add(ERROR, 'invalid_duration',
+                   f"Subject {subject} lasts {durations[subject]} timeslots, a day has {daily}",
+                   subject=int(subject), duration=int(durations[subject]))
+
+    if sum(c['GroupsPerSubject']) != c['NumGroups']:
+        report.add(ERROR, 'groups_count_mismatch',
+                   f"GroupsPerSubject sums to {sum(c['GroupsPerSubject'])} but NumGroups is {c['NumGroups']}",
+                   expected=c['NumGroups'], actual=sum(c['GroupsPerSubject']))
+
+    num_tags = c.get('NumTags', 0)
+    references = [
+        ('StudentsSubjects', c['StudentsSubjects'], c['NumSubjects']),
+        ('TeachersGroups', c['TeachersGroups'], c['NumGroups']),
+        ('RoomsUnavailabilityTimeslots', c['RoomsUnavailabilityTimeslots'], total_timeslots),
+        ('StudentsUnavailabilityTimeslots', c['StudentsUnavailabilityTimeslots'], total_timeslots),
+        ('TeachersUnavailabilityTimeslots', c['TeachersUnavailabilityTimeslots'], total_timeslots),
+        ('GroupsTags', [pair[:1] for pair in c.get('GroupsTags') or []], c['NumGroups']),
+        ('GroupsTags', [pair[1:2] for pair in c.get('GroupsTags') or []], num_tags),
+        ('RoomsTags', [pair[:1] for pair in c.get('RoomsTags') or []], c['NumRooms']),
+        ('RoomsTags', [pair[1:2] for pair in c.get('RoomsTags') or []], num_tags),
+    ]
+    for key, rows, limit in references:
+        owners = np.repeat(np.arange(len(rows)), [len(row) for row in rows])
+        values = np.fromiter((value for row in rows for value in row), dtype=np.int64, count=len(owners))
+        for position in np.flatnonzero((values < 0) | (values >= limit)):
+            report.add(ERROR, 'invalid_reference', f"{key}[{owners[position]}] refers to {values[position]}, valid range is 0..{limit - 1}",
+                       field=key, index=int(owners[position]), value=int(values[position]))
+
+    if c['NumGroups'] > total_timeslots * c['NumRooms']:
+        report.add(ERROR, 'too_many_groups',
+                   f"{c['NumGroups']} groups do not fit in {total_timeslots} timeslots x {c['NumRooms']} rooms",
+                   groups=c['NumGroups'], slots=total_timeslots * c['NumRooms'])
+
+    if report.errors:
+        return False
+
+    demand = np.bincount(_flat(c['StudentsSubjects']), minlength=c['NumSubjects'])
+    capacity = np.bincount(_group_subject(c), weights=c['GroupsCapacity'], minlength=c['NumSubjects'])
+    for subject in np.flatnonzero(capacity < demand):
+        report.add(ERROR, 'subject_capacity',
+                   f"Subject {subject} has {demand[subject]} students but its groups hold {int(capacity[subject])}",
+                   subject=int(subject), demand=int(demand[subject]), capacity=int(capacity[subject]))
+    return not report.errors
+
+
+def _check_resources(c: Dict[str, Any], report: FeasibilityReport):
+    """Rooms, tags, availability and minimum students; assumes a consistent structure"""
+    daily, days = c['TimeslotsDaily'], c['DaysInCycle']
+    total_timeslots = daily * days
+    num_groups, num_rooms, num_subjects = c['NumGroups'], c['NumRooms'], c['NumSubjects']
+    group_subject = _group_subject(c)
+    durations = np.asarray(c['SubjectsDuration'], dtype=np.int64)
+    group_duration = durations[group_subject]
+    group_capacity = np.asarray(c['GroupsCapacity'], dtype=np.int64)
+    min_students = np.asarray(c['MinStudentsPerGroup'], dtype=np.int64)
+    room_capacity = np.asarray(c['RoomsCapacity'], dtype=np.int64)
+    demand = np.bincount(_flat(c['StudentsSubjects']), minlength=num_subjects)
+
+    # a running group has at least max(1, MinStudentsPerGroup) students, its room must hold them
+    needed = np.maximum(min_students, 1)
+    num_tags = max(c.get('NumTags', 0), 1)
+    group_tags = _incidence(c.get('GroupsTags') or [], num_groups, num_tags)
+    room_tags = _incidence(c.get('RoomsTags') or [], num_rooms, num_tags)
+    missing_tags = group_tags.astype(np.float32) @ (~room_tags).astype(np.float32).T
+    compatible = (missing_tags == 0) & (room_capacity[None, :] >= needed[:, None])
+
+    # first teacher listing a group teaches it (as in Evaluator::repair), -1 for none
+    group_teacher = np.full(num_groups, -1, dtype=np.int64)
+    teacher_of = np.repeat(np.arange(len(c['TeachersGroups'])), [len(groups) for groups in c['TeachersGroups']])
+    taught = _flat(c['TeachersGroups'])
+    first = np.unique(taught, return_index=True)
+    group_teacher[first[0]] = teacher_of[first[1]]
+
+    room_busy = _busy(c['RoomsUnavailabilityTimeslots'], total_timeslots)
+    teacher_busy = _busy(c['TeachersUnavailabilityTimeslots'], total_timeslots)
+    student_busy = _busy(c['StudentsUnavailabilityTimeslots'], total_timeslots)
+
+    has_slot = np.zeros(num_groups, dtype=bool)
+    for duration in np.unique(group_duration):
+        members = np.flatnonzero(group_duration == duration)
+        room_free = _free_windows(room_busy, duration, daily)
+        room_ready = (compatible[members].astype(np.float32) @ room_free.astype(np.float32)) > 0
+        teacher_free = np.vstack([_free_windows(teacher_busy, duration, daily), np.ones((1, total_timeslots), dtype=bool)])
+        has_slot[members] = (room_ready & teacher_free[group_teacher[members]]).any(axis=1)
+
+    max_room = np.where(compatible, room_capacity[None, :], 0).max(axis=1, initial=0)
+    effective_capacity = np.minimum(group_capacity, max_room)
+    usable = compatible.any(axis=1) & has_slot & (min_students <= effective_capacity)
+    needs_students = demand[group_subject] > 0
+
+    for group in np.flatnonzero(~usable & needs_students):
+        subject = int(group_subject[group])
+        if min_students[group] > group_capacity[group]:
+            reason, code = f"needs {min_students[group]} students but holds {group_capacity[group]}", 'group_min_students'
+        elif not compatible[group].any():
+            reason, code = "no room has its tags and room for its minimum students", 'group_without_room'
+        elif min_students[group] > effective_capacity[group]:
+            reason, code = f"its rooms hold {max_room[group]} students, it needs {min_students[group]}", 'group_without_room'
+        else:
+            reason, code = "its teacher and a suitable room are never free at the same time", 'group_without_slot'
+        report.add(WARNING, code, f"Group {group} (subject {subject}) can never run: {reason}",
+                   group=int(group), subject=subject, teacher=int(group_teacher[group]))
+
+    usable_capacity = np.bincount(group_subject, weights=np.where(usable, effective_capacity, 0), minlength=num_subjects)
+    for subject in np.flatnonzero(usable_capacity < demand):
+        report.add(ERROR, 'subject_capacity',
+                   f"Subject {subject} has {demand[subject]} students but the groups that can run hold {int(usable_capacity[subject])}",
+                   subject=int(subject), demand=int(demand[subject]), capacity=int(usable_capacity[subject]))
+
+    smallest = np.full(num_subjects, np.iinfo(np.int64).max)
+    np.minimum.at(smallest, group_subject[usable], needed[usable])
+    for subject in np.flatnonzero((demand > 0) & (demand < smallest) & (usable_capacity >= demand)):
+        report.add(ERROR, 'subject_min_students',
+                   f"Subject {subject} has {demand[subject]} students, each of its groups needs at least {smallest[subject]}",
+                   subject=int(subject), demand=int(demand[subject]), minimum=int(smallest[subject]))
+
+    # groups their subject cannot be covered without
+    mandatory = usable & (usable_capacity[group_subject] - effective_capacity < demand[group_subject])
+
+    free_teacher_slots = total_timeslots - teacher_busy.sum(axis=1)
+    has_teacher = group_teacher >= 0
+    teacher_load = np.bincount(group_teacher[mandatory & has_teacher], weights=group_duration[mandatory & has_teacher],
+                               minlength=len(c['TeachersGroups']))
+    for teacher in np.flatnonzero(teacher_load > free_teacher_slots):
+        report.add(ERROR, 'teacher_overloaded',
+                   f"Teacher {teacher} must teach {int(teacher_load[teacher])} timeslots but is available in {free_teacher_slots[teacher]}",
+                   teacher=int(teacher), required=int(teacher_load[teacher]), available=int(free_teacher_slots[teacher]))
+
+    student_subjects = _flat(c['StudentsSubjects'])
+    student_of = np.repeat(np.arange(len(c['StudentsSubjects'])), [len(subjects) for subjects in c['StudentsSubjects']])
+    student_load = np.bincount(student_of, weights=durations[student_subjects], minlength=len(c['StudentsSubjects']))
+    free_student_slots = total_timeslots - student_busy.sum(axis=1)
+    for student in np.flatnonzero(student_load > free_student_slots):
+        report.add(ERROR, 'student_overloaded',
+                   f"Student {student} attends {int(student_load[student])} timeslots of classes but is available in {free_student_slots[student]}",
+                   student=int(student), required=int(student_load[student]), available=int(free_student_slots[student]))
+
+    room_load = int(group_duration[mandatory].sum())
+    free_room_slots = int(room_busy.size - room_busy.sum())
+    if room_load > free_room_slots:
+        report.add(ERROR, 'rooms_overloaded',
+                   f"Required groups take {room_load} room timeslots, rooms are available for {free_room_slots}",
+                   required=room_load, available=free_room_slots)
+    elif room_load > 0.9 * free_room_slots:
+        report.add(WARNING, 'rooms_tight',
+                   f"Required groups take {room_load} of {free_room_slots} available room timeslots",
+                   required=room_load, available=free_room_slots)
+
+
+def _flat(rows) -> np.ndarray:
+    return np.fromiter((value for row in rows for value in row), dtype=np.int64)
+
+
+def _group_subject(c: Dict[str, Any]) -> np.ndarray:
+    groups_per_subject = np.asarray(c['GroupsPerSubject'], dtype=np.int64)
+    return np.repeat(np.arange(len(groups_per_subject)), groups_per_subject)
+
+
+def _incidence(pairs, rows: int, columns: int) -> np.ndarray:
+    matrix = np.zeros((rows, columns), dtype=bool)
+    pairs = np.array([pair[:2] for pair in pairs if len(pair) >= 2], dtype=np.int64).reshape(-1, 2)
+    matrix[pairs[:, 0], pairs[:, 1]] = True
+    return matrix
+
+
+def _busy(unavailability, total_timeslots: int) -> np.ndarray:
+    busy = np.zeros((len(unavailability), total_timeslots), dtype=bool)
+    owners = np.repeat(np.arange(len(unavailability)), [len(slots) for slots in unavailability])
+    busy[owners, _flat(unavailability)] = True
+    return busy
+
+
+def _free_windows(busy: np.ndarray, duration: int, daily: int) -> np.ndarray:
+    """(rows, timeslots): a class of this duration can start here within one day, free throughout"""
+    rows, total = busy.shape
+    counts = np.zeros((rows, total + 1), dtype=np.int64)
+    np.cumsum(busy, axis=1, out=counts[:, 1:])
+    free = np.zeros((rows, total), dtype=bool)
+    starts = np.arange(total - duration + 1)
+    free[:, starts] = (counts[:, starts + duration] - counts[:, starts]) == 0
+    free[:, np.arange(total) % daily > daily - duration] = False
+    return free
@@ -0,0 +1,205 @@
+"""
+Island model: one logical OptimizationJob optimized by several optimizer workers at once.
+
+submit_job(islands=K) with K > 1 keeps the job it creates as the parent (never queued) and adds K
+child jobs sharing its problem payload, each with a distinct seed and an algorithm taken round robin
+from OPTIMIZER_ISLAND_ALGORITHMS. Children are queued like any other job, so idle optimizer containers
+pick them up in parallel and a single large recruitment uses all of them.
+
+Progress of the children is merged into the parent by merge_island_progress, which every progress
+listener calls after child updates are written:
+
+- parent.final_solution is the best child solution (by fitness), current_iteration the furthest
+  iteration any child reached; a parent progress row and websocket frame follow each advance,
+- the parent completes, and goes through finish_optimization_round instead of its children, once
+  every child is completed, failed or cancelled.
+
+Every OPTIMIZER_ISLAND_MIGRATION_INTERVAL seconds the running islands of a parent pass their best
+genotype to the next island in a ring through optimizer:migrants:{child_id}, which the optimizer
+reads between iterations (RedisEventReceiver::receiveMigrants) and injects in place of its worst
+individuals.
+"""
+import json
+import random
+from typing import Dict, Any, List, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OptimizationJob, OptimizationProgress, ProblemPayload
+from .progress_storage import build_progress_rows, solution_fitness
+from .progress_frames import PROGRESS_MESSAGE, COMPLETED_MESSAGE
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+MIGRANT_KEY_PREFIX = "optimizer:migrants:"
+MIGRATION_LOCK_PREFIX = "optimizer:islands:migrated:"
+# migrants kept per island, older unread ones are dropped
+MAX_PENDING_MIGRANTS = 4
+MIGRANT_TTL = 3600
+# islands in these states take no further part in the run
+FINISHED_STATUSES = ('completed', 'failed', 'cancelled', 'archived')
+
+DEFAULT_MIGRATION_INTERVAL = 30
+
+
+def island_count(requested: Optional[int] = None) -> int:
+    count = requested if requested is not None else getattr(settings, 'OPTIMIZER_ISLANDS', 1)
+    return max(1, int(count))
+
+
+def island_algorithms() -> List[str]:
+    return list(getattr(settings, 'OPTIMIZER_ISLAND_ALGORITHMS', None) or ['zawodev'])
+
+
+def create_islands(parent: OptimizationJob, count: int) -> List[OptimizationJob]:
+    """Create the child jobs of a parent job (distinct seeds, algorithms round robin)"""
+    algorithms = island_algorithms()
+    # the optimizer takes the seed as a non-negative int
+    seeds = random.SystemRandom().sample(range(2 ** 31 - 1), count)
+    islands = [
+        OptimizationJob(
+            recruitment_id=parent.recruitment_id,
+            parent=parent,
+            max_execution_time=parent.max_execution_time,
+            problem_payload_id=parent.problem_payload_id,
+            entity_index=parent.entity_index,
+            warm_start_job_id=parent.warm_start_job_id,
+            seed=seed,
+            algorithm=algorithms[i % len(algorithms)],
+        )
+        for i, seed in enumerate(seeds)
+    ]
+    with transaction.atomic():
+        OptimizationJob.objects.bulk_create(islands)
+        if parent.problem_payload_id:
+            # bulk_create skips save(), take the children's payload references here
+            ProblemPayload.objects.retain(parent.problem_payload_id, count)
+    logger.info(f"Split job {parent.id} into {count} islands ({', '.join(algorithms[:count])})")
+    return islands
+
+
+def merge_island_progress(islands: Iterable[OptimizationJob]) -> Tuple[List[Tuple[str, str, Dict[str, Any]]], List[OptimizationJob]]:
+    """
+    Merge the saved state of the given child jobs into their parents.
+
+    Returns (websocket messages for the parents, parents that completed with this merge or earlier
+    without their round being finished). The parents are locked for the merge, so a parent completes
+    once even with several listeners.
+    """
+    parent_ids = {island.parent_id for island in islands if island.parent_id}
+    if not parent_ids:
+        return [], []
+
+    now = timezone.now()
+    messages = []
+    completed_parents = []
+    with transaction.atomic():
+        parents = list(
+            OptimizationJob.objects.select_for_update().select_related('recruitment').filter(pk__in=parent_ids)
+        )
+        children: Dict[Any, List[OptimizationJob]] = {}
+        for child in OptimizationJob.objects.filter(parent_id__in=parent_ids).only(
+                'id', 'parent_id', 'status', 'current_iteration', 'started_at', 'final_solution'):
+            children.setdefault(child.parent_id, []).append(child)
+
+        progress_items = []
+        for parent in parents:
+            if parent.status in FINISHED_STATUSES:
+                if parent.status == 'completed' and parent.round_finished_at is None:
+                    # replayed update of a parent whose round was never finished (crash before the ack)
+                    completed_parents.append(parent)
+                continue
+            parent_children = children.get(parent.id, [])
+            base_iteration, base_solution = parent.current_iteration, parent.final_solution
+
+            best = max(
+                (child for child in parent_children if solution_fitness(child.final_solution) is not None),
+                key=lambda child: solution_fitness(child.final_solution),
+                default=None
+            )
+            if best is not None and solution_fitness(best.final_solution) != solution_fitness(parent.final_solution):
+                parent.final_solution = best.final_solution
+                if parent.first_solution is None:
+                    parent.first_solution = best.final_solution
+
+            started = [child.started_at for child in parent_children if child.started_at]
+            if parent.status == 'queued' and started:
+                parent.status = 'running'
+                parent.started_at = min(started)
+
+            # completed children report -1, the parent keeps the furthest iteration reached
+            iteration = max([child.current_iteration for child in parent_children] + [parent.current_iteration])
+            if iteration > parent.current_iteration and parent.final_solution is not None:
+                parent.current_iteration = iteration
+                progress_items.append((parent, iteration, parent.final_solution, base_iteration, base_solution))
+
+            if parent_children and all(child.status in FINISHED_STATUSES for child in parent_children):
+                parent.status = 'completed'
+                parent.completed_at = now
+                parent.current_iteration = -1
+                completed_parents.append(parent)
+            parent.updated_at = now
+
+        OptimizationJob.objects.bulk_update(
+            parents, ['final_solution', 'first_solution', 'status', 'started_at', 'current_iteration', 'completed_at', 'updated_at']
+        )
+        progress_rows = OptimizationProgress.objects.bulk_create(build_progress_rows(progress_items), ignore_conflicts=True)
+
+    for progress, (parent, iteration, solution, _, _) in zip(progress_rows, progress_items):
+        messages.append((str(parent.id), PROGRESS_MESSAGE, {
+            'job_id': str(parent.id),
+            'iteration': iteration,
+            'best_solution': solution,
+            'timestamp': progress.timestamp.isoformat()
+        }))
+    for parent in completed_parents:
+        messages.append((str(parent.id), COMPLETED_MESSAGE, {
+            'job_id': str(parent.id),
+            'status': 'completed',
+            'final_solution': parent.final_solution,
+            'timestamp': now.isoformat()
+        }))
+        logger.info(f"All islands of job {parent.id} finished, best fitness {solution_fitness(parent.final_solution)}")
+
+    for parent_id, parent_children in children.items():
+        migrate_genotypes(parent_id, parent_children)
+    return messages, completed_parents
+
+
+def migrate_genotypes(parent_id, islands: List[OptimizationJob], redis_client=None) -> int:
+    """
+    Ring migration between the running islands of a parent: each sends its best genotype to the next.
+
+    At most once per OPTIMIZER_ISLAND_MIGRATION_INTERVAL per parent (across processes); returns the
+    number of migrants sent. Never raises, a missed migration only slows convergence.
+    """
+    running = sorted(
+        (island for island in islands
+         if island.status == 'running' and (island.final_solution or {}).get('genotype')),
+        key=lambda island: str(island.id)
+    )
+    if len(running) < 2:
+        return 0
+
+    from .services import get_redis_client
+    interval = getattr(settings, 'OPTIMIZER_ISLAND_MIGRATION_INTERVAL', DEFAULT_MIGRATION_INTERVAL)
+    try:
+        redis_client = redis_client or get_redis_client()
+        if not redis_client.set(f"{MIGRATION_LOCK_PREFIX}{parent_id}", 1, nx=True, ex=max(1, int(interval))):
+            return 0
+
+        pipe = redis_client.pipeline(transaction=False)
+        for source, target in zip(running, running[1:] + running[:1]):
+            key = f"{MIGRANT_KEY_PREFIX}{target.id}"
+            pipe.rpush(key, json.dumps(source.final_solution['genotype']))
+            pipe.ltrim(key, -MAX_PENDING_MIGRANTS, -1)
+            pipe.expire(key, MIGRANT_TTL)
+        pipe.execute()
+        logger.info(f"Migrated best genotypes between {len(running)} islands of job {parent_id}")
+        return len(running)
+    except Exception as e:
+        logger.error(f"Failed to migrate genotypes between islands of job {parent_id}: {e}")
+        return 0
@@ -0,0 +1,275 @@
+"""
+Priority- and tenant-aware optimizer job queue.
+
+Jobs wait in Redis ordered per organization and are moved to the optimizer:jobs list (which
+optimizer workers BRPOP) only when that list is shorter than OPTIMIZER_QUEUE_DISPATCH_DEPTH, so
+the decision which job runs next is made as late as possible:
+
+- higher priority first (PRIORITY_HIGH is used by force_recruitment_optimization),
+- among organizations with equal head priority the least recently served one goes next,
+- FIFO within an organization and priority.
+
+Enqueue, dispatch and removal are Lua scripts, atomic across any number of Django processes and
+optimizer workers. Dispatch runs on enqueue, cancellation, first progress / completion of a job
+(a worker took a job or became idle) and on every scheduler tick.
+
+Every script gets all of its keys in KEYS (see QUEUE_KEYS); per-organization queues are ranges of
+one lexicographically ordered set instead of a key per organization.
+
+Keys:
+    optimizer:queue:tenants        ZSET  tenant -> -head_priority * 1e12 + last served clock
+    optimizer:queue:queued         ZSET  "{tenant}|{9 - priority}{sequence:015}|{job_id}", all scored 0,
+                                         so lexicographic order is dispatch order within a tenant
+    optimizer:queue:jobs           HASH  job_id -> payload (job JSON)
+    optimizer:queue:entries        HASH  job_id -> its member of optimizer:queue:queued
+    optimizer:queue:served         HASH  tenant -> clock of its last dispatch
+    optimizer:queue:counters       HASH  seq (enqueue sequence), clock (dispatch clock)
+    optimizer:queue:dispatched     HASH  job_id -> payload of a job moved to optimizer:jobs (for removal)
+    optimizer:queue:dispatched_at  ZSET  job_id -> dispatch time, pruned after DISPATCHED_TTL
+"""
+import json
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+from django.conf import settings
+
+from .services import get_redis_client
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+PRIORITY_LOW = 0
+PRIORITY_NORMAL = 1
+PRIORITY_HIGH = 2
+
+DISPATCH_LIST = "optimizer:jobs"
+QUEUE_PREFIX = "optimizer:queue:"
+# queue keys after the prefix, passed to every script as KEYS[1..8] (KEYS[9] is the dispatch list)
+QUEUE_KEYS = ('tenants', 'queued', 'jobs', 'entries', 'served', 'counters', 'dispatched', 'dispatched_at')
+# how long a dispatched payload is remembered for removal from the dispatch list (seconds)
+DISPATCHED_TTL = 24 * 3600
+
+# shared by the scripts: key names, queued member helpers and tenant position refresh
+_PRELUDE = """
+local tenants_key, queued_key, jobs_key, entries_key = KEYS[1], KEYS[2], KEYS[3], KEYS[4]
+local served_key, counters_key, dispatched_key, dispatched_at_key = KEYS[5], KEYS[6], KEYS[7], KEYS[8]
+local dispatch_list = KEYS[9]
+
+local function queued_member(tenant, priority, job_id)
+    local seq = redis.call('HINCRBY', counters_key, 'seq', 1)
+    return string.format('%s|%d%015d|%s', tenant, 9 - priority, seq, job_id)
+end
+
+local function tenant_head(tenant)
+    return redis.call('ZRANGEBYLEX', queued_key, '[' .. tenant .. '|', '[' .. tenant .. '|\\255', 'LIMIT', 0, 1)[1]
+end
+
+local function refresh_tenant(tenant)
+    local head = tenant_head(tenant)
+    if not head then
+        redis.call('ZREM', tenants_key, tenant)
+        return
+    end
+    local priority = 9 - tonumber(string.sub(head, #tenant + 2, #tenant + 2))
+    local served = tonumber(redis.call('HGET', served_key, tenant) or '0')
+    redis.call('ZADD', tenants_key, -priority * 1e12 + served, tenant)
+end
+"""
+
+_DISPATCH = """
+local function dispatch(depth, ttl, now)
+    local expired = redis.call('ZRANGEBYSCORE', dispatched_at_key, '-inf', now - ttl)
+    for _, job_id in ipairs(expired) do
+        redis.call('HDEL', dispatched_key, job_id)
+    end
+    redis.call('ZREMRANGEBYSCORE', dispatched_at_key, '-inf', now - ttl)
+
+    local moved = 0
+    while redis.call('LLEN', dispatch_list) < depth do
+        local tenant = redis.call('ZRANGE', tenants_key, 0, 0)[1]
+        if not tenant then
+            break
+        end
+        local member = tenant_head(tenant)
+        local job_id = string.sub(member, #tenant + 19)
+        local payload = redis.call('HGET', jobs_key, job_id)
+        redis.call('ZREM', queued_key, member)
+        redis.call('HDEL', jobs_key, job_id)
+        redis.call('HDEL', entries_key, job_id)
+        redis.call('HSET', served_key, tenant, redis.call('HINCRBY', counters_key, 'clock', 1))
+        refresh_tenant(tenant)
+        if payload then
+            redis.call('LPUSH', dispatch_list, payload)
+            redis.call('HSET', dispatched_key, job_id, payload)
+            redis.call('ZADD', dispatched_at_key, now, job_id)
+            moved = moved + 1
+        end
+    end
+    return moved
+end
+"""
+
+# ARGV: depth, ttl, now, job_id, tenant, priority, payload
+ENQUEUE_SCRIPT = _PRELUDE + _DISPATCH + """
+local job_id, tenant, priority = ARGV[4], ARGV[5], tonumber(ARGV[6])
+local member = queued_member(tenant, priority, job_id)
+redis.call('ZADD', queued_key, 0, member)
+redis.call('HSET', jobs_key, job_id, ARGV[7])
+redis.call('HSET', entries_key, job_id, member)
+refresh_tenant(tenant)
+return dispatch(tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]))
+"""
+
+# ARGV: depth, ttl, now
+DISPATCH_SCRIPT = _PRELUDE + _DISPATCH + """
+return dispatch(tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]))
+"""
+
+# ARGV: job_id; returns 1 when removed from the queue, 2 from the dispatch list
+REMOVE_SCRIPT = _PRELUDE + """
+local job_id = ARGV[1]
+local member = redis.call('HGET', entries_key, job_id)
+if member then
+    local tenant = string.match(member, '^(.-)|')
+    redis.call('ZREM', queued_key, member)
+    redis.call('HDEL', jobs_key, job_id)
+    redis.call('HDEL', entries_key, job_id)
+    refresh_tenant(tenant)
+    return 1
+end
+local payload = redis.call('HGET', dispatched_key, job_id)
+if payload then
+    redis.call('HDEL', dispatched_key, job_id)
+    redis.call('ZREM', dispatched_at_key, job_id)
+    if redis.call('LREM', dispatch_list, 1, payload) > 0 then
+        return 2
+    end
+end
+return 0
+"""
+
+# ARGV: job_id, priority; returns 1 when the job was queued
+REPRIORITIZE_SCRIPT = _PRELUDE + """
+local job_id, priority = ARGV[1], tonumber(ARGV[2])
+local member = redis.call('HGET', entries_key, job_id)
+if not member then
+    return 0
+end
+local tenant = string.match(member, '^(.-)|')
+local reprioritized = queued_member(tenant, priority, job_id)
+redis.call('ZREM', queued_key, member)
+redis.call('ZADD', queued_key, 0, reprioritized)
+redis.call('HSET', entries_key, job_id, reprioritized)
+refresh_tenant(tenant)
+return 1
+"""
+
+
+def dispatch_depth() -> int:
+    return max(1, getattr(settings, 'OPTIMIZER_QUEUE_DISPATCH_DEPTH', 1))
+
+
+class JobQueue:
+    """Fair-share job queue in front of the optimizer:jobs list"""
+
+    def __init__(self, redis_client=None, prefix: str = QUEUE_PREFIX, dispatch_list: str = DISPATCH_LIST):
+        self.redis_client = redis_client or get_redis_client()
+        self.prefix = prefix
+        self.dispatch_list = dispatch_list
+        self.keys = [f"{prefix}{name}" for name in QUEUE_KEYS] + [dispatch_list]
+        self._enqueue = self.redis_client.register_script(ENQUEUE_SCRIPT)
+        self._dispatch = self.redis_client.register_script(DISPATCH_SCRIPT)
+        self._remove = self.redis_client.register_script(REMOVE_SCRIPT)
+        self._reprioritize = self.redis_client.register_script(REPRIORITIZE_SCRIPT)
+
+    def enqueue(self, job_id: str, tenant: str, payload: Dict[str, Any], priority: int = PRIORITY_NORMAL) -> int:
+        """Queue a job and dispatch what fits; returns number of jobs moved to the dispatch list"""
+        moved = self._enqueue(keys=self.keys, args=[
+            dispatch_depth(), DISPATCHED_TTL, time.time(), job_id, tenant, priority, json.dumps(payload)
+        ])
+        logger.info(f"Queued job {job_id} for tenant {tenant} with priority {priority}")
+        print(f"[REDIS] Queued job {job_id} (tenant {tenant}, priority {priority})")
+        return moved
+
+    def dispatch(self) -> int:
+        """Move queued jobs to the dispatch list while it is shorter than the dispatch depth"""
+        return self._dispatch(keys=self.keys, args=[dispatch_depth(), DISPATCHED_TTL, time.time()])
+
+    def remove(self, job_id: str) -> bool:
+        """Remove a job that no worker has taken yet"""
+        removed = self._remove(keys=self.keys, args=[job_id])
+        if removed:
+            logger.info(f"Removed job {job_id} from the {'queue' if removed == 1 else 'dispatch list'}")
+        return bool(removed)
+
+    def reprioritize(self, job_id: str, priority: int) -> bool:
+        """Change priority of a queued job (it goes to the end of its new priority level)"""
+        return bool(self._reprioritize(keys=self.keys, args=[job_id, priority]))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Queue depth and ordering: dispatch list, tenants in dispatch order and projected job order"""
+        pipe = self.redis_client.pipeline(transaction=True)
+        pipe.lrange(self.dispatch_list, 0, -1)
+        pipe.zrange(f"{self.prefix}tenants", 0, -1)
+        pipe.zrange(f"{self.prefix}queued", 0, -1)
+        pipe.hgetall(f"{self.prefix}served")
+        dispatch_payloads, tenants, members, served = pipe.execute()
+
+        tenant_jobs = {tenant: [] for tenant in tenants}
+        priorities = {}
+        for member in members:
+            tenant, job_id, priority = _parse_member(member)
+            tenant_jobs.setdefault(tenant, []).append(job_id)
+            priorities[job_id] = priority
+
+        return {
+            # optimizer workers BRPOP, so the right end of the list is taken first
+            'dispatched': [_payload_job_id(p) for p in reversed(dispatch_payloads)],
+            'queued': sum(len(jobs) for jobs in tenant_jobs.values()),
+            'tenants': [
+                {
+                    'tenant': tenant,
+                    'jobs': [{'job_id': job_id, 'priority': priorities[job_id]} for job_id in jobs],
+                }
+                for tenant, jobs in tenant_jobs.items()
+            ],
+            'order': projected_order(tenant_jobs, priorities, served),
+        }
+
+
+def projected_order(tenant_jobs: Dict[str, List[str]], priorities: Dict[str, int], served: Dict[str, str]) -> List[str]:
+    """Order in which queued jobs would be dispatched if nothing else arrived (mirrors the dispatch script)"""
+    queues = {tenant: list(jobs) for tenant, jobs in tenant_jobs.items() if jobs}
+    last_served = {tenant: int(served.get(tenant, 0)) for tenant in queues}
+    clock = max([int(v) for v in served.values()] or [0])
+    order = []
+    while queues:
+        tenant = min(queues, key=lambda t: (-int(priorities.get(queues[t][0], 0)), last_served[t], t))
+        order.append(queues[tenant].pop(0))
+        clock += 1
+        last_served[tenant] = clock
+        if not queues[tenant]:
+            del queues[tenant]
+    return order
+
+
+def _parse_member(member: str) -> Tuple[str, str, int]:
+    """(tenant, job_id, priority) of an optimizer:queue:queued member"""
+    tenant, rank, job_id = member.split('|', 2)
+    return tenant, job_id, 9 - int(rank[0])
+
+
+def _payload_job_id(payload: str) -> Optional[str]:
+    try:
+        # RawJobData carries the job id in recruitment_id
+        return json.loads(payload).get('recruitment_id')
+    except (json.JSONDecodeError, AttributeError):
+        return None
+
+
+def dispatch_queued_jobs():
+    """Dispatch step for event hooks; never raises"""
+    try:
+        JobQueue().dispatch()
+    except Exception as e:
+        logger.error(f"Failed to dispatch queued optimizer jobs: {e}")
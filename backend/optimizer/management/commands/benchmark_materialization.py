@@ -0,0 +1,34 @@
+import json
+from django.core.management.base import BaseCommand
+from optimizer.benchmarks import benchmark_materialization
+
+
+class Command(BaseCommand):
+    help = 'Benchmark convert_solution_to_meetings on synthetic recruitments of growing size (data is rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=str,
+            default='100x10,1000x50,5000x200',
+            help='comma separated STUDENTSxGROUPS pairs (default: 100x10,1000x50,5000x200)'
+        )
+        parser.add_argument('--seed', type=int, default=0, help='random seed for synthetic data')
+        parser.add_argument('--json', action='store_true', help='print results as JSON')
+
+    def handle(self, *args, **options):
+        results = []
+        for pair in options['sizes'].split(','):
+            num_students, num_groups = (int(x) for x in pair.lower().split('x'))
+            results.append(benchmark_materialization(num_students, num_groups, seed=options['seed']))
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write(f"{'students':>10} {'groups':>8} {'queries':>8} {'seconds':>10} {'us/student':>11}")
+        for r in results:
+            per_student = r['seconds'] / max(1, r['students']) * 1e6
+            self.stdout.write(
+                f"{r['students']:>10} {r['groups']:>8} {r['queries']:>8} {r['seconds']:>10.3f} {per_student:>11.1f}"
+            )
@@ -0,0 +1,70 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_databases, teardown_databases
+from optimizer.benchmarks import PIPELINE_STAGES, compare_pipeline_reports, pipeline_report
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the optimization pipeline stages (time, queries, peak memory) on synthetic recruitments '
+        'in a throwaway test database; optionally compare against a stored baseline report'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=str,
+            default='100x10,1000x50,5000x250',
+            help='comma separated PARTICIPANTSxGROUPS pairs, up to 20000x1000 (default: 100x10,1000x50,5000x250)'
+        )
+        parser.add_argument('--seed', type=int, default=0, help='random seed for synthetic data')
+        parser.add_argument('--repeat', type=int, default=3, help='timed runs per stage, the median is reported')
+        # the services log to stdout, so the machine-readable report always goes to a file
+        parser.add_argument('--output', type=str, help='write the JSON report to this file (e.g. a new baseline)')
+        parser.add_argument('--baseline', type=str, help='baseline JSON report; exit with an error on regressions')
+        parser.add_argument('--time-tolerance', type=float, default=0.5,
+                            help='allowed relative wall time increase over the baseline (default: 0.5)')
+        parser.add_argument('--memory-tolerance', type=float, default=0.25,
+                            help='allowed relative peak memory increase over the baseline (default: 0.25)')
+
+    def handle(self, *args, **options):
+        sizes = []
+        for pair in options['sizes'].split(','):
+            try:
+                sizes.append(tuple(int(x) for x in pair.lower().split('x')))
+            except ValueError:
+                raise CommandError(f"Invalid size '{pair}', expected PARTICIPANTSxGROUPS")
+
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+
+        # synthetic data never touches the configured database
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            report = pipeline_report(sizes, seed=options['seed'], repeat=options['repeat'])
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+
+        self.stdout.write(f"{'size':>12} {'stage':<38} {'queries':>8} {'seconds':>10} {'peak KB':>10}")
+        for result in report['results']:
+            for name in PIPELINE_STAGES:
+                stage = result['stages'][name]
+                self.stdout.write(
+                    f"{result['size']:>12} {name:<38} {stage['queries']:>8} "
+                    f"{stage['seconds']:>10.4f} {stage['peak_memory_kb']:>10.1f}"
+                )
+
+        if baseline is not None:
+            regressions = compare_pipeline_reports(
+                report, baseline,
+                time_tolerance=options['time_tolerance'], memory_tolerance=options['memory_tolerance']
+            )
+            if regressions:
+                raise CommandError('Regressions against the baseline:\n' + '\n'.join(regressions))
+            self.stderr.write('No regressions against the baseline')
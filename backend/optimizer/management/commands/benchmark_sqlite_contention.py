@@ -0,0 +1,54 @@
+import json
+from django.core.management.base import BaseCommand
+from optimizer.benchmarks import (
+    CONTENTION_ROLES, benchmark_sqlite_contention, run_contention_role, setup_contention_dataset
+)
+
+
+class Command(BaseCommand):
+    help = ('Run the web, listener and scheduler roles as concurrent processes on one fresh SQLite file '
+            'and report latencies and "database is locked" errors per SQLITE_PROFILE')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--profiles',
+            type=str,
+            default='default,concurrent',
+            help='comma separated SQLITE_PROFILE values to compare (default: default,concurrent)'
+        )
+        parser.add_argument('--duration', type=float, default=10.0, help='seconds every role runs (default: 10)')
+        parser.add_argument('--seed', type=int, default=0, help='random seed for synthetic data')
+        parser.add_argument('--json', action='store_true', help='print results as JSON')
+        # internal: one process of a run, started by the benchmark itself
+        parser.add_argument('--role', choices=('setup',) + CONTENTION_ROLES, help='run a single role (internal)')
+        parser.add_argument('--dataset', type=str, help='dataset ids from the setup role (internal)')
+
+    def handle(self, *args, **options):
+        if options['role'] == 'setup':
+            self.stdout.write(json.dumps(setup_contention_dataset(seed=options['seed'])))
+            return
+        if options['role']:
+            stats = run_contention_role(options['role'], json.loads(options['dataset']), options['duration'], options['seed'])
+            self.stdout.write(json.dumps(stats))
+            return
+
+        results = []
+        for profile in options['profiles'].split(','):
+            results.extend(benchmark_sqlite_contention(profile.strip(), options['duration'], seed=options['seed']))
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        def ms(value):
+            return f'{value:>9.1f}' if value is not None else f"{'-':>9}"
+
+        self.stdout.write(f"{'profile':>11} {'role':>10} {'ops':>6} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+        for r in results:
+            if r.get('failed'):
+                self.stdout.write(f"{r.get('profile', '?'):>11} {r['role']:>10} failed")
+                continue
+            self.stdout.write(
+                f"{r['profile']:>11} {r['role']:>10} {r['ops']:>6} {r['errors']:>7} "
+                f"{ms(r['p50_ms'])} {ms(r['p95_ms'])} {ms(r['max_ms'])}"
+            )
@@ -0,0 +1,78 @@
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from optimizer.problem_generator import PREFERENCE_DISTRIBUTIONS, write_problem_data
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate synthetic problem_data JSON (no database needed) with tunable size, tightness and '
+        'preference distributions; the output is streamed, so very large instances fit in memory'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=200, help='number of students (default: 200)')
+        parser.add_argument('--groups', type=int, default=40, help='number of subject groups (default: 40)')
+        parser.add_argument('--subjects', type=int, help='number of subjects (default: groups / 3)')
+        parser.add_argument('--rooms', type=int, help='number of rooms (default: enough for a half-full cycle)')
+        parser.add_argument('--teachers', type=int, help='number of teachers (default: groups / 4)')
+        parser.add_argument('--timeslots-daily', type=int, default=32, help='timeslots per day (default: 32)')
+        parser.add_argument('--days', type=int, default=7, choices=[7, 14, 28], help='days in cycle (default: 7)')
+        parser.add_argument('--subjects-per-student', type=str, default='2,5',
+                            help='MIN,MAX subjects of a student (default: 2,5)')
+        parser.add_argument('--tags', type=int, default=4, help='number of room / group tags (default: 4)')
+        parser.add_argument('--capacity-slack', type=float, default=0.2,
+                            help='spare group seats per student of a subject, negative over-subscribes (default: 0.2)')
+        parser.add_argument('--unavailability', type=float, default=0.1,
+                            help='average unavailable fraction of the cycle per room / teacher / student (default: 0.1)')
+        parser.add_argument('--preference-distribution', choices=PREFERENCE_DISTRIBUTIONS, default='log',
+                            help='distribution of preference weights (default: log)')
+        parser.add_argument('--preference-density', type=float, default=0.15,
+                            help='average fraction of timeslots a user weights (default: 0.15)')
+        parser.add_argument('--max-weight', type=int, default=100, help='largest preference weight (default: 100)')
+        parser.add_argument('--seed', type=int, default=0, help='random seed, the same seed gives the same output')
+        parser.add_argument('--job', action='store_true',
+                            help='write a job input ({recruitment_id, max_execution_time, problem_data}) '
+                                 'as in optimizer_service/data/input')
+        parser.add_argument('--max-execution-time', type=int, default=300, help='max_execution_time of --job')
+        parser.add_argument('--output', type=str, default='-', help='output file (default: stdout)')
+
+    def handle(self, *args, **options):
+        try:
+            low, high = (int(x) for x in options['subjects_per_student'].split(','))
+        except ValueError:
+            raise CommandError("--subjects-per-student expects MIN,MAX")
+        if low < 1 or high < low:
+            raise CommandError("--subjects-per-student expects 1 <= MIN <= MAX")
+
+        job = None
+        if options['job']:
+            job = {
+                'recruitment_id': f"synthetic-{options['students']}x{options['groups']}-{options['seed']}",
+                'max_execution_time': options['max_execution_time'],
+            }
+
+        generator_options = {
+            'num_subjects': options['subjects'],
+            'num_rooms': options['rooms'],
+            'num_teachers': options['teachers'],
+            'timeslots_daily': options['timeslots_daily'],
+            'days_in_cycle': options['days'],
+            'capacity_slack': options['capacity_slack'],
+            'unavailability': options['unavailability'],
+            'subjects_per_student': (low, high),
+            'num_tags': options['tags'],
+            'preference_distribution': options['preference_distribution'],
+            'preference_density': options['preference_density'],
+            'max_weight': options['max_weight'],
+            'seed': options['seed'],
+        }
+        try:
+            if options['output'] == '-':
+                write_problem_data(sys.stdout, options['students'], options['groups'], job=job, **generator_options)
+                sys.stdout.write('\n')
+                return
+            with open(options['output'], 'w') as f:
+                write_problem_data(f, options['students'], options['groups'], job=job, **generator_options)
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stderr.write(f"problem_data written to {options['output']}")
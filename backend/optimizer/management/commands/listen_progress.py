@@ -1,6 +1,9 @@
 from django.core.management.base import BaseCommand
 from optimizer.services import ProgressListener
+from optimizer.async_listener import AsyncProgressListener, DEFAULT_FLUSH_INTERVAL
+from optimizer.stream_listener import StreamProgressListener
 from optimizer.logger import get_logger
+import asyncio
 import logging
 import signal
 import sys
@@ -22,6 +25,29 @@ class Command(BaseCommand):
             action='store_true',
             help='Enable verbose logging',
         )
+        parser.add_argument(
+            '--async',
+            action='store_true',
+            dest='use_async',
+            help='Use the asyncio listener (coalesced, batched database writes)',
+        )
+        parser.add_argument(
+            '--streams',
+            action='store_true',
+            help='Consume the durable progress stream through a consumer group (several listeners can run at once)',
+        )
+        parser.add_argument(
+            '--consumer',
+            type=str,
+            default=None,
+            help='Consumer name in stream mode (default: hostname-pid); reuse it to recover own pending entries',
+        )
+        parser.add_argument(
+            '--flush-interval',
+            type=float,
+            default=DEFAULT_FLUSH_INTERVAL,
+            help=f'Seconds to coalesce updates before writing them in async mode (default: {DEFAULT_FLUSH_INTERVAL})',
+        )
     
     def handle(self, *args, **options):
         if options['verbose']:
@@ -33,6 +59,14 @@ class Command(BaseCommand):
         signal.signal(signal.SIGINT, self.signal_handler)
         signal.signal(signal.SIGTERM, self.signal_handler)
         
+        if options['streams']:
+            self.handle_streams(options['consumer'])
+            return
+        
+        if options['use_async']:
+            self.handle_async(options['flush_interval'])
+            return
+        
         self.stdout.write(
             self.style.SUCCESS('Starting Redis progress listener...')
         )
@@ -62,6 +96,54 @@ class Command(BaseCommand):
                     self.style.SUCCESS('Progress listener stopped.')
                 )
     
+    def handle_streams(self, consumer):
+        """Run StreamProgressListener until SIGINT/SIGTERM"""
+        listener = StreamProgressListener(consumer=consumer)
+        self.stdout.write(
+            self.style.SUCCESS(f'Starting Redis stream progress listener {listener.consumer}...')
+        )
+
+        def stop(sig, frame):
+            self.stdout.write(self.style.WARNING(f'Received signal {sig}, shutting down...'))
+            listener.stop()
+
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGTERM, stop)
+        try:
+            listener.run()
+        except Exception as e:
+            self.stdout.write(
+                self.style.ERROR(f'Error in progress listener: {e}')
+            )
+            logger.exception("Progress listener error")
+        self.stdout.write(
+            self.style.SUCCESS('Progress listener stopped.')
+        )
+    
+    def handle_async(self, flush_interval):
+        """Run AsyncProgressListener in an event loop until SIGINT/SIGTERM"""
+        self.stdout.write(
+            self.style.SUCCESS(f'Starting async Redis progress listener (flush interval {flush_interval}s)...')
+        )
+        listener = AsyncProgressListener(flush_interval=flush_interval)
+
+        async def main():
+            loop = asyncio.get_running_loop()
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                loop.add_signal_handler(sig, listener.stop)
+            await listener.run()
+
+        try:
+            asyncio.run(main())
+        except Exception as e:
+            self.stdout.write(
+                self.style.ERROR(f'Error in progress listener: {e}')
+            )
+            logger.exception("Progress listener error")
+        self.stdout.write(
+            self.style.SUCCESS('Progress listener stopped.')
+        )
+    
     def signal_handler(self, sig, frame):
         """Handle shutdown signals"""
         self.stdout.write(
@@ -1,10 +1,82 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.conf import settings
+from django.utils import timezone
+from datetime import timedelta
+import hashlib
 import json
 import uuid
 
 
+class ProblemPayloadManager(models.Manager):
+    def intern(self, data) -> 'ProblemPayload':
+        """Store data once under its content hash and take a reference to it"""
+        encoded = ProblemPayload.encode(data)
+        content_hash = hashlib.sha256(encoded).hexdigest()
+        with transaction.atomic():
+            # the row lock keeps a concurrent release() from deleting the payload before it is referenced;
+            # only() keeps an existing multi-MB payload from being loaded just to reference it
+            payload, created = self.select_for_update().only('content_hash').get_or_create(
+                content_hash=content_hash,
+                defaults={'data': data, 'size_bytes': len(encoded), 'ref_count': 1}
+            )
+            if not created:
+                self.filter(pk=content_hash).update(ref_count=models.F('ref_count') + 1)
+        return payload
+
+    def retain(self, content_hash: str, count: int = 1):
+        """Take references for jobs created without save() (bulk_create)"""
+        self.filter(pk=content_hash).update(ref_count=models.F('ref_count') + count)
+
+    def release(self, content_hash: str):
+        """Drop a reference; the payload is removed once no job references it"""
+        self.filter(pk=content_hash).update(ref_count=models.F('ref_count') - 1)
+        self.filter(pk=content_hash, ref_count__lte=0, jobs__isnull=True).delete()
+
+    def collect_garbage(self, min_age: timedelta = timedelta(hours=1)) -> int:
+        """
+        Recompute reference counts from jobs and delete unreferenced payloads, returns deleted count.
+
+        Payloads younger than min_age are kept, a job may be about to reference them.
+        """
+        for content_hash, ref_count, count in self.annotate(jobs_count=models.Count('jobs')).values_list(
+            'content_hash', 'ref_count', 'jobs_count'
+        ):
+            if ref_count != count:
+                self.filter(pk=content_hash).update(ref_count=count)
+        deleted, _ = self.filter(
+            ref_count__lte=0, jobs__isnull=True, created_at__lt=timezone.now() - min_age
+        ).delete()
+        return deleted
+
+
+class ProblemPayload(models.Model):
+    """
+    Content-addressed problem_data shared by optimization jobs.
+
+    Consecutive rounds of a recruitment usually submit identical problems, so each distinct
+    payload is stored once, keyed by the sha256 of its canonical JSON, and reference counted.
+    """
+    content_hash = models.CharField(max_length=64, primary_key=True)
+    data = models.JSONField()
+    size_bytes = models.IntegerField(default=0)
+    ref_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = ProblemPayloadManager()
+
+    @staticmethod
+    def encode(data) -> bytes:
+        """Canonical JSON encoding used for hashing"""
+        return json.dumps(data, sort_keys=True, separators=(',', ':')).encode()
+
+    def __str__(self):
+        return f"Payload {self.content_hash[:12]} ({self.size_bytes} B, {self.ref_count} refs)"
+
+
+_UNSET = object()
+
+
 class OptimizationJob(models.Model):
     STATUS_CHOICES = [
         ('queued', 'Queued'),
@@ -19,7 +91,15 @@ class OptimizationJob(models.Model):
     recruitment = models.ForeignKey('scheduling.Recruitment', on_delete=models.CASCADE, related_name='optimization_jobs')
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
     max_execution_time = models.IntegerField(help_text="Maximum execution time in seconds")
-    problem_data = models.JSONField()
+    # problem data is stored deduplicated, use the problem_data property to read/write it
+    problem_payload = models.ForeignKey(
+        ProblemPayload,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='jobs',
+        db_column='problem_data_hash'
+    )
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -31,13 +111,59 @@ class OptimizationJob(models.Model):
     first_solution = models.JSONField(null=True, blank=True)
     
     current_iteration = models.IntegerField(default=0)
+    # set once finish_optimization_round has converted the solution or queued the next round;
+    # a completed job without it is finished again when its completion update is replayed
+    round_finished_at = models.DateTimeField(null=True, blank=True)
+
+    # ids of students / subjects / subject groups / rooms in problem_data index order (see optimizer.warm_start)
+    entity_index = models.JSONField(null=True, blank=True)
+    # previous round whose best genotype seeded this job's initial population
+    warm_start_job = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
+    # island model (optimizer.islands): a logical job runs as child sub-runs with distinct seeds,
+    # the parent holds the merged progress and is never queued itself
+    parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='islands')
+    seed = models.BigIntegerField(null=True, blank=True)
+    algorithm = models.CharField(max_length=50, blank=True, default='')
+
+    # pre-flight diagnosis of problem_data (optimizer.feasibility), errors make the job fail without being queued
+    feasibility = models.JSONField(null=True, blank=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # jobs of a recruitment by status, newest first (progress view, warm start, scheduler)
+            models.Index(fields=['recruitment', 'status', '-created_at'], name='job_rec_status_created_idx'),
+            # job list: top-level jobs (parent IS NULL) or the islands of one job, newest first
+            models.Index(fields=['parent', '-created_at'], name='job_parent_created_idx'),
+        ]
     
     def __str__(self):
         return f"Job {self.id} - {self.status}"
 
+    @property
+    def problem_data(self):
+        pending = self.__dict__.get('_pending_problem_data', _UNSET)
+        if pending is not _UNSET:
+            return pending
+        return self.problem_payload.data if self.problem_payload_id else None
+
+    @problem_data.setter
+    def problem_data(self, value):
+        self.__dict__['_pending_problem_data'] = value
+
+    def save(self, *args, **kwargs):
+        pending = self.__dict__.pop('_pending_problem_data', _UNSET)
+        previous_hash = None
+        if pending is not _UNSET:
+            previous_hash = self.problem_payload_id
+            self.problem_payload = ProblemPayload.objects.intern(pending)
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = set(kwargs['update_fields']) | {'problem_payload'}
+        super().save(*args, **kwargs)
+        if previous_hash:
+            ProblemPayload.objects.release(previous_hash)
+
 
 class OptimizationProgress(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -47,13 +173,37 @@ class OptimizationProgress(models.Model):
     timestamp = models.DateTimeField(auto_now_add=True)
     
     # best solution data (includes fitness and all solution details such as genotype)
-    best_solution = models.JSONField()
+    # keyframes store it whole, delta rows leave it empty and store the changes against the previous row
+    best_solution = models.JSONField(null=True, blank=True)
+    delta = models.JSONField(null=True, blank=True)
+    fitness = models.FloatField(null=True, blank=True)
+    # iteration of the keyframe this row's delta chain starts at (null for rows stored before deltas)
+    keyframe_iteration = models.IntegerField(null=True, blank=True)
+    chain_length = models.IntegerField(default=0)
     
     class Meta:
         ordering = ['-timestamp']
+        # (job, iteration) is also the index for a job's rows by iteration, either direction
         unique_together = ['job', 'iteration']
+        indexes = [
+            # latest row of a job in the default ordering (job.progress_updates.first())
+            models.Index(fields=['job', '-timestamp'], name='progress_job_timestamp_idx'),
+        ]
     
     def __str__(self):
-        return f"Progress for Job {self.job.id} - Iteration {self.iteration}"
+        return f"Progress for Job {self.job_id} - Iteration {self.iteration}"
+
+    @property
+    def is_keyframe(self) -> bool:
+        return self.delta is None
+
+    def get_solution(self):
+        """Full best solution of this iteration, rebuilt from the keyframe chain for delta rows"""
+        if self.is_keyframe:
+            return self.best_solution
+        if '_solution' not in self.__dict__:
+            from .progress_storage import attach_solutions
+            attach_solutions([self])
+        return self.__dict__['_solution']
 
 
@@ -0,0 +1,274 @@
+"""
+Synthetic problem_data of any size, a Python port of optimizer_service utils/TestCaseGenerator.
+
+The output has the format of services.convert_preferences_to_problem_data: constraints with every
+DEFAULT_CONSTRAINTS key, preferences built as DEFAULT_USER_PREFERENCES dicts and converted with
+preferences_to_positional. Unlike the C++ generator it is reproducible (everything follows `seed`)
+and it also generates tags, teacher / student unavailability, room capacities and weights. As in
+the backend, PreferredGroups has one weight per group (the C++ generator wrote one per subject of
+the student, which the Evaluator reads as group indices).
+
+Problems are feasible by construction (analyze_feasibility finds no errors) unless made tight:
+
+- capacity_slack: the groups of a subject hold (1 + capacity_slack) x its students; 0 is exactly
+  enough, a negative value over-subscribes every subject,
+- unavailability: average fraction of the cycle each room, teacher and student is unavailable,
+  in blocks of whole timeslot ranges within a day.
+
+Preference weights follow preference_distribution: 'log' (P(w) ~ 1 / (w + 1) as in the C++
+generator), 'uniform' or 'none' (all preferences disabled); preference_density is the average
+fraction of the cycle's timeslots a user has a weight for.
+
+write_problem_data streams the JSON: the constraints are kept in memory (a few integers per person),
+the preferences, whose PreferredTimeslots / PreferredGroups dominate large instances, are generated
+and written one user at a time.
+"""
+import json
+import math
+import random
+from itertools import accumulate
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .services import preferences_to_positional
+
+PREFERENCE_DISTRIBUTIONS = ('log', 'uniform', 'none')
+# same choices as the synthetic recruitments in optimizer.benchmarks
+SUBJECT_DURATIONS = (2, 4, 4, 6)
+# share of rooms having each tag, share of groups requiring one
+ROOM_TAG_PROBABILITY = 0.3
+GROUP_TAG_PROBABILITY = 0.2
+
+
+def _split(total: int, parts: int, rng: random.Random, weights: Optional[List[float]] = None) -> List[int]:
+    """total split into parts, each at least 1, the rest drawn in proportion to weights"""
+    counts = [1] * parts
+    for index in rng.choices(range(parts), weights=weights, k=max(0, total - parts)):
+        counts[index] += 1
+    return counts
+
+
+def _blocks(rng: random.Random, density: float, timeslots_daily: int, days_in_cycle: int) -> List[int]:
+    """Sorted unavailable timeslots, about density x cycle on average, in ranges within a day"""
+    total = timeslots_daily * days_in_cycle
+    target = min(total, int(round(rng.uniform(0, 2 * density) * total))) if density > 0 else 0
+    busy = set()
+    while len(busy) < target:
+        day = rng.randrange(days_in_cycle)
+        length = rng.randint(1, max(1, timeslots_daily // 2))
+        start = rng.randrange(timeslots_daily - length + 1)
+        busy.update(range(day * timeslots_daily + start, day * timeslots_daily + start + length))
+    return sorted(busy)
+
+
+def build_constraints(num_students: int, num_groups: int, num_subjects: Optional[int] = None,
+                      num_rooms: Optional[int] = None, num_teachers: Optional[int] = None,
+                      timeslots_daily: int = 32, days_in_cycle: int = 7, capacity_slack: float = 0.2,
+                      unavailability: float = 0.1, subjects_per_student: Tuple[int, int] = (2, 5),
+                      num_tags: int = 4, seed: int = 0) -> Dict[str, Any]:
+    """
+    Constraints section of a synthetic problem_data (all DEFAULT_CONSTRAINTS keys).
+
+    Defaults derived from num_groups: 3 groups per subject, 4 per teacher and rooms for half of the
+    cycle's room timeslots to be taken.
+    """
+    if num_students < 1 or num_groups < 1:
+        raise ValueError("num_students and num_groups must be positive")
+    rng = random.Random(f'{seed}:constraints')
+    total_timeslots = timeslots_daily * days_in_cycle
+    num_subjects = min(num_subjects or max(1, num_groups // 3), num_groups)
+    num_teachers = num_teachers or max(1, num_groups // 4)
+    durations = [min(rng.choice(SUBJECT_DURATIONS), timeslots_daily) for _ in range(num_subjects)]
+
+    # popular subjects have more groups and more students
+    popularity = [1 / (rank + 1) ** 0.7 for rank in range(num_subjects)]
+    rng.shuffle(popularity)
+    groups_per_subject = _split(num_groups, num_subjects, rng, popularity)
+    group_subject = [subject for subject, count in enumerate(groups_per_subject) for _ in range(count)]
+
+    low, high = subjects_per_student
+    subject_cum_weights = list(accumulate(groups_per_subject))
+    students_subjects = []
+    for _ in range(num_students):
+        k = min(rng.randint(low, high), num_subjects)
+        chosen = set()
+        while len(chosen) < k:
+            chosen.add(rng.choices(range(num_subjects), cum_weights=subject_cum_weights)[0])
+        students_subjects.append(sorted(chosen))
+
+    demand = [0] * num_subjects
+    for subjects in students_subjects:
+        for subject in subjects:
+            demand[subject] += 1
+    groups_capacity = []
+    for subject, count in enumerate(groups_per_subject):
+        seats = max(count, math.ceil(demand[subject] * (1 + capacity_slack)))
+        groups_capacity += [seats // count + (1 if i < seats % count else 0) for i in range(count)]
+
+    if num_rooms is None:
+        room_timeslots = sum(durations[subject] for subject in group_subject)
+        num_rooms = max(1, math.ceil(room_timeslots / (0.5 * total_timeslots)))
+    # every group fits some room, most rooms are sized like a typical group
+    largest = max(groups_capacity)
+    rooms_capacity = [largest] + [rng.choice(groups_capacity) + rng.randint(0, 10) for _ in range(num_rooms - 1)]
+
+    rooms_tags = [[room, tag] for room in range(num_rooms) for tag in range(num_tags) if rng.random() < ROOM_TAG_PROBABILITY]
+    # a group only requires a tag some room big enough for the whole group has
+    tag_capacity = {}
+    for room, tag in rooms_tags:
+        tag_capacity[tag] = max(tag_capacity.get(tag, 0), rooms_capacity[room])
+    groups_tags = []
+    for group, capacity in enumerate(groups_capacity):
+        tags = [tag for tag, room_capacity in sorted(tag_capacity.items()) if room_capacity >= capacity]
+        if tags and rng.random() < GROUP_TAG_PROBABILITY:
+            groups_tags.append([group, rng.choice(tags)])
+
+    groups = list(range(num_groups))
+    rng.shuffle(groups)
+    if num_teachers <= num_groups:
+        loads = _split(num_groups, num_teachers, rng)
+    else:
+        loads = [1] * num_groups + [0] * (num_teachers - num_groups)
+    teachers_groups = []
+    for count in loads:
+        teachers_groups.append(sorted(groups[:count]))
+        groups = groups[count:]
+
+    def busy(density):
+        return _blocks(rng, density, timeslots_daily, days_in_cycle)
+
+    return {
+        'TimeslotsDaily': timeslots_daily,
+        'DaysInCycle': days_in_cycle,
+        'NumSubjects': num_subjects,
+        'NumGroups': num_groups,
+        'NumTeachers': num_teachers,
+        'NumStudents': num_students,
+        'NumRooms': num_rooms,
+        'NumTags': num_tags,
+        'StudentWeights': [rng.randint(1, 10) for _ in range(num_students)],
+        'TeacherWeights': [rng.randint(1, 10) for _ in range(num_teachers)],
+        'MinStudentsPerGroup': [1] * num_groups,
+        'SubjectsDuration': durations,
+        'GroupsPerSubject': groups_per_subject,
+        'GroupsCapacity': groups_capacity,
+        'RoomsCapacity': rooms_capacity,
+        'GroupsTags': groups_tags,
+        'RoomsTags': rooms_tags,
+        'StudentsSubjects': students_subjects,
+        'TeachersGroups': teachers_groups,
+        'RoomsUnavailabilityTimeslots': [busy(unavailability) for _ in range(num_rooms)],
+        'StudentsUnavailabilityTimeslots': [busy(unavailability) for _ in range(num_students)],
+        'TeachersUnavailabilityTimeslots': [busy(unavailability) for _ in range(num_teachers)],
+    }
+
+
+def iter_preferences(constraints: Dict[str, Any], role: str, preference_distribution: str = 'log',
+                     preference_density: float = 0.15, max_weight: int = 100, seed: int = 0) -> Iterator[list]:
+    """Positional preferences of every student ('students') or teacher ('teachers'), one at a time"""
+    from preferences.views import DEFAULT_USER_PREFERENCES
+
+    if preference_distribution not in PREFERENCE_DISTRIBUTIONS:
+        raise ValueError(f"preference_distribution must be one of {', '.join(PREFERENCE_DISTRIBUTIONS)}")
+    rng = random.Random(f'{seed}:{role}')
+    students = role == 'students'
+    total_timeslots = constraints['TimeslotsDaily'] * constraints['DaysInCycle']
+    daily = constraints['TimeslotsDaily']
+    log_cum_weights = list(accumulate(1 / (w + 1) for w in range(max_weight)))
+
+    group_offsets = [0]
+    for count in constraints['GroupsPerSubject']:
+        group_offsets.append(group_offsets[-1] + count)
+
+    def weight():
+        if preference_distribution == 'uniform':
+            value = rng.randint(1, max_weight)
+        else:
+            # like the C++ generator, the drawn weight can be 0 (no preference)
+            value = rng.choices(range(max_weight), cum_weights=log_cum_weights)[0]
+        return value if rng.random() < 0.5 else -value
+
+    people = constraints['StudentsSubjects'] if students else constraints['TeachersGroups']
+    for person in people:
+        data = dict(DEFAULT_USER_PREFERENCES)
+        if preference_distribution != 'none':
+            min_gaps = rng.randint(0, 5)
+            data.update({
+                'FreeDays': rng.randint(-50, 50),
+                'ShortDays': rng.randint(-50, 50),
+                'UniformDays': rng.randint(-50, 50),
+                'ConcentratedDays': rng.randint(-50, 50),
+                'MinGapsLength': [min_gaps, abs(weight())],
+                'MaxGapsLength': [min_gaps + rng.randint(0, 5), abs(weight())],
+                'MinDayLength': [rng.randint(0, daily // 4), abs(weight())],
+                'MaxDayLength': [rng.randint(daily // 2, daily), abs(weight())],
+                'PreferredDayStartTimeslot': [rng.randint(0, daily // 2), abs(weight())],
+                'PreferredDayEndTimeslot': [rng.randint(daily // 2, daily), abs(weight())],
+            })
+            if constraints['NumTags'] > 1 and rng.random() < 0.1:
+                tag_a, tag_b = rng.sample(range(constraints['NumTags']), 2)
+                data['TagOrder'] = [[tag_a, tag_b, abs(weight())]]
+
+            timeslots = [0] * total_timeslots
+            for _ in range(rng.randint(0, int(2 * preference_density * total_timeslots))):
+                timeslots[rng.randrange(total_timeslots)] = weight()
+            data['PreferredTimeslots'] = timeslots
+
+            if students:
+                groups = [0] * constraints['NumGroups']
+                own = [g for subject in person for g in range(group_offsets[subject], group_offsets[subject + 1])]
+                for _ in range(rng.randint(0, len(own))):
+                    groups[rng.choice(own)] = weight()
+                data['PreferredGroups'] = groups
+        if students and not data['PreferredGroups']:
+            data['PreferredGroups'] = [0] * constraints['NumGroups']
+        if not data['PreferredTimeslots']:
+            data['PreferredTimeslots'] = [0] * total_timeslots
+        yield preferences_to_positional(data, include_groups=students)
+
+
+def _split_options(options: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    preference_keys = ('preference_distribution', 'preference_density', 'max_weight')
+    preference_options = {key: options.pop(key) for key in preference_keys if key in options}
+    preference_options['seed'] = options.get('seed', 0)
+    return options, preference_options
+
+
+def generate_problem_data(num_students: int, num_groups: int, **options) -> Dict[str, Any]:
+    """Whole problem_data in memory; options are those of build_constraints and iter_preferences"""
+    constraint_options, preference_options = _split_options(options)
+    constraints = build_constraints(num_students, num_groups, **constraint_options)
+    return {
+        'constraints': constraints,
+        'preferences': {
+            role: list(iter_preferences(constraints, role, **preference_options))
+            for role in ('students', 'teachers')
+        },
+    }
+
+
+def iter_problem_data_json(num_students: int, num_groups: int, **options) -> Iterator[str]:
+    """problem_data as JSON text chunks (same document as json.dumps(generate_problem_data(...)))"""
+    constraint_options, preference_options = _split_options(options)
+    constraints = build_constraints(num_students, num_groups, **constraint_options)
+    yield '{"constraints": '
+    yield json.dumps(constraints)
+    yield ', "preferences": {'
+    for i, role in enumerate(('students', 'teachers')):
+        yield f'{", " if i else ""}"{role}": ['
+        for j, preference in enumerate(iter_preferences(constraints, role, **preference_options)):
+            yield (', ' if j else '') + json.dumps(preference)
+        yield ']'
+    yield '}}'
+
+
+def write_problem_data(fp, num_students: int, num_groups: int, job: Optional[Dict[str, Any]] = None, **options) -> None:
+    """
+    Stream problem_data to a text file object. With job ({'recruitment_id', 'max_execution_time'})
+    the document is a job input as in optimizer_service/data/input, problem_data under its key.
+    """
+    if job is not None:
+        fp.write(json.dumps(job)[:-1] + ', "problem_data": ')
+    for chunk in iter_problem_data_json(num_students, num_groups, **options):
+        fp.write(chunk)
+    if job is not None:
+        fp.write('}')
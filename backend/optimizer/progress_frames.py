@@ -0,0 +1,86 @@
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+from django.conf import settings
+
+# (job_id, message type, data) as passed to channel_layer.group_send for job_progress_{job_id}
+Frame = Tuple[str, str, Dict[str, Any]]
+
+PROGRESS_MESSAGE = 'job_progress_update'
+COMPLETED_MESSAGE = 'job_completed'
+
+DEFAULT_MAX_FRAMES_PER_SECOND = 2.0
+
+
+def fitness_summary(values) -> Optional[Dict[str, float]]:
+    values = [v for v in values or () if isinstance(v, (int, float))]
+    if not values:
+        return None
+    return {'mean': sum(values) / len(values), 'min': min(values), 'max': max(values)}
+
+
+def slim_progress_frame(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Progress frame without the solution itself: iteration, fitness and aggregates of the
+    per-student / per-teacher fitness arrays. Clients fetch the full solution with 'get_solution'.
+    """
+    solution = data.get('best_solution') or {}
+    return {
+        'job_id': data['job_id'],
+        'iteration': data['iteration'],
+        'fitness': solution.get('fitness'),
+        'management_fitness': solution.get('management_fitness'),
+        'student_fitness': fitness_summary(solution.get('student_fitnesses')),
+        'teacher_fitness': fitness_summary(solution.get('teacher_fitnesses')),
+        'timestamp': data['timestamp'],
+    }
+
+
+class ProgressFrameThrottle:
+    """
+    Rate limits progress frames per job group, latest frame wins.
+
+    dispatch() returns the frames to send right away; a progress frame arriving sooner than
+    1 / max_frames_per_second after the previous one replaces the job's pending frame, which
+    due() releases once the interval has passed. Other messages (completion, errors) are never
+    delayed; a pending progress frame of the same job is sent before them so ordering is kept.
+    """
+
+    def __init__(self, max_frames_per_second: float = None, slim: bool = None):
+        if max_frames_per_second is None:
+            max_frames_per_second = getattr(settings, 'OPTIMIZER_WS_MAX_FRAMES_PER_SECOND', DEFAULT_MAX_FRAMES_PER_SECOND)
+        if slim is None:
+            slim = getattr(settings, 'OPTIMIZER_WS_FRAME', 'slim') == 'slim'
+        self.min_interval = 1.0 / max_frames_per_second if max_frames_per_second > 0 else 0.0
+        self.slim = slim
+        self.last_sent: Dict[str, float] = {}
+        self.pending: Dict[str, Frame] = {}
+
+    def dispatch(self, job_id: str, message_type: str, data: Dict[str, Any]) -> List[Frame]:
+        now = time.monotonic()
+        if message_type != PROGRESS_MESSAGE:
+            frames = [self.pending.pop(job_id)] if job_id in self.pending else []
+            frames.append((job_id, message_type, data))
+            if message_type == COMPLETED_MESSAGE:
+                self.last_sent.pop(job_id, None)
+            return frames
+
+        frame = (job_id, message_type, slim_progress_frame(data) if self.slim else data)
+        if now - self.last_sent.get(job_id, float('-inf')) >= self.min_interval:
+            self.pending.pop(job_id, None)
+            self.last_sent[job_id] = now
+            return [frame]
+        self.pending[job_id] = frame
+        return []
+
+    def due(self) -> List[Frame]:
+        """Pending frames whose job interval has passed"""
+        if not self.pending:
+            return []
+        now = time.monotonic()
+        ready = [job_id for job_id in self.pending if now - self.last_sent.get(job_id, float('-inf')) >= self.min_interval]
+        frames = []
+        for job_id in ready:
+            frames.append(self.pending.pop(job_id))
+            self.last_sent[job_id] = now
+        return frames
@@ -0,0 +1,172 @@
+"""
+Compact storage of OptimizationProgress rows.
+
+Consecutive best solutions of a job usually differ in a handful of genes, so instead of the whole
+best_solution every row after a keyframe only stores what changed against the previous row:
+
+    {"set": {key: value}, "patch": {key: [[index, value], ...]}, "drop": [key, ...], "keys": [...]}
+
+- "patch" is used for lists of unchanged length (genotype, by_student, by_group, fitness arrays),
+- "set" for scalars and lists whose length changed,
+- "keys" only when the key order differs from the previous solution.
+
+A keyframe (full best_solution) is written every OPTIMIZER_PROGRESS_KEYFRAME_INTERVAL rows, so
+rebuilding any iteration needs one query for at most that many rows. With
+OPTIMIZER_PROGRESS_STORAGE = 'full' every row is a keyframe (previous behaviour).
+"""
+from typing import Dict, Any, List, Optional, Iterable, Tuple
+
+from django.conf import settings
+from django.db.models import Q
+
+from .models import OptimizationJob, OptimizationProgress
+
+DEFAULT_KEYFRAME_INTERVAL = 50
+
+
+def keyframe_interval() -> int:
+    if getattr(settings, 'OPTIMIZER_PROGRESS_STORAGE', 'delta') != 'delta':
+        return 1
+    return max(1, getattr(settings, 'OPTIMIZER_PROGRESS_KEYFRAME_INTERVAL', DEFAULT_KEYFRAME_INTERVAL))
+
+
+def diff_solution(base: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    """Changes turning base into current (see module docstring for the format)"""
+    delta: Dict[str, Any] = {}
+    set_values = {}
+    patches = {}
+    for key, value in current.items():
+        if key not in base:
+            set_values[key] = value
+            continue
+        old = base[key]
+        if old == value:
+            continue
+        if isinstance(old, list) and isinstance(value, list) and len(old) == len(value):
+            patches[key] = [[i, v] for i, (o, v) in enumerate(zip(old, value)) if o != v]
+        else:
+            set_values[key] = value
+    dropped = [key for key in base if key not in current]
+
+    if set_values:
+        delta['set'] = set_values
+    if patches:
+        delta['patch'] = patches
+    if dropped:
+        delta['drop'] = dropped
+    # apply_solution_delta keeps base order and appends new keys
+    applied_order = [k for k in base if k in current] + [k for k in set_values if k not in base]
+    if applied_order != list(current):
+        delta['keys'] = list(current)
+    return delta
+
+
+def apply_solution_delta(base: Dict[str, Any], delta: Dict[str, Any]) -> Dict[str, Any]:
+    """Inverse of diff_solution; base is not modified"""
+    result = dict(base)
+    for key in delta.get('drop', ()):
+        result.pop(key, None)
+    for key, changes in delta.get('patch', {}).items():
+        values = list(result[key])
+        for index, value in changes:
+            values[index] = value
+        result[key] = values
+    result.update(delta.get('set', {}))
+    if 'keys' in delta:
+        result = {key: result[key] for key in delta['keys']}
+    return result
+
+
+def solution_fitness(solution: Optional[Dict[str, Any]]) -> Optional[float]:
+    fitness = solution.get('fitness') if isinstance(solution, dict) else None
+    return float(fitness) if isinstance(fitness, (int, float)) else None
+
+
+def build_progress_rows(items: Iterable[Tuple[OptimizationJob, int, Dict[str, Any], int, Optional[Dict[str, Any]]]]) -> List[OptimizationProgress]:
+    """
+    Build (unsaved) progress rows for (job, iteration, solution, base_iteration, base_solution) items.
+
+    base_iteration / base_solution are the job's current_iteration and final_solution before this
+    update, i.e. the last stored progress row. A delta is only written when that row exists, is
+    older than the new one and its chain is shorter than the keyframe interval; otherwise the row
+    becomes a keyframe. One query for all base rows.
+    """
+    items = list(items)
+    interval = keyframe_interval()
+
+    base_rows = {}
+    if interval > 1:
+        base_filter = Q()
+        for job, iteration, _, base_iteration, base_solution in items:
+            if base_solution is not None and 0 <= base_iteration < iteration:
+                base_filter |= Q(job_id=job.id, iteration=base_iteration)
+        if base_filter:
+            base_rows = {
+                (job_id, iteration): (keyframe_iteration, chain_length, fitness)
+                for job_id, iteration, keyframe_iteration, chain_length, fitness in
+                OptimizationProgress.objects.filter(base_filter, keyframe_iteration__isnull=False)
+                .values_list('job_id', 'iteration', 'keyframe_iteration', 'chain_length', 'fitness')
+            }
+
+    rows = []
+    for job, iteration, solution, base_iteration, base_solution in items:
+        fitness = solution_fitness(solution)
+        base = base_rows.get((job.id, base_iteration))
+        if (base is not None and base[1] + 1 < interval and isinstance(solution, dict)
+                and base[2] == solution_fitness(base_solution)):
+            rows.append(OptimizationProgress(
+                job=job, iteration=iteration, fitness=fitness, delta=diff_solution(base_solution, solution),
+                keyframe_iteration=base[0], chain_length=base[1] + 1
+            ))
+        else:
+            rows.append(OptimizationProgress(
+                job=job, iteration=iteration, fitness=fitness, best_solution=solution,
+                keyframe_iteration=iteration, chain_length=0
+            ))
+    return rows
+
+
+def attach_solutions(rows: List[OptimizationProgress]) -> List[OptimizationProgress]:
+    """
+    Rebuild the full solution of delta rows (available via row.get_solution()).
+
+    All chains needed by the given rows are fetched in one query per job.
+    """
+    needed: Dict[Any, Tuple[int, int]] = {}
+    for row in rows:
+        if row.is_keyframe or '_solution' in row.__dict__:
+            continue
+        low, high = needed.get(row.job_id, (row.keyframe_iteration, row.iteration))
+        needed[row.job_id] = (min(low, row.keyframe_iteration), max(high, row.iteration))
+
+    for job_id, (low, high) in needed.items():
+        chain_rows = (
+            OptimizationProgress.objects
+            .filter(job_id=job_id, iteration__gte=low, iteration__lte=high)
+            .order_by('iteration')
+            .only('iteration', 'best_solution', 'delta', 'keyframe_iteration')
+        )
+        solutions = {}
+        # latest solution of every chain in the range, keyed by the chain's keyframe iteration
+        chain_heads = {}
+        for chain_row in chain_rows:
+            if chain_row.is_keyframe:
+                chain_heads[chain_row.iteration] = chain_row.best_solution
+            elif chain_row.keyframe_iteration in chain_heads:
+                chain_heads[chain_row.keyframe_iteration] = apply_solution_delta(
+                    chain_heads[chain_row.keyframe_iteration], chain_row.delta
+                )
+            else:
+                continue
+            solutions[chain_row.iteration] = chain_heads[chain_row.iteration if chain_row.is_keyframe else chain_row.keyframe_iteration]
+
+        for row in rows:
+            if row.job_id == job_id and not row.is_keyframe:
+                row.__dict__['_solution'] = solutions.get(row.iteration)
+    return rows
+
+
+def reconstruct_solution(job_id, iteration: int) -> Optional[Dict[str, Any]]:
+    """Full best solution stored for a job's iteration, None if there is no such progress row"""
+    row = OptimizationProgress.objects.filter(job_id=job_id, iteration=iteration).first()
+    return row.get_solution() if row else None
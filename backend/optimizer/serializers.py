@@ -37,6 +37,8 @@ class OptimizationJobCreateSerializer(serializers.Serializer):
     recruitment_id = serializers.UUIDField()
     problem_data = ProblemDataSerializer()
     max_execution_time = serializers.IntegerField(min_value=10, max_value=3600)
+    # parallel sub-runs with distinct seeds (optimizer.islands), default OPTIMIZER_ISLANDS
+    islands = serializers.IntegerField(min_value=1, max_value=64, required=False)
     
     def validate_recruitment_id(self, value):
         """Validate that recruitment exists"""
@@ -61,6 +63,8 @@ class OptimizationJobCreateSerializer(serializers.Serializer):
 
 class OptimizationProgressSerializer(serializers.ModelSerializer):
     """Serializer for optimization progress updates"""
+    # delta rows are rebuilt from their keyframe (see progress_storage)
+    best_solution = serializers.JSONField(source='get_solution', read_only=True)
     
     class Meta:
         model = OptimizationProgress
@@ -79,11 +83,12 @@ class OptimizationJobSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'recruitment_id', 'status', 'max_execution_time', 'created_at', 'updated_at',
             'started_at', 'completed_at', 'error_message', 
-            'current_iteration', 'final_solution', 'first_solution'
+            'current_iteration', 'final_solution', 'first_solution',
+            'parent', 'seed', 'algorithm', 'islands', 'feasibility'
         ]
         read_only_fields = [
             'id', 'recruitment_id', 'created_at', 'updated_at', 'started_at', 'completed_at',
-            'current_iteration'
+            'current_iteration', 'parent', 'seed', 'algorithm', 'islands', 'feasibility'
         ]
 
 
@@ -97,6 +102,11 @@ class OptimizationJobListSerializer(serializers.ModelSerializer):
             'id', 'recruitment_id', 'status', 'created_at', 'updated_at', 'current_iteration'
         ]
 
+class JobPrioritySerializer(serializers.Serializer):
+    """Serializer for changing priority of a queued job"""
+    priority = serializers.ChoiceField(choices=[(0, 'low'), (1, 'normal'), (2, 'high')])
+
+
 class JobCancelSerializer(serializers.Serializer):
     """Serializer for job cancellation requests"""
     reason = serializers.CharField(max_length=500, required=False, allow_blank=True)
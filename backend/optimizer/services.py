@@ -1,18 +1,68 @@
 import json
+import hashlib
+import zlib
 import redis
 import threading
 import time
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 from django.conf import settings
 from django.utils import timezone
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
-from .models import OptimizationJob, OptimizationProgress
+from .models import OptimizationJob, ProblemPayload
+from .progress_storage import build_progress_rows
+from .db_writes import write_serialized
+from .progress_frames import ProgressFrameThrottle, PROGRESS_MESSAGE, COMPLETED_MESSAGE
+from .feasibility import analyze_feasibility, FeasibilityReport, InfeasibleProblemError
 from .logger import get_logger
 
 logger = get_logger(__name__)
 
+# problem data is handed to the optimizer under a content-addressed key, the queue only carries an envelope
+PAYLOAD_KEY_PREFIX = "optimizer:payload:"
+PAYLOAD_VERSION = 1
+
+
+def preferences_to_positional(prefs_data: Optional[Dict[str, Any]], include_groups: bool) -> list:
+    """
+    Convert a preferences_data dict to the positional list format expected by the C++ JsonParser.
+
+    Missing fields (or prefs_data=None for users who never submitted) fall back to zero defaults.
+    Positions:
+        0: FreeDays (int)
+        1: ShortDays (int)
+        2: UniformDays (int)
+        3: ConcentratedDays (int)
+        4: MinGapsLength ([val, weight])
+        5: MaxGapsLength ([val, weight])
+        6: MinDayLength ([val, weight])
+        7: MaxDayLength ([val, weight])
+        8: PreferredDayStartTimeslot ([val, weight])
+        9: PreferredDayEndTimeslot ([val, weight])
+        10: TagOrder ([[tagA, tagB, weight], ...])
+        11: PreferredTimeslots ([weight, ...])
+        12: PreferredGroups ([weight, ...]) - Students only (include_groups=True)
+    """
+    prefs_data = prefs_data or {}
+    positional = [
+        prefs_data.get('FreeDays', 0),
+        prefs_data.get('ShortDays', 0),
+        prefs_data.get('UniformDays', 0),
+        prefs_data.get('ConcentratedDays', 0),
+        prefs_data.get('MinGapsLength', [0, 0]),
+        prefs_data.get('MaxGapsLength', [0, 0]),
+        prefs_data.get('MinDayLength', [0, 0]),
+        prefs_data.get('MaxDayLength', [0, 0]),
+        prefs_data.get('PreferredDayStartTimeslot', [0, 0]),
+        prefs_data.get('PreferredDayEndTimeslot', [0, 0]),
+        prefs_data.get('TagOrder', []),
+        prefs_data.get('PreferredTimeslots', []),
+    ]
+    if include_groups:
+        positional.append(prefs_data.get('PreferredGroups', []))
+    return positional
+
 
 def convert_preferences_to_problem_data(recruitment_id: str) -> Dict[str, Any]:
     """
@@ -63,90 +113,35 @@ def convert_preferences_to_problem_data(recruitment_id: str) -> Dict[str, Any]:
             logger.error(f"No constraints found for recruitment {recruitment_id}")
             raise ValueError(f"No constraints found for recruitment {recruitment_id}")
         
-        # get all users in this recruitment
-        user_recruitments = UserRecruitment.objects.filter(
-            recruitment_id=recruitment_id
-        ).select_related('user').order_by('user_id')
+        # all preference rows of this recruitment in one query, joined to users in memory
+        prefs_by_user = dict(
+            UserPreferences.objects.filter(recruitment_id=recruitment_id)
+            .values_list('user_id', 'preferences_data')
+        )
+
+        # get all participants and hosts in this recruitment (ordered by user id)
+        user_rows = UserRecruitment.objects.filter(
+            recruitment_id=recruitment_id,
+            user__role__in=['participant', 'host']
+        ).order_by('user_id').values_list('user_id', 'user__role')
         
         students_preferences = []
         teachers_preferences = []
+        missing_users = 0
         
-        # process each user based on their role
-        for user_recruitment in user_recruitments:
-            user = user_recruitment.user
-            
-            # skip users that are not participants or hosts
-            if user.role not in ['participant', 'host']:
-                continue
-            
-            # get user preferences
-            try:
-                user_prefs = UserPreferences.objects.get(
-                    recruitment_id=recruitment_id,
-                    user_id=user.id
-                )
-                prefs_data = user_prefs.preferences_data
-                
-                # Extract all fields for positional format (matching C++ JsonParser)
-                # 0: FreeDays (int)
-                # 1: ShortDays (int)
-                # 2: UniformDays (int)
-                # 3: ConcentratedDays (int)
-                # 4: MinGapsLength ([val, weight])
-                # 5: MaxGapsLength ([val, weight])
-                # 6: MinDayLength ([val, weight])
-                # 7: MaxDayLength ([val, weight])
-                # 8: PreferredDayStartTimeslot ([val, weight])
-                # 9: PreferredDayEndTimeslot ([val, weight])
-                # 10: TagOrder ([[tagA, tagB, weight], ...])
-                # 11: PreferredTimeslots ([weight, ...])
-                # 12: PreferredGroups ([weight, ...]) - Students only
-                
-                free_days = prefs_data.get('FreeDays', 0)
-                short_days = prefs_data.get('ShortDays', 0)
-                uniform_days = prefs_data.get('UniformDays', 0)
-                concentrated_days = prefs_data.get('ConcentratedDays', 0)
-                min_gaps_length = prefs_data.get('MinGapsLength', [0, 0])
-                max_gaps_length = prefs_data.get('MaxGapsLength', [0, 0])
-                min_day_length = prefs_data.get('MinDayLength', [0, 0])
-                max_day_length = prefs_data.get('MaxDayLength', [0, 0])
-                pref_day_start = prefs_data.get('PreferredDayStartTimeslot', [0, 0])
-                pref_day_end = prefs_data.get('PreferredDayEndTimeslot', [0, 0])
-                tag_order = prefs_data.get('TagOrder', [])
-                pref_timeslots = prefs_data.get('PreferredTimeslots', [])
-                
-                # Common part
-                common_pref = [
-                    free_days,
-                    short_days,
-                    uniform_days,
-                    concentrated_days,
-                    min_gaps_length,
-                    max_gaps_length,
-                    min_day_length,
-                    max_day_length,
-                    pref_day_start,
-                    pref_day_end,
-                    tag_order,
-                    pref_timeslots
-                ]
-                
-                if user.role == 'participant':
-                    pref_groups = prefs_data.get('PreferredGroups', [])
-                    students_preferences.append(common_pref + [pref_groups])
-                    
-                elif user.role == 'host':
-                    teachers_preferences.append(common_pref)
-                    
-            except UserPreferences.DoesNotExist:
-                logger.warning(f"No preferences found for user {user.id} in recruitment {recruitment_id}")
-                # default preferences based on role (matching the structure above with 0s)
-                default_pref = [0, 0, 0, 0, [0, 0], [0, 0], [0, 0], [0, 0], [0, 0], [0, 0], [], []]
-                
-                if user.role == 'participant':
-                    students_preferences.append(default_pref + [[]])
-                elif user.role == 'host':
-                    teachers_preferences.append(default_pref)
+        # single streaming pass building positional vectors per role
+        for user_id, role in user_rows.iterator(chunk_size=2000):
+            prefs_data = prefs_by_user.get(user_id)
+            if prefs_data is None:
+                missing_users += 1
+            
+            if role == 'participant':
+                students_preferences.append(preferences_to_positional(prefs_data, include_groups=True))
+            else:
+                teachers_preferences.append(preferences_to_positional(prefs_data, include_groups=False))
+
+        if missing_users:
+            logger.warning(f"No preferences found for {missing_users} users in recruitment {recruitment_id}, using defaults")
         
         # build problem_data structure (with constraints and preferences separation)
         problem_data = {
@@ -184,6 +179,25 @@ def convert_preferences_to_problem_data(recruitment_id: str) -> Dict[str, Any]:
         raise
 
 
+# rows per INSERT when materializing plans (keeps SQLite under its variable limit)
+MATERIALIZATION_BATCH_SIZE = 500
+
+
+def index_students_by_group(by_student, num_groups: int):
+    """
+    Invert by_student (student -> [group indices]) into group -> [student indices].
+
+    Single pass over by_student; out-of-range group indices are ignored and a student
+    listed twice for the same group is kept once. Student order within a group is preserved.
+    """
+    group_students = [[] for _ in range(num_groups)]
+    for student_idx, student_groups in enumerate(by_student):
+        for group_idx in set(student_groups):
+            if 0 <= group_idx < num_groups:
+                group_students[group_idx].append(student_idx)
+    return group_students
+
+
 def convert_solution_to_meetings(job_id: str) -> None:
     """
     Convert optimizer solution (genotype) to Meeting records in SQL database.
@@ -194,14 +208,20 @@ def convert_solution_to_meetings(job_id: str) -> None:
     Extracts solution data from the job, parses by_group and by_student arrays,
     deletes existing meetings for the recruitment, and creates new Meeting records
     with corresponding Identity Groups for students.
+
+    by_student is inverted once into a group -> students index and all groups,
+    memberships and meetings are written with chunked bulk_create, so the time spent
+    inside the transaction grows linearly with the plan size.
     """
     from scheduling.models import Meeting, SubjectGroup, Room, Recruitment
+    from scheduling.constraints import mark_constraints_dirty
+    from scheduling.occupancy import invalidate_layer
     from identity.models import Group, UserGroup, User, UserRecruitment
     from django.db import transaction
     
     try:
         # Get the optimization job
-        job = OptimizationJob.objects.get(id=job_id)
+        job = OptimizationJob.objects.select_related('recruitment__organization').get(id=job_id)
         
         # Extract solution data
         solution_data = job.final_solution
@@ -231,6 +251,7 @@ def convert_solution_to_meetings(job_id: str) -> None:
         # Get ordered lists of subject groups, rooms, and users for this recruitment
         subject_groups = list(
             SubjectGroup.objects.filter(subject__recruitment_id=recruitment_id)
+            .select_related('subject', 'host_user')
             .order_by('subject__subject_name')
         )
         
@@ -257,7 +278,86 @@ def convert_solution_to_meetings(job_id: str) -> None:
                 f"and participants count ({len(participants)})"
             )
             return
-        
+
+        # Invert by_student once instead of rescanning it for every group
+        group_students = index_students_by_group(by_student, len(by_group))
+
+        # Calculate start_time and end_time relative to the recruitment day start
+        # Default to 00:00 AM if not set
+        if recruitment.day_start_time:
+            day_start = recruitment.day_start_time
+        else:
+            day_start = datetime.strptime("00:00", "%H:%M").time()
+            logger.warning(f"Recruitment {recruitment_id} has no day_start_time set; defaulting to 00:00")
+
+        # We need a dummy date to combine with time for arithmetic
+        base_dt = datetime.combine(datetime.today().date(), day_start)
+
+        # Build all rows in memory first, then write them in a few bulk statements
+        identity_groups = []
+        user_groups = []
+        meetings = []
+        skipped_groups = 0
+
+        for group_idx, (timeslot_start, timeslot_end, room_idx) in enumerate(by_group):
+            # Get subject group and room
+            subject_group = subject_groups[group_idx]
+            
+            if room_idx >= len(rooms):
+                logger.warning(f"Invalid room index {room_idx} for group {group_idx}")
+                continue
+            
+            # Skip creating meeting if no students are assigned
+            student_indices = group_students[group_idx]
+            if not student_indices:
+                skipped_groups += 1
+                continue
+
+            room = rooms[room_idx]
+            
+            # Calculate day_of_week and day_of_cycle from timeslot
+            if timeslots_daily > 0:
+                day_of_cycle = timeslot_start // timeslots_daily
+                timeslot_in_day = timeslot_start % timeslots_daily
+                day_of_week = day_of_cycle % 7
+            else:
+                day_of_cycle = 0
+                timeslot_in_day = 0
+                day_of_week = 0
+            
+            start_dt = base_dt + timedelta(minutes=timeslot_in_day * 15)
+            duration_blocks = timeslot_end - timeslot_start
+            end_dt = start_dt + timedelta(minutes=duration_blocks * 15)
+
+            # Identity Group for this meeting (pk is generated client-side, so rows can reference it before insert)
+            identity_group = Group(
+                group_name=f"Grupa {group_idx}",
+                category='meeting',
+                organization=organization
+            )
+            identity_groups.append(identity_group)
+
+            user_groups.extend(
+                UserGroup(user=participants[student_idx], group=identity_group)
+                for student_idx in student_indices
+            )
+
+            meetings.append(Meeting(
+                recruitment=recruitment,
+                subject_group=subject_group,
+                group=identity_group,
+                room=room,
+                start_timeslot=timeslot_start,
+                duration=duration_blocks,
+                start_time=start_dt.time(),
+                end_time=end_dt.time(),
+                day_of_week=day_of_week,
+                day_of_cycle=day_of_cycle
+            ))
+
+        if skipped_groups:
+            logger.info(f"Skipped {skipped_groups} groups with no students assigned for recruitment {recruitment_id}")
+
         # Use transaction to ensure atomicity
         with transaction.atomic():
             # Get existing meetings and their groups for deletion
@@ -272,114 +372,24 @@ def convert_solution_to_meetings(job_id: str) -> None:
             if group_ids_to_delete:
                 deleted_groups = Group.objects.filter(group_id__in=group_ids_to_delete).delete()
                 logger.info(f"Deleted {deleted_groups[0] if deleted_groups else 0} identity groups")
-            
-            # Create meetings and identity groups
-            created_meetings = []
-            
-            for group_idx, (timeslot_start, timeslot_end, room_idx) in enumerate(by_group):
-                # Get subject group and room
-                subject_group = subject_groups[group_idx]
-                
-                if room_idx >= len(rooms):
-                    logger.warning(f"Invalid room index {room_idx} for group {group_idx}")
-                    continue
-                
-                room = rooms[room_idx]
-                
-                # Calculate day_of_week and day_of_cycle from timeslot
-                if timeslots_daily > 0:
-                    day_of_cycle = timeslot_start // timeslots_daily
-                    timeslot_in_day = timeslot_start % timeslots_daily
-                    day_of_week = day_of_cycle % 7
-                else:
-                    day_of_cycle = 0
-                    timeslot_in_day = 0
-                    day_of_week = 0
-                
-                # Calculate start_time and end_time
-                # Default to 00:00 AM if not set
-                if recruitment.day_start_time:
-                    day_start = recruitment.day_start_time
-                else:
-                    day_start = datetime.strptime("00:00", "%H:%M").time()
-                    logger.warning(f"Recruitment {recruitment_id} has no day_start_time set; defaulting to 00:00")
-                
-                # We need a dummy date to combine with time for arithmetic
-                dummy_date = datetime.today().date()
-                base_dt = datetime.combine(dummy_date, day_start)
-                
-                start_dt = base_dt + timedelta(minutes=timeslot_in_day * 15)
-                duration_blocks = timeslot_end - timeslot_start
-                end_dt = start_dt + timedelta(minutes=duration_blocks * 15)
-                
-                start_time = start_dt.time()
-                end_time = end_dt.time()
-                
-                # Find students assigned to this subject group from by_student
-                students_in_group = []
-                for student_idx, student_groups in enumerate(by_student):
-                    if group_idx in student_groups:
-                        if student_idx < len(participants):
-                            students_in_group.append(participants[student_idx])
-                
-                # Skip creating meeting if no students are assigned
-                if not students_in_group:
-                    logger.info(f"Skipping meeting creation for group {group_idx} (subject {subject_group.subject.subject_name}) - no students assigned")
-                    continue
-
-                # Create Identity Group for this meeting
-                # Group name format: "Meeting_<recruitment_name>_<subject_name>_<group_idx>"
-                group_name = f"Grupa {group_idx}"
-                
-                logger.info(f"Creating identity group with name: {group_name}")
 
-                identity_group = Group.objects.create(
-                    group_name=group_name,
-                    category='meeting',
-                    organization=organization
-                )
+            # Create identity groups, memberships and meetings
+            Group.objects.bulk_create(identity_groups, batch_size=MATERIALIZATION_BATCH_SIZE)
+            UserGroup.objects.bulk_create(user_groups, batch_size=MATERIALIZATION_BATCH_SIZE)
+            Meeting.objects.bulk_create(meetings, batch_size=MATERIALIZATION_BATCH_SIZE)
+
+            # bulk_create sends no signals, the new meetings block other recruitments of the organization
+            mark_constraints_dirty(['unavailability'], organization_id=organization.organization_id)
+            invalidate_layer(recruitment.recruitment_id)
 
-                logger.info(f"Created identity group {identity_group.group_id}")
-                logger.info(f"Identity group details: {identity_group}")
-                
-                # Add students to the identity group
-                for student in students_in_group:
-                    UserGroup.objects.create(
-                        user=student,
-                        group=identity_group
-                    )
-                
-                # Create the Meeting with the identity group
-                meeting = Meeting.objects.create(
-                    recruitment=recruitment,
-                    subject_group=subject_group,
-                    group=identity_group,
-                    room=room,
-                    start_timeslot=timeslot_start,
-                    duration=duration_blocks,
-                    start_time=start_time,
-                    end_time=end_time,
-                    day_of_week=day_of_week,
-                    day_of_cycle=day_of_cycle
-                )
-                created_meetings.append(meeting)
-                
-                logger.info(
-                    f"Created meeting {meeting.meeting_id} for subject group {subject_group.subject_group_id} "
-                    f"with {len(students_in_group)} students in identity group {identity_group.group_id}"
-                )
-                
-                # Log detailed info as requested
-                logger.info(f"Group {group_idx}: {len(students_in_group)} students, Room {room.room_number}, Teacher {subject_group.host_user.username}, Start {start_time}, End {end_time}")
-            
             # Update recruitment status to 'active'
             recruitment.plan_status = 'active'
             recruitment.save()
             
             logger.info(
-                f"Successfully created {len(created_meetings)} meetings for recruitment {recruitment_id}"
+                f"Successfully created {len(meetings)} meetings "
+                f"({len(user_groups)} group memberships) for recruitment {recruitment_id}"
             )
-            print(f"[CONVERSION] Created {len(created_meetings)} meetings for recruitment {recruitment_id}")
     
     except OptimizationJob.DoesNotExist:
         logger.error(f"Optimization job {job_id} not found")
@@ -388,46 +398,162 @@ def convert_solution_to_meetings(job_id: str) -> None:
         raise
 
 
-class RedisService:
-    """Service for Redis communication with optimizer"""
-    
-    def __init__(self):
-        self.redis_client = None
-        self.connect()
-    
-    def connect(self):
-        """Establish connection to Redis"""
+def finish_optimization_round(job: OptimizationJob) -> None:
+    """
+    Handle a completed optimization job (already saved with status 'completed').
+
+    If the recruitment's optimization period has ended the final solution is converted to meetings,
+    otherwise constraints are refreshed and the next optimization round is triggered. Raises when
+    that fails; round_finished_at is set only once the round was finished, so a durable listener
+    finishes the job again when its completion update is replayed.
+    """
+    if OptimizationJob.objects.filter(pk=job.pk, round_finished_at__isnull=False).exists():
+        logger.info(f"Optimization round of job {job.id} already finished")
+        return
+
+    recruitment = job.recruitment
+    optimization_end_date = recruitment.optimization_end_date
+
+    if not optimization_end_date or timezone.now() >= optimization_end_date:
+        # Optimization period ended, convert solution to meetings
         try:
-            self.redis_client = redis.Redis(
-                host=getattr(settings, 'REDIS_HOST', 'localhost'),
-                port=getattr(settings, 'REDIS_PORT', 6379),
-                db=getattr(settings, 'REDIS_DB', 0),
-                decode_responses=True,
-                socket_timeout=5,
-                socket_connect_timeout=5
-            )
-            
-            # test connection
-            self.redis_client.ping()
-            logger.info("Connected to Redis successfully")
+            convert_solution_to_meetings(str(job.id))
+            logger.info(f"Successfully converted solution to meetings for job {job.id}")
         except Exception as e:
-            logger.error(f"Failed to connect to Redis: {e}")
+            logger.error(f"Failed to convert solution to meetings for job {job.id}: {e}")
             raise
-    
-    def publish_job(self, job_data: Dict[str, Any]):
-        """Publish optimization job to Redis queue"""
+    else:
+        # Optimization period still active, trigger next optimization round
         try:
-            recruitment_id = job_data['recruitment_id']
-            message = json.dumps(job_data)
-            
-            # Push job to the queue (LPUSH for FIFO with BRPOP)
-            self.redis_client.lpush("optimizer:jobs", message)
-            logger.info(f"Published job {recruitment_id} to Redis queue")
-            print(f"[REDIS] Published job to queue: {recruitment_id}")
-            
+            from scheduling.services import prepare_optimization_constraints, trigger_optimization
+            # recompiles only the constraints sections changed since the previous round
+            prepare_optimization_constraints(recruitment)
+            trigger_optimization(recruitment)
+            logger.info(f"Triggered next optimization round for recruitment {recruitment.recruitment_id}")
+        except InfeasibleProblemError:
+            # recruitment is back in draft with the diagnosis on a failed job, nothing to retry here
+            pass
         except Exception as e:
-            logger.error(f"Failed to publish job {job_data.get('recruitment_id', 'unknown')}: {e}")
+            logger.error(f"Failed to trigger next optimization round for recruitment {recruitment.recruitment_id}: {e}")
             raise
+
+    job.round_finished_at = timezone.now()
+    OptimizationJob.objects.filter(pk=job.pk).update(round_finished_at=job.round_finished_at)
+
+
+def check_feasibility(problem_data: Dict[str, Any]) -> Optional[FeasibilityReport]:
+    """Pre-flight diagnosis of problem_data, None when OPTIMIZER_FEASIBILITY_CHECK is off or there is nothing to check"""
+    if not problem_data or not getattr(settings, 'OPTIMIZER_FEASIBILITY_CHECK', True):
+        return None
+    started = time.perf_counter()
+    report = analyze_feasibility(problem_data)
+    logger.info(f"{report.summary()} (checked in {(time.perf_counter() - started) * 1000:.1f} ms)")
+    return report
+
+
+def record_infeasible_job(recruitment_id: str, problem_data: Dict[str, Any], max_execution_time: int,
+                          report: FeasibilityReport, entity_index=None) -> OptimizationJob:
+    """
+    Failed job holding the diagnosis of a problem rejected before queueing.
+
+    The scheduler retries draft recruitments every tick, so while the problem stays the same the
+    latest failed job is returned instead of recording another one.
+    """
+    content_hash = hashlib.sha256(ProblemPayload.encode(problem_data)).hexdigest()
+    latest = OptimizationJob.objects.filter(recruitment_id=recruitment_id, parent__isnull=True).order_by('-created_at').first()
+    if latest and latest.status == 'failed' and latest.problem_payload_id == content_hash:
+        return latest
+
+    job = OptimizationJob.objects.create(
+        recruitment_id=recruitment_id,
+        problem_data=problem_data,
+        max_execution_time=max_execution_time,
+        entity_index=entity_index,
+        status='failed',
+        error_message=report.summary(),
+        feasibility=report.as_dict(),
+        completed_at=timezone.now()
+    )
+    print(f"[DJANGO] Rejected infeasible problem for recruitment {recruitment_id} ({len(report.errors)} errors), job {job.id}")
+    return job
+
+
+# one connection pool per process, shared by every RedisService / OptimizerService instance
+_redis_pool: Optional[redis.ConnectionPool] = None
+_redis_pool_lock = threading.Lock()
+
+
+def get_redis_pool() -> redis.ConnectionPool:
+    """Process-wide Redis connection pool (created on first use)"""
+    global _redis_pool
+    if _redis_pool is None:
+        with _redis_pool_lock:
+            if _redis_pool is None:
+                _redis_pool = redis.ConnectionPool(
+                    host=getattr(settings, 'REDIS_HOST', 'localhost'),
+                    port=getattr(settings, 'REDIS_PORT', 6379),
+                    db=getattr(settings, 'REDIS_DB', 0),
+                    decode_responses=True,
+                    socket_timeout=5,
+                    socket_connect_timeout=5,
+                    # idle connections are pinged before reuse instead of on every client creation
+                    health_check_interval=getattr(settings, 'REDIS_HEALTH_CHECK_INTERVAL', 30),
+                    max_connections=getattr(settings, 'REDIS_MAX_CONNECTIONS', 50)
+                )
+                logger.info("Created shared Redis connection pool")
+    return _redis_pool
+
+
+def get_redis_client() -> redis.Redis:
+    """Redis client using the shared pool; cheap to create, no connection is opened until first use"""
+    return redis.Redis(connection_pool=get_redis_pool())
+
+
+class RedisService:
+    """Service for Redis communication with optimizer"""
+    
+    def __init__(self, redis_client: Optional[redis.Redis] = None):
+        self.redis_client = redis_client
+        if self.redis_client is None:
+            self.connect()
+    
+    def connect(self):
+        """Attach to the shared connection pool (connections are opened and health checked lazily)"""
+        self.redis_client = get_redis_client()
+    
+    def store_problem_payload(self, content_hash: str, problem_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Store problem_data once under optimizer:payload:v{version}:{content_hash}:{encoding} (with TTL)
+        and return the envelope fields pointing at it. Payloads already in Redis only get their TTL
+        refreshed, so resubmitting the same problem uploads nothing.
+        """
+        encoding = getattr(settings, 'OPTIMIZER_PAYLOAD_ENCODING', 'zlib')
+        ttl = getattr(settings, 'OPTIMIZER_PAYLOAD_TTL', 2 * 24 * 3600)
+        payload_key = f"{PAYLOAD_KEY_PREFIX}v{PAYLOAD_VERSION}:{content_hash}:{encoding}"
+        meta_key = f"{payload_key}:meta"
+        
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.expire(payload_key, ttl)
+        pipe.expire(meta_key, ttl)
+        pipe.get(meta_key)
+        payload_exists, _, meta = pipe.execute()
+        
+        if not payload_exists or not meta:
+            raw = ProblemPayload.encode(problem_data)
+            stored = zlib.compress(raw, 1) if encoding == 'zlib' else raw
+            meta = json.dumps({'size': len(raw), 'checksum': f"crc32:{zlib.crc32(stored):08x}"})
+            pipe = self.redis_client.pipeline(transaction=True)
+            pipe.set(payload_key, stored, ex=ttl)
+            pipe.set(meta_key, meta, ex=ttl)
+            pipe.execute()
+            logger.info(f"Stored problem payload {content_hash[:12]} ({len(raw)} B, {len(stored)} B {encoding})")
+        
+        return {
+            'payload_version': PAYLOAD_VERSION,
+            'payload_key': payload_key,
+            'payload_encoding': encoding,
+            **json.loads(meta),
+        }
     
     def cancel_job(self, job_id: str):
         """Set cancellation flag for job"""
@@ -454,6 +580,64 @@ class RedisService:
         except Exception as e:
             logger.error(f"Failed to get progress for job {job_id}: {e}")
             return None
+    
+    def get_progress_many(self, job_ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Get current progress for several jobs in one round-trip"""
+        pipe = self.redis_client.pipeline(transaction=False)
+        for job_id in job_ids:
+            pipe.get(f"optimizer:progress:{job_id}")
+        raw_values = pipe.execute()
+        
+        progress = {}
+        for job_id, raw in zip(job_ids, raw_values):
+            progress[job_id] = None
+            if raw:
+                try:
+                    progress[job_id] = json.loads(raw)
+                except json.JSONDecodeError as e:
+                    logger.error(f"Failed to parse progress data for job {job_id}: {e}")
+        return progress
+
+
+def apply_progress_update(job_id: str, iteration: int, solution_data: Dict[str, Any]):
+    """
+    Database part of one progress notification: job fields, recruitment status on iteration 0 and
+    the progress row (not for the completion, iteration -1). Returns (job, progress row or None).
+    """
+    job = OptimizationJob.objects.select_related('recruitment').get(id=job_id)
+    # last stored progress row, base for the delta of the new one
+    base_iteration, base_solution = job.current_iteration, job.final_solution
+    job.current_iteration = iteration
+    job.updated_at = timezone.now()
+
+    # Update final_solution with latest best solution
+    job.final_solution = solution_data
+
+    if job.status == 'queued':
+        job.status = 'running'
+        job.started_at = timezone.now()
+
+    if iteration == 0:
+        job.first_solution = solution_data
+        # Update recruitment status to optimizing
+        recruitment = job.recruitment
+        if recruitment.plan_status == 'queued':
+            recruitment.plan_status = 'optimizing'
+            recruitment.save()
+            logger.info(f"Recruitment {recruitment.recruitment_id} status changed to optimizing")
+
+    # Check if job is completed (iteration = -1)
+    if iteration == -1:
+        job.status = 'completed'
+        job.completed_at = timezone.now()
+
+    job.save()
+
+    progress = None
+    if iteration >= 0:
+        progress, = build_progress_rows([(job, iteration, solution_data, base_iteration, base_solution)])
+        progress.save()
+    return job, progress
 
 
 class ProgressListener:
@@ -462,6 +646,7 @@ class ProgressListener:
     def __init__(self):
         self.redis_service = RedisService()
         self.channel_layer = get_channel_layer()
+        self.frame_throttle = ProgressFrameThrottle()
         self.pubsub = None
         self.running = False
         self.listener_thread = None
@@ -501,6 +686,9 @@ class ProgressListener:
             while self.running:
                 try:
                     message = self.pubsub.get_message(timeout=1.0)
+                    # throttled websocket frames whose interval has passed
+                    for frame in self.frame_throttle.due():
+                        self.send_websocket_update(*frame)
                     if message is None:
                         continue
                         
@@ -544,77 +732,43 @@ class ProgressListener:
             
             # Update job in database
             try:
-                job = OptimizationJob.objects.get(id=job_id)
-                job.current_iteration = iteration
-                job.updated_at = timezone.now()
-                
-                # Update final_solution with latest best solution
-                job.final_solution = solution_data
-                
-                if job.status == 'queued':
-                    job.status = 'running'
-                    job.started_at = timezone.now()
-
-                if iteration == 0:
-                    job.first_solution = solution_data
-                    # Update recruitment status to optimizing
-                    recruitment = job.recruitment
-                    if recruitment.plan_status == 'queued':
-                        recruitment.plan_status = 'optimizing'
-                        recruitment.save()
-                        logger.info(f"Recruitment {recruitment.recruitment_id} status changed to optimizing")
-                
-                # Check if job is completed (iteration = -1)
-                if iteration == -1:
-                    job.status = 'completed'
-                    job.completed_at = timezone.now()
-                    
-                    # Check if optimization end date has passed
-                    recruitment = job.recruitment
-                    optimization_end_date = recruitment.optimization_end_date
-                    
-                    if not optimization_end_date or timezone.now() >= optimization_end_date:
-                        # Optimization period ended, convert solution to meetings
-                        try:
-                            convert_solution_to_meetings(str(job.id))
-                            logger.info(f"Successfully converted solution to meetings for job {job.id}")
-                        except Exception as e:
-                            logger.error(f"Failed to convert solution to meetings for job {job.id}: {e}")
-                    else:
-                        # Optimization period still active, trigger next optimization round
-                        try:
-                            from scheduling.services import trigger_optimization
-                            trigger_optimization(recruitment)
-                            logger.info(f"Triggered next optimization round for recruitment {recruitment.recruitment_id}")
-                        except Exception as e:
-                            logger.error(f"Failed to trigger next optimization round for recruitment {recruitment.recruitment_id}: {e}")
-                
-                job.save()
+                # one short transaction, retried while the scheduler or the web process holds the write lock
+                job, progress = write_serialized(apply_progress_update, job_id, iteration, solution_data)
+
+                if iteration in (0, -1):
+                    # a worker took a job or became idle, hand out the next queued one
+                    from .job_queue import dispatch_queued_jobs
+                    dispatch_queued_jobs()
+
+                if iteration == -1 and not job.parent_id:
+                    self.finish_round(job)
                 
-                # Create progress record (only for non-completion iterations)
-                if iteration >= 0:
-                    progress = OptimizationProgress.objects.create(
-                        job=job,
-                        iteration=iteration,
-                        best_solution=solution_data
-                    )
-                    
-                    # Send websocket update
-                    self.send_websocket_update(job_id, 'progress_update', {
+                if progress is not None:
+                    # Send websocket update (rate limited per job, slim frame by default)
+                    self.dispatch_websocket_update(job_id, PROGRESS_MESSAGE, {
                         'job_id': job_id,
                         'iteration': iteration,
-                        'best_solution': progress.best_solution,
+                        'best_solution': solution_data,
                         'timestamp': progress.timestamp.isoformat()
                     })
                 else:
                     # Send completion update
-                    self.send_websocket_update(job_id, 'job_completed', {
+                    self.dispatch_websocket_update(job_id, COMPLETED_MESSAGE, {
                         'job_id': job_id,
                         'status': 'completed',
                         'final_solution': solution_data,
                         'timestamp': timezone.now().isoformat()
                     })
                 
+                if job.parent_id:
+                    # island of a larger job: merge into the parent, which completes the round
+                    from .islands import merge_island_progress
+                    island_messages, completed_parents = merge_island_progress([job])
+                    for message in island_messages:
+                        self.dispatch_websocket_update(*message)
+                    for parent in completed_parents:
+                        self.finish_round(parent)
+                
                 logger.info(f"Updated progress for job {job_id}, iteration {iteration}")
                 print(f"[REDIS] Updated database for job {job_id}, iteration {iteration}")
                 
@@ -624,6 +778,18 @@ class ProgressListener:
         except Exception as e:
             logger.error(f"Error handling progress update: {e}")
     
+    def finish_round(self, job: OptimizationJob):
+        """finish_optimization_round; pub/sub updates are not replayed, so a failure is only logged"""
+        try:
+            finish_optimization_round(job)
+        except Exception as e:
+            logger.error(f"Failed to finish optimization round of job {job.id}: {e}")
+
+    def dispatch_websocket_update(self, job_id: str, message_type: str, data: Dict[str, Any]):
+        """Pass update through the per-job frame throttle and send what is due"""
+        for frame in self.frame_throttle.dispatch(job_id, message_type, data):
+            self.send_websocket_update(*frame)
+
     def send_websocket_update(self, job_id: str, message_type: str, data: Dict[str, Any]):
         """Send update to WebSocket clients"""
         try:
@@ -645,8 +811,17 @@ class OptimizerService:
     def __init__(self):
         self.redis_service = RedisService()
     
-    def submit_job(self, validated_data: Dict[str, Any]) -> OptimizationJob:
-        """Submit a new optimization job"""
+    def submit_job(self, validated_data: Dict[str, Any], priority: Optional[int] = None,
+                   islands: Optional[int] = None) -> OptimizationJob:
+        """
+        Submit a new optimization job (queued per organization, see job_queue).
+
+        With islands > 1 (default OPTIMIZER_ISLANDS) the returned job is the parent of that many
+        sub-runs with distinct seeds, see optimizer.islands.
+        """
+        from .job_queue import JobQueue, PRIORITY_NORMAL
+        from .islands import island_count, create_islands
+        
         try:
             # Extract data
             problem_data = validated_data['problem_data']
@@ -657,19 +832,39 @@ class OptimizerService:
             job = OptimizationJob.objects.create(
                 recruitment_id=recruitment_id,
                 problem_data=problem_data,
-                max_execution_time=max_execution_time
+                max_execution_time=max_execution_time,
+                entity_index=validated_data.get('entity_index'),
+                warm_start_job=validated_data.get('warm_start_job'),
+                feasibility=validated_data.get('feasibility')
             )
             
-            # Prepare job data for optimizer (matching RawJobData format in C++)
-            # Note: RawJobData expects "recruitment_id", not "job_id"
-            job_data = {
-                'recruitment_id': str(job.id),  # C++ uses recruitment_id field
-                'problem_data': problem_data,
-                'max_execution_time': max_execution_time
-            }
-            
-            # Publish to Redis queue
-            self.redis_service.publish_job(job_data)
+            payload = self.redis_service.store_problem_payload(job.problem_payload_id, problem_data)
+            count = island_count(islands)
+            runs = create_islands(job, count) if count > 1 else [job]
+
+            queue = JobQueue(self.redis_service.redis_client)
+            for run in runs:
+                # Prepare job envelope for optimizer (RedisEventReceiver loads problem_data from payload_key)
+                # Note: RawJobData expects "recruitment_id", not "job_id"
+                job_data = {
+                    'recruitment_id': str(run.id),  # C++ uses recruitment_id field
+                    'max_execution_time': max_execution_time,
+                    **payload
+                }
+                if validated_data.get('initial_genotypes'):
+                    # warm start (see optimizer.warm_start), -1 marks genes the optimizer draws randomly
+                    job_data['initial_genotypes'] = validated_data['initial_genotypes']
+                if run.seed is not None:
+                    job_data['seed'] = run.seed
+                    job_data['algorithm'] = run.algorithm
+
+                # Queue for the optimizer workers (fair share between organizations)
+                queue.enqueue(
+                    str(run.id),
+                    str(job.recruitment.organization_id),
+                    job_data,
+                    priority=PRIORITY_NORMAL if priority is None else priority
+                )
             
             logger.info(f"Submitted optimization job {job.id} for recruitment {recruitment_id}")
             print(f"[DJANGO] Submitted job {job.id} with max_execution_time: {max_execution_time}s for recruitment {recruitment_id}")
@@ -691,9 +886,21 @@ class OptimizerService:
             job.status = 'cancelled'
             job.completed_at = timezone.now()
             job.save()
-            
-            # Set cancel flag in Redis
-            self.redis_service.cancel_job(job_id)
+
+            # a parent of islands runs nowhere itself, its children are cancelled instead
+            run_ids = [job_id]
+            if job.islands.exists():
+                islands = job.islands.filter(status__in=['queued', 'running'])
+                run_ids = [str(pk) for pk in islands.values_list('id', flat=True)]
+                islands.update(status='cancelled', completed_at=job.completed_at)
+            
+            # Drop the job from the queue if no worker took it yet, otherwise set cancel flag
+            from .job_queue import JobQueue
+            queue = JobQueue(self.redis_service.redis_client)
+            for run_id in run_ids:
+                if not queue.remove(run_id):
+                    self.redis_service.cancel_job(run_id)
+            queue.dispatch()
             
             # Send websocket notification
             channel_layer = get_channel_layer()
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import OptimizationJob, ProblemPayload
+
+
+@receiver(post_delete, sender=OptimizationJob)
+def release_problem_payload(sender, instance, **kwargs):
+    """Drop the job's reference to its problem payload"""
+    if instance.problem_payload_id:
+        ProblemPayload.objects.release(instance.problem_payload_id)
@@ -0,0 +1,245 @@
+import os
+import socket
+import time
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+import redis
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+
+from .async_listener import PendingJobUpdate, write_progress_batch
+from .models import OptimizationJob
+from .services import finish_optimization_round, RedisService
+from .progress_frames import ProgressFrameThrottle
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+PROGRESS_STREAM = "optimizer:progress:stream"
+PROGRESS_GROUP = "django-progress"
+
+# entries read per XREADGROUP call
+DEFAULT_BATCH_SIZE = 500
+# how long XREADGROUP blocks waiting for new entries (ms)
+DEFAULT_BLOCK_MS = 1000
+# entries pending longer than this (ms) on a dead consumer are claimed by a live one
+DEFAULT_MIN_IDLE_MS = 60000
+# entries delivered this many times without being acked are dropped as poison
+DEFAULT_MAX_DELIVERIES = 5
+# how often pending entries are checked for reclaim (seconds)
+DEFAULT_RECLAIM_INTERVAL = 30
+
+
+def default_consumer_name() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class StreamProgressListener:
+    """
+    Durable progress listener reading optimizer:progress:stream through a consumer group.
+
+    Several listener processes can share one group; each entry is delivered to one of them and
+    acknowledged (XACK) only after its batch has been written, so entries published while no
+    listener is running are read on start and entries held by a crashed consumer are claimed
+    (XAUTOCLAIM) by another after min_idle_ms. Entries reference the optimizer:progress:{job_id} key
+    just like pub/sub notifications, batches are coalesced and written with write_progress_batch.
+    """
+
+    def __init__(self, redis_client: Optional[redis.Redis] = None, consumer: Optional[str] = None,
+                 stream: str = None, group: str = None, batch_size: int = DEFAULT_BATCH_SIZE,
+                 block_ms: int = DEFAULT_BLOCK_MS, min_idle_ms: int = DEFAULT_MIN_IDLE_MS,
+                 max_deliveries: int = DEFAULT_MAX_DELIVERIES,
+                 reclaim_interval: float = DEFAULT_RECLAIM_INTERVAL):
+        self.redis_service = RedisService(redis_client)
+        self.redis_client = self.redis_service.redis_client
+        self.stream = stream or getattr(settings, 'OPTIMIZER_PROGRESS_STREAM', PROGRESS_STREAM)
+        self.group = group or getattr(settings, 'OPTIMIZER_PROGRESS_GROUP', PROGRESS_GROUP)
+        self.consumer = consumer or default_consumer_name()
+        self.batch_size = batch_size
+        self.block_ms = block_ms
+        self.min_idle_ms = min_idle_ms
+        self.max_deliveries = max_deliveries
+        self.reclaim_interval = reclaim_interval
+        self.channel_layer = get_channel_layer()
+        self.frame_throttle = ProgressFrameThrottle()
+        self.running = False
+        self._last_reclaim = 0.0
+
+    def ensure_group(self):
+        """
+        Create the consumer group (and stream) if missing.
+
+        A new group starts at the end of the stream: entries added before any listener consumed it
+        belong to long finished jobs, the optimizer only trims the stream at 100k entries.
+        """
+        try:
+            self.redis_client.xgroup_create(self.stream, self.group, id='$', mkstream=True)
+            logger.info(f"Created consumer group {self.group} on {self.stream}")
+        except redis.ResponseError as e:
+            if 'BUSYGROUP' not in str(e):
+                raise
+
+    def run(self):
+        self.running = True
+        logger.info(f"Started stream listener {self.consumer} on {self.stream} (group {self.group})")
+        print(f"[REDIS] Started stream listener {self.consumer} on {self.stream}")
+
+        replayed = False
+        while self.running:
+            try:
+                if not replayed:
+                    # entries this consumer received before a restart but never acked,
+                    # retried like any other loop step until Redis and the database answer
+                    self.ensure_group()
+                    self.process_own_pending()
+                    replayed = True
+                    continue
+                if time.monotonic() - self._last_reclaim >= self.reclaim_interval:
+                    self.reclaim()
+                self.poll()
+                for frame in self.frame_throttle.due():
+                    self.send_websocket_update(*frame)
+            except redis.ConnectionError as e:
+                logger.error(f"Lost connection to Redis: {e}")
+                time.sleep(1)
+            except Exception as e:
+                logger.error(f"Error in stream listener loop: {e}")
+                time.sleep(0.1)
+        logger.info("Stream listener stopped")
+
+    def stop(self):
+        self.running = False
+
+    def poll(self) -> int:
+        """Read and process one batch of new entries, returns number of entries processed"""
+        response = self.redis_client.xreadgroup(
+            self.group, self.consumer, {self.stream: '>'}, count=self.batch_size, block=self.block_ms
+        )
+        entries = response[0][1] if response else []
+        return self.process(entries)
+
+    def process_own_pending(self):
+        """Re-process entries delivered to this consumer name that were never acknowledged"""
+        # entries left pending by a failed round finish are skipped here and retried by reclaim()
+        last_id = '0'
+        while self.running:
+            response = self.redis_client.xreadgroup(
+                self.group, self.consumer, {self.stream: last_id}, count=self.batch_size
+            )
+            entries = response[0][1] if response else []
+            if not entries:
+                return
+            self.process(entries)
+            last_id = entries[-1][0]
+
+    def reclaim(self) -> int:
+        """Claim entries idle on other consumers longer than min_idle_ms and process them"""
+        self._last_reclaim = time.monotonic()
+        self.drop_poison_entries()
+
+        claimed_total = 0
+        start_id = '0-0'
+        while True:
+            next_id, entries, *_ = self.redis_client.xautoclaim(
+                self.stream, self.group, self.consumer, self.min_idle_ms, start_id=start_id, count=self.batch_size
+            )
+            # entries deleted by trimming come back as None
+            entries = [entry for entry in entries if entry and entry[1] is not None]
+            if entries:
+                logger.info(f"Reclaimed {len(entries)} pending progress entries")
+                claimed_total += self.process(entries)
+            if next_id in ('0-0', start_id):
+                return claimed_total
+            start_id = next_id
+
+    def drop_poison_entries(self):
+        """Acknowledge entries that failed max_deliveries times so they stop being reclaimed"""
+        pending = self.redis_client.xpending_range(
+            self.stream, self.group, min='-', max='+', count=self.batch_size, idle=self.min_idle_ms
+        )
+        poison = [p['message_id'] for p in pending if p['times_delivered'] >= self.max_deliveries]
+        if poison:
+            self.redis_client.xack(self.stream, self.group, *poison)
+            logger.error(f"Dropped {len(poison)} progress entries after {self.max_deliveries} failed deliveries: {poison}")
+
+    def process(self, entries: List[Tuple[str, Dict[str, str]]]) -> int:
+        """
+        Coalesce, write and acknowledge a batch of stream entries.
+
+        Entries of a job whose round could not be finished stay pending, so the job is finished again
+        when they are replayed or reclaimed; everything else in the batch is acknowledged.
+        """
+        if not entries:
+            return 0
+
+        batch: Dict[str, PendingJobUpdate] = {}
+        for _, fields in entries:
+            job_id = fields.get('job_id')
+            try:
+                iteration = int(fields.get('iteration'))
+            except (TypeError, ValueError):
+                iteration = None
+            if not job_id or iteration is None:
+                logger.warning(f"Invalid progress stream entry: {fields}")
+                continue
+            batch.setdefault(job_id, PendingJobUpdate()).add(iteration)
+
+        unfinished = set()
+        if batch:
+            solutions = self.fetch_progress(list(batch))
+            updates = []
+            for job_id, pending in batch.items():
+                if solutions.get(job_id) is None:
+                    logger.warning(f"No progress data found for job {job_id}")
+                    continue
+                updates.append((job_id, pending, solutions[job_id]))
+
+            if updates:
+                # raises on database errors: entries stay pending and are retried
+                messages, completed_jobs = write_progress_batch(updates)
+                for message in messages:
+                    for frame in self.frame_throttle.dispatch(*message):
+                        self.send_websocket_update(*frame)
+                unfinished = self.finish_rounds(completed_jobs)
+
+        acked = [entry_id for entry_id, fields in entries if fields.get('job_id') not in unfinished]
+        if acked:
+            self.redis_client.xack(self.stream, self.group, *acked)
+        print(f"[REDIS] Processed {len(entries)} progress stream entries ({len(batch)} jobs)")
+        return len(entries)
+
+    def finish_rounds(self, jobs: List[OptimizationJob]) -> Set[str]:
+        """Finish the rounds of completed jobs one by one, returns ids of the jobs whose entries must stay pending"""
+        failed = []
+        for job in jobs:
+            try:
+                finish_optimization_round(job)
+            except Exception as e:
+                logger.error(f"Failed to finish optimization round of job {job.id}, its entries stay pending: {e}")
+                failed.append(job.id)
+        if not failed:
+            return set()
+        # a parent of islands is completed by the entries of its islands
+        island_ids = OptimizationJob.objects.filter(parent_id__in=failed).values_list('id', flat=True)
+        return {str(job_id) for job_id in failed} | {str(job_id) for job_id in island_ids}
+
+    def fetch_progress(self, job_ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Best solutions from optimizer:progress:{job_id} for all jobs in one round-trip"""
+        return {
+            job_id: progress.get('best_solution', {}) if progress is not None else None
+            for job_id, progress in self.redis_service.get_progress_many(job_ids).items()
+        }
+
+    def send_websocket_update(self, job_id: str, message_type: str, data: Dict[str, Any]):
+        """Send update to WebSocket clients"""
+        try:
+            async_to_sync(self.channel_layer.group_send)(
+                f'job_progress_{job_id}',
+                {
+                    'type': message_type,
+                    'data': data
+                }
+            )
+        except Exception as e:
+            logger.error(f"Failed to send WebSocket update: {e}")
@@ -1,3 +1,928 @@
-from django.test import TestCase
+import io
+import json
+import time
+import unittest
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import fakeredis
+import redis
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from .evaluator import PlanEvaluator, evaluate_solution
+from .feasibility import InfeasibleProblemError, analyze_feasibility
+from .islands import MIGRANT_KEY_PREFIX, create_islands, merge_island_progress, migrate_genotypes
+from .job_queue import DISPATCHED_TTL, PRIORITY_HIGH, PRIORITY_LOW, JobQueue
+from .models import OptimizationJob, OptimizationProgress, ProblemPayload
+from .progress_frames import COMPLETED_MESSAGE, PROGRESS_MESSAGE, ProgressFrameThrottle
+from .problem_generator import generate_problem_data, write_problem_data
+from .progress_storage import (
+    apply_solution_delta, attach_solutions, build_progress_rows, diff_solution, reconstruct_solution
+)
+from .services import convert_solution_to_meetings
+from .stream_listener import StreamProgressListener
+from .warm_start import UNKNOWN_GENE, warm_start_genotypes
+from identity.models import Group, Organization, User, UserGroup, UserRecruitment
+from preferences.models import Constraints
+from preferences.views import DEFAULT_CONSTRAINTS
+from scheduling.models import Meeting, Recruitment, Room, Subject, SubjectGroup
+from scheduling.occupancy import occupancy_snapshot
+from scheduling.services import trigger_optimization
+
+OPTIMIZER_DATA = settings.BASE_DIR.parent / 'optimizer_service' / 'data'
+# solutions scored by the C++ Evaluator for inputs in optimizer_service/data/input
+EVALUATOR_REFERENCE = OPTIMIZER_DATA / 'output' / 'evaluator_reference.json'
+
+SOLUTION_FIELDS = [
+    'student_fitnesses', 'teacher_fitnesses', 'student_weighted_fitnesses', 'teacher_weighted_fitnesses',
+    'total_student_weight', 'total_teacher_weight', 'student_detailed_fitnesses', 'teacher_detailed_fitnesses',
+]
+
+
+@unittest.skipUnless(EVALUATOR_REFERENCE.exists(), "optimizer_service data not available")
+class PlanEvaluatorTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        with open(EVALUATOR_REFERENCE) as f:
+            cls.reference = json.load(f)
+        cls.problems = {}
+        for input_name in cls.reference:
+            with open(OPTIMIZER_DATA / 'input' / input_name) as f:
+                cls.problems[input_name] = json.load(f)['problem_data']
+
+    def assertMatchesOptimizer(self, result, expected):
+        self.assertAlmostEqual(result['fitness'], expected['fitness'], places=9)
+        for field in SOLUTION_FIELDS:
+            self.assertAlmostEqualNested(result[field], expected[field], field)
+
+    def assertAlmostEqualNested(self, actual, expected, path):
+        if isinstance(expected, list):
+            self.assertEqual(len(actual), len(expected), path)
+            for i, (a, e) in enumerate(zip(actual, expected)):
+                self.assertAlmostEqualNested(a, e, f'{path}[{i}]')
+        else:
+            self.assertAlmostEqual(actual, expected, places=9, msg=path)
+
+    def test_genotype_matches_optimizer(self):
+        for input_name, solutions in self.reference.items():
+            evaluator = PlanEvaluator(self.problems[input_name])
+            for i, solution in enumerate(solutions):
+                with self.subTest(input=input_name, solution=i):
+                    self.assertMatchesOptimizer(evaluator.evaluate(genotype=solution['genotype']), solution)
+
+    def test_by_student_and_by_group_match_optimizer(self):
+        for input_name, solutions in self.reference.items():
+            for i, solution in enumerate(solutions):
+                with self.subTest(input=input_name, solution=i):
+                    result = evaluate_solution(self.problems[input_name], {
+                        'by_student': solution['by_student'], 'by_group': solution['by_group']
+                    })
+                    self.assertMatchesOptimizer(result, solution)
+
+    def test_evaluate_many(self):
+        for input_name, solutions in self.reference.items():
+            evaluator = PlanEvaluator(self.problems[input_name])
+            fitness = evaluator.evaluate_many([solution['genotype'] for solution in solutions])
+            for value, solution in zip(fitness, solutions):
+                self.assertAlmostEqual(value, solution['fitness'], places=9)
+
+    def test_invalid_plans_are_rejected(self):
+        input_name, solutions = next(iter(self.reference.items()))
+        evaluator = PlanEvaluator(self.problems[input_name])
+        genotype = solutions[0]['genotype']
+        with self.assertRaises(ValueError):
+            evaluator.evaluate(genotype=genotype[:-1])
+        with self.assertRaises(ValueError):
+            evaluator.evaluate(genotype=[99] + genotype[1:])
+        with self.assertRaises(ValueError):
+            evaluator.evaluate(genotype=genotype[:-2] + [evaluator.total_timeslots, 0])
+        with self.assertRaises(ValueError):
+            evaluator.evaluate()
+
+    def test_large_batch_matches_optimizer(self):
+        # throughput is reported by the evaluate_plans stage of benchmark_pipeline, not asserted here
+        input_name, solutions = next(iter(self.reference.items()))
+        evaluator = PlanEvaluator(self.problems[input_name])
+        batch = [solutions[i % len(solutions)] for i in range(5000)]
+        fitness = evaluator.evaluate_many([solution['genotype'] for solution in batch])
+        self.assertEqual(len(fitness), len(batch))
+        for value, solution in zip(fitness, batch):
+            self.assertAlmostEqual(value, solution['fitness'], places=9)
+
+
+class ProblemGeneratorTests(SimpleTestCase):
+    def test_generated_problem_is_feasible_and_complete(self):
+        problem = generate_problem_data(300, 40, seed=1)
+        self.assertEqual(set(problem['constraints']), set(DEFAULT_CONSTRAINTS))
+        self.assertTrue(analyze_feasibility(problem).feasible, analyze_feasibility(problem).summary())
+        self.assertEqual(len(problem['preferences']['students']), 300)
+        self.assertEqual(len(problem['preferences']['teachers']), problem['constraints']['NumTeachers'])
+        total_timeslots = problem['constraints']['TimeslotsDaily'] * problem['constraints']['DaysInCycle']
+        for student in problem['preferences']['students']:
+            self.assertEqual((len(student), len(student[11]), len(student[12])), (13, total_timeslots, 40))
+        # the optimizer's fitness function accepts it
+        PlanEvaluator(problem)
+
+    def test_seed_makes_output_reproducible(self):
+        self.assertEqual(generate_problem_data(50, 10, seed=3), generate_problem_data(50, 10, seed=3))
+        self.assertNotEqual(generate_problem_data(50, 10, seed=3), generate_problem_data(50, 10, seed=4))
+
+    def test_streamed_output_matches(self):
+        options = {'seed': 2, 'preference_distribution': 'uniform', 'unavailability': 0.2}
+        out = io.StringIO()
+        write_problem_data(out, 80, 12, job={'recruitment_id': 'synthetic', 'max_execution_time': 60}, **options)
+        document = json.loads(out.getvalue())
+        self.assertEqual(document['recruitment_id'], 'synthetic')
+        self.assertEqual(document['problem_data'], generate_problem_data(80, 12, **options))
+
+    def test_tightness(self):
+        exact = generate_problem_data(200, 30, capacity_slack=0, seed=5)
+        self.assertTrue(analyze_feasibility(exact).feasible)
+        oversubscribed = analyze_feasibility(generate_problem_data(200, 30, capacity_slack=-0.3, seed=5))
+        self.assertIn('subject_capacity', [issue['code'] for issue in oversubscribed.errors])
+
+        busy = generate_problem_data(200, 30, unavailability=0.4, seed=5)['constraints']
+        free = generate_problem_data(200, 30, unavailability=0, seed=5)['constraints']
+        self.assertGreater(sum(map(len, busy['StudentsUnavailabilityTimeslots'])), 0)
+        self.assertEqual(sum(map(len, free['StudentsUnavailabilityTimeslots'])), 0)
+
+    def test_disabled_preferences(self):
+        problem = generate_problem_data(20, 5, preference_distribution='none')
+        for student in problem['preferences']['students']:
+            self.assertEqual(student[:4], [0, 0, 0, 0])
+            self.assertFalse(any(student[11]) or any(student[12]))
+
+
+class ProblemPayloadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        organization = Organization.objects.create(organization_name='Org')
+        cls.recruitment = Recruitment.objects.create(recruitment_name='Main', organization=organization)
+
+    def create_job(self, problem_data):
+        return OptimizationJob.objects.create(recruitment=self.recruitment, max_execution_time=60, problem_data=problem_data)
+
+    def test_identical_problems_share_one_payload(self):
+        first, second = self.create_job({'a': [1, 2]}), self.create_job({'a': [1, 2]})
+        self.assertEqual(first.problem_payload_id, second.problem_payload_id)
+        self.assertEqual(ProblemPayload.objects.get().ref_count, 2)
+        self.assertEqual(OptimizationJob.objects.get(pk=second.pk).problem_data, {'a': [1, 2]})
+
+        first.delete()
+        self.assertEqual(ProblemPayload.objects.get().ref_count, 1)
+        second.problem_data = {'b': 3}
+        second.save()
+        self.assertEqual(list(ProblemPayload.objects.values_list('data', 'ref_count')), [({'b': 3}, 1)])
+
+    def test_collect_garbage_repairs_reference_counts(self):
+        job = self.create_job({'kept': True})
+        ProblemPayload.objects.filter(pk=job.problem_payload_id).update(ref_count=0)
+        orphan = ProblemPayload.objects.create(content_hash='0' * 64, data={}, ref_count=3)
+        fresh = ProblemPayload.objects.create(content_hash='1' * 64, data={}, ref_count=0)
+        ProblemPayload.objects.filter(pk__in=[job.problem_payload_id, orphan.pk]).update(
+            created_at=timezone.now() - timedelta(days=1)
+        )
+
+        self.assertEqual(ProblemPayload.objects.collect_garbage(), 1)
+        self.assertEqual(
+            dict(ProblemPayload.objects.values_list('content_hash', 'ref_count')),
+            {job.problem_payload_id: 1, fresh.pk: 0}
+        )
+
+
+class ProgressFrameThrottleTests(SimpleTestCase):
+    def setUp(self):
+        self.now = 100.0
+        clock = mock.patch('optimizer.progress_frames.time.monotonic', side_effect=lambda: self.now)
+        clock.start()
+        self.addCleanup(clock.stop)
+        self.throttle = ProgressFrameThrottle(max_frames_per_second=2, slim=True)
+
+    @staticmethod
+    def progress(iteration, fitness, job_id='job'):
+        solution = {'fitness': fitness, 'genotype': [1] * 50, 'student_fitnesses': [fitness, 0.0], 'teacher_fitnesses': []}
+        return job_id, PROGRESS_MESSAGE, {'job_id': job_id, 'iteration': iteration, 'best_solution': solution, 'timestamp': 't'}
+
+    def iterations(self, frames):
+        return [(job_id, message_type, data['iteration']) for job_id, message_type, data in frames]
+
+    def test_frames_inside_interval_are_coalesced(self):
+        # the first frame of a job passes right away
+        self.assertEqual(self.iterations(self.throttle.dispatch(*self.progress(1, 1.0))), [('job', PROGRESS_MESSAGE, 1)])
+        self.now += 0.1
+        self.assertEqual(self.throttle.dispatch(*self.progress(2, 1.0)), [])
+        # jobs are throttled independently
+        self.assertEqual(self.iterations(self.throttle.dispatch(*self.progress(3, 2.0, job_id='other'))), [
+            ('other', PROGRESS_MESSAGE, 3)
+        ])
+        self.now += 0.1
+        # an improvement inside the interval is held back, not lost: the latest frame replaces the pending one
+        self.assertEqual(self.throttle.dispatch(*self.progress(4, 3.0)), [])
+        self.assertEqual(self.throttle.due(), [])
+
+        self.now += 0.4
+        due = self.throttle.due()
+        self.assertEqual(self.iterations(due), [('job', PROGRESS_MESSAGE, 4)])
+        self.assertEqual(due[0][2]['fitness'], 3.0)
+        self.assertEqual(self.throttle.due(), [])
+
+        self.now += 0.5
+        self.assertEqual(self.iterations(self.throttle.dispatch(*self.progress(5, 4.0))), [('job', PROGRESS_MESSAGE, 5)])
+
+    def test_completion_flushes_pending_frame(self):
+        self.throttle.dispatch(*self.progress(1, 1.0))
+        self.throttle.dispatch(*self.progress(2, 5.0))
+        frames = self.throttle.dispatch('job', COMPLETED_MESSAGE, {'job_id': 'job', 'iteration': 2})
+        # the last progress frame goes out before the completion, neither waits for the interval
+        self.assertEqual(self.iterations(frames), [('job', PROGRESS_MESSAGE, 2), ('job', COMPLETED_MESSAGE, 2)])
+        self.assertEqual(frames[0][2]['fitness'], 5.0)
+        self.assertEqual(self.throttle.due(), [])
+        # a new round of the same job starts unthrottled
+        self.assertEqual(len(self.throttle.dispatch(*self.progress(3, 1.0))), 1)
+
+    def test_slim_frame_drops_solution(self):
+        _, _, data = self.progress(7, 2.5)
+        frame, = self.throttle.dispatch('job', PROGRESS_MESSAGE, data)
+        self.assertEqual(frame[2], {
+            'job_id': 'job', 'iteration': 7, 'fitness': 2.5, 'management_fitness': None,
+            'student_fitness': {'mean': 1.25, 'min': 0.0, 'max': 2.5}, 'teacher_fitness': None, 'timestamp': 't',
+        })
+        self.assertNotIn('best_solution', frame[2])
+
+        full = ProgressFrameThrottle(max_frames_per_second=0, slim=False)
+        self.assertEqual([frame for _, _, frame in full.dispatch('job', PROGRESS_MESSAGE, data)], [data])
+        self.assertEqual(len(full.dispatch('job', PROGRESS_MESSAGE, data)), 1)
+
+
+@override_settings(OPTIMIZER_PROGRESS_STORAGE='delta', OPTIMIZER_PROGRESS_KEYFRAME_INTERVAL=4)
+class ProgressStorageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        organization = Organization.objects.create(organization_name='Org')
+        recruitment = Recruitment.objects.create(recruitment_name='Main', organization=organization)
+        cls.job = OptimizationJob.objects.create(recruitment=recruitment, max_execution_time=60)
+
+    def test_diff_round_trip(self):
+        base = {'fitness': 1.0, 'genotype': [1, 2, 3, 4], 'by_student': [0.5, 0.5], 'dropped': 7}
+        cases = {
+            'patched list': {'fitness': 2.0, 'genotype': [1, 9, 3, 8], 'by_student': [0.5, 0.5], 'dropped': 7},
+            'resized list': {'fitness': 1.0, 'genotype': [1, 2, 3], 'by_student': [0.5, 0.5], 'dropped': 7},
+            'dropped and new key': {'fitness': 1.0, 'genotype': [1, 2, 3, 4], 'by_student': [0.5, 0.5], 'new': [1]},
+            'key order': {'genotype': [1, 2, 3, 4], 'fitness': 1.0, 'dropped': 7, 'by_student': [0.5, 0.5]},
+            'unchanged': dict(base),
+        }
+        for name, current in cases.items():
+            with self.subTest(case=name):
+                applied = apply_solution_delta(base, diff_solution(base, current))
+                self.assertEqual(list(applied.items()), list(current.items()))
+        self.assertEqual(diff_solution(base, cases['patched list'])['patch'], {'genotype': [[1, 9], [3, 8]]})
+        self.assertEqual(diff_solution(base, base), {})
+        self.assertEqual(base['genotype'], [1, 2, 3, 4])
+
+    def write(self, iteration, solution, base_iteration, base_solution):
+        row, = build_progress_rows([(self.job, iteration, solution, base_iteration, base_solution)])
+        row.save()
+        return row
+
+    def test_chains_rebuild_every_solution(self):
+        solutions = []
+        genotype = [0] * 12
+        for iteration in range(12):
+            genotype = list(genotype)
+            genotype[iteration] = iteration + 1
+            solutions.append({'fitness': float(iteration), 'genotype': genotype, 'by_group': [iteration % 3] * 4})
+
+        base_iteration, base_solution = -1, None
+        for iteration, solution in enumerate(solutions):
+            if iteration == 6:
+                # the job's final_solution no longer matches the last stored row, the chain restarts
+                base_solution = dict(base_solution, fitness=-1.0)
+            self.write(iteration, solution, base_iteration, base_solution)
+            base_iteration, base_solution = iteration, solution
+
+        rows = list(OptimizationProgress.objects.filter(job=self.job).order_by('iteration'))
+        self.assertEqual([row.iteration for row in rows if row.is_keyframe], [0, 4, 6, 10])
+        self.assertEqual([row.chain_length for row in rows], [0, 1, 2, 3, 0, 1, 0, 1, 2, 3, 0, 1])
+        self.assertEqual([row.keyframe_iteration for row in rows], [0, 0, 0, 0, 4, 4, 6, 6, 6, 6, 10, 10])
+        self.assertTrue(all(row.best_solution is None for row in rows if not row.is_keyframe))
+
+        with self.assertNumQueries(1):
+            attach_solutions(rows)
+        self.assertEqual([row.get_solution() for row in rows], solutions)
+
+        # a single row rebuilds its own chain, the older chains are not needed
+        with self.assertNumQueries(2):
+            row = OptimizationProgress.objects.get(job=self.job, iteration=9)
+            self.assertEqual(row.get_solution(), solutions[9])
+        for iteration, solution in enumerate(solutions):
+            self.assertEqual(reconstruct_solution(self.job.id, iteration), solution)
+        self.assertIsNone(reconstruct_solution(self.job.id, 12))
+
+    @override_settings(OPTIMIZER_PROGRESS_STORAGE='full')
+    def test_full_storage_writes_keyframes(self):
+        self.write(0, {'fitness': 0.0, 'genotype': [1]}, -1, None)
+        row = self.write(1, {'fitness': 1.0, 'genotype': [2]}, 0, {'fitness': 0.0, 'genotype': [1]})
+        self.assertTrue(row.is_keyframe)
+        self.assertEqual(row.best_solution, {'fitness': 1.0, 'genotype': [2]})
+
+
+class WarmStartTests(TestCase):
+    # students s1, s2; subject A with groups gA1, gA2 and subject B with gB1; rooms r1, r2
+    constraints = {
+        'StudentsSubjects': [[0, 1], [0]], 'GroupsPerSubject': [2, 1], 'NumGroups': 3, 'NumRooms': 2,
+        'TimeslotsDaily': 4, 'DaysInCycle': 2,
+    }
+    index = {'students': ['s1', 's2'], 'subjects': ['A', 'B'], 'subject_groups': ['gA1', 'gA2', 'gB1'], 'rooms': ['r1', 'r2']}
+    # s1 in gA2 and gB1, s2 in gA1; gA1 at day 1 slot 1 in r2, gA2 at day 0 slot 2 in r1, gB1 at day 1 slot 3 in r2
+    genotype = [1, 0, 0, 5, 1, 2, 0, 7, 1]
+
+    @classmethod
+    def setUpTestData(cls):
+        organization = Organization.objects.create(organization_name='Org')
+        cls.recruitment = Recruitment.objects.create(recruitment_name='Main', organization=organization)
+
+    def finish_round(self, genotype=None, constraints=None, index=None, **kwargs):
+        return OptimizationJob.objects.create(
+            recruitment=self.recruitment, max_execution_time=60, status='completed', completed_at=timezone.now(),
+            problem_data={'constraints': constraints or self.constraints}, entity_index=index or self.index,
+            final_solution={'fitness': 1.0, 'genotype': genotype or self.genotype}, **kwargs
+        )
+
+    def next_round(self, constraints, index):
+        return warm_start_genotypes(self.recruitment, {'constraints': constraints}, index)
+
+    def test_unchanged_problem_reuses_genotype(self):
+        previous = self.finish_round()
+        self.assertEqual(self.next_round(self.constraints, self.index), (previous, [self.genotype]))
+
+    def test_remap_after_entities_added_and_removed(self):
+        previous = self.finish_round()
+        # s2 left and s3 joined, subject A got a new first group gA0, room r1 was removed
+        constraints = dict(self.constraints, GroupsPerSubject=[3, 1], NumGroups=4, NumRooms=1)
+        index = {'students': ['s1', 's3'], 'subjects': ['A', 'B'], 'subject_groups': ['gA0', 'gA1', 'gA2', 'gB1'], 'rooms': ['r2']}
+        u = UNKNOWN_GENE
+        self.assertEqual(self.next_round(constraints, index), (previous, [[2, 0, u, u, u, 5, 0, 2, u, 7, 0]]))
+
+        # a shorter cycle drops the placements that no longer fit, reordered subjects move the student genes
+        constraints = dict(self.constraints, StudentsSubjects=[[1, 0], [1]], GroupsPerSubject=[1, 2], DaysInCycle=1)
+        index = dict(self.index, subjects=['B', 'A'], subject_groups=['gB1', 'gA1', 'gA2'])
+        self.assertEqual(self.next_round(constraints, index), (previous, [[1, 0, 0, u, 1, u, 1, 2, 0]]))
+
+    def test_stale_or_mismatched_genotype_is_dropped(self):
+        cases = {
+            # genotype of a different problem than the one stored with the job
+            'length mismatch': {'genotype': self.genotype[:-1]},
+            'index mismatch': {'index': dict(self.index, students=['s1'])},
+            # rounds stored before entity_index only warm start an identical shape
+            'no index': {'index': {}},
+        }
+        constraints = dict(self.constraints, NumRooms=1)
+        index = dict(self.index, rooms=['r2'])
+        for name, round_kwargs in cases.items():
+            with self.subTest(case=name):
+                OptimizationJob.objects.all().delete()
+                job = self.finish_round(**round_kwargs)
+                if name == 'no index':
+                    OptimizationJob.objects.filter(id=job.id).update(entity_index=None)
+                self.assertEqual(self.next_round(constraints, index), (None, []))
+
+        # nothing carried over: every student, group and room is new
+        OptimizationJob.objects.all().delete()
+        self.finish_round()
+        index = {'students': ['x1', 'x2'], 'subjects': ['A', 'B'], 'subject_groups': ['x', 'y', 'z'], 'rooms': ['r9']}
+        self.assertEqual(self.next_round(constraints, index), (None, []))
+
+    def test_latest_completed_round_is_used(self):
+        self.finish_round(genotype=[0, 0, 0, 1, 0, 1, 0, 1, 0])
+        OptimizationJob.objects.create(
+            recruitment=self.recruitment, max_execution_time=60, status='failed', completed_at=timezone.now(),
+            final_solution={'genotype': [9] * 9}
+        )
+        latest = self.finish_round()
+        self.assertEqual(self.next_round(self.constraints, self.index), (latest, [self.genotype]))
+        with self.settings(OPTIMIZER_WARM_START=False):
+            self.assertEqual(self.next_round(self.constraints, self.index), (None, []))
+
+
+@override_settings(OPTIMIZER_ISLAND_ALGORITHMS=['zawodev', 'greedy'], OPTIMIZER_ISLAND_MIGRATION_INTERVAL=30)
+class IslandsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        organization = Organization.objects.create(organization_name='Org')
+        cls.recruitment = Recruitment.objects.create(recruitment_name='Main', organization=organization)
+
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis(decode_responses=True)
+        client = mock.patch('optimizer.services.get_redis_client', return_value=self.redis)
+        client.start()
+        self.addCleanup(client.stop)
+        self.parent = OptimizationJob.objects.create(
+            recruitment=self.recruitment, max_execution_time=60, problem_data={'constraints': {}}
+        )
+        self.islands = create_islands(self.parent, 3)
+
+    def update_island(self, island, **fields):
+        OptimizationJob.objects.filter(id=island.id).update(updated_at=timezone.now(), **fields)
+        return OptimizationJob.objects.get(id=island.id)
+
+    def payload_refs(self):
+        return ProblemPayload.objects.get(pk=self.parent.problem_payload_id).ref_count
+
+    def test_islands_share_parent_payload(self):
+        self.assertEqual(len({island.seed for island in self.islands}), 3)
+        self.assertEqual([island.algorithm for island in self.islands], ['zawodev', 'greedy', 'zawodev'])
+        self.assertEqual(self.parent.islands.filter(problem_payload_id=self.parent.problem_payload_id).count(), 3)
+        self.assertEqual(self.payload_refs(), 4)
+        # the references taken by bulk_create agree with a recount
+        ProblemPayload.objects.collect_garbage(min_age=timedelta(0))
+        self.assertEqual(self.payload_refs(), 4)
+
+        self.parent.islands.all().delete()
+        self.assertEqual(self.payload_refs(), 1)
+        self.parent.delete()
+        self.assertFalse(ProblemPayload.objects.exists())
+
+    def test_progress_merged_into_parent(self):
+        started = timezone.now() - timedelta(minutes=1)
+        first = self.update_island(
+            self.islands[0], status='running', started_at=started, current_iteration=3,
+            final_solution={'fitness': 2.0, 'genotype': [1]}
+        )
+        self.update_island(
+            self.islands[1], status='running', started_at=timezone.now(), current_iteration=5,
+            final_solution={'fitness': 1.0, 'genotype': [2]}
+        )
+
+        messages, completed = merge_island_progress([first])
+        self.assertEqual(completed, [])
+        self.assertEqual([(job_id, message_type, data['iteration']) for job_id, message_type, data in messages], [
+            (str(self.parent.id), PROGRESS_MESSAGE, 5)
+        ])
+        self.parent.refresh_from_db()
+        # best solution of any island, furthest iteration of any island
+        self.assertEqual((self.parent.status, self.parent.started_at), ('running', started))
+        self.assertEqual((self.parent.current_iteration, self.parent.final_solution['fitness']), (5, 2.0))
+        self.assertEqual(self.parent.first_solution['fitness'], 2.0)
+        self.assertEqual(self.parent.progress_updates.get().get_solution()['fitness'], 2.0)
+
+        # the two running islands exchanged their genotypes
+        running = sorted(self.islands[:2], key=lambda island: str(island.id))
+        migrants = {
+            str(island.id): [json.loads(g) for g in self.redis.lrange(f'{MIGRANT_KEY_PREFIX}{island.id}', 0, -1)]
+            for island in running
+        }
+        self.assertEqual(sorted(migrants.values()), [[[1]], [[2]]])
+        # at most once per interval
+        self.assertEqual(migrate_genotypes(self.parent.id, list(self.parent.islands.all())), 0)
+
+    def test_parent_completes_when_every_island_finished(self):
+        self.update_island(self.islands[0], status='completed', current_iteration=-1, final_solution={'fitness': 3.0, 'genotype': [1]})
+        last = self.update_island(self.islands[1], status='failed')
+        messages, completed = merge_island_progress([last])
+        self.assertEqual(completed, [])
+        self.parent.refresh_from_db()
+        self.assertNotEqual(self.parent.status, 'completed')
+
+        last = self.update_island(self.islands[2], status='cancelled')
+        messages, completed = merge_island_progress([last])
+        self.assertEqual(completed, [self.parent])
+        self.assertEqual(messages[-1][1], COMPLETED_MESSAGE)
+        self.assertEqual(messages[-1][2]['final_solution'], {'fitness': 3.0, 'genotype': [1]})
+        self.parent.refresh_from_db()
+        self.assertEqual((self.parent.status, self.parent.current_iteration), ('completed', -1))
+        self.assertIsNotNone(self.parent.completed_at)
+
+        # a replay completes the parent again only until its round is finished
+        self.assertEqual(merge_island_progress([last])[1], [self.parent])
+        OptimizationJob.objects.filter(id=self.parent.id).update(round_finished_at=timezone.now())
+        self.assertEqual(merge_island_progress([last]), ([], []))
+
+
+class JobQueueTests(SimpleTestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis(decode_responses=True)
+        self.queue = JobQueue(self.redis)
+
+    def tearDown(self):
+        # the scripts only ever touch the keys they declare
+        self.assertLessEqual(set(self.redis.keys()), set(self.queue.keys))
+
+    def enqueue(self, job_id, tenant, **kwargs):
+        return self.queue.enqueue(job_id, tenant, {'recruitment_id': job_id}, **kwargs)
+
+    def take(self):
+        """A worker takes the next job and reports back, which triggers a dispatch"""
+        payload = self.redis.rpop('optimizer:jobs')
+        self.queue.dispatch()
+        return json.loads(payload)['recruitment_id'] if payload else None
+
+    def take_all(self):
+        return list(iter(self.take, None))
+
+    def test_fair_share_between_organizations(self):
+        for job_id in ['a1', 'a2', 'a3']:
+            self.enqueue(job_id, 'org-a')
+        for job_id in ['b1', 'b2']:
+            self.enqueue(job_id, 'org-b')
+
+        snapshot = self.queue.snapshot()
+        self.assertEqual(snapshot['dispatched'], ['a1'])
+        self.assertEqual(snapshot['queued'], 4)
+        # org-a was just served, so org-b goes next and the two alternate
+        self.assertEqual(snapshot['order'], ['b1', 'a2', 'b2', 'a3'])
+        self.assertEqual(self.take_all(), ['a1', 'b1', 'a2', 'b2', 'a3'])
+        self.assertEqual(self.queue.snapshot()['order'], [])
+
+    def test_priority_before_fair_share(self):
+        self.enqueue('a1', 'org-a')
+        self.enqueue('b1', 'org-b', priority=PRIORITY_LOW)
+        self.enqueue('a2', 'org-a')
+        self.enqueue('c1', 'org-c', priority=PRIORITY_HIGH)
+        self.assertEqual(self.queue.snapshot()['order'], ['c1', 'a2', 'b1'])
+
+        self.assertTrue(self.queue.reprioritize('b1', PRIORITY_HIGH))
+        self.assertFalse(self.queue.reprioritize('a1', PRIORITY_HIGH))
+        snapshot = self.queue.snapshot()
+        self.assertEqual(snapshot['order'], ['b1', 'c1', 'a2'])
+        self.assertEqual(self.take_all(), ['a1'] + snapshot['order'])
+
+    def test_fifo_within_organization(self):
+        job_ids = [f'a{i}' for i in range(12)]
+        for job_id in job_ids:
+            self.enqueue(job_id, 'org-a')
+        self.assertEqual(self.queue.snapshot()['tenants'], [
+            {'tenant': 'org-a', 'jobs': [{'job_id': job_id, 'priority': 1} for job_id in job_ids[1:]]}
+        ])
+        self.assertEqual(self.take_all(), job_ids)
+
+    def test_remove_before_and_after_dispatch(self):
+        self.enqueue('a1', 'org-a')
+        self.enqueue('a2', 'org-a')
+        self.enqueue('b1', 'org-b')
+
+        self.assertTrue(self.queue.remove('a2'))
+        self.assertEqual(self.queue.snapshot()['order'], ['b1'])
+        # a dispatched job no worker took yet is removed from the dispatch list
+        self.assertTrue(self.queue.remove('a1'))
+        self.assertEqual(self.redis.llen('optimizer:jobs'), 0)
+        self.assertFalse(self.queue.remove('a1'))
+
+        self.queue.dispatch()
+        self.assertEqual(self.take(), 'b1')
+        # taken by a worker: cancelled through the cancel flag instead
+        self.assertFalse(self.queue.remove('b1'))
+
+        self.enqueue('c1', 'org-c')
+        with mock.patch('optimizer.job_queue.time.time', return_value=time.time() + DISPATCHED_TTL + 1):
+            self.queue.dispatch()
+        self.assertEqual(self.redis.hkeys('optimizer:queue:dispatched'), [])
+        self.assertFalse(self.queue.remove('c1'))
+
+    @override_settings(OPTIMIZER_QUEUE_DISPATCH_DEPTH=3)
+    def test_dispatch_depth(self):
+        moved = [self.enqueue(f'a{i}', 'org-a') for i in range(5)]
+        self.assertEqual(moved, [1, 1, 1, 0, 0])
+        self.assertEqual(self.queue.snapshot()['dispatched'], ['a0', 'a1', 'a2'])
+        self.assertEqual(self.queue.dispatch(), 0)
+
+        self.redis.rpop('optimizer:jobs')
+        self.assertEqual(self.queue.dispatch(), 1)
+        self.assertEqual(self.redis.llen('optimizer:jobs'), 3)
+        self.assertEqual(self.queue.snapshot()['order'], ['a4'])
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class StreamProgressListenerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        organization = Organization.objects.create(organization_name='Org')
+        # without an optimization end date a completed round is converted to meetings
+        cls.recruitment = Recruitment.objects.create(recruitment_name='Main', organization=organization, plan_status='optimizing')
+
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis(decode_responses=True)
+        self.job = OptimizationJob.objects.create(
+            recruitment=self.recruitment, max_execution_time=60, status='running', current_iteration=1
+        )
+        convert = mock.patch('optimizer.services.convert_solution_to_meetings')
+        self.convert = convert.start()
+        self.addCleanup(convert.stop)
+
+    def listener(self, consumer='live', **kwargs):
+        listener = StreamProgressListener(redis_client=self.redis, consumer=consumer, **kwargs)
+        listener.ensure_group()
+        listener.running = True
+        return listener
+
+    def publish(self, iteration, job=None):
+        job = job or self.job
+        self.redis.set(f'optimizer:progress:{job.id}', json.dumps({'best_solution': {'fitness': 1.0}}))
+        return self.redis.xadd('optimizer:progress:stream', {'job_id': str(job.id), 'iteration': iteration})
+
+    def deliver(self, consumer):
+        """Entries read by a consumer that then dies without acknowledging them"""
+        return self.redis.xreadgroup('django-progress', consumer, {'optimizer:progress:stream': '>'})[0][1]
+
+    def pending(self):
+        return self.redis.xpending('optimizer:progress:stream', 'django-progress')['pending']
+
+    def test_new_group_skips_existing_entries(self):
+        self.publish(2)
+        listener = self.listener()
+        self.publish(3)
+        self.assertEqual(listener.poll(), 1)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.current_iteration, 3)
+
+    def test_replays_own_pending_entries(self):
+        self.listener(consumer='restarted')
+        self.publish(2)
+        self.publish(5)
+        self.deliver('restarted')
+
+        self.listener(consumer='restarted').process_own_pending()
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.current_iteration, 5)
+        self.assertEqual(self.job.progress_updates.count(), 1)
+        self.assertEqual(self.pending(), 0)
+
+    def test_startup_replay_retried_after_error(self):
+        self.listener(consumer='restarted')
+        self.publish(3)
+        self.deliver('restarted')
+
+        listener = StreamProgressListener(redis_client=self.redis, consumer='restarted')
+        replay = listener.process_own_pending
+        attempts = []
+
+        def flaky_replay():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise redis.ConnectionError('Redis is starting')
+            replay()
+
+        with mock.patch.object(listener, 'process_own_pending', side_effect=flaky_replay), \
+                mock.patch.object(listener, 'poll', side_effect=listener.stop), \
+                mock.patch('optimizer.stream_listener.time.sleep'):
+            listener.run()
+        self.assertEqual(len(attempts), 2)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.current_iteration, 3)
+        self.assertEqual(self.pending(), 0)
+
+    def test_reclaims_entries_of_dead_consumer(self):
+        listener = self.listener(min_idle_ms=0)
+        self.publish(4)
+        self.deliver('dead')
+
+        self.assertEqual(listener.reclaim(), 1)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.current_iteration, 4)
+        self.assertEqual(self.pending(), 0)
+
+    def test_poison_entry_is_acknowledged(self):
+        listener = self.listener(min_idle_ms=5, max_deliveries=3)
+        self.publish(4)
+        self.deliver('dead')
+        for _ in range(2):
+            self.redis.xreadgroup('django-progress', 'dead', {'optimizer:progress:stream': '0'})
+        time.sleep(0.01)
+
+        with mock.patch.object(listener, 'process') as process:
+            listener.reclaim()
+        process.assert_not_called()
+        self.assertEqual(self.pending(), 0)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.current_iteration, 1)
+
+    def test_completion_replayed_after_crash_before_ack(self):
+        listener = self.listener(consumer='restarted')
+        self.publish(-1)
+        entries = self.deliver('restarted')
+        # the crashed listener committed the completion, but died before finishing the round and XACK
+        with mock.patch('optimizer.stream_listener.finish_optimization_round', side_effect=SystemExit):
+            with self.assertRaises(SystemExit):
+                listener.process(entries)
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.status, self.job.round_finished_at), ('completed', None))
+        self.assertEqual(self.pending(), 1)
+
+        self.listener(consumer='restarted').process_own_pending()
+        self.convert.assert_called_once_with(str(self.job.id))
+        self.job.refresh_from_db()
+        self.assertIsNotNone(self.job.round_finished_at)
+        self.assertEqual(self.pending(), 0)
+
+        # a later replay does not finish the round again
+        self.publish(-1)
+        self.assertEqual(listener.poll(), 1)
+        self.convert.assert_called_once()
+
+    def test_failed_finish_keeps_only_its_entries_pending(self):
+        other = OptimizationJob.objects.create(recruitment=self.recruitment, max_execution_time=60, status='running')
+        listener = self.listener()
+        self.publish(-1)
+        self.publish(-1, job=other)
+
+        def convert(job_id):
+            if job_id == str(self.job.id):
+                raise RuntimeError('conversion failed')
+        self.convert.side_effect = convert
+        self.assertEqual(listener.poll(), 2)
+        self.assertEqual(self.pending(), 1)
+        other.refresh_from_db()
+        self.assertIsNotNone(other.round_finished_at)
+
+        self.convert.side_effect = None
+        listener.min_idle_ms = 0
+        listener.reclaim()
+        self.job.refresh_from_db()
+        self.assertIsNotNone(self.job.round_finished_at)
+        self.assertEqual(self.pending(), 0)
+
+
+def small_problem(**overrides):
+    """Feasible problem_data: one subject of two 2-timeslot groups, two students, one teacher and room"""
+    constraints = {
+        'TimeslotsDaily': 4, 'DaysInCycle': 1,
+        'NumSubjects': 1, 'NumGroups': 2, 'NumTeachers': 1, 'NumStudents': 2, 'NumRooms': 1, 'NumTags': 1,
+        'SubjectsDuration': [2], 'GroupsPerSubject': [2], 'MinStudentsPerGroup': [1, 1], 'GroupsCapacity': [2, 2],
+        'RoomsCapacity': [2], 'GroupsTags': [], 'RoomsTags': [],
+        'StudentsSubjects': [[0], [0]], 'TeachersGroups': [[0, 1]],
+        'RoomsUnavailabilityTimeslots': [[]], 'StudentsUnavailabilityTimeslots': [[], []], 'TeachersUnavailabilityTimeslots': [[]],
+        'StudentWeights': [], 'TeacherWeights': [],
+    }
+    constraints.update(overrides)
+    return {'constraints': constraints, 'preferences': {'students': [], 'teachers': []}}
+
+
+class FeasibilityTests(SimpleTestCase):
+    def assertIssues(self, problem_data, codes, severity='error'):
+        report = analyze_feasibility(problem_data)
+        issues = report.errors if severity == 'error' else report.warnings
+        self.assertEqual(sorted({issue['code'] for issue in issues}), sorted(codes), report.as_dict())
+        return report
+
+    def test_small_problem_is_feasible(self):
+        report = analyze_feasibility(small_problem())
+        self.assertEqual((report.errors, report.warnings), ([], []))
+
+    @unittest.skipUnless((OPTIMIZER_DATA / 'input' / 'THE2.json').exists(), "optimizer_service data not available")
+    def test_sample_input_is_feasible(self):
+        with open(OPTIMIZER_DATA / 'input' / 'THE2.json') as f:
+            report = analyze_feasibility(json.load(f)['problem_data'])
+        self.assertTrue(report.feasible, report.summary())
+
+    def test_size_mismatch(self):
+        report = self.assertIssues(small_problem(GroupsCapacity=[2]), ['size_mismatch'])
+        self.assertEqual(report.errors[0]['field'], 'GroupsCapacity')
+        self.assertIssues(small_problem(StudentWeights=[1]), ['size_mismatch'])
+
+    def test_subject_capacity(self):
+        report = self.assertIssues(small_problem(GroupsCapacity=[1, 0]), ['subject_capacity'])
+        self.assertEqual((report.errors[0]['demand'], report.errors[0]['capacity']), (2, 1))
+
+    def test_group_without_room(self):
+        # one group needs a tag no room has, the other still covers the subject
+        report = self.assertIssues(small_problem(GroupsTags=[[1, 0]]), ['group_without_room'], severity='warning')
+        self.assertTrue(report.feasible)
+        self.assertEqual(report.warnings[0]['group'], 1)
+
+        # without any group that can get a room the subject is not covered
+        report = self.assertIssues(small_problem(GroupsTags=[[0, 0], [1, 0]]), ['subject_capacity'])
+        self.assertEqual(report.errors[0]['capacity'], 0)
+        self.assertTrue(analyze_feasibility(small_problem(GroupsTags=[[0, 0], [1, 0]], RoomsTags=[[0, 0]])).feasible)
+
+    def test_teacher_overloaded(self):
+        # three single-seat groups are all needed, 6 timeslots of teaching in the 4 free ones
+        problem_data = small_problem(
+            DaysInCycle=2, NumGroups=3, NumStudents=3, GroupsPerSubject=[3], MinStudentsPerGroup=[1, 1, 1],
+            GroupsCapacity=[1, 1, 1], RoomsCapacity=[1], StudentsSubjects=[[0], [0], [0]], TeachersGroups=[[0, 1, 2]],
+            StudentsUnavailabilityTimeslots=[[], [], []], TeachersUnavailabilityTimeslots=[[4, 5, 6, 7]],
+        )
+        report = self.assertIssues(problem_data, ['teacher_overloaded'])
+        self.assertEqual((report.errors[0]['required'], report.errors[0]['available']), (6, 4))
+
+        problem_data['constraints']['TeachersUnavailabilityTimeslots'] = [[]]
+        self.assertTrue(analyze_feasibility(problem_data).feasible)
+
+    def test_subject_min_students(self):
+        report = self.assertIssues(
+            small_problem(MinStudentsPerGroup=[3, 3], GroupsCapacity=[3, 3], RoomsCapacity=[3]), ['subject_min_students']
+        )
+        self.assertEqual((report.errors[0]['demand'], report.errors[0]['minimum']), (2, 3))
+
+
+class TriggerInfeasibleOptimizationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        organization = Organization.objects.create(organization_name='Org')
+        cls.recruitment = Recruitment.objects.create(recruitment_name='Main', organization=organization)
+
+    def trigger(self, problem_data):
+        with mock.patch('optimizer.services.convert_preferences_to_problem_data', return_value=problem_data):
+            with self.assertRaises(InfeasibleProblemError) as raised:
+                trigger_optimization(self.recruitment)
+        return raised.exception
+
+    def test_infeasible_problem_is_not_queued(self):
+        problem_data = small_problem(GroupsCapacity=[1, 0])
+        error = self.trigger(problem_data)
+        self.recruitment.refresh_from_db()
+        self.assertEqual(self.recruitment.plan_status, 'draft')
+
+        job = OptimizationJob.objects.get()
+        self.assertEqual(error.job, job)
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.feasibility['errors'][0]['code'], 'subject_capacity')
+        self.assertEqual(job.problem_data, problem_data)
+
+        # the scheduler retries every tick: the same problem reuses the failed job
+        self.assertEqual(self.trigger(problem_data).job, job)
+        self.assertEqual(OptimizationJob.objects.count(), 1)
+        self.trigger(small_problem(GroupsCapacity=[0, 0]))
+        self.assertEqual(OptimizationJob.objects.count(), 2)
+
+
+# occupancy layer versions need a cache, the configured one is Redis
+LOCAL_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class MaterializationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = Organization.objects.create(organization_name='Org')
+        cls.recruitment = Recruitment.objects.create(recruitment_name='Main', organization=cls.organization, plan_status='optimizing')
+        # another recruitment of the organization whose rooms the new plan blocks
+        cls.other = Recruitment.objects.create(recruitment_name='Other', organization=cls.organization)
+        Constraints.objects.create(recruitment=cls.other, constraints_data={})
+
+        host = User.objects.create_user(username='host', password='x', role='host', organization=cls.organization)
+        cls.subject_groups = [
+            SubjectGroup.objects.create(
+                subject=Subject.objects.create(subject_name=f'Subject {i}', recruitment=cls.recruitment, duration_blocks=2),
+                host_user=host
+            )
+            for i in range(2)
+        ]
+        cls.rooms = sorted(
+            (Room.objects.create(organization=cls.organization, building_name='B', room_number=str(i), capacity=20) for i in range(2)),
+            key=lambda room: room.room_id
+        )
+        cls.students = sorted(
+            (User.objects.create_user(username=f'student{i}', password='x', role='participant', organization=cls.organization)
+             for i in range(3)),
+            key=lambda user: user.id
+        )
+        for user in cls.students + [host]:
+            UserRecruitment.objects.create(user=user, recruitment=cls.recruitment)
+
+    def setUp(self):
+        self.old_group = Group.objects.create(group_name='old', category='meeting', organization=self.organization)
+        # committed like in production, so no occupancy change of the fixtures is left pending
+        with self.captureOnCommitCallbacks(execute=True):
+            Meeting.objects.create(
+                recruitment=self.recruitment, subject_group=self.subject_groups[0], group=self.old_group,
+                room=self.rooms[0], start_timeslot=20, day_of_week=0, day_of_cycle=0
+            )
+        self.job = OptimizationJob.objects.create(
+            recruitment=self.recruitment, max_execution_time=60, status='completed',
+            final_solution={
+                'by_group': [[0, 2, 0], [36, 38, 1]],
+                'by_student': [[0], [0, 1], [1]],
+                'timeslots_daily': 32,
+                'days_in_cycle': 7,
+            }
+        )
+
+    def test_bulk_materialization(self):
+        # the occupancy index of this process already holds the old meeting
+        self.assertEqual(occupancy_snapshot(self.other).busy_slots('room', self.rooms[0].room_id), [20, 21])
+
+        with mock.patch('optimizer.services.MATERIALIZATION_BATCH_SIZE', 1):
+            with self.captureOnCommitCallbacks(execute=True):
+                convert_solution_to_meetings(str(self.job.id))
+
+        meetings = list(Meeting.objects.filter(recruitment=self.recruitment).order_by('start_timeslot'))
+        self.assertEqual(
+            [(m.subject_group_id, m.room_id, m.start_timeslot, m.duration, m.day_of_cycle) for m in meetings],
+            [(self.subject_groups[0].subject_group_id, self.rooms[0].room_id, 0, 2, 0),
+             (self.subject_groups[1].subject_group_id, self.rooms[1].room_id, 36, 2, 1)]
+        )
+        self.assertEqual(
+            [set(UserGroup.objects.filter(group=m.group).values_list('user_id', flat=True)) for m in meetings],
+            [{self.students[0].id, self.students[1].id}, {self.students[1].id, self.students[2].id}]
+        )
+        self.assertFalse(Group.objects.filter(pk=self.old_group.pk).exists())
+        self.recruitment.refresh_from_db()
+        self.assertEqual(self.recruitment.plan_status, 'active')
+
+        # bulk_create sends no signals: dirty marks and the occupancy layer are invalidated explicitly
+        self.assertEqual(Constraints.objects.get(recruitment=self.other).dirty_sections, ['unavailability'])
+        snapshot = occupancy_snapshot(self.other)
+        self.assertEqual(snapshot.busy_slots('room', self.rooms[0].room_id), [0, 1])
+        self.assertEqual(snapshot.busy_slots('room', self.rooms[1].room_id), [36, 37])
@@ -13,8 +13,13 @@ urlpatterns = [
     
     path('jobs/<uuid:id>/', views.OptimizationJobDetailView.as_view(), name='job-detail'),
     path('jobs/<uuid:job_id>/cancel/', views.cancel_job, name='job-cancel'),
+    path('jobs/<uuid:job_id>/priority/', views.job_priority, name='job-priority'),
     path('jobs/<uuid:job_id>/status/', views.job_status, name='job-status'),
     path('jobs/<uuid:job_id>/progress/', views.OptimizationProgressListView.as_view(), name='job-progress'),
+    path('jobs/<uuid:job_id>/progress/<int:iteration>/', views.OptimizationProgressDetailView.as_view(), name='job-progress-iteration'),
+    
+    # queue
+    path('queue/', views.job_queue, name='job-queue'),
     
     # health check
     path('health/', views.health_check, name='health-check'),
@@ -12,9 +12,10 @@ from .models import OptimizationJob, OptimizationProgress
 from .serializers import (
     OptimizationJobCreateSerializer, OptimizationJobSerializer,
     OptimizationJobListSerializer, OptimizationProgressSerializer,
-    JobCancelSerializer
+    JobCancelSerializer, JobPrioritySerializer
 )
 from .services import OptimizerService
+from .progress_storage import attach_solutions
 from .logger import get_logger
 
 logger = get_logger(__name__)
@@ -50,6 +51,13 @@ class OptimizationJobListCreateView(generics.ListCreateAPIView):
         recruitment_id = self.request.query_params.get('recruitment_id')
         if recruitment_id:
             queryset = queryset.filter(recruitment__recruitment_id=recruitment_id)
+
+        # islands of a job with ?parent=<job_id>, top-level jobs otherwise
+        parent_id = self.request.query_params.get('parent')
+        if parent_id:
+            queryset = queryset.filter(parent_id=parent_id)
+        else:
+            queryset = queryset.filter(parent__isnull=True)
         
         return queryset.order_by('-created_at')
     
@@ -65,7 +73,7 @@ class OptimizationJobListCreateView(generics.ListCreateAPIView):
         try:
             # use the service to submit the job
             optimizer_service = OptimizerService()
-            job = optimizer_service.submit_job(serializer.validated_data)
+            job = optimizer_service.submit_job(serializer.validated_data, islands=serializer.validated_data.get('islands'))
             
             # return the created job
             job_serializer = OptimizationJobSerializer(job)
@@ -94,6 +102,12 @@ class OptimizationJobListCreateView(generics.ListCreateAPIView):
                 location=OpenApiParameter.QUERY,
                 description='Filter jobs by recruitment ID'
             ),
+            OpenApiParameter(
+                name='parent',
+                type=OpenApiTypes.UUID,
+                location=OpenApiParameter.QUERY,
+                description='List the islands (sub-runs) of this job instead of top-level jobs'
+            ),
         ]
     )
     def get(self, request, *args, **kwargs):
@@ -123,7 +137,7 @@ class LatestOptimizationJobView(generics.RetrieveAPIView):
     serializer_class = OptimizationJobSerializer
     
     def get_object(self):
-        queryset = OptimizationJob.objects.all().order_by('-created_at')
+        queryset = OptimizationJob.objects.filter(parent__isnull=True).order_by('-created_at')
         
         # Check kwargs first (URL path)
         recruitment_id = self.kwargs.get('recruitment_id')
@@ -218,6 +232,13 @@ class OptimizationProgressListView(generics.ListAPIView):
         job_id = self.kwargs['job_id']
         return OptimizationProgress.objects.filter(job__id=job_id).order_by('-iteration')
     
+    def paginate_queryset(self, queryset):
+        # rebuild delta-encoded solutions of the whole page with one query
+        page = super().paginate_queryset(queryset)
+        if page is not None:
+            attach_solutions(page)
+        return page
+    
     @extend_schema(
         summary="Get job progress history",
         description="Get paginated list of progress updates for a specific job"
@@ -229,6 +250,25 @@ class OptimizationProgressListView(generics.ListAPIView):
         return super().get(request, *args, **kwargs)
 
 
+class OptimizationProgressDetailView(generics.RetrieveAPIView):
+    """
+    Full best solution of a single iteration (rebuilt from its keyframe when stored as a delta).
+    """
+    serializer_class = OptimizationProgressSerializer
+
+    def get_object(self):
+        return get_object_or_404(
+            OptimizationProgress, job__id=self.kwargs['job_id'], iteration=self.kwargs['iteration']
+        )
+
+    @extend_schema(
+        summary="Get job progress iteration",
+        description="Get the full best solution stored for one iteration of a job"
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
 @extend_schema(
     summary="Get job status",
     description="Get current status of an optimization job"
@@ -255,6 +295,57 @@ def job_status(request, job_id):
         )
 
 
+@extend_schema(
+    summary="Get optimizer queue",
+    description="Jobs waiting for an optimizer worker: dispatch list, per-organization queues and projected dispatch order"
+)
+@api_view(['GET'])
+def job_queue(request):
+    """Optimizer queue inspection endpoint"""
+    from .job_queue import JobQueue
+    
+    try:
+        return Response(JobQueue().snapshot())
+    except Exception as e:
+        return Response(
+            {'error': f'Failed to read job queue: {str(e)}'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+
+
+@extend_schema(
+    summary="Change queued job priority",
+    description="Change priority of a job that no optimizer worker has taken yet",
+    request=JobPrioritySerializer
+)
+@api_view(['POST'])
+def job_priority(request, job_id):
+    """Reprioritize a queued job"""
+    from .job_queue import JobQueue
+    
+    get_object_or_404(OptimizationJob, id=job_id)
+    serializer = JobPrioritySerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    
+    try:
+        queue = JobQueue()
+        if not queue.reprioritize(str(job_id), serializer.validated_data['priority']):
+            return Response(
+                {'error': 'Job is not waiting in the queue'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        queue.dispatch()
+        return Response({
+            'job_id': str(job_id),
+            'priority': serializer.validated_data['priority']
+        })
+    except Exception as e:
+        return Response(
+            {'error': f'Failed to change job priority: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
 @extend_schema(
     summary="Health check",
     description="Check the health of the optimization service"
@@ -317,7 +408,7 @@ def recruitment_optimization_status(request, recruitment_id):
         
         # Filter out archived jobs as requested
         jobs = OptimizationJob.objects.filter(
-            recruitment_id=recruitment_id
+            recruitment_id=recruitment_id, parent__isnull=True
         ).exclude(status='archived').order_by('created_at')
         
         mode = request.query_params.get('mode', 'optimistic')
@@ -563,7 +654,8 @@ def recruitment_optimization_status(request, recruitment_id):
             required=False
         ),
     ],
-    responses={200: {'description': 'Optimization triggered successfully'}}
+    responses={200: {'description': 'Optimization triggered successfully'},
+               400: {'description': 'Problem data is infeasible, see feasibility'}}
 )
 @api_view(['POST'])
 def force_recruitment_optimization(request, recruitment_id):
@@ -572,7 +664,9 @@ def force_recruitment_optimization(request, recruitment_id):
     Sets status to draft, updates optimization dates, and triggers optimization.
     """
     from scheduling.models import Recruitment
-    from scheduling.services import check_and_trigger_optimizations
+    from scheduling.services import prepare_optimization_constraints, trigger_optimization
+    from .feasibility import InfeasibleProblemError
+    from .job_queue import PRIORITY_HIGH
     
     try:
         recruitment = get_object_or_404(Recruitment, recruitment_id=recruitment_id)
@@ -597,8 +691,9 @@ def force_recruitment_optimization(request, recruitment_id):
         # archive all existing jobs for this recruitment
         OptimizationJob.objects.filter(recruitment_id=recruitment_id).update(status='archived')
         
-        # Trigger optimization
-        check_and_trigger_optimizations()
+        # Trigger optimization ahead of regular queued jobs
+        prepare_optimization_constraints(recruitment)
+        trigger_optimization(recruitment, priority=PRIORITY_HIGH)
         
         return Response({
             'message': 'Optimization forced successfully',
@@ -608,6 +703,14 @@ def force_recruitment_optimization(request, recruitment_id):
             'optimization_end_date': recruitment.optimization_end_date,
             'duration_seconds': duration_seconds
         })
+
+    except InfeasibleProblemError as e:
+        return Response({
+            'error': str(e),
+            'recruitment_id': str(recruitment_id),
+            'job_id': str(e.job.id) if e.job else None,
+            'feasibility': e.report.as_dict()
+        }, status=status.HTTP_400_BAD_REQUEST)
         
     except Exception as e:
         logger.error(f"Failed to force optimization for recruitment {recruitment_id}: {str(e)}")
@@ -0,0 +1,171 @@
+"""
+Warm start of optimization rounds.
+
+A recruitment is optimized in rounds (finish_optimization_round triggers the next one until
+optimization_end_date). Instead of starting from random individuals, the next round seeds its
+initial population with the best genotype of the previous completed round. The genotype is positional:
+
+    [student 0 subject genes..., student 1 subject genes..., ..., group 0 timeslot, group 0 room, ...]
+
+a student gene is the group index relative to its subject (in StudentsSubjects order), the group
+genes follow the subject groups order. When the problem shape is unchanged the genotype is reused
+as is. When students, subjects, groups or rooms were added or removed it is remapped through the
+entity ids recorded in OptimizationJob.entity_index; genes without a counterpart in the new problem
+are sent as -1 and drawn randomly by the optimizer.
+"""
+from typing import Dict, Any, List, Optional, Tuple
+
+from django.conf import settings
+
+from .models import OptimizationJob
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+UNKNOWN_GENE = -1
+
+# constraints keys the genotype layout and gene ranges depend on
+SHAPE_KEYS = ['StudentsSubjects', 'GroupsPerSubject', 'NumGroups', 'NumRooms', 'TimeslotsDaily', 'DaysInCycle']
+
+
+def same_shape(old_constraints: Dict[str, Any], new_constraints: Dict[str, Any]) -> bool:
+    return all(old_constraints.get(key) == new_constraints.get(key) for key in SHAPE_KEYS)
+
+
+def first_groups(groups_per_subject: List[int]) -> List[int]:
+    """Absolute index of the first group of every subject (groups of a subject are contiguous)"""
+    result, total = [], 0
+    for count in groups_per_subject:
+        result.append(total)
+        total += count
+    return result
+
+
+def decode_genotype(genotype: List[int], constraints: Dict[str, Any], index: Dict[str, List[str]]):
+    """
+    Genotype -> ({(student_id, subject_id): group_id}, {group_id: (day, slot, room_id)}).
+
+    Returns None when the genotype does not fit the constraints / index it was produced for.
+    """
+    students_subjects = constraints.get('StudentsSubjects') or []
+    groups_per_subject = constraints.get('GroupsPerSubject') or []
+    timeslots_daily = constraints.get('TimeslotsDaily') or 1
+    students, subjects = index['students'], index['subjects']
+    subject_groups, rooms = index['subject_groups'], index['rooms']
+
+    student_genes = sum(len(student_subjects) for student_subjects in students_subjects)
+    if (len(students_subjects) != len(students) or len(groups_per_subject) != len(subjects)
+            or len(genotype) != student_genes + 2 * len(subject_groups)):
+        return None
+
+    offsets = first_groups(groups_per_subject)
+    assignments = {}
+    position = 0
+    for student_id, student_subjects in zip(students, students_subjects):
+        for subject_idx in student_subjects:
+            relative = genotype[position]
+            position += 1
+            if 0 <= subject_idx < len(subjects) and 0 <= relative < groups_per_subject[subject_idx]:
+                assignments[(student_id, subjects[subject_idx])] = subject_groups[offsets[subject_idx] + relative]
+
+    placements = {}
+    for group_id in subject_groups:
+        timeslot, room = genotype[position], genotype[position + 1]
+        position += 2
+        placements[group_id] = (
+            timeslot // timeslots_daily,
+            timeslot % timeslots_daily,
+            rooms[room] if 0 <= room < len(rooms) else None,
+        )
+    return assignments, placements
+
+
+def encode_genotype(assignments, placements, constraints: Dict[str, Any], index: Dict[str, List[str]]) -> Tuple[List[int], int]:
+    """Inverse of decode_genotype for the new problem; returns (genotype, number of genes carried over)"""
+    students_subjects = constraints.get('StudentsSubjects') or []
+    groups_per_subject = constraints.get('GroupsPerSubject') or []
+    timeslots_daily = constraints.get('TimeslotsDaily') or 1
+    days_in_cycle = constraints.get('DaysInCycle') or 1
+    subjects = index['subjects']
+
+    offsets = first_groups(groups_per_subject)
+    group_position = {group_id: i for i, group_id in enumerate(index['subject_groups'])}
+    room_position = {room_id: i for i, room_id in enumerate(index['rooms'])}
+
+    genotype = []
+    carried = 0
+    for student_id, student_subjects in zip(index['students'], students_subjects):
+        for subject_idx in student_subjects:
+            gene = UNKNOWN_GENE
+            group_id = assignments.get((student_id, subjects[subject_idx])) if subject_idx < len(subjects) else None
+            if group_id in group_position:
+                relative = group_position[group_id] - offsets[subject_idx]
+                if 0 <= relative < groups_per_subject[subject_idx]:
+                    gene = relative
+            carried += gene != UNKNOWN_GENE
+            genotype.append(gene)
+
+    for group_id in index['subject_groups']:
+        timeslot = room = UNKNOWN_GENE
+        if group_id in placements:
+            day, slot, room_id = placements[group_id]
+            if day < days_in_cycle and slot < timeslots_daily:
+                timeslot = day * timeslots_daily + slot
+            room = room_position.get(room_id, UNKNOWN_GENE)
+        carried += (timeslot != UNKNOWN_GENE) + (room != UNKNOWN_GENE)
+        genotype.extend((timeslot, room))
+    return genotype, carried
+
+
+def remap_genotype(genotype: List[int], old_constraints: Dict[str, Any], old_index: Optional[Dict[str, List[str]]],
+                   new_constraints: Dict[str, Any], new_index: Optional[Dict[str, List[str]]]) -> Optional[List[int]]:
+    """
+    Translate a genotype of the previous round's problem into the current one.
+
+    Returns None when nothing can be carried over (or the genotype does not match its problem).
+    """
+    if (old_index is None or old_index == new_index) and same_shape(old_constraints, new_constraints):
+        return list(genotype)
+    if old_index is None or new_index is None:
+        return None
+
+    decoded = decode_genotype(genotype, old_constraints, old_index)
+    if decoded is None:
+        return None
+    remapped, carried = encode_genotype(*decoded, new_constraints, new_index)
+    if not carried:
+        return None
+    logger.info(f"Remapped warm start genotype: {carried}/{len(remapped)} genes carried over")
+    return remapped
+
+
+def warm_start_genotypes(recruitment, problem_data: Dict[str, Any],
+                         entity_index: Optional[Dict[str, List[str]]]) -> Tuple[Optional[OptimizationJob], List[List[int]]]:
+    """
+    (previous job, initial genotypes) for the next optimization round of a recruitment.
+
+    The previous job is the latest completed round (the parent for island runs) with a best genotype; (None, []) when warm start
+    is disabled (OPTIMIZER_WARM_START) or the genotype cannot be mapped onto the new problem.
+    """
+    if not getattr(settings, 'OPTIMIZER_WARM_START', True):
+        return None, []
+
+    previous = (
+        OptimizationJob.objects.filter(
+            recruitment=recruitment, parent__isnull=True, status='completed', final_solution__isnull=False
+        )
+        .select_related('problem_payload')
+        .order_by('-completed_at')
+        .first()
+    )
+    genotype = (previous.final_solution or {}).get('genotype') if previous else None
+    if not genotype:
+        return None, []
+
+    old_constraints = (previous.problem_data or {}).get('constraints') or {}
+    new_constraints = (problem_data or {}).get('constraints') or {}
+    remapped = remap_genotype(genotype, old_constraints, previous.entity_index, new_constraints, entity_index)
+    if remapped is None:
+        logger.info(f"Previous round {previous.id} cannot seed recruitment {recruitment.recruitment_id}, starting cold")
+        return None, []
+    return previous, [remapped]
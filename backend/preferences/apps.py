@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class PreferencesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'preferences'
+
+    def ready(self):
+        # register preference heatmap signals
+        from . import signals  # noqa: F401
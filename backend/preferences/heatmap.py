@@ -0,0 +1,180 @@
+"""
+Preference heatmap: element-wise sum of the users' PreferredTimeslots (negative weights count as 0).
+
+HeatmapCache keeps the sum of a recruitment as a running vector. Saving or deleting UserPreferences
+adds the difference between the old and the new PreferredTimeslots (see preferences.signals), so
+the heatmap is always current without recomputing it. A full recompute (first read, or after a
+change whose old value is unknown) is a single query of PreferredTimeslots and one NumPy sum.
+
+Slices, the sum over the students of one subject ('subject:<id>') or the members of one identity
+group ('group:<id>'), are built on first request and then maintained the same way. A membership change
+drops the affected slice. Every change bumps HeatmapCache.version, which the view serves as ETag.
+"""
+from typing import List, Optional, Tuple
+
+import numpy as np
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import HeatmapCache, UserPreferences
+from identity.models import UserGroup, UserSubjects
+
+
+def slice_key(subject_id=None, group_id=None) -> Optional[str]:
+    if subject_id is not None:
+        return f'subject:{subject_id}'
+    if group_id is not None:
+        return f'group:{group_id}'
+    return None
+
+
+def timeslot_weights(preferred_timeslots) -> np.ndarray:
+    """PreferredTimeslots as the heatmap counts them: non-negative floats, anything non-numeric as 0"""
+    if not isinstance(preferred_timeslots, list):
+        return np.zeros(0)
+    try:
+        weights = np.array(preferred_timeslots, dtype=float)
+    except (TypeError, ValueError):
+        weights = np.array([_number(value) for value in preferred_timeslots], dtype=float)
+    if weights.ndim != 1:
+        return np.zeros(0)
+    return np.maximum(np.nan_to_num(weights), 0)
+
+
+def _number(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _add(total, delta: np.ndarray) -> np.ndarray:
+    total = np.asarray(total or [], dtype=float)
+    size = max(len(total), len(delta))
+    return np.pad(total, (0, size - len(total))) + np.pad(delta, (0, size - len(delta)))
+
+
+def _as_json(vector: np.ndarray) -> List:
+    """ints when every value is integral (as the heatmap always returned them)"""
+    if np.all(np.mod(vector, 1) == 0):
+        return [int(value) for value in vector]
+    return vector.tolist()
+
+
+def aggregate(timeslot_lists) -> np.ndarray:
+    """Sum of timeslot_weights over the given PreferredTimeslots lists, in one pass"""
+    rows = [timeslot_weights(pts) for pts in timeslot_lists]
+    width = max((len(row) for row in rows), default=0)
+    matrix = np.zeros((len(rows), width))
+    for i, row in enumerate(rows):
+        matrix[i, :len(row)] = row
+    return matrix.sum(axis=0)
+
+
+def _preferred_timeslots(recruitment_id, user_ids=None):
+    queryset = UserPreferences.objects.filter(recruitment_id=recruitment_id)
+    if user_ids is not None:
+        queryset = queryset.filter(user_id__in=user_ids)
+    # only the PreferredTimeslots key is read from the JSON
+    return queryset.values_list('preferences_data__PreferredTimeslots', flat=True)
+
+
+def _slice_members(recruitment_id, key: str):
+    kind, object_id = key.split(':', 1)
+    if kind == 'subject':
+        return UserSubjects.objects.filter(subject_id=object_id, subject__recruitment_id=recruitment_id).values('user_id')
+    return UserGroup.objects.filter(group_id=object_id).values('user_id')
+
+
+def _is_built(heatmap: HeatmapCache) -> bool:
+    # version 0 / a foreign cached_value (e.g. seeded demo data) was never computed here
+    return heatmap.version > 0 and isinstance(heatmap.cached_value, list) and all(
+        isinstance(value, (int, float)) for value in heatmap.cached_value
+    )
+
+
+def get_heatmap(recruitment_id, subject_id=None, group_id=None) -> Tuple[List, int]:
+    """(heatmap or its slice, version), recomputed first when it was never built or marked stale"""
+    key = slice_key(subject_id, group_id)
+    heatmap = HeatmapCache.objects.filter(recruitment_id=recruitment_id).first()
+    if heatmap is not None and _is_built(heatmap) and (key is None or key in heatmap.slices):
+        return (heatmap.slices[key] if key else heatmap.cached_value), heatmap.version
+
+    with transaction.atomic():
+        heatmap, _ = HeatmapCache.objects.select_for_update().get_or_create(recruitment_id=recruitment_id)
+        changed = []
+        if not _is_built(heatmap):
+            heatmap.cached_value = _as_json(aggregate(_preferred_timeslots(recruitment_id)))
+            heatmap.slices = {}
+            heatmap.version += 1
+            heatmap.last_updated = timezone.now()
+            changed = ['cached_value', 'slices', 'version', 'last_updated']
+        if key is not None and key not in heatmap.slices:
+            members = _slice_members(recruitment_id, key)
+            heatmap.slices[key] = _as_json(aggregate(_preferred_timeslots(recruitment_id, members)))
+            changed.append('slices')
+        if changed:
+            heatmap.save(update_fields=set(changed))
+    return (heatmap.slices[key] if key else heatmap.cached_value), heatmap.version
+
+
+def current_version(recruitment_id) -> Optional[int]:
+    """Version of a built heatmap (for If-None-Match), None when it has to be computed first"""
+    version = HeatmapCache.objects.filter(recruitment_id=recruitment_id).values_list('version', flat=True).first()
+    return version or None
+
+
+def apply_timeslots_change(recruitment_id, user_id, old_timeslots, new_timeslots):
+    """Add new - old PreferredTimeslots of one user to the heatmap and to the slices the user belongs to"""
+    new_weights, old_weights = timeslot_weights(new_timeslots), timeslot_weights(old_timeslots)
+    size = max(len(new_weights), len(old_weights))
+    delta = np.pad(new_weights, (0, size - len(new_weights))) - np.pad(old_weights, (0, size - len(old_weights)))
+    if not delta.any():
+        return
+
+    with transaction.atomic():
+        heatmap = HeatmapCache.objects.select_for_update().filter(recruitment_id=recruitment_id).first()
+        if heatmap is None or not _is_built(heatmap):
+            # computed in full on the next read
+            return
+        heatmap.cached_value = _as_json(_add(heatmap.cached_value, delta))
+        for key in _user_slices(heatmap, user_id):
+            heatmap.slices[key] = _as_json(_add(heatmap.slices[key], delta))
+        heatmap.version += 1
+        heatmap.last_updated = timezone.now()
+        heatmap.save(update_fields=['cached_value', 'slices', 'version', 'last_updated'])
+
+
+def _user_slices(heatmap: HeatmapCache, user_id) -> List[str]:
+    subjects = [key.split(':', 1)[1] for key in heatmap.slices if key.startswith('subject:')]
+    groups = [key.split(':', 1)[1] for key in heatmap.slices if key.startswith('group:')]
+    keys = []
+    if subjects:
+        keys += [slice_key(subject_id=subject_id) for subject_id in UserSubjects.objects.filter(
+            user_id=user_id, subject_id__in=subjects
+        ).values_list('subject_id', flat=True)]
+    if groups:
+        keys += [slice_key(group_id=group_id) for group_id in UserGroup.objects.filter(
+            user_id=user_id, group_id__in=groups
+        ).values_list('group_id', flat=True)]
+    return keys
+
+
+def mark_heatmap_stale(recruitment_id):
+    """The running vector cannot be updated by delta, recompute it on the next read"""
+    HeatmapCache.objects.filter(recruitment_id=recruitment_id).update(
+        cached_value=None, slices={}, version=F('version') + 1
+    )
+
+
+def drop_slice(key: str, recruitment_id=None):
+    """Membership of a slice changed; it is rebuilt on the next request"""
+    heatmaps = HeatmapCache.objects.filter(slices__has_key=key)
+    if recruitment_id is not None:
+        heatmaps = heatmaps.filter(recruitment_id=recruitment_id)
+    with transaction.atomic():
+        for heatmap in heatmaps.select_for_update():
+            heatmap.slices.pop(key, None)
+            heatmap.version += 1
+            heatmap.save(update_fields=['slices', 'version'])
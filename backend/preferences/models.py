@@ -29,6 +29,14 @@ class UserPreferences(models.Model):
     def __str__(self):
         return f"UserPreferences for {self.user} in {self.recruitment}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # PreferredTimeslots as stored, the heatmap is updated by the difference on save (preferences.heatmap)
+        if 'preferences_data' in field_names:
+            instance.saved_timeslots = (instance.preferences_data or {}).get('PreferredTimeslots', [])
+        return instance
+
 
 class Constraints(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -40,6 +48,10 @@ class Constraints(models.Model):
     )
     # constraints_data structure can be viewed in views.py
     constraints_data = models.JSONField(default=dict)
+    # sections of constraints_data to recompile on the next round (see scheduling.constraints.SECTION_KEYS)
+    dirty_sections = models.JSONField(default=list, blank=True)
+    # fingerprints of the data used by the last compilation; null forces a full recompilation
+    compile_state = models.JSONField(null=True, blank=True)
 
     class Meta:
         db_table = 'preferences_constraints'
@@ -55,6 +67,10 @@ class HeatmapCache(models.Model):
     - recruitment: FK to Recruitment (unique) - which recruitment the cache is for
     - last_updated: DateTime of last calculation
     - cached_value: JSONField storing the aggregated PreferredTimeslots (list)
+    - slices: aggregates over the students of a subject / members of a group ({'subject:<id>': list, ...})
+    - version: bumped on every change, served as ETag (0 = never computed)
+
+    Kept up to date by delta on every preferences change, see preferences.heatmap.
     """
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     recruitment = models.OneToOneField(
@@ -65,6 +81,8 @@ class HeatmapCache(models.Model):
     )
     last_updated = models.DateTimeField(default=timezone.now)
     cached_value = models.JSONField(null=True, blank=True)
+    slices = models.JSONField(default=dict, blank=True)
+    version = models.PositiveIntegerField(default=0)
 
     class Meta:
         db_table = 'preferences_heatmap_cache'
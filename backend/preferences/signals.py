@@ -0,0 +1,38 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import UserPreferences
+from .heatmap import apply_timeslots_change, mark_heatmap_stale, drop_slice, slice_key
+from identity.models import UserGroup, UserSubjects
+
+_UNKNOWN = object()
+
+
+# running preference heatmap (see preferences.heatmap)
+
+@receiver(post_save, sender=UserPreferences)
+def user_preferences_saved(sender, instance, created, **kwargs):
+    new_timeslots = (instance.preferences_data or {}).get('PreferredTimeslots', [])
+    old_timeslots = [] if created else getattr(instance, 'saved_timeslots', _UNKNOWN)
+    if old_timeslots is _UNKNOWN:
+        # instance was not loaded with its preferences_data
+        mark_heatmap_stale(instance.recruitment_id)
+    else:
+        apply_timeslots_change(instance.recruitment_id, instance.user_id, old_timeslots, new_timeslots)
+    instance.saved_timeslots = new_timeslots
+
+
+@receiver(post_delete, sender=UserPreferences)
+def user_preferences_deleted(sender, instance, **kwargs):
+    old_timeslots = getattr(instance, 'saved_timeslots', (instance.preferences_data or {}).get('PreferredTimeslots', []))
+    apply_timeslots_change(instance.recruitment_id, instance.user_id, old_timeslots, [])
+
+
+@receiver([post_save, post_delete], sender=UserSubjects)
+def user_subjects_changed(sender, instance, **kwargs):
+    drop_slice(slice_key(subject_id=instance.subject_id))
+
+
+@receiver([post_save, post_delete], sender=UserGroup)
+def user_group_changed(sender, instance, **kwargs):
+    drop_slice(slice_key(group_id=instance.group_id))
@@ -1,3 +1,135 @@
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from .heatmap import aggregate, get_heatmap, slice_key
+from .models import HeatmapCache, UserPreferences
+from identity.models import Group, Organization, User, UserGroup, UserSubjects
+from scheduling.models import Recruitment, Subject
+
+
+class HeatmapTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        organization = Organization.objects.create(organization_name='Org')
+        cls.recruitment = Recruitment.objects.create(recruitment_name='Main', organization=organization)
+        cls.subject = Subject.objects.create(subject_name='Subject', recruitment=cls.recruitment)
+        cls.group = Group.objects.create(group_name='g', category='class', organization=organization)
+        cls.users = [
+            User.objects.create_user(username=f'student{i}', password='x', role='participant', organization=organization)
+            for i in range(3)
+        ]
+        # subject: students 0 and 1, group: students 1 and 2
+        for user in cls.users[:2]:
+            UserSubjects.objects.create(user=user, subject=cls.subject)
+        for user in cls.users[1:]:
+            UserGroup.objects.create(user=user, group=cls.group)
+
+    def set_preferences(self, user, timeslots):
+        preferences, _ = UserPreferences.objects.update_or_create(
+            user=user, recruitment=self.recruitment, defaults={'preferences_data': {'PreferredTimeslots': timeslots}}
+        )
+        return preferences
+
+    def recomputed(self, users=None):
+        """Heatmap summed from scratch over the stored preferences"""
+        preferences = UserPreferences.objects.filter(recruitment=self.recruitment)
+        if users is not None:
+            preferences = preferences.filter(user__in=users)
+        return [int(value) for value in aggregate(p.preferences_data.get('PreferredTimeslots') for p in preferences)]
+
+    def cache(self):
+        return HeatmapCache.objects.get(recruitment=self.recruitment)
+
+    def assertSums(self, running, recomputed):
+        # the running sum keeps the widest list it has seen, a recompute is as wide as the current ones
+        width = max(len(running), len(recomputed))
+        self.assertEqual(running + [0] * (width - len(running)), recomputed + [0] * (width - len(recomputed)))
+
+    def assertHeatmapCurrent(self):
+        cache = self.cache()
+        self.assertSums(cache.cached_value, self.recomputed())
+        if slice_key(subject_id=self.subject.subject_id) in cache.slices:
+            self.assertSums(cache.slices[slice_key(subject_id=self.subject.subject_id)], self.recomputed(self.users[:2]))
+        if slice_key(group_id=self.group.group_id) in cache.slices:
+            self.assertSums(cache.slices[slice_key(group_id=self.group.group_id)], self.recomputed(self.users[1:]))
+
+    def test_deltas_match_full_recompute(self):
+        self.set_preferences(self.users[0], [1, 0, 2])
+        self.assertEqual(get_heatmap(self.recruitment.recruitment_id), ([1, 0, 2], 1))
+
+        created = self.set_preferences(self.users[1], [0, 3, 1, 4])
+        self.assertHeatmapCurrent()
+        # negative weights count as 0
+        self.set_preferences(self.users[2], [-5, 1])
+        self.assertHeatmapCurrent()
+
+        # an instance kept after create and one loaded from the database
+        created.preferences_data = {'PreferredTimeslots': [2, 2]}
+        created.save()
+        self.assertHeatmapCurrent()
+        loaded = UserPreferences.objects.get(user=self.users[0])
+        loaded.preferences_data['PreferredTimeslots'] = [0, 0, 7]
+        loaded.save()
+        self.assertHeatmapCurrent()
+
+        loaded.delete()
+        self.assertHeatmapCurrent()
+        self.assertEqual(self.cache().cached_value, [2, 3, 0, 0])
+
+        # an instance loaded without its preferences makes the heatmap stale instead of adding a wrong delta
+        partial = UserPreferences.objects.only('id', 'user', 'recruitment').get(user=self.users[1])
+        partial.save()
+        self.assertIsNone(self.cache().cached_value)
+        self.assertEqual(get_heatmap(self.recruitment.recruitment_id)[0], self.recomputed())
+
+    def test_slices(self):
+        self.set_preferences(self.users[0], [1, 1])
+        self.set_preferences(self.users[1], [2, 0, 1])
+        self.set_preferences(self.users[2], [0, 4])
+        recruitment_id = self.recruitment.recruitment_id
+        self.assertEqual(get_heatmap(recruitment_id, subject_id=self.subject.subject_id)[0], [3, 1, 1])
+        self.assertEqual(get_heatmap(recruitment_id, group_id=self.group.group_id)[0], [2, 4, 1])
+
+        # both slices are kept current by the same deltas
+        self.set_preferences(self.users[1], [0, 0, 0, 5])
+        self.set_preferences(self.users[2], [1])
+        self.assertHeatmapCurrent()
+        self.assertEqual(len(self.cache().slices), 2)
+
+    def test_membership_change_drops_slice(self):
+        self.set_preferences(self.users[0], [1])
+        self.set_preferences(self.users[2], [0, 2])
+        recruitment_id = self.recruitment.recruitment_id
+        get_heatmap(recruitment_id, subject_id=self.subject.subject_id)
+        get_heatmap(recruitment_id, group_id=self.group.group_id)
+
+        UserSubjects.objects.create(user=self.users[2], subject=self.subject)
+        self.assertEqual(list(self.cache().slices), [slice_key(group_id=self.group.group_id)])
+        self.assertEqual(get_heatmap(recruitment_id, subject_id=self.subject.subject_id)[0], [1, 2])
+
+        UserGroup.objects.get(user=self.users[2], group=self.group).delete()
+        self.assertEqual(list(self.cache().slices), [slice_key(subject_id=self.subject.subject_id)])
+        self.assertEqual(get_heatmap(recruitment_id, group_id=self.group.group_id)[0], [])
+
+    def test_etag(self):
+        client = APIClient(SERVER_NAME='localhost')
+        url = f'/api/v1/preferences/aggregate-preferred-timeslots/{self.recruitment.recruitment_id}/'
+        self.set_preferences(self.users[0], [1, 2])
+
+        response = client.get(url)
+        self.assertEqual((response.status_code, response.json()), (200, [1, 2]))
+        etag = response['ETag']
+
+        with self.assertNumQueries(1):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        # a slice has its own ETag
+        response = client.get(url, {'subject': self.subject.subject_id}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        self.set_preferences(self.users[1], [0, 0, 3])
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response.json()), (200, [1, 2, 3]))
+        self.assertNotEqual(response['ETag'], etag)
@@ -1,14 +1,13 @@
 from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-from .models import UserPreferences, Constraints, HeatmapCache
+from .models import UserPreferences, Constraints
+from .heatmap import get_heatmap, current_version
 from .serializers import UserPreferencesSerializer, ConstraintsSerializer
 from identity.models import User
 from scheduling.models import Recruitment
 import copy
 import uuid
-from django.utils import timezone
-from datetime import timedelta
 
 
 # pokazac zbiorcze statystyki dla grupy jak fituje dla kazdego usera
@@ -260,6 +259,8 @@ def constraints_view(request, recruitment_id):
                     path,
                     value
                 )
+                # manual edits invalidate incremental compilation state
+                constraints.compile_state = None
                 constraints.save()
             else:
                 # full replacement of constraints_data
@@ -267,6 +268,7 @@ def constraints_view(request, recruitment_id):
                     constraints.constraints_data = request.data['constraints_data']
                 else:
                     constraints.constraints_data = request.data
+                constraints.compile_state = None
                 constraints.save()
             
             serializer = ConstraintsSerializer(constraints)
@@ -277,6 +279,7 @@ def constraints_view(request, recruitment_id):
             try:
                 constraints = Constraints.objects.get(recruitment_id=recruitment_uuid)
                 constraints.constraints_data = DEFAULT_CONSTRAINTS.copy()
+                constraints.compile_state = None
                 constraints.save()
                 serializer = ConstraintsSerializer(constraints)
                 return Response(serializer.data)
@@ -299,9 +302,13 @@ def aggregate_preferred_timeslots_view(request, recruitment_id):
     Aggregate the "PreferredTimeslots" arrays from all UserPreferences for the
     given recruitment and return the element-wise sum as a list.
 
-    Uses HeatmapCache: if a cached value exists and was updated within the last
-    hour, returns the cached value. Otherwise recomputes the aggregation, stores
-    it in the cache and returns the new value.
+    The sum is kept up to date by delta on every preferences change (see
+    preferences.heatmap), so it is never older than the last saved preferences.
+    Query params ?subject=<subject_id> or ?group=<group_id> return the sum over
+    the students of a subject / members of a group instead.
+
+    The response carries an ETag; a request with a matching If-None-Match gets
+    304 Not Modified without the heatmap being loaded.
 
     If no preferences exist for the recruitment, returns the default
     PreferredTimeslots from DEFAULT_USER_PREFERENCES.
@@ -313,66 +320,48 @@ def aggregate_preferred_timeslots_view(request, recruitment_id):
             status=status.HTTP_400_BAD_REQUEST
         )
 
-    try:
-        recruitment = Recruitment.objects.get(recruitment_id=recruitment_uuid)
-    except Recruitment.DoesNotExist:
-        return Response(
-            {'error': f'Recruitment with id {recruitment_id} not found'},
-            status=status.HTTP_404_NOT_FOUND
-        )
+    slice_ids = {}
+    for param in ('subject', 'group'):
+        value = request.query_params.get(param)
+        if value is None:
+            continue
+        is_valid, slice_ids[param] = validate_uuid(value)
+        if not is_valid:
+            return Response(
+                {'error': f'Invalid {param} format. Expected UUID, got: {value}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+    if len(slice_ids) > 1:
+        return Response({'error': 'Use either subject or group, not both'}, status=status.HTTP_400_BAD_REQUEST)
+
+    def etag(version):
+        slice_part = ''.join(f'-{param}-{value.hex}' for param, value in slice_ids.items())
+        return f'"{recruitment_uuid.hex}{slice_part}-{version}"'
+
+    def with_etag(response, version):
+        response['ETag'] = etag(version)
+        # browsers revalidate on every request instead of guessing a freshness lifetime
+        response['Cache-Control'] = 'no-cache'
+        return response
 
     try:
-        try:
-            cache = HeatmapCache.objects.get(recruitment_id=recruitment_uuid)
-        except HeatmapCache.DoesNotExist:
-            cache = None
-
-        if cache is not None:
-            age = timezone.now() - cache.last_updated
-            if age <= timedelta(hours=1) and cache.cached_value is not None:
-                return Response(cache.cached_value, status=status.HTTP_200_OK)
-
-        prefs_qs = UserPreferences.objects.filter(recruitment_id=recruitment_uuid)
-
-        if not prefs_qs.exists():
-            default_pts = DEFAULT_USER_PREFERENCES.get('PreferredTimeslots', [])
-            if cache is None:
-                HeatmapCache.objects.create(recruitment_id=recruitment_uuid, cached_value=default_pts, last_updated=timezone.now())
-            else:
-                cache.cached_value = default_pts
-                cache.last_updated = timezone.now()
-                cache.save()
-            return Response(default_pts, status=status.HTTP_200_OK)
-
-        max_len = 0
-        for p in prefs_qs:
-            pts = p.preferences_data.get('PreferredTimeslots', []) if p.preferences_data else []
-            if isinstance(pts, list) and len(pts) > max_len:
-                max_len = len(pts)
-
-        sums = [0] * max_len
-        for p in prefs_qs:
-            pts = p.preferences_data.get('PreferredTimeslots', []) if p.preferences_data else []
-            if not isinstance(pts, list):
-                continue
-            for i, val in enumerate(pts):
-                try:
-                    num = float(max(0, val))
-                except (TypeError, ValueError):
-                    continue
-                sums[i] += num
-
-        if all(float(x).is_integer() for x in sums):
-            sums = [int(x) for x in sums]
-
-        if cache is None:
-            HeatmapCache.objects.create(recruitment_id=recruitment_uuid, cached_value=sums, last_updated=timezone.now())
-        else:
-            cache.cached_value = sums
-            cache.last_updated = timezone.now()
-            cache.save()
-
-        return Response(sums, status=status.HTTP_200_OK)
+        # cheap polling: only the version is read when the client already has the current heatmap
+        version = current_version(recruitment_uuid)
+        if version is not None and request.headers.get('If-None-Match') == etag(version):
+            return with_etag(Response(status=status.HTTP_304_NOT_MODIFIED), version)
+
+        if not Recruitment.objects.filter(recruitment_id=recruitment_uuid).exists():
+            return Response(
+                {'error': f'Recruitment with id {recruitment_id} not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        sums, version = get_heatmap(
+            recruitment_uuid, subject_id=slice_ids.get('subject'), group_id=slice_ids.get('group')
+        )
+        if not sums:
+            sums = DEFAULT_USER_PREFERENCES.get('PreferredTimeslots', [])
+        return with_etag(Response(sums, status=status.HTTP_200_OK), version)
 
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,461 @@
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+from functools import cached_property
+from typing import Dict, Any, Iterable, List, Optional
+
+import numpy as np
+from django.db import connection, models, transaction
+
+from .models import Room, Recruitment, Subject, SubjectGroup, RoomTag, RoomRecruitment, Tag, SubjectTag
+from .occupancy import occupancy_snapshot
+from identity.models import User, UserGroup, UserRecruitment, UserSubjects
+
+
+# cycle_type -> DaysInCycle
+CYCLE_DAYS = {
+    'weekly': 7,
+    'biweekly': 14,
+    'monthly': 28,  # zgodnie z docstringiem (Meeting day_of_cycle może mieć większy zakres; tu przyjmujemy 28)
+}
+
+# constraints_data keys produced by each compiler section
+SECTION_KEYS = {
+    'cycle': ['TimeslotsDaily', 'DaysInCycle'],
+    'users': ['NumStudents', 'NumTeachers', 'StudentWeights', 'TeacherWeights'],
+    'subjects': [
+        'MinStudentsPerGroup', 'SubjectsDuration', 'GroupsPerSubject', 'GroupsCapacity',
+        'NumGroups', 'NumSubjects', 'TeachersGroups',
+    ],
+    'rooms': ['RoomsCapacity', 'NumRooms'],
+    'tags': ['GroupsTags', 'RoomsTags', 'NumTags'],
+    'students_subjects': ['StudentsSubjects'],
+    'unavailability': [
+        'RoomsUnavailabilityTimeslots', 'StudentsUnavailabilityTimeslots', 'TeachersUnavailabilityTimeslots',
+    ],
+}
+
+# entity set -> sections whose indices or values depend on it; a changed fingerprint makes them stale
+ENTITY_SECTIONS = {
+    'users': ['users', 'subjects', 'students_subjects', 'unavailability'],
+    'subjects': ['subjects', 'students_subjects'],
+    'subject_groups': ['subjects', 'tags'],
+    'rooms': ['rooms', 'tags', 'unavailability'],
+    'tags': ['tags'],
+    'window': ['unavailability'],
+}
+
+# recruitments whose constraints can still be compiled for an optimization round
+COMPILABLE_STATUSES = ['draft', 'queued', 'optimizing']
+
+
+def _fingerprint(values) -> str:
+    return hashlib.sha1(repr(values).encode()).hexdigest()
+
+
+class QueryCounter:
+    """Database execute wrapper counting executed queries (works without DEBUG)"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class ConstraintCompiler:
+    """
+    Compiles Constraints.constraints_data for a recruitment with a fixed number of queries.
+
+    Every entity set (users, subjects, subject groups, rooms, tags, ...) is fetched once with
+    an aggregated values_list query and joined in memory through index maps, so the query
+    count does not depend on recruitment size. The output is split into sections (see
+    SECTION_KEYS) which can be compiled independently; compile() returns only the keys of
+    the requested sections.
+
+    After compile(), `stats` holds the query count and wall time of the run.
+    """
+
+    def __init__(self, recruitment: Recruitment, previous_data: Optional[Dict[str, Any]] = None):
+        self.recruitment = recruitment
+        self.previous_data = previous_data or {}
+        self.stats = {'queries': 0, 'seconds': 0.0, 'sections': []}
+
+    @contextmanager
+    def _measure(self, sections: List[str]):
+        counter = QueryCounter()
+        start = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            yield
+        self.stats = {
+            'queries': counter.count,
+            'seconds': time.perf_counter() - start,
+            'sections': sections,
+        }
+
+    def _compile_sections(self, sections: List[str]) -> Dict[str, Any]:
+        result = {}
+        for section in sections:
+            result.update(getattr(self, f'compile_{section}')())
+        return result
+
+    def compile(self, sections: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Compile the given sections (all by default) and return the resulting constraints keys"""
+        sections = [s for s in SECTION_KEYS if sections is None or s in set(sections)]
+        with self._measure(sections):
+            return self._compile_sections(sections)
+
+    def compile_changed(self, compile_state: Optional[Dict[str, Any]], dirty_sections: Iterable[str]) -> Dict[str, Any]:
+        """
+        Compile only the sections that may differ from previous_data.
+
+        A section is recompiled when it was marked dirty, when a fingerprint of an entity set it depends on
+        changed since the last compilation (see ENTITY_SECTIONS) or when its keys are missing. Without a
+        compile_state everything is compiled. The cheap 'cycle' section is always recompiled.
+        """
+        sections = []
+        with self._measure(sections):
+            sections.extend(self.stale_sections(compile_state, dirty_sections))
+            return self._compile_sections(sections)
+
+    def fingerprints(self) -> Dict[str, str]:
+        """Fingerprints of the entity sets (ids in index order plus the fields copied into constraints)"""
+        recruitment = self.recruitment
+        return {
+            'users': _fingerprint(self.users),
+            'subjects': _fingerprint(self.subjects),
+            'subject_groups': _fingerprint(self.subject_groups),
+            'rooms': _fingerprint(self.rooms),
+            'tags': _fingerprint(self.tag_ids),
+            'window': _fingerprint([recruitment.organization_id, recruitment.plan_start_date, recruitment.expiration_date]),
+        }
+
+    def stale_sections(self, compile_state: Optional[Dict[str, Any]], dirty_sections: Iterable[str]) -> List[str]:
+        if not compile_state or not self.previous_data:
+            return list(SECTION_KEYS)
+
+        stale = {'cycle'} | set(dirty_sections or ())
+        previous = compile_state.get('fingerprints', {})
+        for entity, fingerprint in self.fingerprints().items():
+            if previous.get(entity) != fingerprint:
+                stale.update(ENTITY_SECTIONS[entity])
+        for section, keys in SECTION_KEYS.items():
+            if any(key not in self.previous_data for key in keys):
+                stale.add(section)
+        return [s for s in SECTION_KEYS if s in stale]
+
+    def state(self) -> Dict[str, Any]:
+        """compile_state to store next to the compiled constraints_data"""
+        return {'fingerprints': self.fingerprints(), 'index': self.entity_index()}
+
+    def entity_index(self) -> Dict[str, List[str]]:
+        """Ids of students, subjects, subject groups and rooms in constraints index order"""
+        return {
+            'students': [str(user_id) for user_id, _ in self.students],
+            'subjects': [str(subject_id) for subject_id, _ in self.subjects],
+            'subject_groups': [str(sg[0]) for sg in self.subject_groups],
+            'rooms': [str(room_id) for room_id, _ in self.rooms],
+        }
+
+    # --- entity loaders (one query each, cached) ---
+
+    @cached_property
+    def users(self):
+        """(id, role, weight) of participants and hosts linked to the recruitment, ordered by id"""
+        return list(
+            User.objects.filter(
+                user_recruitments__recruitment=self.recruitment,
+                role__in=['participant', 'host']
+            ).order_by('id').values_list('id', 'role', 'weight').distinct()
+        )
+
+    @cached_property
+    def students(self):
+        return [(user_id, weight) for user_id, role, weight in self.users if role == 'participant']
+
+    @cached_property
+    def teachers(self):
+        return [(user_id, weight) for user_id, role, weight in self.users if role == 'host']
+
+    @cached_property
+    def subjects(self):
+        """(subject_id, duration_blocks) ordered by subject_name"""
+        return list(
+            Subject.objects.filter(recruitment=self.recruitment).distinct()
+            .values_list('subject_id', 'duration_blocks')
+        )
+
+    @cached_property
+    def subject_index_map(self):
+        return {subject_id: i for i, (subject_id, _) in enumerate(self.subjects)}
+
+    @cached_property
+    def subject_groups(self):
+        """(subject_group_id, subject_id, host_user_id, min_students, capacity) ordered by subject name"""
+        return list(
+            SubjectGroup.objects.filter(subject__recruitment=self.recruitment)
+            .values_list('subject_group_id', 'subject_id', 'host_user_id', 'subject__min_students', 'subject__capacity')
+        )
+
+    @cached_property
+    def subject_group_index_map(self):
+        return {sg[0]: idx for idx, sg in enumerate(self.subject_groups)}
+
+    @cached_property
+    def rooms(self):
+        """(room_id, capacity) of rooms assigned to the recruitment"""
+        return list(
+            Room.objects.filter(room_recruitments__recruitment=self.recruitment).distinct()
+            .values_list('room_id', 'capacity')
+        )
+
+    @cached_property
+    def room_index_map(self):
+        return {room_id: i for i, (room_id, _) in enumerate(self.rooms)}
+
+    @cached_property
+    def tag_ids(self):
+        """ids of tags used by the recruitment's rooms or subjects, ordered by tag_name"""
+        return list(
+            Tag.objects.filter(
+                models.Q(tagged_rooms__room__room_recruitments__recruitment=self.recruitment) |
+                models.Q(tagged_subjects__subject__recruitment=self.recruitment)
+            ).distinct().order_by('tag_name').values_list('tag_id', flat=True)
+        )
+
+    @cached_property
+    def tag_index_map(self):
+        return {tag_id: i for i, tag_id in enumerate(self.tag_ids)}
+
+    # --- sections ---
+
+    def compile_cycle(self) -> Dict[str, Any]:
+        # a) TimeslotsDaily
+        timeslots_daily = None
+        start = self.recruitment.day_start_time
+        end = self.recruitment.day_end_time
+        if start and end:
+            delta_minutes = (end.hour * 60 + end.minute) - (start.hour * 60 + start.minute)
+            if delta_minutes > 0:
+                timeslots_daily = max(delta_minutes // 15, 1)
+        if timeslots_daily is None:
+            # fallback – użyj istniejącej wartości lub default 32 (8h *4 *1?)
+            timeslots_daily = self.previous_data.get('TimeslotsDaily', 32)
+
+        # b) DaysInCycle
+        return {
+            'TimeslotsDaily': timeslots_daily,
+            'DaysInCycle': CYCLE_DAYS.get(self.recruitment.cycle_type, 7),
+        }
+
+    def compile_users(self) -> Dict[str, Any]:
+        # j) Wagi użytkowników
+        return {
+            'NumStudents': len(self.students),
+            'NumTeachers': len(self.teachers),
+            'StudentWeights': [weight for _, weight in self.students],
+            'TeacherWeights': [weight for _, weight in self.teachers],
+        }
+
+    def compile_subjects(self) -> Dict[str, Any]:
+        # c) MinStudentsPerGroup i GroupsCapacity, d) SubjectsDuration, GroupsPerSubject
+        groups_count = {}
+        teacher_groups_map = {}
+        for idx, (_, subject_id, host_id, _, _) in enumerate(self.subject_groups):
+            groups_count[subject_id] = groups_count.get(subject_id, 0) + 1
+            teacher_groups_map.setdefault(host_id, set()).add(idx)
+
+        # g) TeacherGroups (unikalność i sortowanie)
+        teacher_groups = [sorted(teacher_groups_map.get(teacher_id, ())) for teacher_id, _ in self.teachers]
+
+        return {
+            'MinStudentsPerGroup': [sg[3] for sg in self.subject_groups],
+            'SubjectsDuration': [duration for _, duration in self.subjects],
+            'GroupsPerSubject': [groups_count.get(subject_id, 0) for subject_id, _ in self.subjects],
+            'GroupsCapacity': [sg[4] for sg in self.subject_groups],
+            'NumGroups': len(self.subject_groups),
+            'NumSubjects': len(self.subjects),
+            'TeachersGroups': teacher_groups,
+        }
+
+    def compile_rooms(self) -> Dict[str, Any]:
+        # f) RoomCapacity
+        return {
+            'RoomsCapacity': [capacity for _, capacity in self.rooms],
+            'NumRooms': len(self.rooms),
+        }
+
+    def compile_tags(self) -> Dict[str, Any]:
+        # f) RoomTags oraz GroupTags = pary indeksów [subjectGroupIndex, tagIndex]
+        tag_index_map = self.tag_index_map
+        room_index_map = self.room_index_map
+
+        # pary sortowane – kolejność nie zależy od planu zapytania w bazie
+        room_tags_pairs = []
+        room_tags = RoomTag.objects.filter(
+            room__room_recruitments__recruitment=self.recruitment
+        ).values_list('room_id', 'tag_id')
+        for room_id, tag_id in room_tags:
+            if tag_id in tag_index_map and room_id in room_index_map:
+                room_tags_pairs.append([room_index_map[room_id], tag_index_map[tag_id]])
+        room_tags_pairs.sort()
+
+        # dla każdej subjectGroup bierzemy tagi jej subjectu
+        subject_tags = {}
+        for subject_id, tag_id in SubjectTag.objects.filter(
+            subject__recruitment=self.recruitment
+        ).values_list('subject_id', 'tag_id'):
+            tag_idx = tag_index_map.get(tag_id)
+            if tag_idx is not None:
+                subject_tags.setdefault(subject_id, []).append(tag_idx)
+
+        group_tags_pairs = []
+        for idx, (_, subject_id, _, _, _) in enumerate(self.subject_groups):
+            for tag_idx in sorted(subject_tags.get(subject_id, ())):
+                group_tags_pairs.append([idx, tag_idx])
+
+        return {
+            'GroupsTags': group_tags_pairs,
+            'RoomsTags': room_tags_pairs,
+            'NumTags': len(self.tag_ids),
+        }
+
+    def compile_students_subjects(self) -> Dict[str, Any]:
+        # g) StudentSubjects
+        subject_index_map = self.subject_index_map
+        subjects_by_student = {}
+        for user_id, subject_id in UserSubjects.objects.filter(
+            subject__recruitment=self.recruitment
+        ).values_list('user_id', 'subject_id'):
+            if subject_id in subject_index_map:
+                subjects_by_student.setdefault(user_id, []).append(subject_index_map[subject_id])
+
+        return {
+            'StudentsSubjects': [sorted(subjects_by_student.get(student_id, ())) for student_id, _ in self.students],
+        }
+
+    def compile_unavailability(self) -> Dict[str, Any]:
+        # h) Unavailability – start_timeslot jest globalnym indeksem timeslota w całym cyklu,
+        # więc bierzemy start_timeslot oraz kolejne bloki według duration_blocks.
+        # Zajętość sal, prowadzących i grup daje indeks zajętości organizacji (scheduling.occupancy).
+        snapshot = occupancy_snapshot(self.recruitment)
+
+        # grupy -> studenci (niezależnie od rekrutacji)
+        student_groups_map = {}
+        for user_id, group_id in UserGroup.objects.filter(
+            user__user_recruitments__recruitment=self.recruitment,
+            user__role='participant'
+        ).values_list('user_id', 'group_id').distinct():
+            student_groups_map.setdefault(user_id, []).append(group_id)
+
+        rooms_busy = snapshot.matrix('room', [room_id for room_id, _ in self.rooms])
+        teachers_busy = snapshot.matrix('host', [teacher_id for teacher_id, _ in self.teachers])
+        students_busy = snapshot.members_matrix(student_groups_map, [student_id for student_id, _ in self.students])
+
+        return {
+            'RoomsUnavailabilityTimeslots': _busy_lists(rooms_busy),
+            'StudentsUnavailabilityTimeslots': _busy_lists(students_busy),
+            'TeachersUnavailabilityTimeslots': _busy_lists(teachers_busy),
+        }
+
+
+def _busy_lists(busy) -> List[List[int]]:
+    """Bitset rows -> sorted lists of busy timeslots"""
+    if not busy.shape[0]:
+        return []
+    rows, slots = busy.nonzero()
+    return [part.tolist() for part in np.split(slots, np.searchsorted(rows, range(1, busy.shape[0])))]
+
+
+# --- change tracking ---
+
+_dirty_marks = threading.local()
+
+
+def mark_constraints_dirty(sections: Iterable[str], recruitment_id=None, organization_id=None,
+                           organization_of=None, subject_id=None, room_id=None, user_id=None):
+    """
+    Mark constraints sections as dirty for the recruitments affected by a change.
+
+    Scope is given by one of: recruitment_id, organization_id (all compilable recruitments of
+    the organization), organization_of (same, for the organization of the given recruitment id),
+    subject_id (its recruitment), room_id (recruitments the room is assigned to) or user_id
+    (recruitments the user takes part in).
+    Marks are collected per thread and written once when the current transaction commits,
+    so bulk changes cost a few queries in total.
+    """
+    marks = getattr(_dirty_marks, 'marks', None)
+    if marks is None:
+        marks = _dirty_marks.marks = {}
+    for scope, obj_id in (('recruitment', recruitment_id), ('organization', organization_id),
+                          ('organization_of', organization_of), ('subject', subject_id), ('room', room_id),
+                          ('user', user_id)):
+        if obj_id is not None:
+            marks.setdefault((scope, obj_id), set()).update(sections)
+    # flushing is idempotent, marks left over from a rolled back transaction go out with the next commit
+    transaction.on_commit(flush_dirty_marks)
+
+
+def flush_dirty_marks():
+    """Resolve collected marks to recruitments and merge them into Constraints.dirty_sections"""
+    from preferences.models import Constraints
+
+    marks = getattr(_dirty_marks, 'marks', None)
+    if not marks:
+        return
+    _dirty_marks.marks = {}
+
+    by_scope = {}
+    for (scope, obj_id), sections in marks.items():
+        by_scope.setdefault(scope, {}).setdefault(obj_id, set()).update(sections)
+
+    dirty = {}
+
+    def add(recruitment_id, sections):
+        dirty.setdefault(recruitment_id, set()).update(sections)
+
+    for recruitment_id, sections in by_scope.get('recruitment', {}).items():
+        add(recruitment_id, sections)
+
+    if 'subject' in by_scope:
+        subjects = by_scope['subject']
+        for subject_id, recruitment_id in Subject.objects.filter(
+            subject_id__in=subjects.keys()
+        ).values_list('subject_id', 'recruitment_id'):
+            add(recruitment_id, subjects[subject_id])
+
+    if 'room' in by_scope:
+        rooms = by_scope['room']
+        for room_id, recruitment_id in RoomRecruitment.objects.filter(
+            room_id__in=rooms.keys()
+        ).values_list('room_id', 'recruitment_id'):
+            add(recruitment_id, rooms[room_id])
+
+    if 'user' in by_scope:
+        users = by_scope['user']
+        for user_id, recruitment_id in UserRecruitment.objects.filter(
+            user_id__in=users.keys()
+        ).values_list('user_id', 'recruitment_id'):
+            add(recruitment_id, users[user_id])
+
+    organizations = dict(by_scope.get('organization', {}))
+    if 'organization_of' in by_scope:
+        for recruitment_id, organization_id in Recruitment.objects.filter(
+            recruitment_id__in=by_scope['organization_of'].keys()
+        ).values_list('recruitment_id', 'organization_id'):
+            organizations.setdefault(organization_id, set()).update(by_scope['organization_of'][recruitment_id])
+    if organizations:
+        for recruitment_id, organization_id in Recruitment.objects.filter(
+            organization_id__in=organizations.keys(), plan_status__in=COMPILABLE_STATUSES
+        ).values_list('recruitment_id', 'organization_id'):
+            add(recruitment_id, organizations[organization_id])
+
+    if not dirty:
+        return
+    for constraints in Constraints.objects.filter(recruitment_id__in=dirty.keys()).only('id', 'recruitment_id', 'dirty_sections'):
+        merged = set(constraints.dirty_sections or ()) | dirty[constraints.recruitment_id]
+        if merged != set(constraints.dirty_sections or ()):
+            constraints.dirty_sections = [s for s in SECTION_KEYS if s in merged]
+            constraints.save(update_fields=['dirty_sections'])
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from scheduling.timetable import rebuild_all_timetables, rebuild_timetable
+
+
+class Command(BaseCommand):
+    help = 'rebuild the materialized timetables (TimetableEntry) of active recruitments'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--recruitment',
+            type=str,
+            default=None,
+            help='rebuild only this recruitment (default: all active recruitments)'
+        )
+
+    def handle(self, *args, **options):
+        if options['recruitment']:
+            count = rebuild_timetable(options['recruitment'])
+        else:
+            count = rebuild_all_timetables()
+        self.stdout.write(f"built {count} timetable entries")
@@ -1,6 +1,8 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from scheduling.services import check_and_trigger_optimizations, archive_expired_recruitments
+from optimizer.job_queue import dispatch_queued_jobs
+from optimizer.models import ProblemPayload
 from optimizer.logger import get_logger
 import time
 
@@ -17,16 +19,32 @@ class Command(BaseCommand):
             default=60,
             help='check interval in seconds (default: 60)'
         )
+        parser.add_argument(
+            '--gc-interval',
+            type=int,
+            default=3600,
+            help='interval of problem payload garbage collection in seconds, 0 disables it (default: 3600)'
+        )
 
     def handle(self, *args, **options):
         interval = options['interval']
+        gc_interval = options['gc_interval']
         logger.info(f"starting scheduler (interval: {interval}s)")
+        # first collection on the first tick, a restart often follows a crash
+        last_gc = float('-inf')
         
         try:
             while True:
                 try:
                     check_and_trigger_optimizations()
                     archive_expired_recruitments()
+                    # refill optimizer:jobs in case a worker became idle without reporting (crash, restart)
+                    dispatch_queued_jobs()
+                    if gc_interval and time.monotonic() - last_gc >= gc_interval:
+                        # repairs reference counts left wrong by crashes and bulk deletes
+                        last_gc = time.monotonic()
+                        deleted = ProblemPayload.objects.collect_garbage()
+                        logger.info(f"problem payload garbage collection deleted {deleted} payloads")
                 except Exception as e:
                     logger.error(f"error in scheduler: {e}")
                     self.stderr.write(f"error: {e}")
@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from identity.models import User, Group, Organization
 import uuid
 
@@ -114,6 +115,13 @@ class Recruitment(models.Model):
 
     class Meta:
         db_table = 'scheduling_recruitments'
+        indexes = [
+            # scheduler: draft recruitments whose optimization should start
+            models.Index(fields=['plan_status', 'optimization_start_date'], name='recruitment_status_opt_idx'),
+            # scheduler: active recruitments past expiration_date
+            # (not a partial index: SQLite cannot match its condition against a bound parameter)
+            models.Index(fields=['plan_status', 'expiration_date'], name='recruitment_status_exp_idx'),
+        ]
 
     def __str__(self):
         return f"{self.recruitment_name} ({self.cycle_type})"
@@ -262,6 +270,12 @@ class Meeting(models.Model):
 
     class Meta:
         db_table = 'scheduling_meetings'
+        indexes = [
+            # meetings of a recruitment in timetable order (timetable rebuild, materialization)
+            models.Index(fields=['recruitment', 'day_of_cycle', 'start_timeslot'], name='meeting_rec_day_slot_idx'),
+            # meetings of a room joined to their recruitment's status (room availability)
+            models.Index(fields=['room', 'recruitment'], name='meeting_room_rec_idx'),
+        ]
 
     def __str__(self):
         return f"Meeting: {self.subject_group.subject.subject_name} - {self.group} - {self.subject_group.host_user} ({self.day_of_week})"
@@ -289,3 +303,41 @@ class Meeting(models.Model):
     def host_user(self):
         """Access host_user through subject_group"""
         return self.subject_group.host_user
+
+
+class TimetableEntry(models.Model):
+    """Materialized timetable: serialized meetings (MeetingDetailSerializer) of one active recruitment
+    for one user (host or group member) or one room.
+
+    Rebuilt per recruitment by scheduling.timetable when it becomes active, its meetings change or it
+    is archived (entries removed), so a timetable read is one indexed lookup by owner.
+    """
+    OWNER_TYPE_CHOICES = [
+        ('user', 'User'),
+        ('room', 'Room'),
+    ]
+
+    owner_type = models.CharField(max_length=4, choices=OWNER_TYPE_CHOICES)
+    owner_id = models.UUIDField()
+    recruitment = models.ForeignKey(
+        Recruitment,
+        on_delete=models.CASCADE,
+        db_column='recruitmentid',
+        related_name='timetable_entries'
+    )
+    # copies of the recruitment fields the reads filter and sort by
+    recruitment_name = models.CharField(max_length=255)
+    plan_start_date = models.DateTimeField(blank=True, null=True)
+    expiration_date = models.DateTimeField(blank=True, null=True)
+    meetings = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+    built_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'scheduling_timetable_entries'
+        unique_together = ('owner_type', 'owner_id', 'recruitment')
+        indexes = [
+            models.Index(fields=['owner_type', 'owner_id', 'recruitment_name'], name='timetable_owner_idx'),
+        ]
+
+    def __str__(self):
+        return f"Timetable {self.owner_type} {self.owner_id} - {self.recruitment_name}"
@@ -0,0 +1,390 @@
+"""
+Occupancy index: the timeslots in which rooms, hosts and identity groups have meetings.
+
+Meetings of every recruitment of an organization block the rooms, hosts and students of the
+other recruitments whose plan window they overlap (see ConstraintCompiler.compile_unavailability).
+Instead of expanding all of them into Python sets on every round, each process keeps a
+per-organization OccupancyIndex made of one layer per recruitment that has meetings:
+
+    counts[kind][row, timeslot] = number of the recruitment's meetings taking that slot
+
+(kind is 'room', 'host' or 'group'; rows are added on first use, the width grows in 64-slot steps).
+Counts rather than bits let a deleted meeting be removed without rescanning the others.
+snapshot() ORs the busy bitsets (counts > 0) of the layers of the recruitments overlapping a plan
+window into one OccupancySnapshot, whose matrices answer free/busy lookups in O(1) and give the
+unavailability lists of a whole recruitment with a few vectorized operations.
+
+Layers follow Meeting signals incrementally. Other processes learn about changes through a version
+counter per layer in the Django cache (occupancy:layer:<recruitment_id>); a layer whose version
+moved is rebuilt from one query at the next snapshot. Bulk writes that send no signals call
+invalidate_layer(). Without a reachable cache every snapshot rebuilds its layers.
+"""
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Meeting, Recruitment
+from identity.models import UserGroup
+from optimizer.logger import get_logger
+
+logger = get_logger(__name__)
+
+KINDS = ('room', 'host', 'group')
+# width granularity (one uint64 word of the packed bitset)
+WORD = 64
+VERSION_KEY = 'occupancy:layer:{}'
+
+
+def meeting_span(start_timeslot: Optional[int], duration_blocks: Optional[int]) -> Optional[Tuple[int, int]]:
+    """
+    [first, last) timeslots of a meeting, None when it takes none.
+
+    Gives the same timeslots as the previous constraints builder. That builder also widened meetings by
+    break_before_blocks / break_after_blocks, but read them with getattr from Subject, which has no such
+    fields (it has break_before / break_after), so the breaks were always 0 and are not applied here.
+    """
+    if start_timeslot is None:
+        return None
+    # przerwy przed/po zajęciach nie są doliczane do niedostępności
+    first = max(0, start_timeslot)
+    end = start_timeslot + (duration_blocks or 1)
+    if end <= first:
+        return None
+    return first, end
+
+
+class OccupancyLayer:
+    """Meeting counts of one recruitment per room / host / group and timeslot"""
+
+    def __init__(self, version: int = 0):
+        self.version = version
+        self.width = WORD
+        self.rows: Dict[str, Dict] = {kind: {} for kind in KINDS}
+        self.counts: Dict[str, np.ndarray] = {kind: np.zeros((0, self.width), dtype=np.int32) for kind in KINDS}
+        # meeting_id -> (start_timeslot, duration_blocks, room_id, host_id, group_id), to remove a meeting again
+        self.meetings: Dict = {}
+
+    @classmethod
+    def build(cls, meetings: Iterable[Tuple], version: int = 0) -> 'OccupancyLayer':
+        """Layer from (meeting_id, start_timeslot, duration_blocks, room_id, host_id, group_id) rows"""
+        layer = cls(version)
+        layer.meetings = {meeting_id: tuple(meeting) for meeting_id, *meeting in meetings}
+        if not layer.meetings:
+            return layer
+
+        # same rules as meeting_span, for all meetings at once
+        values = list(layer.meetings.values())
+        start = np.array([-1 if meeting[0] is None else meeting[0] for meeting in values], dtype=np.int64)
+        end = start + np.array([meeting[1] or 1 for meeting in values], dtype=np.int64)
+        first = np.maximum(start, 0)
+        taken = np.array([meeting[0] is not None for meeting in values]) & (end > first)
+        if not taken.any():
+            return layer
+
+        layer._fit(int(end[taken].max()))
+        for column, kind in enumerate(KINDS, start=2):
+            rows = layer.rows[kind]
+            owned = taken & np.array([meeting[column] is not None for meeting in values])
+            row = np.array([rows.setdefault(values[i][column], len(rows)) for i in np.flatnonzero(owned)], dtype=np.int64)
+            # +1 at the first slot and -1 after the last one, a cumulative sum fills the spans
+            deltas = np.zeros((len(rows), layer.width + 1), dtype=np.int32)
+            np.add.at(deltas, (row, first[owned]), 1)
+            np.add.at(deltas, (row, end[owned]), -1)
+            layer.counts[kind] = np.cumsum(deltas[:, :-1], axis=1, dtype=np.int32)
+        return layer
+
+    def _fit(self, end: int):
+        if end <= self.width:
+            return
+        width = -(-end // WORD) * WORD
+        for kind in KINDS:
+            self.counts[kind] = np.pad(self.counts[kind], ((0, 0), (0, width - self.width)))
+        self.width = width
+
+    def _row(self, kind: str, owner_id) -> int:
+        rows = self.rows[kind]
+        if owner_id not in rows:
+            rows[owner_id] = len(rows)
+            self.counts[kind] = np.vstack([self.counts[kind], np.zeros((1, self.width), dtype=np.int32)])
+        return rows[owner_id]
+
+    def _count(self, meeting: Tuple, sign: int):
+        start, duration, *owners = meeting
+        span = meeting_span(start, duration)
+        if span is None:
+            return
+        first, end = span
+        self._fit(end)
+        for kind, owner_id in zip(KINDS, owners):
+            if owner_id is not None:
+                row = self._row(kind, owner_id)
+                self.counts[kind][row, first:end] += sign
+
+    def put(self, meeting_id, meeting: Tuple):
+        """Add a meeting or move an existing one"""
+        self.remove(meeting_id)
+        self.meetings[meeting_id] = meeting
+        self._count(meeting, 1)
+
+    def remove(self, meeting_id):
+        meeting = self.meetings.pop(meeting_id, None)
+        if meeting is not None:
+            self._count(meeting, -1)
+
+    def busy(self, kind: str) -> np.ndarray:
+        return self.counts[kind] > 0
+
+
+class OccupancySnapshot:
+    """Busy bitsets of rooms, hosts and groups for a set of recruitments"""
+
+    def __init__(self, layers: List[OccupancyLayer]):
+        self.width = max((layer.width for layer in layers), default=WORD)
+        self.rows: Dict[str, Dict] = {}
+        self.busy: Dict[str, np.ndarray] = {}
+        for kind in KINDS:
+            rows = {}
+            for layer in layers:
+                for owner_id in layer.rows[kind]:
+                    rows.setdefault(owner_id, len(rows))
+            busy = np.zeros((len(rows), self.width), dtype=bool)
+            for layer in layers:
+                if layer.rows[kind]:
+                    target = np.fromiter((rows[owner_id] for owner_id in layer.rows[kind]), dtype=np.int64)
+                    busy[target, :layer.width] |= layer.busy(kind)
+            self.rows[kind] = rows
+            self.busy[kind] = busy
+        self._users: Optional[Tuple[Dict, np.ndarray]] = None
+
+    def matrix(self, kind: str, ids: List) -> np.ndarray:
+        """(len(ids), width) busy bitsets in the order of ids, all free for ids without meetings"""
+        rows = self.rows[kind]
+        result = np.zeros((len(ids), self.width), dtype=bool)
+        known = [(i, rows[owner_id]) for i, owner_id in enumerate(ids) if owner_id in rows]
+        if known:
+            target, source = np.array(known, dtype=np.int64).T
+            result[target] = self.busy[kind][source]
+        return result
+
+    def members_matrix(self, members: Dict, ids: List) -> np.ndarray:
+        """Busy bitsets of users given {user_id: group ids} (participants are busy when any of their groups is)"""
+        group_rows = self.rows['group']
+        incidence = np.zeros((len(ids), len(group_rows)), dtype=np.float32)
+        for i, user_id in enumerate(ids):
+            for group_id in members.get(user_id, ()):
+                if group_id in group_rows:
+                    incidence[i, group_rows[group_id]] = 1
+        return (incidence @ self.busy['group'].astype(np.float32)) > 0
+
+    def is_busy(self, kind: str, owner_id, timeslot: int) -> bool:
+        row = self.rows[kind].get(owner_id)
+        return row is not None and 0 <= timeslot < self.width and bool(self.busy[kind][row, timeslot])
+
+    def busy_slots(self, kind: str, owner_id) -> List[int]:
+        row = self.rows[kind].get(owner_id)
+        return [] if row is None else np.flatnonzero(self.busy[kind][row]).tolist()
+
+    def user_is_busy(self, user_id, timeslot: int) -> bool:
+        """As a host or as a member of a meeting's group; memberships are loaded on first call"""
+        rows, busy = self._user_bitsets()
+        row = rows.get(user_id)
+        return self.is_busy('host', user_id, timeslot) or (
+            row is not None and 0 <= timeslot < self.width and bool(busy[row, timeslot])
+        )
+
+    def _user_bitsets(self) -> Tuple[Dict, np.ndarray]:
+        if self._users is None:
+            members = {}
+            for user_id, group_id in UserGroup.objects.filter(group_id__in=list(self.rows['group'])).values_list('user_id', 'group_id'):
+                members.setdefault(user_id, []).append(group_id)
+            ids = list(members)
+            self._users = ({user_id: i for i, user_id in enumerate(ids)}, self.members_matrix(members, ids))
+        return self._users
+
+
+class OccupancyIndex:
+    """Layers of the recruitments of one organization"""
+
+    def __init__(self, organization_id):
+        self.organization_id = organization_id
+        self.layers: Dict = {}
+        self.lock = threading.Lock()
+
+    def snapshot(self, recruitment_ids: Iterable) -> OccupancySnapshot:
+        recruitment_ids = list(recruitment_ids)
+        versions = _get_versions(recruitment_ids)
+        with self.lock:
+            stale = [
+                recruitment_id for recruitment_id in recruitment_ids
+                if recruitment_id not in self.layers or versions is None
+                or self.layers[recruitment_id].version != versions.get(recruitment_id, 0)
+            ]
+            if stale:
+                self._rebuild(stale, versions or {})
+            layers = [self.layers[recruitment_id] for recruitment_id in recruitment_ids]
+        return OccupancySnapshot(layers)
+
+    def _rebuild(self, recruitment_ids: List, versions: Dict):
+        meetings = {recruitment_id: [] for recruitment_id in recruitment_ids}
+        for recruitment_id, *row in Meeting.objects.filter(recruitment_id__in=recruitment_ids).values_list(
+            'recruitment_id', 'meeting_id', 'start_timeslot', 'subject_group__subject__duration_blocks', 'room_id',
+            'subject_group__host_user_id', 'group_id'
+        ):
+            meetings[recruitment_id].append(row)
+        for recruitment_id, rows in meetings.items():
+            self.layers[recruitment_id] = OccupancyLayer.build(rows, versions.get(recruitment_id, 0))
+        logger.debug(f"Rebuilt {len(recruitment_ids)} occupancy layers of organization {self.organization_id}")
+
+    def apply(self, recruitment_id, version: Optional[int], changes: Optional[Dict]):
+        """
+        Apply the committed changes {meeting_id: meeting or None (deleted)} announced as version.
+
+        The layer is dropped (rebuilt on next use) when it missed other changes or changes is None.
+        """
+        with self.lock:
+            layer = self.layers.get(recruitment_id)
+            if layer is None:
+                return
+            if changes is None or version is None or layer.version != version - 1:
+                del self.layers[recruitment_id]
+                return
+            for meeting_id, meeting in changes.items():
+                if meeting is None:
+                    layer.remove(meeting_id)
+                else:
+                    layer.put(meeting_id, meeting)
+            layer.version = version
+
+    def drop(self, recruitment_id):
+        with self.lock:
+            self.layers.pop(recruitment_id, None)
+
+
+_indexes: Dict = {}
+_indexes_lock = threading.Lock()
+
+
+def get_occupancy_index(organization_id) -> OccupancyIndex:
+    with _indexes_lock:
+        if organization_id not in _indexes:
+            _indexes[organization_id] = OccupancyIndex(organization_id)
+        return _indexes[organization_id]
+
+
+def recruitments_in_window(recruitment: Recruitment):
+    """Recruitments of the organization whose plan window overlaps recruitment's (all of them without a window)"""
+    window_start = recruitment.plan_start_date
+    window_end = recruitment.expiration_date
+
+    recruitments_filter = {'organization': recruitment.organization_id}
+    # jeśli mamy zdefiniowane okno czasowe, uwzględniamy rekrutacje, które z nim się przecinają
+    if window_start and window_end:
+        recruitments_filter.update({
+            'plan_start_date__lte': window_end,
+            'expiration_date__gte': window_start,
+        })
+    elif window_start and not window_end:
+        recruitments_filter.update({
+            'expiration_date__gte': window_start,
+        })
+    elif window_end and not window_start:
+        recruitments_filter.update({
+            'plan_start_date__lte': window_end,
+        })
+    return Recruitment.objects.filter(**recruitments_filter)
+
+
+def occupancy_snapshot(recruitment: Recruitment) -> OccupancySnapshot:
+    """Occupancy by meetings of every recruitment overlapping recruitment's plan window (its own included)"""
+    # tylko rekrutacje, które mają spotkania – reszta nie wnosi zajętości
+    recruitment_ids = list(
+        recruitments_in_window(recruitment).filter(meetings__isnull=False).distinct().values_list('recruitment_id', flat=True)
+    )
+    return get_occupancy_index(recruitment.organization_id).snapshot(recruitment_ids)
+
+
+# --- change propagation ---
+
+def _get_versions(recruitment_ids: List) -> Optional[Dict]:
+    try:
+        found = cache.get_many([VERSION_KEY.format(recruitment_id) for recruitment_id in recruitment_ids])
+    except Exception as e:
+        logger.debug(f"Occupancy versions unavailable, rebuilding layers: {e}")
+        return None
+    return {recruitment_id: found.get(VERSION_KEY.format(recruitment_id), 0) for recruitment_id in recruitment_ids}
+
+
+def _bump_version(recruitment_id) -> Optional[int]:
+    key = VERSION_KEY.format(recruitment_id)
+    try:
+        cache.add(key, 0, timeout=None)
+        return cache.incr(key)
+    except Exception as e:
+        logger.debug(f"Occupancy version of {recruitment_id} not bumped: {e}")
+        return None
+
+
+_changes = threading.local()
+
+
+def _pending() -> Dict:
+    pending = getattr(_changes, 'pending', None)
+    if pending is None:
+        pending = _changes.pending = {}
+    return pending
+
+
+def meeting_changed(meeting: Meeting, deleted: bool = False):
+    """Record a saved or deleted meeting; layers are updated once the transaction commits"""
+    changes = _pending().setdefault(meeting.recruitment_id, {})
+    if changes is not None:
+        changes[meeting.meeting_id] = None if deleted else (meeting.start_timeslot, meeting.subject_group_id,
+                                                            meeting.room_id, meeting.group_id)
+    transaction.on_commit(flush_occupancy_changes)
+
+
+def invalidate_layer(recruitment_id):
+    """Meetings of the recruitment changed without signals (bulk writes) or their durations changed"""
+    _pending()[recruitment_id] = None
+    transaction.on_commit(flush_occupancy_changes)
+
+
+def flush_occupancy_changes():
+    """Bump the layer versions of changed recruitments once and update this process's layers"""
+    from .models import SubjectGroup
+
+    pending = getattr(_changes, 'pending', None)
+    if not pending:
+        return
+    _changes.pending = {}
+
+    subject_group_ids = {meeting[1] for changes in pending.values() if changes
+                         for meeting in changes.values() if meeting is not None}
+    subject_groups = {
+        subject_group_id: (duration, host_id)
+        for subject_group_id, duration, host_id in SubjectGroup.objects.filter(subject_group_id__in=subject_group_ids)
+        .values_list('subject_group_id', 'subject__duration_blocks', 'host_user_id')
+    } if subject_group_ids else {}
+
+    with _indexes_lock:
+        indexes = list(_indexes.values())
+    for recruitment_id, changes in pending.items():
+        resolved = None
+        if changes is not None:
+            resolved = {}
+            for meeting_id, meeting in changes.items():
+                if meeting is None:
+                    resolved[meeting_id] = None
+                    continue
+                start, subject_group_id, room_id, group_id = meeting
+                if subject_group_id not in subject_groups:
+                    resolved = None
+                    break
+                duration, host_id = subject_groups[subject_group_id]
+                resolved[meeting_id] = (start, duration, room_id, host_id, group_id)
+        version = _bump_version(recruitment_id)
+        for index in indexes:
+            index.apply(recruitment_id, version, resolved)
@@ -2,11 +2,11 @@ from typing import Union, Optional
 from django.db.models import QuerySet, Q
 from django.utils import timezone
 from django.db import transaction, models
-from .models import Meeting, Room, Recruitment, Subject, SubjectGroup, RoomTag, Tag, SubjectTag
+from .models import Meeting, Room, Recruitment
+from .constraints import ConstraintCompiler
 from optimizer.logger import logger
 from django.contrib.auth import get_user_model
 from preferences.models import Constraints
-from identity.models import UserGroup, UserSubjects
 User = get_user_model()
 
 
@@ -89,10 +89,18 @@ def should_start_optimization(recruitment):
     return False
 
 
-def trigger_optimization(recruitment):
-    """trigger optimization for recruitment"""
-    from optimizer.services import OptimizerService, convert_preferences_to_problem_data
+def trigger_optimization(recruitment, priority=None):
+    """
+    trigger optimization for recruitment (priority: optimizer.job_queue PRIORITY_*, default normal)
+
+    problem_data the optimizer cannot solve (optimizer.feasibility) is not queued: the recruitment goes
+    back to draft, a failed job records the diagnosis and InfeasibleProblemError is raised.
+    """
+    from optimizer.services import OptimizerService, convert_preferences_to_problem_data, check_feasibility, record_infeasible_job
+    from optimizer.feasibility import InfeasibleProblemError
+    from optimizer.warm_start import warm_start_genotypes
 
+    rejected_job = None
     with transaction.atomic():
         recruitment.plan_status = 'optimizing'
         recruitment.save()
@@ -111,25 +119,52 @@ def trigger_optimization(recruitment):
             recruitment.save()
             raise
 
-        try:
-            optimizer_service = OptimizerService()
-            job = optimizer_service.submit_job({
-                'recruitment_id': str(recruitment.recruitment_id),
-                'max_execution_time': recruitment.max_round_execution_time,
-                'problem_data': problem_data
-            })
-            logger.info(f"created optimization job {job.id} for recruitment {recruitment.recruitment_id}")
-        except Exception as e:
-            logger.error(f"failed to create optimization job: {e}")
+        # index order of the compiled constraints, lets the next round remap this round's genotype
+        compile_state = Constraints.objects.filter(recruitment=recruitment).values_list('compile_state', flat=True).first()
+        entity_index = (compile_state or {}).get('index')
+
+        # the optimizer would drop an unsolvable problem and leave the job queued forever
+        report = check_feasibility(problem_data)
+        if report is not None and not report.feasible:
+            logger.warning(f"optimization for recruitment {recruitment.recruitment_id} rejected: {report.summary()}")
             recruitment.plan_status = 'draft'
             recruitment.save()
-            raise
+            rejected_job = record_infeasible_job(
+                str(recruitment.recruitment_id), problem_data, recruitment.max_round_execution_time, report, entity_index
+            )
+        else:
+            # seed the GA with the previous round's best genotype
+            previous_job, initial_genotypes = warm_start_genotypes(recruitment, problem_data, entity_index)
+
+            try:
+                optimizer_service = OptimizerService()
+                job = optimizer_service.submit_job({
+                    'recruitment_id': str(recruitment.recruitment_id),
+                    'max_execution_time': recruitment.max_round_execution_time,
+                    'problem_data': problem_data,
+                    'entity_index': entity_index,
+                    'warm_start_job': previous_job,
+                    'initial_genotypes': initial_genotypes,
+                    'feasibility': report.as_dict() if report is not None else None,
+                }, priority=priority)
+                logger.info(f"created optimization job {job.id} for recruitment {recruitment.recruitment_id}")
+            except Exception as e:
+                logger.error(f"failed to create optimization job: {e}")
+                recruitment.plan_status = 'draft'
+                recruitment.save()
+                raise
+
+    # raised after the transaction so the failed job and the draft status are kept
+    if rejected_job is not None:
+        raise InfeasibleProblemError(report, rejected_job)
 
 
 def prepare_optimization_constraints(recruitment: Recruitment):
     """
     Zbiera dane z modeli i aktualizuje Constraints.constraints_data dla danego recruitment.
-    Patrz docstring oryginalny dla szczegółów pól.
+    Dane kompiluje ConstraintCompiler (stała liczba zapytań niezależnie od rozmiaru rekrutacji).
+    Rekompilowane są tylko sekcje oznaczone jako brudne (sygnały w scheduling.signals) lub te,
+    których dane wejściowe zmieniły fingerprint; liczba zapytań i czas kompilacji są logowane.
     """
     try:
         constraints = Constraints.objects.select_for_update().get(recruitment=recruitment)
@@ -138,206 +173,32 @@ def prepare_optimization_constraints(recruitment: Recruitment):
         constraints = Constraints.objects.create(recruitment=recruitment, constraints_data={})
 
     data = constraints.constraints_data or {}
+    consumed_dirty = list(constraints.dirty_sections or [])
 
-    # a) TimeslotsDaily
-    def compute_timeslots_daily():
-        start = recruitment.day_start_time
-        end = recruitment.day_end_time
-        if start and end:
-            delta_minutes = (end.hour * 60 + end.minute) - (start.hour * 60 + start.minute)
-            if delta_minutes > 0:
-                blocks = delta_minutes // 15
-                return max(blocks, 1)
-        # fallback – użyj istniejącej wartości lub default 32 (8h *4 *1?)
-        return data.get('TimeslotsDaily', 32)
-
-    timeslots_daily = compute_timeslots_daily()
-
-    # b) DaysInCycle
-    cycle_map = {
-        'weekly': 7,
-        'biweekly': 14,
-        'monthly': 28,  # zgodnie z docstringiem (Meeting day_of_cycle może mieć większy zakres; tu przyjmujemy 28)
-    }
-    days_in_cycle = cycle_map.get(recruitment.cycle_type, 7)
-
-    # Pobieramy użytkowników powiązanych z rekrutacją
-    linked_users_qs = User.objects.filter(user_recruitments__recruitment=recruitment).distinct().order_by('id')
-    students = list(linked_users_qs.filter(role='participant'))
-    teachers = list(linked_users_qs.filter(role='host'))
-
-    # c) MinStudentsPerGroup i GroupsCapacity w kontekście SubjectGroup (dla każdej kombinacji subject-host)
-    subject_groups_qs = SubjectGroup.objects.filter(subject__recruitment=recruitment).select_related('subject', 'host_user')
-    subject_groups = list(subject_groups_qs)
-    min_students_per_group = [sg.subject.min_students for sg in subject_groups]
-    groups_capacity = [sg.subject.capacity for sg in subject_groups]
-    subject_group_index_map = {sg.subject_group_id: idx for idx, sg in enumerate(subject_groups)}
-
-    # d) SubjectsDuration, GroupsPerSubject
-    subjects = Subject.objects.filter(recruitment=recruitment).distinct()
-    subjects_duration = [s.duration_blocks for s in subjects]
-    groups_per_subject = [SubjectGroup.objects.filter(subject=s).count() for s in subjects]
-    subject_index_map = {s.subject_id: i for i, s in enumerate(subjects)}
-    num_subjects = len(subjects)
-
-    # f) RoomTags, RoomCapacity
-    rooms = Room.objects.filter(room_recruitments__recruitment=recruitment).distinct()
-    rooms_capacity = [r.capacity for r in rooms]
-    room_index_map = {r.room_id: i for i, r in enumerate(rooms)}
-
-    # Subject tags zmapowane na SubjectGroup -> Tag (GroupTags = para indeksów [subjectGroupIndex, tagIndex])
-    # Budujemy tag_index_map jak wcześniej
-    all_tags = Tag.objects.filter(
-        models.Q(tagged_rooms__room__in=rooms) | models.Q(tagged_subjects__subject__in=subjects)
-    ).distinct().order_by('tag_name')
-    tag_index_map = {t.tag_id: i for i, t in enumerate(all_tags)}
-
-    room_tags_pairs = []
-    for rt in RoomTag.objects.filter(room__in=rooms).select_related('room', 'tag'):
-        if rt.tag_id in tag_index_map and rt.room_id in room_index_map:
-            room_tags_pairs.append([room_index_map[rt.room_id], tag_index_map[rt.tag_id]])
-
-    group_tags_pairs = []
-    # dla każdej subjectGroup bierzemy tagi jej subjectu
-    for sg in subject_groups:
-        for st in SubjectTag.objects.filter(subject=sg.subject).select_related('tag'):
-            tag_idx = tag_index_map.get(st.tag_id)
-            if tag_idx is not None:
-                group_tags_pairs.append([subject_group_index_map[sg.subject_group_id], tag_idx])
-
-    # g) StudentSubjects & TeacherGroups (na bazie SubjectGroup)
-    students_subjects = []
-    for stu in students:
-        subj_ids = list(UserSubjects.objects.filter(user=stu).values_list('subject__subject_id', flat=True))
-        mapped = [subject_index_map[sid] for sid in subj_ids if sid in subject_index_map]
-        students_subjects.append(mapped)
-
-    teacher_groups = []
-    for t in teachers:
-        sg_indices = [subject_group_index_map[sg.subject_group_id] for sg in subject_groups if sg.host_user_id == t.id]
-        # unikalność i sortowanie
-        sg_indices = sorted(set(sg_indices))
-        teacher_groups.append(sg_indices)
-
-    # i) Liczebności (NumGroups jako liczba SubjectGroup w rekrutacji)
-    num_groups = len(subject_groups)
-    num_teachers = len(teachers)
-    num_students = len(students)
-    num_rooms = len(rooms)
-    num_tags = len(all_tags)
-
-    # j) Wagi użytkowników (domyślnie 1 jeśli brak pola weight)
-    student_weights = [getattr(stu, 'weight', 1) for stu in students]
-    teacher_weights = [getattr(t, 'weight', 1) for t in teachers]
-
-    # h) Unavailability – teraz wypełniamy realnymi timeslotami:
-    # start_timeslot jest już globalnym indeksem timeslota w całym cyklu (0.. DaysInCycle*TimeslotsDaily-1)
-    # więc wystarczy wziąć start_timeslot oraz kolejne bloki według duration_blocks.
-    def meeting_block_indices(m: Meeting):
-        start_idx = getattr(m, 'start_timeslot', None)
-        if start_idx is None:
-            return []
-
-        duration_blocks = getattr(m.subject_group.subject, 'duration_blocks', None) or 1
-        break_before = getattr(m.subject_group.subject, 'break_before_blocks', 0) or 0
-        break_after = getattr(m.subject_group.subject, 'break_after_blocks', 0) or 0
-
-        first_idx = max(0, start_idx - break_before)
-        last_idx = start_idx + duration_blocks - 1 + break_after
-        if last_idx < first_idx:
-            return []
-        return [i for i in range(first_idx, last_idx + 1)]
-
-    # Zbierz wszystkie spotkania w oknie czasowym bieżącej rekrutacji, dla całej organizacji
-    window_start = getattr(recruitment, 'plan_start_date', None)
-    window_end = getattr(recruitment, 'expiration_date', None)
-
-    meetings_filter = {
-        'recruitment__organization': recruitment.organization,
-    }
-    # jeśli mamy zdefiniowane okno czasowe, uwzględniamy rekrutacje, które z nim się przecinają
-    if window_start and window_end:
-        meetings_filter.update({
-            'recruitment__plan_start_date__lte': window_end,
-            'recruitment__expiration_date__gte': window_start,
-        })
-    elif window_start and not window_end:
-        meetings_filter.update({
-            'recruitment__expiration_date__gte': window_start,
-        })
-    elif window_end and not window_start:
-        meetings_filter.update({
-            'recruitment__plan_start_date__lte': window_end,
-        })
-    # pobieramy spotkania niezależnie od tego, czy należą do bieżącej rekrutacji – liczy się nachodzenie w czasie
-    all_meetings = Meeting.objects.filter(**meetings_filter).select_related(
-        'room', 'group', 'subject_group__subject', 'subject_group__host_user', 'recruitment'
-    )
-
-    # Preindeksowanie
-    room_unavail_map = {r.room_id: set() for r in rooms}
-    teacher_unavail_map = {t.id: set() for t in teachers}
-    student_unavail_map = {s.id: set() for s in students}
-
-    # Grupy uczestników per user oraz grupy -> studenci (niezależnie od rekrutacji)
-    user_groups_map = {}
-    group_students_map = {}
-    for ug in UserGroup.objects.filter(user__in=students).select_related('user', 'group'):
-        user_groups_map.setdefault(ug.user_id, set()).add(ug.group_id)
-        group_students_map.setdefault(ug.group_id, set()).add(ug.user_id)
-
-    for m in all_meetings:
-        m_indices = meeting_block_indices(m)
-        # room – tylko jeśli to pokój z listy rooms (tej organizacji)
-        if m.room_id in room_unavail_map:
-            room_unavail_map[m.room_id].update(m_indices)
-        # teacher (host) – jeśli host jest w naszym zbiorze teachers
-        host_id = m.subject_group.host_user_id
-        if host_id in teacher_unavail_map:
-            teacher_unavail_map[host_id].update(m_indices)
-        # students: wszyscy należący do grupy – jeśli są w naszym zbiorze students
-        group_id = m.group_id
-        for stu_id in group_students_map.get(group_id, ()):  # szybkie rozwinięcie bez iteracji po wszystkich studentach
-            student_unavail_map[stu_id].update(m_indices)
-
-    rooms_unavailability = [sorted(room_unavail_map[r.room_id]) for r in rooms]
-    students_unavailability = [sorted(student_unavail_map[s.id]) for s in students]
-    teachers_unavailability = [sorted(teacher_unavail_map[t.id]) for t in teachers]
+    compiler = ConstraintCompiler(recruitment, previous_data=data)
 
     # Aktualizacja constraints_data – zachowujemy stare pola jeśli nie nadpisujemy
-    data.update({
-        'TimeslotsDaily': timeslots_daily,
-        'DaysInCycle': days_in_cycle,
-        'MinStudentsPerGroup': min_students_per_group,
-        'SubjectsDuration': subjects_duration,
-        'GroupsPerSubject': groups_per_subject,
-        'GroupsCapacity': groups_capacity,
-        'GroupsTags': group_tags_pairs,
-        'RoomsCapacity': rooms_capacity,
-        'RoomsTags': room_tags_pairs,
-        'StudentsSubjects': students_subjects,
-        'TeachersGroups': teacher_groups,
-        'RoomsUnavailabilityTimeslots': rooms_unavailability,
-        'StudentsUnavailabilityTimeslots': students_unavailability,
-        'TeachersUnavailabilityTimeslots': teachers_unavailability,
-        'NumGroups': num_groups,
-        'NumTeachers': num_teachers,
-        'NumStudents': num_students,
-        'NumRooms': num_rooms,
-        'NumTags': num_tags,
-        'NumSubjects': num_subjects,
-        'StudentWeights': student_weights,
-        'TeacherWeights': teacher_weights,
-    })
+    data.update(compiler.compile_changed(constraints.compile_state, consumed_dirty))
+
+    # sekcje oznaczone w trakcie kompilacji zostają brudne na następną rundę
+    current_dirty = Constraints.objects.filter(pk=constraints.pk).values_list('dirty_sections', flat=True).first() or []
 
     constraints.constraints_data = data
-    constraints.save(update_fields=['constraints_data'])
-    logger.info(f"Constraints updated for recruitment {recruitment.recruitment_id}")
+    constraints.dirty_sections = [s for s in current_dirty if s not in consumed_dirty]
+    constraints.compile_state = compiler.state()
+    constraints.save(update_fields=['constraints_data', 'dirty_sections', 'compile_state'])
+    logger.info(
+        f"Constraints updated for recruitment {recruitment.recruitment_id}: "
+        f"sections {compiler.stats['sections']} "
+        f"({compiler.stats['queries']} queries, {compiler.stats['seconds'] * 1000:.1f} ms)"
+    )
     return constraints
 
 
 def check_and_trigger_optimizations():
     """check all draft recruitments and trigger optimization if needed"""
+    from optimizer.feasibility import InfeasibleProblemError
+
     recruitments = Recruitment.objects.filter(plan_status='draft')
     logger.debug(f"checking {recruitments.count()} draft recruitments for optimization triggers")
     for recruitment in recruitments:
@@ -345,7 +206,11 @@ def check_and_trigger_optimizations():
             logger.info(f"preparing optimization constraints for recruitment {recruitment.recruitment_id}")
             prepare_optimization_constraints(recruitment)
             logger.info(f"triggering optimization for recruitment {recruitment.recruitment_id}")
-            trigger_optimization(recruitment)
+            try:
+                trigger_optimization(recruitment)
+            except InfeasibleProblemError:
+                # diagnosis is on the failed job, retried once the data changes
+                continue
 
 
 def archive_expired_recruitments():
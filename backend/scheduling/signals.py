@@ -0,0 +1,92 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Subject, SubjectGroup, Recruitment, Room, RoomRecruitment, RoomTag, SubjectTag, Meeting
+from .constraints import mark_constraints_dirty
+from .timetable import timetable_changed
+from . import occupancy
+from identity.models import User, Group, UserGroup, UserSubjects
+
+
+# dirty tracking for incremental constraints compilation (see scheduling.constraints)
+
+@receiver([post_save, post_delete], sender=UserSubjects)
+def user_subjects_changed(sender, instance, **kwargs):
+    mark_constraints_dirty(['students_subjects'], subject_id=instance.subject_id)
+
+
+@receiver([post_save, post_delete], sender=SubjectGroup)
+def subject_group_changed(sender, instance, **kwargs):
+    mark_constraints_dirty(['subjects', 'tags'], subject_id=instance.subject_id)
+    timetable_changed(subject_group_id=instance.subject_group_id)
+
+
+@receiver([post_save, post_delete], sender=RoomRecruitment)
+def room_recruitment_changed(sender, instance, **kwargs):
+    mark_constraints_dirty(['rooms', 'tags', 'unavailability'], recruitment_id=instance.recruitment_id)
+
+
+@receiver([post_save, post_delete], sender=RoomTag)
+def room_tag_changed(sender, instance, **kwargs):
+    mark_constraints_dirty(['tags'], room_id=instance.room_id)
+
+
+@receiver([post_save, post_delete], sender=SubjectTag)
+def subject_tag_changed(sender, instance, **kwargs):
+    mark_constraints_dirty(['tags'], subject_id=instance.subject_id)
+
+
+@receiver(post_save, sender=Meeting)
+def meeting_saved(sender, instance, **kwargs):
+    # meetings block rooms, hosts and students of every recruitment in the organization
+    mark_constraints_dirty(['unavailability'], organization_of=instance.recruitment_id)
+    occupancy.meeting_changed(instance)
+    timetable_changed(recruitment_id=instance.recruitment_id)
+
+
+@receiver(post_delete, sender=Meeting)
+def meeting_deleted(sender, instance, **kwargs):
+    mark_constraints_dirty(['unavailability'], organization_of=instance.recruitment_id)
+    occupancy.meeting_changed(instance, deleted=True)
+    timetable_changed(recruitment_id=instance.recruitment_id)
+
+
+@receiver(post_save, sender=Subject)
+def subject_changed(sender, instance, **kwargs):
+    # subject duration is used for the unavailability of other recruitments' meetings
+    mark_constraints_dirty(['unavailability'], organization_of=instance.recruitment_id)
+    occupancy.invalidate_layer(instance.recruitment_id)
+    timetable_changed(recruitment_id=instance.recruitment_id)
+
+
+# timetable read model (see scheduling.timetable)
+
+@receiver(post_save, sender=Recruitment)
+def recruitment_saved(sender, instance, **kwargs):
+    # activation builds the timetables, archiving (any status but active) removes them
+    timetable_changed(recruitment_id=instance.recruitment_id)
+
+
+@receiver([post_save, post_delete], sender=UserGroup)
+def user_group_changed(sender, instance, **kwargs):
+    # members of a meeting's group are unavailable in the recruitments they take part in
+    mark_constraints_dirty(['unavailability'], user_id=instance.user_id)
+    timetable_changed(group_id=instance.group_id)
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, **kwargs):
+    timetable_changed(group_id=instance.group_id)
+
+
+@receiver(post_save, sender=Room)
+def room_saved(sender, instance, **kwargs):
+    timetable_changed(room_id=instance.room_id)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, update_fields=None, **kwargs):
+    # hosts are serialized into the meetings; a login only touches last_login
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    timetable_changed(host_user_id=instance.pk)
@@ -1,3 +1,407 @@
-from django.test import TestCase
+import io
+import re
+import unittest
+import uuid
+from datetime import datetime
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Q
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .constraints import ConstraintCompiler
+from .models import Meeting, Recruitment, Room, RoomRecruitment, RoomTag, Subject, SubjectGroup, SubjectTag, Tag, TimetableEntry
+from .occupancy import VERSION_KEY, flush_occupancy_changes
+from .services import get_active_meetings_for_room, prepare_optimization_constraints
+from .timetable import _window, get_timetable
+from identity.models import Group, Organization, User, UserGroup, UserRecruitment, UserSubjects
+from identity.services import get_active_meetings_for_user
+from optimizer.models import OptimizationJob, OptimizationProgress
+from preferences.models import Constraints
+
+
+class BaseCrudListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = Organization.objects.create(organization_name='Org')
+        cls.office = User.objects.create_user(username='office', password='x', role='office', organization=cls.organization)
+        cls.recruitment = Recruitment.objects.create(recruitment_name='Main', organization=cls.organization)
+        cls.other_recruitment = Recruitment.objects.create(recruitment_name='Other', organization=cls.organization)
+        cls.hosts = [
+            User.objects.create_user(username=f'host{i}', password='x', role='host', organization=cls.organization)
+            for i in range(3)
+        ]
+        cls.rooms = [
+            Room.objects.create(organization=cls.organization, building_name='B', room_number=str(i), capacity=20)
+            for i in range(3)
+        ]
+        cls.subjects = [
+            Subject.objects.create(subject_name=f'Subject {i}', recruitment=cls.recruitment) for i in range(3)
+        ]
+        cls.subject_groups = [
+            SubjectGroup.objects.create(subject=subject, host_user=host) for subject, host in zip(cls.subjects, cls.hosts)
+        ]
+
+    def setUp(self):
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.force_authenticate(self.office)
+
+    def create_meetings(self, count, recruitment=None):
+        meetings = []
+        for i in range(count):
+            group = Group.objects.create(group_name=f'g{i}', category='meeting', organization=self.organization)
+            meetings.append(Meeting.objects.create(
+                recruitment=recruitment or self.recruitment,
+                subject_group=self.subject_groups[i % 3],
+                group=group,
+                room=self.rooms[i % 3],
+                start_timeslot=i,
+                day_of_week=0,
+                day_of_cycle=0,
+            ))
+        return meetings
+
+    def test_meeting_list_query_count_does_not_grow_with_rows(self):
+        self.create_meetings(3)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/v1/scheduling/meetings/')
+        self.assertEqual(len(response.json()), 3)
+
+        self.create_meetings(12)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/v1/scheduling/meetings/')
+        rows = response.json()
+        self.assertEqual(len(rows), 15)
+        self.assertEqual({row['subject_name'] for row in rows}, {subject.subject_name for subject in self.subjects})
+        self.assertEqual({row['host_user_username'] for row in rows}, {host.username for host in self.hosts})
+
+    def test_subject_group_list_query_count(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/v1/scheduling/subject-groups/')
+        self.assertEqual(len(response.json()), 3)
+
+    def test_cursor_pagination(self):
+        meetings = self.create_meetings(7)
+        seen = []
+        url = '/api/v1/scheduling/meetings/?page_size=3'
+        while url:
+            with self.assertNumQueries(1):
+                response = self.client.get(url)
+            page = response.json()
+            self.assertLessEqual(len(page['results']), 3)
+            seen += [row['meeting_id'] for row in page['results']]
+            url = page['next']
+        self.assertEqual(sorted(seen), sorted(str(meeting.meeting_id) for meeting in meetings))
+
+    def test_sparse_fields(self):
+        self.create_meetings(2)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/v1/scheduling/meetings/?fields=meeting_id,room')
+        self.assertEqual([set(row) for row in response.json()], [{'meeting_id', 'room'}] * 2)
+
+        response = self.client.get('/api/v1/scheduling/meetings/?fields=meeting_id,nope')
+        self.assertEqual(response.status_code, 400)
+
+    def test_filters(self):
+        self.create_meetings(2)
+        other = self.create_meetings(3, recruitment=self.other_recruitment)
+        response = self.client.get(f'/api/v1/scheduling/meetings/?recruitment={self.other_recruitment.recruitment_id}')
+        self.assertEqual(sorted(row['meeting_id'] for row in response.json()),
+                         sorted(str(meeting.meeting_id) for meeting in other))
+
+        response = self.client.get(f'/api/v1/scheduling/meetings/?organization={self.organization.organization_id}')
+        self.assertEqual(len(response.json()), 5)
+
+        response = self.client.get('/api/v1/scheduling/meetings/?recruitment=not-a-uuid')
+        self.assertEqual(response.status_code, 400)
+
+
+class ConstraintsDirtyTrackingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = Organization.objects.create(organization_name='Org')
+        # an active plan whose meeting blocks its group's members in the draft recruitment
+        active = Recruitment.objects.create(recruitment_name='Active', organization=cls.organization, plan_status='active')
+        host = User.objects.create_user(username='host', password='x', role='host', organization=cls.organization)
+        subject = Subject.objects.create(subject_name='Subject', recruitment=active, duration_blocks=4)
+        cls.group = Group.objects.create(group_name='g', category='meeting', organization=cls.organization)
+        Meeting.objects.create(
+            recruitment=active,
+            subject_group=SubjectGroup.objects.create(subject=subject, host_user=host),
+            group=cls.group,
+            room=Room.objects.create(organization=cls.organization, building_name='B', room_number='1', capacity=20),
+            start_timeslot=5,
+            day_of_week=0,
+            day_of_cycle=0,
+        )
+
+        cls.recruitment = Recruitment.objects.create(recruitment_name='Draft', organization=cls.organization)
+        cls.student = User.objects.create_user(username='student', password='x', role='participant', organization=cls.organization)
+        UserRecruitment.objects.create(user=cls.student, recruitment=cls.recruitment)
+        Constraints.objects.create(recruitment=cls.recruitment, constraints_data={})
+
+    def compile(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return prepare_optimization_constraints(self.recruitment)
+
+    def test_group_membership_marks_unavailability_dirty(self):
+        self.assertEqual(self.compile().constraints_data['StudentsUnavailabilityTimeslots'], [[]])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            membership = UserGroup.objects.create(user=self.student, group=self.group)
+        self.assertEqual(Constraints.objects.get(recruitment=self.recruitment).dirty_sections, ['unavailability'])
+        constraints = self.compile()
+        self.assertEqual(constraints.constraints_data['StudentsUnavailabilityTimeslots'], [[5, 6, 7, 8]])
+        self.assertEqual(constraints.dirty_sections, [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            membership.delete()
+        self.assertEqual(self.compile().constraints_data['StudentsUnavailabilityTimeslots'], [[]])
+
+
+def legacy_constraints_data(recruitment):
+    """constraints_data as the per-entity builder of prepare_optimization_constraints computed it before ConstraintCompiler"""
+    start, end = recruitment.day_start_time, recruitment.day_end_time
+    minutes = (end.hour * 60 + end.minute) - (start.hour * 60 + start.minute) if start and end else 0
+    linked_users = User.objects.filter(user_recruitments__recruitment=recruitment).distinct().order_by('id')
+    students = list(linked_users.filter(role='participant'))
+    teachers = list(linked_users.filter(role='host'))
+    subject_groups = list(SubjectGroup.objects.filter(subject__recruitment=recruitment).select_related('subject'))
+    subject_group_index = {sg.subject_group_id: i for i, sg in enumerate(subject_groups)}
+    subjects = Subject.objects.filter(recruitment=recruitment).distinct()
+    subject_index = {s.subject_id: i for i, s in enumerate(subjects)}
+    rooms = Room.objects.filter(room_recruitments__recruitment=recruitment).distinct()
+    room_index = {r.room_id: i for i, r in enumerate(rooms)}
+    tags = Tag.objects.filter(
+        Q(tagged_rooms__room__in=rooms) | Q(tagged_subjects__subject__in=subjects)
+    ).distinct().order_by('tag_name')
+    tag_index = {t.tag_id: i for i, t in enumerate(tags)}
+
+    meetings = {'recruitment__organization': recruitment.organization}
+    if recruitment.plan_start_date:
+        meetings['recruitment__expiration_date__gte'] = recruitment.plan_start_date
+    if recruitment.expiration_date:
+        meetings['recruitment__plan_start_date__lte'] = recruitment.expiration_date
+    group_students = {}
+    for membership in UserGroup.objects.filter(user__in=students):
+        group_students.setdefault(membership.group_id, set()).add(membership.user_id)
+    room_busy = {r.room_id: set() for r in rooms}
+    teacher_busy = {t.id: set() for t in teachers}
+    student_busy = {s.id: set() for s in students}
+    for meeting in Meeting.objects.filter(**meetings).select_related('subject_group__subject'):
+        if meeting.start_timeslot is None:
+            continue
+        # break_before_blocks / break_after_blocks do not exist on Subject, the old getattr always read 0
+        blocks = range(meeting.start_timeslot, meeting.start_timeslot + (meeting.subject_group.subject.duration_blocks or 1))
+        room_busy.get(meeting.room_id, set()).update(blocks)
+        teacher_busy.get(meeting.subject_group.host_user_id, set()).update(blocks)
+        for student_id in group_students.get(meeting.group_id, ()):
+            student_busy[student_id].update(blocks)
+
+    return {
+        'TimeslotsDaily': max(minutes // 15, 1) if minutes > 0 else 32,
+        'DaysInCycle': {'weekly': 7, 'biweekly': 14, 'monthly': 28}.get(recruitment.cycle_type, 7),
+        'MinStudentsPerGroup': [sg.subject.min_students for sg in subject_groups],
+        'SubjectsDuration': [s.duration_blocks for s in subjects],
+        'GroupsPerSubject': [SubjectGroup.objects.filter(subject=s).count() for s in subjects],
+        'GroupsCapacity': [sg.subject.capacity for sg in subject_groups],
+        'GroupsTags': [
+            [subject_group_index[sg.subject_group_id], tag_index[st.tag_id]]
+            for sg in subject_groups for st in SubjectTag.objects.filter(subject=sg.subject) if st.tag_id in tag_index
+        ],
+        'RoomsCapacity': [r.capacity for r in rooms],
+        'RoomsTags': [
+            [room_index[rt.room_id], tag_index[rt.tag_id]]
+            for rt in RoomTag.objects.filter(room__in=rooms) if rt.tag_id in tag_index and rt.room_id in room_index
+        ],
+        'StudentsSubjects': [
+            [subject_index[sid] for sid in UserSubjects.objects.filter(user=s).values_list('subject_id', flat=True)
+             if sid in subject_index]
+            for s in students
+        ],
+        'TeachersGroups': [
+            sorted({subject_group_index[sg.subject_group_id] for sg in subject_groups if sg.host_user_id == t.id})
+            for t in teachers
+        ],
+        'RoomsUnavailabilityTimeslots': [sorted(room_busy[r.room_id]) for r in rooms],
+        'StudentsUnavailabilityTimeslots': [sorted(student_busy[s.id]) for s in students],
+        'TeachersUnavailabilityTimeslots': [sorted(teacher_busy[t.id]) for t in teachers],
+        'NumGroups': len(subject_groups),
+        'NumTeachers': len(teachers),
+        'NumStudents': len(students),
+        'NumRooms': len(rooms),
+        'NumTags': len(tags),
+        'NumSubjects': len(subject_index),
+        'StudentWeights': [s.weight for s in students],
+        'TeacherWeights': [t.weight for t in teachers],
+    }
+
+
+class ConstraintCompilerEquivalenceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # an active term with meetings and a draft term overlapping it, both with tagged rooms and subjects
+        call_command('seed_demo_data', scale=60, organizations=1, seed=7, stdout=io.StringIO())
+        cls.recruitments = list(Recruitment.objects.filter(organization__organization_name='Scale Org 7-1'))
+
+    @staticmethod
+    def normalized(data):
+        # the compiler emits these pairs and lists in query order rather than per entity
+        data = dict(data)
+        for key in ('GroupsTags', 'RoomsTags'):
+            data[key] = sorted(data[key])
+        data['StudentsSubjects'] = [sorted(subjects) for subjects in data['StudentsSubjects']]
+        return data
+
+    def test_matches_legacy_builder(self):
+        self.assertEqual({r.plan_status for r in self.recruitments}, {'active', 'draft'})
+        for recruitment in self.recruitments:
+            with self.subTest(recruitment=recruitment.plan_status):
+                legacy = legacy_constraints_data(recruitment)
+                compiled = ConstraintCompiler(recruitment).compile()
+                self.assertTrue(legacy['GroupsTags'] and legacy['RoomsTags'])
+                self.assertTrue(any(legacy['StudentsUnavailabilityTimeslots']))
+                self.assertEqual(self.normalized(compiled), self.normalized(legacy))
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class OccupancyIndexTests(TestCase):
+    """Unavailability from this process's occupancy layers stays equal to a recompute from the meetings"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = Organization.objects.create(organization_name='Org')
+        cls.active = Recruitment.objects.create(recruitment_name='Active', organization=cls.organization, plan_status='active')
+        cls.draft = Recruitment.objects.create(recruitment_name='Draft', organization=cls.organization)
+        cls.subject = Subject.objects.create(subject_name='Subject', recruitment=cls.active, duration_blocks=2)
+        cls.hosts = [
+            User.objects.create_user(username=f'host{i}', password='x', role='host', organization=cls.organization)
+            for i in range(2)
+        ]
+        cls.subject_groups = [SubjectGroup.objects.create(subject=cls.subject, host_user=host) for host in cls.hosts]
+        cls.rooms = [
+            Room.objects.create(organization=cls.organization, building_name='B', room_number=str(i), capacity=20)
+            for i in range(2)
+        ]
+        cls.groups = [Group.objects.create(group_name=f'g{i}', category='class', organization=cls.organization) for i in range(2)]
+        students = [
+            User.objects.create_user(username=f'student{i}', password='x', role='participant', organization=cls.organization)
+            for i in range(3)
+        ]
+        # student 1 is in both groups
+        for student, groups in zip(students, [cls.groups[:1], cls.groups, cls.groups[1:]]):
+            for group in groups:
+                UserGroup.objects.create(user=student, group=group)
+        for user in cls.hosts + students:
+            UserRecruitment.objects.create(user=user, recruitment=cls.draft)
+        for room in cls.rooms:
+            RoomRecruitment.objects.create(room=room, recruitment=cls.draft)
+        cls.meeting = cls.create_meeting(0, 0, 0, start_timeslot=3)
+
+    @classmethod
+    def create_meeting(cls, subject_group, room, group, start_timeslot):
+        return Meeting.objects.create(
+            recruitment=cls.active, subject_group=cls.subject_groups[subject_group], room=cls.rooms[room],
+            group=cls.groups[group], start_timeslot=start_timeslot, day_of_week=0, day_of_cycle=0
+        )
+
+    def setUp(self):
+        # changes recorded by the fixtures never reached an on_commit flush
+        flush_occupancy_changes()
+        cache.clear()
+
+    def assertCurrent(self):
+        compiled = ConstraintCompiler(self.draft).compile(['unavailability'])
+        recomputed = legacy_constraints_data(self.draft)
+        self.assertEqual(compiled, {key: recomputed[key] for key in compiled})
+        return compiled
+
+    def test_meeting_changes(self):
+        self.assertEqual(sorted(self.assertCurrent()['RoomsUnavailabilityTimeslots']), [[], [3, 4]])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other = self.create_meeting(1, 1, 1, start_timeslot=10)
+        self.assertEqual(sorted(self.assertCurrent()['StudentsUnavailabilityTimeslots']), [[3, 4], [3, 4, 10, 11], [10, 11]])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other.start_timeslot = 4
+            other.room = self.rooms[0]
+            other.save()
+        self.assertEqual(sorted(self.assertCurrent()['RoomsUnavailabilityTimeslots']), [[], [3, 4, 5]])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.meeting.delete()
+        self.assertEqual(sorted(self.assertCurrent()['TeachersUnavailabilityTimeslots']), [[], [4, 5]])
+
+    def test_subject_duration_change(self):
+        self.assertCurrent()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.subject.duration_blocks = 4
+            self.subject.save()
+        self.assertEqual(sorted(self.assertCurrent()['RoomsUnavailabilityTimeslots']), [[], [3, 4, 5, 6]])
+
+    def test_version_bump_from_another_process(self):
+        self.assertCurrent()
+        # another process moved the meeting: this process only sees the version it bumped in the shared cache
+        Meeting.objects.filter(pk=self.meeting.pk).update(start_timeslot=20)
+        stale = ConstraintCompiler(self.draft).compile(['unavailability'])
+        self.assertEqual(sorted(stale['RoomsUnavailabilityTimeslots']), [[], [3, 4]])
+
+        cache.add(VERSION_KEY.format(self.active.recruitment_id), 0, timeout=None)
+        cache.incr(VERSION_KEY.format(self.active.recruitment_id))
+        self.assertEqual(sorted(self.assertCurrent()['RoomsUnavailabilityTimeslots']), [[], [20, 21]])
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', "EXPLAIN QUERY PLAN output is SQLite specific")
+class HotQueryPlanTests(TestCase):
+    """The hot queries of the services, views and the scheduler must search an index, never scan a table"""
+
+    def assertNoFullScan(self, queryset):
+        plan = queryset.explain()
+        scans = re.findall(r'\bSCAN (?!CONSTANT ROW)\S+.*', plan)
+        self.assertEqual(scans, [], plan)
+
+    def test_hot_queries_use_indexes(self):
+        some_id = uuid.uuid4()
+        window = (timezone.make_aware(datetime(2025, 1, 1)), timezone.make_aware(datetime(2025, 2, 1)))
+        queries = {
+            # identity.services / scheduling.services
+            'meetings of a user': get_active_meetings_for_user(some_id, *window),
+            'meetings of a room': get_active_meetings_for_room(some_id, *window),
+            # scheduling.timetable
+            'timetable rebuild': Meeting.objects.filter(recruitment_id=some_id).order_by('day_of_cycle', 'start_timeslot'),
+            # run_scheduler
+            'draft recruitments': Recruitment.objects.filter(plan_status='draft'),
+            'expired recruitments': Recruitment.objects.filter(plan_status='active', expiration_date__lt=timezone.now()),
+            # optimizer.views / optimizer.warm_start / optimizer.consumers
+            'job list': OptimizationJob.objects.filter(parent__isnull=True).order_by('-created_at'),
+            'job list by recruitment and status': OptimizationJob.objects.filter(
+                parent__isnull=True, recruitment__recruitment_id=some_id, status='running'
+            ).order_by('-created_at'),
+            'recruitment progress': OptimizationJob.objects.filter(
+                recruitment_id=some_id, parent__isnull=True
+            ).exclude(status='archived').order_by('created_at'),
+            'warm start job': OptimizationJob.objects.filter(
+                recruitment_id=some_id, parent__isnull=True, status='completed'
+            ).order_by('-completed_at'),
+            'latest progress by iteration': OptimizationProgress.objects.filter(job_id=some_id).order_by('-iteration'),
+            'latest progress': OptimizationProgress.objects.filter(job_id=some_id),
+        }
+        for name, queryset in queries.items():
+            with self.subTest(query=name):
+                self.assertNoFullScan(queryset)
+
+    def test_timetable_lookup_uses_index(self):
+        start, end = timezone.make_aware(datetime(2025, 1, 1)), timezone.make_aware(datetime(2025, 2, 1))
+        with self.assertNumQueries(1):
+            get_timetable('user', uuid.uuid4(), start, end)
+        self.assertNoFullScan(
+            TimetableEntry.objects.filter(_window(start, end), owner_type='room', owner_id=uuid.uuid4())
+        )
+
+    def test_unindexed_query_is_detected(self):
+        with self.assertRaises(AssertionError):
+            self.assertNoFullScan(Meeting.objects.filter(start_timeslot=3))
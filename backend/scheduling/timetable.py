@@ -0,0 +1,176 @@
+"""
+Timetable read model: TimetableEntry rows holding the serialized meetings (MeetingDetailSerializer)
+of one active recruitment for one user or room.
+
+A user's entry lists the meetings they host or attend through an identity group, a room's entry the
+meetings held in it, both ordered by day_of_cycle and start_timeslot. Reading a timetable is one
+query over the (owner_type, owner_id, recruitment_name) index, whatever the number of recruitments
+the owner belongs to; the date window is matched against the copied plan_start_date / expiration_date
+exactly as identity.services.get_active_meetings_for_user does.
+
+Entries are rebuilt per recruitment once the transaction that changed it commits (see
+scheduling.signals): when the recruitment is saved (becomes active, is archived, renamed ...), when one
+of its meetings, subjects, subject groups or rooms changes, or when a group attending it gains or loses
+a member. Recruitments that are not active have no entries. `manage.py rebuild_timetables` builds the
+entries of recruitments activated before the read model existed.
+"""
+import hashlib
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Meeting, Recruitment, TimetableEntry
+from identity.models import UserGroup
+from optimizer.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _window(start_date=None, end_date=None) -> Q:
+    window = Q()
+    if end_date:
+        window &= Q(plan_start_date__lte=end_date) | Q(plan_start_date__isnull=True)
+    if start_date:
+        window &= Q(expiration_date__gte=start_date) | Q(expiration_date__isnull=True)
+    return window
+
+
+def get_timetable(owner_type: str, owner_id, start_date=None, end_date=None) -> Tuple[List[Dict], str]:
+    """(serialized meetings of the owner's active recruitments overlapping the window, ETag)"""
+    entries = (
+        TimetableEntry.objects
+        .filter(_window(start_date, end_date), owner_type=owner_type, owner_id=owner_id)
+        .order_by('recruitment_name', 'recruitment_id')
+        .values_list('recruitment_id', 'built_at', 'meetings')
+    )
+    meetings, versions = [], []
+    for recruitment_id, built_at, entry_meetings in entries:
+        meetings.extend(entry_meetings)
+        versions.append(f'{recruitment_id.hex}:{built_at.timestamp()}')
+    digest = hashlib.sha1('|'.join(versions).encode()).hexdigest()[:20]
+    return meetings, f'"{owner_type}-{digest}"'
+
+
+def with_etag(response, etag: str):
+    response['ETag'] = etag
+    # clients revalidate with If-None-Match instead of guessing a freshness lifetime
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+def rebuild_timetable(recruitment_id) -> int:
+    """Replace the entries of one recruitment (none unless it is active); returns the number of entries"""
+    from .serializers import MeetingDetailSerializer
+
+    with transaction.atomic():
+        recruitment = Recruitment.objects.select_for_update().filter(recruitment_id=recruitment_id).first()
+        TimetableEntry.objects.filter(recruitment_id=recruitment_id).delete()
+        if recruitment is None or recruitment.plan_status != 'active':
+            return 0
+
+        meetings = list(
+            Meeting.objects
+            .filter(recruitment_id=recruitment_id)
+            .select_related(
+                'recruitment', 'room', 'group__organization', 'subject_group__subject',
+                'subject_group__host_user__organization'
+            )
+            .order_by('day_of_cycle', 'start_timeslot')
+        )
+        rows = MeetingDetailSerializer(meetings, many=True).data
+
+        members = defaultdict(list)
+        for group_id, user_id in UserGroup.objects.filter(
+            group_id__in={meeting.group_id for meeting in meetings}
+        ).values_list('group_id', 'user_id'):
+            members[group_id].append(user_id)
+
+        # dict keys keep the meeting order and drop a meeting hosted and attended by the same user
+        owners = defaultdict(dict)
+        for meeting, row in zip(meetings, rows):
+            owners[('room', meeting.room_id)][meeting.meeting_id] = row
+            owners[('user', meeting.subject_group.host_user_id)][meeting.meeting_id] = row
+            for user_id in members[meeting.group_id]:
+                owners[('user', user_id)][meeting.meeting_id] = row
+
+        TimetableEntry.objects.bulk_create([
+            TimetableEntry(
+                owner_type=owner_type,
+                owner_id=owner_id,
+                recruitment_id=recruitment_id,
+                recruitment_name=recruitment.recruitment_name,
+                plan_start_date=recruitment.plan_start_date,
+                expiration_date=recruitment.expiration_date,
+                meetings=list(owner_meetings.values()),
+            )
+            for (owner_type, owner_id), owner_meetings in owners.items()
+        ], batch_size=500)
+    return len(owners)
+
+
+def rebuild_all_timetables() -> int:
+    """Rebuild the entries of every active recruitment and drop the rest; returns the number of entries"""
+    TimetableEntry.objects.exclude(recruitment__plan_status='active').delete()
+    return sum(
+        rebuild_timetable(recruitment_id)
+        for recruitment_id in Recruitment.objects.filter(plan_status='active').values_list('recruitment_id', flat=True)
+    )
+
+
+# --- change propagation ---
+
+_changes = threading.local()
+
+
+def _pending() -> Dict:
+    pending = getattr(_changes, 'pending', None)
+    if pending is None:
+        pending = _changes.pending = defaultdict(set)
+    return pending
+
+
+def timetable_changed(recruitment_id=None, group_id=None, room_id=None, subject_group_id=None, host_user_id=None):
+    """Record a change; the affected recruitments are rebuilt once the transaction commits"""
+    pending = _pending()
+    for kind, object_id in (('recruitment', recruitment_id), ('group', group_id), ('room', room_id),
+                            ('subject_group', subject_group_id), ('host', host_user_id)):
+        if object_id is not None:
+            pending[kind].add(object_id)
+    transaction.on_commit(flush_timetable_changes)
+
+
+def _affected_recruitments(pending: Dict) -> Iterable:
+    recruitment_ids = set(pending.get('recruitment', ()))
+    related = Q()
+    if pending.get('group'):
+        related |= Q(group_id__in=pending['group'])
+    if pending.get('room'):
+        related |= Q(room_id__in=pending['room'])
+    if pending.get('subject_group'):
+        related |= Q(subject_group_id__in=pending['subject_group'])
+    if pending.get('host'):
+        related |= Q(subject_group__host_user_id__in=pending['host'])
+    if related:
+        recruitment_ids.update(
+            Meeting.objects.filter(related, recruitment__plan_status='active')
+            .values_list('recruitment_id', flat=True).distinct()
+        )
+    return recruitment_ids
+
+
+def flush_timetable_changes():
+    """Rebuild every recruitment touched by the recorded changes once"""
+    pending = getattr(_changes, 'pending', None)
+    if not pending:
+        return
+    _changes.pending = None
+
+    for recruitment_id in _affected_recruitments(pending):
+        try:
+            rebuild_timetable(recruitment_id)
+        except Exception as e:
+            # the old entries stay in place until the next change of the recruitment
+            logger.error(f"Timetable rebuild of recruitment {recruitment_id} failed: {e}")
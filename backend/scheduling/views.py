@@ -1,6 +1,10 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination
+from rest_framework.serializers import BaseSerializer, ListSerializer, ManyRelatedField
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
 from django.shortcuts import get_object_or_404
 from django.contrib.auth import get_user_model
 
@@ -16,27 +20,149 @@ from .serializers import (
     RoomTagSerializer,
     MeetingSerializer,
     RoomRecruitmentSerializer,
-    MeetingDetailSerializer,
     SubjectTagSerializer,
 )
-from .services import get_active_meetings_for_room, get_users_for_recruitment
+from .services import get_users_for_recruitment
+from .timetable import get_timetable, with_etag
 from identity.models import UserRecruitment
 from identity.serializers import UserSerializer
 
 
+class CrudCursorPagination(CursorPagination):
+    """Keyset pagination of BaseCrudView lists, used when ?cursor= or ?page_size= is given"""
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    # unique and indexed, so a page is one range scan whatever the offset
+    ordering = 'pk'
+
+
+def _relation_path(model, parts):
+    """(select_related path, prefetch_related path or None) of a dotted serializer source on model"""
+    select_path = []
+    for part in parts:
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            break
+        if not field.is_relation:
+            break
+        if field.one_to_many or field.many_to_many:
+            return '__'.join(select_path), '__'.join(select_path + [part])
+        select_path.append(part)
+        model = field.related_model
+    return '__'.join(select_path), None
+
+
+def related_plan(fields, model, prefix=''):
+    """select_related / prefetch_related paths needed to serialize the given serializer fields of model
+    without a query per row (dotted sources and nested serializers, recursively)"""
+    select, prefetch = set(), set()
+    for field in fields.values():
+        if field.write_only or field.source == '*':
+            continue
+        parts = field.source.split('.')
+        nested = isinstance(field, BaseSerializer)
+        many = isinstance(field, (ListSerializer, ManyRelatedField))
+        # a plain value (or a pk of a relation) needs the objects up to its owner only
+        select_path, prefetch_path = _relation_path(model, parts if nested or many else parts[:-1])
+        if select_path:
+            select.add(prefix + select_path)
+        if prefetch_path:
+            prefetch.add(prefix + prefetch_path)
+        elif nested and select_path == '__'.join(parts):
+            child = field.child if many else field
+            related_model = getattr(getattr(child, 'Meta', None), 'model', None)
+            if related_model is not None:
+                nested_select, nested_prefetch = related_plan(child.fields, related_model, prefix + select_path + '__')
+                select |= nested_select
+                prefetch |= nested_prefetch
+    return select, prefetch
+
+
 class BaseCrudView(APIView):
+    """CRUD of one model.
+
+    GET lists accept:
+    - filters declared in filter_fields (?recruitment=<id>, ?organization=<id>, ...)
+    - ?fields=a,b to serialize only the listed serializer fields
+    - ?page_size=N / ?cursor=... for cursor pagination ({'next', 'previous', 'results'});
+      without them the whole (filtered) list is returned as before
+    Related objects the serializer reads are loaded with select_related / prefetch_related
+    (see related_plan), related_hints adds the relations of computed fields per field name.
+    """
     permission_classes = [permissions.IsAuthenticated, IsOfficeUser]
+    pagination_class = CrudCursorPagination
     model = None
     serializer_class = None
     lookup_field = None
+    # query param -> ORM lookup
+    filter_fields = {}
+    # serializer field -> relations its value reads (properties, methods)
+    related_hints = {}
+
+    def requested_fields(self):
+        if self.request.method != 'GET':
+            return None
+        raw = self.request.query_params.get('fields')
+        if not raw:
+            return None
+        return {name.strip() for name in raw.split(',') if name.strip()}
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = self.serializer_class(*args, **kwargs)
+        names = self.requested_fields()
+        if names:
+            fields = serializer.child.fields if kwargs.get('many') else serializer.fields
+            unknown = names - set(fields)
+            if unknown:
+                raise ValidationError({'fields': f"Unknown fields: {', '.join(sorted(unknown))}"})
+            for name in set(fields) - names:
+                fields.pop(name)
+        return serializer
+
+    def get_queryset(self):
+        fields = self.get_serializer().fields
+        select, prefetch = related_plan(fields, self.model)
+        for name, relations in self.related_hints.items():
+            if name in fields:
+                select.update(relations)
+        queryset = self.model.objects.all()
+        if select:
+            queryset = queryset.select_related(*sorted(select))
+        if prefetch:
+            queryset = queryset.prefetch_related(*sorted(prefetch))
+        return queryset
+
+    def filter_queryset(self, queryset):
+        for param, lookup in self.filter_fields.items():
+            value = self.request.query_params.get(param)
+            if value is None:
+                continue
+            try:
+                queryset = queryset.filter(**{lookup: value})
+            except (DjangoValidationError, ValueError):
+                raise ValidationError({param: f"Invalid value: {value}"})
+        return queryset
+
+    def paginate(self, queryset):
+        """page of the queryset when pagination was requested, None otherwise"""
+        if 'cursor' not in self.request.query_params and 'page_size' not in self.request.query_params:
+            return None
+        self.paginator = self.pagination_class()
+        return self.paginator.paginate_queryset(queryset, self.request, view=self)
 
     def get(self, request, pk=None):
         if pk:
-            instance = get_object_or_404(self.model, **{self.lookup_field: pk})
-            serializer = self.serializer_class(instance)
+            instance = get_object_or_404(self.get_queryset(), **{self.lookup_field: pk})
+            serializer = self.get_serializer(instance)
             return Response(serializer.data)
-        instances = self.model.objects.all()
-        serializer = self.serializer_class(instances, many=True)
+        instances = self.filter_queryset(self.get_queryset())
+        page = self.paginate(instances)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.paginator.get_paginated_response(serializer.data)
+        serializer = self.get_serializer(instances, many=True)
         return Response(serializer.data)
 
     def post(self, request):
@@ -72,12 +198,19 @@ class SubjectView(BaseCrudView):
     model = Subject
     serializer_class = SubjectSerializer
     lookup_field = 'subject_id'
+    filter_fields = {'recruitment': 'recruitment_id', 'organization': 'recruitment__organization_id'}
 
 
 class SubjectGroupView(BaseCrudView):
     model = SubjectGroup
     serializer_class = SubjectGroupSerializer
     lookup_field = 'subject_group_id'
+    filter_fields = {
+        'subject': 'subject_id',
+        'host_user': 'host_user_id',
+        'recruitment': 'subject__recruitment_id',
+        'organization': 'subject__recruitment__organization_id',
+    }
 
 
 class SubjectGroupsBySubjectView(APIView):
@@ -126,42 +259,56 @@ class RecruitmentView(BaseCrudView):
     model = Recruitment
     serializer_class = RecruitmentSerializer
     lookup_field = 'recruitment_id'
+    filter_fields = {'organization': 'organization_id', 'plan_status': 'plan_status'}
 
 
 class RoomView(BaseCrudView):
     model = Room
     serializer_class = RoomSerializer
     lookup_field = 'room_id'
+    filter_fields = {'organization': 'organization_id'}
 
 
 class TagView(BaseCrudView):
     model = Tag
     serializer_class = TagSerializer
     lookup_field = 'tag_id'
+    filter_fields = {'organization': 'organization_id'}
 
 
 class RoomTagView(BaseCrudView):
     model = RoomTag
     serializer_class = RoomTagSerializer
     lookup_field = 'id'
+    filter_fields = {'room': 'room_id', 'tag': 'tag_id', 'organization': 'room__organization_id'}
 
 
 class MeetingView(BaseCrudView):
     model = Meeting
     serializer_class = MeetingSerializer
     lookup_field = 'meeting_id'
+    filter_fields = {
+        'recruitment': 'recruitment_id',
+        'organization': 'recruitment__organization_id',
+        'room': 'room_id',
+        'subject_group': 'subject_group_id',
+        'group': 'group_id',
+    }
+    related_hints = {'end_hour': ['subject_group__subject']}
 
 
 class RoomRecruitmentView(BaseCrudView):
     model = RoomRecruitment
     serializer_class = RoomRecruitmentSerializer
     lookup_field = 'id'
+    filter_fields = {'room': 'room_id', 'recruitment': 'recruitment_id', 'organization': 'recruitment__organization_id'}
 
 
 class SubjectTagView(BaseCrudView):
     model = SubjectTag
     serializer_class = SubjectTagSerializer
     lookup_field = 'id'
+    filter_fields = {'subject': 'subject_id', 'tag': 'tag_id', 'recruitment': 'subject__recruitment_id'}
 
 
 User = get_user_model()
@@ -173,6 +320,9 @@ class ActiveMeetingsByRoomView(APIView):
     - start_date YYYY-MM-DD
     - end_date YYYY-MM-DD
     Jeśli brak któregoś z parametrów -> 400.
+
+    Dane z zmaterializowanego planu (scheduling.timetable); odpowiedź ma ETag, przy zgodnym
+    If-None-Match -> 304.
     """
     permission_classes = [permissions.IsAuthenticated]
 
@@ -197,16 +347,18 @@ class ActiveMeetingsByRoomView(APIView):
         if end_date < start_date:
             return Response({'detail': 'end_date earlier than start_date'}, status=status.HTTP_400_BAD_REQUEST)
 
-        qs = get_active_meetings_for_room(room_pk, start_date=start_date, end_date=end_date)
-        serializer = MeetingDetailSerializer(qs, many=True)
-        return Response({
+        # materialized timetable (scheduling.timetable): one indexed lookup, rows already serialized
+        meetings, etag = get_timetable('room', room.room_id, start_date=start_date, end_date=end_date)
+        if request.headers.get('If-None-Match') == etag:
+            return with_etag(Response(status=status.HTTP_304_NOT_MODIFIED), etag)
+        return with_etag(Response({
             'room_id': str(room.room_id),
             'room_name': getattr(room, 'room_name', None),
             'start_date': start_date.isoformat(),
             'end_date': end_date.isoformat(),
-            'count': len(serializer.data),
-            'results': serializer.data
-        })
+            'count': len(meetings),
+            'results': meetings
+        }), etag)
 
 
 class UsersByRecruitmentView(APIView):
@@ -14,6 +14,8 @@ public:
     virtual bool checkForCancellation() = 0;
     virtual std::string getCurrentJobId() const = 0;
     virtual bool hasMoreJobs() = 0;
+    // genotypes sent to the current job by other islands since the last call (island model)
+    virtual std::vector<std::vector<int>> receiveMigrants() { return {}; }
 };
 
 class FileEventReceiver : public EventReceiver {
@@ -37,18 +39,21 @@ class RedisEventReceiver : public EventReceiver {
 public:
     explicit RedisEventReceiver(const std::string& connectionString, 
                                 const std::string& jobQueue = "optimizer:jobs",
-                                const std::string& cancelKeyPrefix = "optimizer:cancel:");
+                                const std::string& cancelKeyPrefix = "optimizer:cancel:",
+                                const std::string& migrantKeyPrefix = "optimizer:migrants:");
     ~RedisEventReceiver();
     
     RawJobData receive() override;
     bool checkForCancellation() override;
     std::string getCurrentJobId() const override;
     bool hasMoreJobs() override;
+    std::vector<std::vector<int>> receiveMigrants() override;
     
 private:
     std::string connectionString_;
     std::string jobQueue_;
     std::string cancelKeyPrefix_;
+    std::string migrantKeyPrefix_;
     void* redisConnection_;
     std::atomic<bool> cancelRequested_;
     std::string currentJobId_;
@@ -59,4 +64,5 @@ private:
     void disconnect();
     bool checkCancelFlag();
     void parseConnectionString();
+    nlohmann::json loadPayload(const nlohmann::json& envelope);
 };
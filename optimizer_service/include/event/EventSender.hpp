@@ -25,7 +25,9 @@ class RedisEventSender : public EventSender {
 public:
     explicit RedisEventSender(const std::string& connectionString,
                              const std::string& progressKeyPrefix = "optimizer:progress:",
-                             const std::string& progressChannel = "optimizer:progress:updates");
+                             const std::string& progressChannel = "optimizer:progress:updates",
+                             const std::string& progressStream = "optimizer:progress:stream",
+                             long long progressStreamMaxLen = 100000);
     ~RedisEventSender();
     
     void sendProgress(const RawProgressData& progress) override;
@@ -34,6 +36,8 @@ private:
     std::string connectionString_;
     std::string progressKeyPrefix_;
     std::string progressChannel_;
+    std::string progressStream_;
+    long long progressStreamMaxLen_;
     void* redisConnection_;
     std::string host_;
     std::string port_;
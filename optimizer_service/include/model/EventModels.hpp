@@ -10,6 +10,9 @@ struct RawJobData {
     std::string recruitment_id;
     RawProblemData problem_data;
     int max_execution_time = 300;
+    std::vector<std::vector<int>> initial_genotypes; // warm start: previous round's best genotype (-1 = gene unknown)
+    int seed = -1;                                    // GA seed, -1 = random (islands of one job get distinct seeds)
+    std::string algorithm = "zawodev";                // genetic algorithm to run ("zawodev" or "example")
     
     RawJobData() = default;
     RawJobData(const std::string& recruitmentId, const RawProblemData& data, int maxTime = 300)
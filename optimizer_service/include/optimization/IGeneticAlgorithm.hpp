@@ -8,5 +8,14 @@ public:
     virtual ~IGeneticAlgorithm() = default;
     virtual Individual Init(const ProblemData& data, const Evaluator& evaluator, int seed = 42) = 0;
     virtual Individual RunIteration(int currentIteration) = 0;
+
+    // genotypes to seed the initial population with (warm start), must be called before Init
+    virtual void SetInitialGenotypes(const std::vector<std::vector<int>>& genotypes) { initialGenotypes = genotypes; }
+
+    // migrants from other islands of the same job (see backend optimizer.islands), ignored by default
+    virtual void InjectGenotypes(const std::vector<std::vector<int>>& genotypes) {}
+
+protected:
+    std::vector<std::vector<int>> initialGenotypes;
 };
 
@@ -8,6 +8,7 @@ class ZawodevGeneticAlgorithm : public IGeneticAlgorithm {
 public:
     Individual Init(const ProblemData& data, const Evaluator& evaluator, int seed = std::random_device{}()) override;
     Individual RunIteration(int currentIteration) override;
+    void InjectGenotypes(const std::vector<std::vector<int>>& genotypes) override;
 private:
     // system variables
     const ProblemData* problemData = nullptr;
@@ -28,6 +29,7 @@ private:
     void UpdateBestIndividual(Individual& contesterInd);
     void RunInnerIteration(int currentInnerIteration);
     void InitRandomInd(Individual& individual);
+    bool InitSeededInd(Individual& individual, const std::vector<int>& seedGenotype, int mutations);
     void FihcInd(Individual& individual);
     void SortSelection();
     void Cross(Individual& parent1, Individual& parent2, Individual& child);
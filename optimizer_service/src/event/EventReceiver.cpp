@@ -5,6 +5,8 @@
 #include <filesystem>
 #include <nlohmann/json.hpp>
 #include <sw/redis++/redis++.h>
+#include <zlib.h>
+#include <cstdio>
 #include <thread>
 #include <chrono>
 
@@ -80,8 +82,10 @@ bool FileEventReceiver::hasMoreJobs() {
 
 RedisEventReceiver::RedisEventReceiver(const std::string& connectionString,
                                      const std::string& jobQueue,
-                                     const std::string& cancelKeyPrefix)
+                                     const std::string& cancelKeyPrefix,
+                                     const std::string& migrantKeyPrefix)
     : connectionString_(connectionString), jobQueue_(jobQueue), cancelKeyPrefix_(cancelKeyPrefix),
+      migrantKeyPrefix_(migrantKeyPrefix),
       redisConnection_(nullptr), cancelRequested_(false) {
     parseConnectionString();
     connect();
@@ -164,6 +168,11 @@ RawJobData RedisEventReceiver::receive() {
                 
                 // parse JSON message
                 json j = json::parse(messageBody);
+                
+                // claim-check envelope: problem_data is stored under payload_key, not inline
+                if (j.contains("payload_key")) {
+                    j["problem_data"] = loadPayload(j);
+                }
                 RawJobData jobData = JsonParser::toRawJobData(j);
                 currentJobId_ = jobData.recruitment_id;
                 
@@ -182,6 +191,52 @@ RawJobData RedisEventReceiver::receive() {
     }
 }
 
+json RedisEventReceiver::loadPayload(const json& envelope) {
+    auto* redis = static_cast<sw::redis::Redis*>(redisConnection_);
+    
+    int version = envelope.value("payload_version", 1);
+    if (version != 1) {
+        throw std::runtime_error("Unsupported payload version: " + std::to_string(version));
+    }
+    
+    std::string payloadKey = envelope.at("payload_key").get<std::string>();
+    auto stored = redis->get(payloadKey);
+    if (!stored) {
+        throw std::runtime_error("Job payload not found (expired?): " + payloadKey);
+    }
+    
+    // checksum of the stored bytes: "crc32:<8 hex digits>"
+    std::string expectedChecksum = envelope.value("checksum", "");
+    if (!expectedChecksum.empty()) {
+        uLong crc = crc32(0L, Z_NULL, 0);
+        crc = crc32(crc, reinterpret_cast<const Bytef*>(stored->data()), static_cast<uInt>(stored->size()));
+        char actual[16];
+        std::snprintf(actual, sizeof(actual), "%08lx", static_cast<unsigned long>(crc));
+        if (expectedChecksum != "crc32:" + std::string(actual)) {
+            throw std::runtime_error("Job payload checksum mismatch for " + payloadKey);
+        }
+    }
+    
+    std::string encoding = envelope.value("payload_encoding", "json");
+    if (encoding == "json") {
+        return json::parse(*stored);
+    }
+    if (encoding != "zlib") {
+        throw std::runtime_error("Unsupported payload encoding: " + encoding);
+    }
+    
+    uLongf size = envelope.at("size").get<uLongf>();
+    std::string raw(size, '\0');
+    int status = uncompress(reinterpret_cast<Bytef*>(raw.data()), &size,
+                            reinterpret_cast<const Bytef*>(stored->data()), static_cast<uLong>(stored->size()));
+    if (status != Z_OK) {
+        throw std::runtime_error("Failed to decompress job payload " + payloadKey + " (zlib error " + std::to_string(status) + ")");
+    }
+    raw.resize(size);
+    Logger::info("Loaded job payload " + payloadKey + " (" + std::to_string(stored->size()) + " -> " + std::to_string(size) + " bytes)");
+    return json::parse(raw);
+}
+
 bool RedisEventReceiver::checkForCancellation() {
     if (cancelRequested_.load()) {
         Logger::info("Cancellation requested for job: " + currentJobId_);
@@ -216,6 +271,32 @@ bool RedisEventReceiver::checkCancelFlag() {
     return false;
 }
 
+std::vector<std::vector<int>> RedisEventReceiver::receiveMigrants() {
+    std::vector<std::vector<int>> migrants;
+    if (!redisConnection_ || currentJobId_.empty()) {
+        return migrants;
+    }
+
+    auto* redis = static_cast<sw::redis::Redis*>(redisConnection_);
+    std::string migrantKey = migrantKeyPrefix_ + currentJobId_;
+
+    try {
+        // the backend keeps the list short (LTRIM), each entry is a JSON genotype array
+        while (auto entry = redis->lpop(migrantKey)) {
+            json genotype = json::parse(*entry, nullptr, false);
+            if (genotype.is_array()) {
+                migrants.push_back(genotype.get<std::vector<int>>());
+            } else {
+                Logger::warn("Ignoring malformed migrant for job: " + currentJobId_);
+            }
+        }
+    } catch (const std::exception& e) {
+        Logger::error("Failed to receive migrants: " + std::string(e.what()));
+    }
+
+    return migrants;
+}
+
 std::string RedisEventReceiver::getCurrentJobId() const {
     return currentJobId_;
 }
@@ -7,6 +7,7 @@
 #include <ctime>
 #include <filesystem>
 #include <sstream>
+#include <vector>
 #include <sw/redis++/redis++.h>
 
 using json = nlohmann::json;
@@ -61,11 +62,14 @@ void FileEventSender::writeToFile(const RawProgressData& message, const std::str
 
 RedisEventSender::RedisEventSender(const std::string& connectionString,
                                  const std::string& progressKeyPrefix,
-                                 const std::string& progressChannel)
+                                 const std::string& progressChannel,
+                                 const std::string& progressStream,
+                                 long long progressStreamMaxLen)
     : connectionString_(connectionString), progressKeyPrefix_(progressKeyPrefix), 
-      progressChannel_(progressChannel), redisConnection_(nullptr) {
+      progressChannel_(progressChannel), progressStream_(progressStream),
+      progressStreamMaxLen_(progressStreamMaxLen), redisConnection_(nullptr) {
     Logger::info("RedisEventSender initialized with prefix: " + progressKeyPrefix_ + 
-                ", channel: " + progressChannel_);
+                ", channel: " + progressChannel_ + ", stream: " + progressStream_);
     parseConnectionString();
     connect();
 }
@@ -145,6 +149,14 @@ void RedisEventSender::sendProgress(const RawProgressData& progress) {
         std::string progressKey = progressKeyPrefix_ + progress.job_id;
         redis->set(progressKey, messageBody);
         
+        // append durable notification to the stream (optimizer:progress:stream), consumed by
+        // listener consumer groups; the entry only references the key, trimmed approximately
+        std::vector<std::pair<std::string, std::string>> fields = {
+            {"job_id", progress.job_id},
+            {"iteration", std::to_string(progress.iteration)}
+        };
+        redis->xadd(progressStream_, "*", fields.begin(), fields.end(), progressStreamMaxLen_, true);
+        
         // publish progress update notification (optimizer:progress:updates)
         auto subscribers = redis->publish(progressChannel_, messageBody);
         
@@ -36,7 +36,12 @@ void processJob(EventReceiver& receiver, EventSender& sender) {
     Logger::info(debugMsg);
 
     Evaluator evaluator(data);
-    std::unique_ptr<IGeneticAlgorithm> geneticAlgorithm = std::make_unique<ZawodevGeneticAlgorithm>();
+    std::unique_ptr<IGeneticAlgorithm> geneticAlgorithm;
+    if (jobData.algorithm == "example") {
+        geneticAlgorithm = std::make_unique<ExampleGeneticAlgorithm>();
+    } else {
+        geneticAlgorithm = std::make_unique<ZawodevGeneticAlgorithm>();
+    }
     Logger::info("Using genetic algorithm: " + std::string(typeid(*geneticAlgorithm).name()));
     
     // track exec time
@@ -44,8 +49,13 @@ void processJob(EventReceiver& receiver, EventSender& sender) {
     auto maxDuration = std::chrono::seconds(jobData.max_execution_time);
 
     //int seed = 819300141;
-    int seed = std::random_device{}();
+    // islands of one job get distinct seeds from the backend
+    int seed = jobData.seed >= 0 ? jobData.seed : (int)std::random_device{}();
     Logger::info("Initializing genetic algorithm with seed: " + std::to_string(seed));
+    if (!jobData.initial_genotypes.empty()) {
+        Logger::info("Warm starting from " + std::to_string(jobData.initial_genotypes.size()) + " genotype(s) of the previous round");
+        geneticAlgorithm->SetInitialGenotypes(jobData.initial_genotypes);
+    }
     Individual bestIndividual = geneticAlgorithm->Init(data, evaluator, seed);
     Logger::info("Genetic algorithm initialization complete. Starting iterations...");
 
@@ -65,6 +75,12 @@ void processJob(EventReceiver& receiver, EventSender& sender) {
             shouldBreak = true;
         }
         
+        // island model: best genotypes of the other islands of this job
+        auto migrants = receiver.receiveMigrants();
+        if (!migrants.empty()) {
+            geneticAlgorithm->InjectGenotypes(migrants);
+        }
+
         // check max time limit
         auto currentTime = std::chrono::steady_clock::now();
         if (currentTime - startTime >= maxDuration) {
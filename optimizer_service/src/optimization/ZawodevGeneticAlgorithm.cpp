@@ -32,15 +32,32 @@ Individual ZawodevGeneticAlgorithm::Init(const ProblemData& data, const Evaluato
     InitRandomInd(bestIndividual);
 
     //init population
+    // warm start: up to half of the population comes from the seed genotypes (first copy of each
+    // unchanged, the rest mutated variants), the other half stays random to keep diversity
+    int seededSize = initialGenotypes.empty() ? 0 : populationSize / 2;
+    int seeded = 0;
     population.clear();
     for (int i = 0; i < populationSize; ++i) {
         Individual ind;
-        InitRandomInd(ind);
+        int seedIdx = i % std::max<int>(1, (int)initialGenotypes.size());
+        int mutations = i < (int)initialGenotypes.size() ? 0 : 1 + i;
+        if (i < seededSize && InitSeededInd(ind, initialGenotypes[seedIdx], mutations)) {
+            seeded++;
+        } else {
+            InitRandomInd(ind);
+        }
         population.push_back(ind);
         //std::cout << i << ": " << ind.fitness << "\n";
     }
+    if (!initialGenotypes.empty()) {
+        Logger::info("Warm start: seeded " + std::to_string(seeded) + "/" + std::to_string(populationSize) +
+                     " individuals, best seeded fitness: " + std::to_string(bestIndividual.fitness));
+    }
 
     //0th iteration return
+    if (seeded > 0) {
+        return bestIndividual;
+    }
     Individual dummy;
     InitRandomInd(dummy);
 
@@ -63,6 +80,29 @@ Individual ZawodevGeneticAlgorithm::RunIteration(int currentIteration) {
     return bestIndividual;
 }
 
+void ZawodevGeneticAlgorithm::InjectGenotypes(const std::vector<std::vector<int>>& genotypes) {
+    if (!initialized || population.empty()) {
+        return;
+    }
+    // migrants replace the worst individuals, at most half of the population
+    std::vector<int> order(population.size());
+    std::iota(order.begin(), order.end(), 0);
+    std::sort(order.begin(), order.end(), [this](int a, int b) {
+        return population[a].fitness < population[b].fitness;
+    });
+
+    int limit = std::min<int>((int)genotypes.size(), populationSize / 2);
+    int accepted = 0;
+    for (int i = 0; i < limit; ++i) {
+        Individual migrant;
+        if (InitSeededInd(migrant, genotypes[i], 0) && migrant.fitness > population[order[accepted]].fitness) {
+            population[order[accepted]] = migrant;
+            accepted++;
+        }
+    }
+    Logger::info("Accepted " + std::to_string(accepted) + "/" + std::to_string(genotypes.size()) + " migrants");
+}
+
 void ZawodevGeneticAlgorithm::UpdateBestIndividual(Individual& contesterInd) {
     if (contesterInd.fitness > bestIndividual.fitness) {
         bestIndividual = contesterInd;
@@ -121,6 +161,34 @@ void ZawodevGeneticAlgorithm::InitRandomInd(Individual& individual) {
     // exit(1);
 }
 
+bool ZawodevGeneticAlgorithm::InitSeededInd(Individual& individual, const std::vector<int>& seedGenotype, int mutations) {
+    int totalGenes = evaluator->getTotalGenes();
+    if ((int)seedGenotype.size() != totalGenes) {
+        Logger::warn("Warm start genotype has " + std::to_string(seedGenotype.size()) + " genes, expected " +
+                     std::to_string(totalGenes) + ", ignoring it");
+        return false;
+    }
+
+    // genes the backend could not remap (-1) or out of range for this problem are drawn randomly
+    individual.genotype = seedGenotype;
+    for (int i = 0; i < totalGenes; ++i) {
+        if (individual.genotype[i] < 0 || individual.genotype[i] > evaluator->getMaxGeneValue(i)) {
+            individual.genotype[i] = std::uniform_int_distribution<int>(0, evaluator->getMaxGeneValue(i))(rng);
+        }
+    }
+    for (int m = 0; m < mutations; ++m) {
+        int idx = std::uniform_int_distribution<int>(0, totalGenes - 1)(rng);
+        individual.genotype[idx] = std::uniform_int_distribution<int>(0, evaluator->getMaxGeneValue(idx))(rng);
+    }
+
+    individual.fitness = evaluator->evaluate(individual);
+    if (individual.fitness < 0) {
+        return false;
+    }
+    UpdateBestIndividual(individual);
+    return true;
+}
+
 void ZawodevGeneticAlgorithm::FihcInd(Individual &individual) {
     bool improved = true;
     bool everImproved = false;
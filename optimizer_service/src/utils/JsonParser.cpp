@@ -284,6 +284,11 @@ RawJobData JsonParser::toRawJobData(const nlohmann::json& jsonData) {
         jobData.recruitment_id = jsonData.at("recruitment_id").get<std::string>();
         jobData.max_execution_time = jsonData.value("max_execution_time", 300);
         jobData.problem_data = toRawProblemData(jsonData.at("problem_data"));
+        if (jsonData.contains("initial_genotypes")) {
+            jobData.initial_genotypes = jsonData.at("initial_genotypes").get<std::vector<std::vector<int>>>();
+        }
+        jobData.seed = jsonData.value("seed", -1);
+        jobData.algorithm = jsonData.value("algorithm", std::string("zawodev"));
         return jobData;
     } catch (const std::exception& e) {
         throw std::runtime_error("Failed to parse job data: " + std::string(e.what()));
@@ -295,6 +300,13 @@ nlohmann::json JsonParser::toJson(const RawJobData& jobData) {
     j["recruitment_id"] = jobData.recruitment_id;
     j["max_execution_time"] = jobData.max_execution_time;
     j["problem_data"] = toJson(jobData.problem_data);
+    if (!jobData.initial_genotypes.empty()) {
+        j["initial_genotypes"] = jobData.initial_genotypes;
+    }
+    if (jobData.seed >= 0) {
+        j["seed"] = jobData.seed;
+    }
+    j["algorithm"] = jobData.algorithm;
     return j;
 }
 